@@ -0,0 +1,27 @@
+"""Add ordered flag to CRM sync jobs
+
+Revision ID: a4v5w6x7y8z9
+Revises: z3u4v5w6x7y8
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a4v5w6x7y8z9'
+down_revision = 'z3u4v5w6x7y8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing jobs are all live syncs, which keep their per-org order
+    op.add_column(
+        'crm_sync_jobs',
+        sa.Column('ordered', sa.Boolean(), nullable=False, server_default=sa.true()),
+    )
+
+
+def downgrade():
+    op.drop_column('crm_sync_jobs', 'ordered')
@@ -0,0 +1,37 @@
+"""Add webhook delivery compression and pagination index
+
+Revision ID: r5m6n7o8p9q0
+Revises: q4l5m6n7o8p9
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'r5m6n7o8p9q0'
+down_revision = 'q4l5m6n7o8p9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Compressed payloads leave the plain text column empty
+    op.alter_column('webhook_deliveries', 'payload', existing_type=sa.Text(), nullable=True)
+    op.add_column(
+        'webhook_deliveries',
+        sa.Column('payload_compressed', sa.LargeBinary(), nullable=True)
+    )
+
+    # Keyset pagination and retention both scan by webhook + time
+    op.create_index(
+        'ix_webhook_deliveries_webhook_delivered',
+        'webhook_deliveries',
+        ['webhook_id', 'delivered_at'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_webhook_deliveries_webhook_delivered', table_name='webhook_deliveries')
+    op.drop_column('webhook_deliveries', 'payload_compressed')
+    op.alter_column('webhook_deliveries', 'payload', existing_type=sa.Text(), nullable=False)
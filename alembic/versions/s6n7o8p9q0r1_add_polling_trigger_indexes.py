@@ -0,0 +1,37 @@
+"""Add keyset indexes for Zapier polling triggers
+
+Revision ID: s6n7o8p9q0r1
+Revises: r5m6n7o8p9q0
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 's6n7o8p9q0r1'
+down_revision = 'r5m6n7o8p9q0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # "Since cursor" polls are range scans on (scope, timestamp, id)
+    op.create_index('ix_leads_org_created', 'leads', ['organization_id', 'created_at', 'id'])
+    op.create_index('ix_leads_org_updated', 'leads', ['organization_id', 'updated_at', 'id'])
+    op.create_index(
+        'ix_chat_widget_conversations_config_captured',
+        'chat_widget_conversations',
+        ['config_id', 'lead_captured_at', 'id'],
+    )
+    op.create_index(
+        'ix_bookings_meeting_type_created',
+        'bookings',
+        ['meeting_type_id', 'created_at', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index('ix_bookings_meeting_type_created', table_name='bookings')
+    op.drop_index('ix_chat_widget_conversations_config_captured', table_name='chat_widget_conversations')
+    op.drop_index('ix_leads_org_updated', table_name='leads')
+    op.drop_index('ix_leads_org_created', table_name='leads')
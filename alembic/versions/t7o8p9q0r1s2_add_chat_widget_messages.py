@@ -0,0 +1,115 @@
+"""Add append-only chat widget messages table
+
+Revision ID: t7o8p9q0r1s2
+Revises: s6n7o8p9q0r1
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+# revision identifiers, used by Alembic.
+revision = 't7o8p9q0r1s2'
+down_revision = 's6n7o8p9q0r1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def upgrade():
+    op.create_table(
+        'chat_widget_messages',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'conversation_id',
+            sa.Integer(),
+            sa.ForeignKey('chat_widget_conversations.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('role', sa.String(20), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_chat_widget_messages_id', 'chat_widget_messages', ['id'])
+    op.create_index(
+        'ix_chat_widget_messages_conversation_id_id',
+        'chat_widget_messages',
+        ['conversation_id', 'id'],
+    )
+
+    # Split existing JSON transcripts into rows, one batch of conversations at a time
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, transcript, created_at FROM chat_widget_conversations "
+                "WHERE id > :last_id AND transcript IS NOT NULL AND transcript != '[]' "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        for conversation_id, transcript, created_at in rows:
+            try:
+                messages = json.loads(transcript)
+            except (TypeError, ValueError):
+                continue
+
+            values = [
+                {
+                    "conversation_id": conversation_id,
+                    "role": m.get("role", "user"),
+                    "content": m.get("content") or "",
+                    "created_at": created_at,
+                }
+                for m in messages
+                if isinstance(m, dict)
+            ]
+            if values:
+                connection.execute(
+                    sa.text(
+                        "INSERT INTO chat_widget_messages (conversation_id, role, content, created_at) "
+                        "VALUES (:conversation_id, :role, :content, :created_at)"
+                    ),
+                    values,
+                )
+            connection.execute(
+                sa.text("UPDATE chat_widget_conversations SET transcript = '[]' WHERE id = :id"),
+                {"id": conversation_id},
+            )
+
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    # Fold messages back into the JSON transcript column
+    connection = op.get_bind()
+    conversation_ids = [
+        row[0] for row in connection.execute(
+            sa.text("SELECT DISTINCT conversation_id FROM chat_widget_messages")
+        )
+    ]
+    for conversation_id in conversation_ids:
+        messages = connection.execute(
+            sa.text(
+                "SELECT role, content FROM chat_widget_messages "
+                "WHERE conversation_id = :id ORDER BY id"
+            ),
+            {"id": conversation_id},
+        ).fetchall()
+        connection.execute(
+            sa.text("UPDATE chat_widget_conversations SET transcript = :transcript WHERE id = :id"),
+            {
+                "transcript": json.dumps([{"role": role, "content": content} for role, content in messages]),
+                "id": conversation_id,
+            },
+        )
+
+    op.drop_index('ix_chat_widget_messages_conversation_id_id', table_name='chat_widget_messages')
+    op.drop_index('ix_chat_widget_messages_id', table_name='chat_widget_messages')
+    op.drop_table('chat_widget_messages')
@@ -0,0 +1,35 @@
+"""Add rolling context summary to chat widget conversations
+
+Revision ID: u8p9q0r1s2t3
+Revises: t7o8p9q0r1s2
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'u8p9q0r1s2t3'
+down_revision = 't7o8p9q0r1s2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chat_widget_conversations', sa.Column('context_summary', sa.Text(), nullable=True))
+    op.add_column('chat_widget_conversations', sa.Column('context_summary_upto_id', sa.Integer(), nullable=True))
+    op.add_column(
+        'chat_widget_conversations',
+        sa.Column('context_summarized_tokens', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.add_column(
+        'chat_widget_conversations',
+        sa.Column('context_tokens_saved', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_column('chat_widget_conversations', 'context_tokens_saved')
+    op.drop_column('chat_widget_conversations', 'context_summarized_tokens')
+    op.drop_column('chat_widget_conversations', 'context_summary_upto_id')
+    op.drop_column('chat_widget_conversations', 'context_summary')
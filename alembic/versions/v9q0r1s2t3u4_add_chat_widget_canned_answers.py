@@ -0,0 +1,23 @@
+"""Add pinned canned answers to chat widget configs
+
+Revision ID: v9q0r1s2t3u4
+Revises: u8p9q0r1s2t3
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'v9q0r1s2t3u4'
+down_revision = 'u8p9q0r1s2t3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('chat_widget_configs', sa.Column('canned_answers', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('chat_widget_configs', 'canned_answers')
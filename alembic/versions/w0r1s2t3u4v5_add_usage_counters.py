@@ -0,0 +1,90 @@
+"""Add monthly usage counters
+
+Revision ID: w0r1s2t3u4v5
+Revises: v9q0r1s2t3u4
+Create Date: 2026-10-18
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'w0r1s2t3u4v5'
+down_revision = 'v9q0r1s2t3u4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'usage_counters',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'organization_id',
+            sa.Integer(),
+            sa.ForeignKey('organizations.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('metric', sa.String(40), nullable=False),
+        sa.Column('period', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            'organization_id', 'metric', 'period', name='uq_usage_counters_org_metric_period'
+        ),
+    )
+    op.create_index('ix_usage_counters_id', 'usage_counters', ['id'])
+
+    # Seed this month's counters so limits carry over mid-month
+    now = datetime.utcnow()
+    period = now.date().replace(day=1)
+    month_start = datetime(period.year, period.month, 1)
+    params = {"period": period, "month_start": month_start, "now": now}
+
+    connection = op.get_bind()
+    connection.execute(
+        sa.text(
+            "INSERT INTO usage_counters (organization_id, metric, period, count, updated_at) "
+            "SELECT id, 'leads', :period, leads_this_month, :now FROM organizations "
+            "WHERE leads_this_month > 0 AND leads_month_reset >= :month_start"
+        ),
+        params,
+    )
+    connection.execute(
+        sa.text(
+            "INSERT INTO usage_counters (organization_id, metric, period, count, updated_at) "
+            "SELECT id, 'ai_messages', :period, ai_messages_this_month, :now FROM organizations "
+            "WHERE ai_messages_this_month > 0 AND ai_messages_month_reset > :now"
+        ),
+        params,
+    )
+    connection.execute(
+        sa.text(
+            "INSERT INTO usage_counters (organization_id, metric, period, count, updated_at) "
+            "SELECT c.organization_id, 'chat_conversations', :period, COUNT(v.id), :now "
+            "FROM chat_widget_conversations v "
+            "JOIN chat_widget_configs c ON c.id = v.config_id "
+            "WHERE v.created_at >= :month_start "
+            "GROUP BY c.organization_id"
+        ),
+        params,
+    )
+    connection.execute(
+        sa.text(
+            "INSERT INTO usage_counters (organization_id, metric, period, count, updated_at) "
+            "SELECT bc.organization_id, 'bookings', :period, COUNT(b.id), :now "
+            "FROM bookings b "
+            "JOIN meeting_types mt ON mt.id = b.meeting_type_id "
+            "JOIN booking_configs bc ON bc.id = mt.booking_config_id "
+            "WHERE b.created_at >= :month_start "
+            "GROUP BY bc.organization_id"
+        ),
+        params,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_usage_counters_id', table_name='usage_counters')
+    op.drop_table('usage_counters')
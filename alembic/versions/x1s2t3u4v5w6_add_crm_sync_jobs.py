@@ -0,0 +1,58 @@
+"""Add CRM sync job outbox
+
+Revision ID: x1s2t3u4v5w6
+Revises: w0r1s2t3u4v5
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'x1s2t3u4v5w6'
+down_revision = 'w0r1s2t3u4v5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'crm_sync_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'organization_id',
+            sa.Integer(),
+            sa.ForeignKey('organizations.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column(
+            'lead_id',
+            sa.Integer(),
+            sa.ForeignKey('leads.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('provider', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(500), nullable=True),
+        sa.Column('external_id', sa.String(100), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_crm_sync_jobs_id', 'crm_sync_jobs', ['id'])
+    op.create_index(
+        'ix_crm_sync_jobs_status_next_attempt', 'crm_sync_jobs', ['status', 'next_attempt_at']
+    )
+    op.create_index(
+        'ix_crm_sync_jobs_org_status', 'crm_sync_jobs', ['organization_id', 'status', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_crm_sync_jobs_org_status', table_name='crm_sync_jobs')
+    op.drop_index('ix_crm_sync_jobs_status_next_attempt', table_name='crm_sync_jobs')
+    op.drop_index('ix_crm_sync_jobs_id', table_name='crm_sync_jobs')
+    op.drop_table('crm_sync_jobs')
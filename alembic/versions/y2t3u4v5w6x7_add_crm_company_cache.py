@@ -0,0 +1,42 @@
+"""Add CRM company resolution cache
+
+Revision ID: y2t3u4v5w6x7
+Revises: x1s2t3u4v5w6
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'y2t3u4v5w6x7'
+down_revision = 'x1s2t3u4v5w6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'crm_company_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'organization_id',
+            sa.Integer(),
+            sa.ForeignKey('organizations.id', ondelete='CASCADE'),
+            nullable=True,
+        ),
+        sa.Column('provider', sa.String(20), nullable=False),
+        sa.Column('normalized_name', sa.String(255), nullable=False),
+        sa.Column('external_id', sa.String(100), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            'organization_id', 'provider', 'normalized_name', name='uq_crm_company_cache_org_provider_name'
+        ),
+    )
+    op.create_index('ix_crm_company_cache_id', 'crm_company_cache', ['id'])
+
+
+def downgrade():
+    op.drop_index('ix_crm_company_cache_id', table_name='crm_company_cache')
+    op.drop_table('crm_company_cache')
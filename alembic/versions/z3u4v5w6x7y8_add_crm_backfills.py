@@ -0,0 +1,51 @@
+"""Add CRM backfills
+
+Revision ID: z3u4v5w6x7y8
+Revises: y2t3u4v5w6x7
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'z3u4v5w6x7y8'
+down_revision = 'y2t3u4v5w6x7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'crm_backfills',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'organization_id',
+            sa.Integer(),
+            sa.ForeignKey('organizations.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('provider', sa.String(20), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('until_lead_id', sa.Integer(), nullable=False),
+        sa.Column('last_lead_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('synced', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.String(500), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_crm_backfills_id', 'crm_backfills', ['id'])
+    op.create_index('ix_crm_backfills_status', 'crm_backfills', ['status'])
+    op.create_index('ix_crm_backfills_org_provider', 'crm_backfills', ['organization_id', 'provider'])
+
+
+def downgrade():
+    op.drop_index('ix_crm_backfills_org_provider', table_name='crm_backfills')
+    op.drop_index('ix_crm_backfills_status', table_name='crm_backfills')
+    op.drop_index('ix_crm_backfills_id', table_name='crm_backfills')
+    op.drop_table('crm_backfills')
@@ -16,6 +16,7 @@ from app.core.plans import PLAN_LIMITS, TRIAL_DURATION_DAYS, get_plan_limits
 from app.db.session import SessionLocal
 from app.db import models
 from app.api.routes.auth import get_current_user
+from app.services.usage import get_org_usage
 
 # Track recent checkout sessions to prevent duplicates (in-memory, resets on server restart)
 # Key: "org_id:plan:cycle", Value: (checkout_url, timestamp)
@@ -262,14 +263,18 @@ def get_subscription_status(
             db.commit()
             limits = get_plan_limits("free")
 
+    usage = get_org_usage(db, org.id)
+    leads_used = usage[models.USAGE_METRIC_LEADS]
+    ai_used = usage[models.USAGE_METRIC_AI_MESSAGES]
+
     # Calculate AI messages remaining
     ai_limit = limits.ai_messages_per_month
-    ai_remaining = -1 if ai_limit == -1 else max(0, ai_limit - org.ai_messages_this_month) if ai_limit > 0 else 0
+    ai_remaining = -1 if ai_limit == -1 else max(0, ai_limit - ai_used) if ai_limit > 0 else 0
 
     # Calculate usage percentage for in-app meter
     leads_used_pct = 0
     if limits.leads_per_month > 0:
-        leads_used_pct = min(100, round((org.leads_this_month / limits.leads_per_month) * 100, 1))
+        leads_used_pct = min(100, round((leads_used / limits.leads_per_month) * 100, 1))
 
     # Determine if this is an AppSumo lifetime deal
     plan_source = getattr(org, "plan_source", "stripe")
@@ -286,11 +291,11 @@ def get_subscription_status(
         "is_trial_active": is_trial_active,
         "trial_days_remaining": trial_days_remaining,
         "usage": {
-            "leads_this_month": org.leads_this_month,
+            "leads_this_month": leads_used,
             "leads_limit": limits.leads_per_month,
-            "leads_remaining": max(0, limits.leads_per_month - org.leads_this_month) if limits.leads_per_month > 0 else -1,
+            "leads_remaining": max(0, limits.leads_per_month - leads_used) if limits.leads_per_month > 0 else -1,
             "leads_used_pct": leads_used_pct,
-            "ai_messages_this_month": org.ai_messages_this_month,
+            "ai_messages_this_month": ai_used,
             "ai_messages_limit": ai_limit,
             "ai_messages_remaining": ai_remaining,
         },
@@ -23,6 +23,9 @@ from app.core.plans import (
     get_plan_limits,
     validate_meeting_types_count,
 )
+from app.services.ai_chat import invalidate_system_prompts
+from app.services.chat_response_cache import chat_response_cache
+from app.services.widget_snapshot import widget_snapshots
 
 router = APIRouter(prefix="/booking", tags=["Booking"])
 
@@ -203,6 +206,13 @@ class BookingResponse(BaseModel):
 # =============================================================================
 
 
+def _invalidate_chat_caches(organization_id: int):
+    """Chat widgets embed booking pages and meeting types; drop their cached copies."""
+    invalidate_system_prompts(organization_id)
+    widget_snapshots.invalidate_org(organization_id)
+    chat_response_cache.invalidate_org(organization_id)
+
+
 def generate_booking_key():
     """Generate a unique booking key."""
     return f"bkg_{secrets.token_urlsafe(16)}"
@@ -469,6 +479,7 @@ def _update_config(config: BookingConfig, data: BookingConfigUpdate, db: Session
 
     db.commit()
     db.refresh(config)
+    _invalidate_chat_caches(current_user.organization_id)
 
     return _config_to_response(config)
 
@@ -496,6 +507,7 @@ def delete_booking_config(
 
     db.delete(config)
     db.commit()
+    _invalidate_chat_caches(current_user.organization_id)
     return None
 
 
@@ -598,6 +610,7 @@ def create_meeting_type(
     db.add(meeting_type)
     db.commit()
     db.refresh(meeting_type)
+    _invalidate_chat_caches(current_user.organization_id)
 
     return meeting_type
 
@@ -636,6 +649,7 @@ def update_meeting_type(
 
     db.commit()
     db.refresh(meeting_type)
+    _invalidate_chat_caches(current_user.organization_id)
 
     return meeting_type
 
@@ -669,6 +683,7 @@ def delete_meeting_type(
 
     db.delete(meeting_type)
     db.commit()
+    _invalidate_chat_caches(current_user.organization_id)
 
 
 # =============================================================================
@@ -22,14 +22,15 @@ from app.db.models import (
     AvailabilityRule,
     BlockedDate,
     Booking,
+    USAGE_METRIC_BOOKINGS,
 )
 from app.core.plans import get_plan_limits, validate_bookings_count
 from app.services.email import (
-    send_booking_confirmation_guest,
-    send_booking_notification_host,
     send_booking_cancellation_guest,
     send_booking_cancellation_host,
 )
+from app.services.events import event_bus, BookingCreated
+from app.services.usage import decrement_usage, get_usage, increment_usage
 from app.services.google_calendar import (
     create_calendar_event,
     delete_calendar_event,
@@ -318,12 +319,7 @@ def create_booking(
     org = db.query(Organization).filter(Organization.id == config.organization_id).first()
     plan = org.plan if org else "free"
 
-    # Count bookings this month
-    month_start = date.today().replace(day=1)
-    month_bookings = db.query(Booking).join(MeetingType).filter(
-        MeetingType.booking_config_id == config.id,
-        Booking.created_at >= datetime.combine(month_start, datetime.min.time()),
-    ).count()
+    month_bookings = get_usage(db, config.organization_id, USAGE_METRIC_BOOKINGS)
 
     is_valid, error_msg = validate_bookings_count(plan, month_bookings)
     if not is_valid:
@@ -355,6 +351,19 @@ def create_booking(
             detail="This time slot is no longer available. Please choose another time.",
         )
 
+    # Take this month's booking slot; the check above is only a fast path,
+    # this is the one concurrent bookings can't both pass
+    booking_limit = get_plan_limits(plan).bookings_per_month
+    reserved = increment_usage(
+        db, config.organization_id, USAGE_METRIC_BOOKINGS,
+        limit=None if booking_limit == -1 else booking_limit,
+    )
+    if reserved is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This booking page has reached its monthly limit. Please contact the host.",
+        )
+
     # Create or find lead
     lead = db.query(Lead).filter(
         Lead.organization_id == config.organization_id,
@@ -397,7 +406,12 @@ def create_booking(
         updated_at=datetime.utcnow(),
     )
     db.add(booking)
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        decrement_usage(db, config.organization_id, USAGE_METRIC_BOOKINGS)
+        raise
     db.refresh(booking)
 
     # Create Google Calendar event if connected
@@ -455,49 +469,8 @@ def create_booking(
         except Exception as e:
             logger.error(f"Error creating calendar event: {e}")
 
-    # Send confirmation emails (async-safe, won't block response)
-    try:
-        manage_url = f"https://site2crm.io/book/{slug}/cancel/{booking.id}?token={cancel_token}"
-
-        # Send confirmation to guest
-        send_booking_confirmation_guest(
-            recipient=data.guest_email,
-            guest_name=data.guest_name,
-            meeting_type_name=meeting_type.name,
-            host_name=config.business_name,
-            scheduled_at=data.scheduled_at,
-            duration_minutes=meeting_type.duration_minutes,
-            timezone=data.timezone,
-            meeting_link=booking.meeting_link,
-            manage_url=manage_url,
-        )
-
-        # Send notification to host (find org owner/default user)
-        host_user = db.query(User).filter(
-            User.organization_id == config.organization_id,
-            User.is_default == True,
-        ).first()
-        if not host_user:
-            host_user = db.query(User).filter(
-                User.organization_id == config.organization_id,
-                User.role == "OWNER",
-            ).first()
-
-        if host_user:
-            send_booking_notification_host(
-                recipient=host_user.email,
-                host_name=config.business_name,
-                guest_name=data.guest_name,
-                guest_email=data.guest_email,
-                guest_company=data.guest_company,
-                meeting_type_name=meeting_type.name,
-                scheduled_at=data.scheduled_at,
-                duration_minutes=meeting_type.duration_minutes,
-                timezone=data.timezone,
-                guest_notes=data.guest_notes,
-            )
-    except Exception as e:
-        logger.warning(f"Failed to send booking emails: {e}")
+    # Confirmation emails go out via the event bus, off the request path
+    event_bus.publish(BookingCreated(org_id=config.organization_id, booking_id=booking.id))
 
     return BookingConfirmationResponse(
         id=booking.id,
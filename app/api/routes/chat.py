@@ -1,10 +1,15 @@
 # app/api/routes/chat.py
 """AI Chat API routes for Site2CRM."""
 
+import json
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
+import anyio
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -15,12 +20,19 @@ from app.db.session import SessionLocal
 from app.services.ai_consultant import (
     ai_consultant,
     AIConsultantError,
+    ConsultantStreamResult,
     AIQuotaExceededError,
     AIFeatureNotAllowedError,
 )
+from app.services.usage import decrement_usage, get_usage, increment_usage, next_period_start
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["AI Chat"])
 
+# Stored messages sent as history when the client doesn't supply WMEM context
+HISTORY_MESSAGES = 20
+
 
 def get_db():
     db = SessionLocal()
@@ -101,27 +113,15 @@ def check_and_increment_usage(db: Session, org: models.Organization) -> None:
             detail="AI features are not available on your current plan. Please upgrade to Pro or higher."
         )
 
-    # Check if quota exceeded (skip for unlimited)
-    if limit != -1:
-        # Reset counter if new month
-        now = datetime.utcnow()
-        if org.ai_messages_month_reset is None or org.ai_messages_month_reset < now:
-            org.ai_messages_this_month = 0
-            # Set reset to first day of next month
-            if now.month == 12:
-                org.ai_messages_month_reset = datetime(now.year + 1, 1, 1)
-            else:
-                org.ai_messages_month_reset = datetime(now.year, now.month + 1, 1)
-
-        if org.ai_messages_this_month >= limit:
-            raise HTTPException(
-                status_code=429,
-                detail=f"AI message quota exceeded. You've used {org.ai_messages_this_month}/{limit} messages this month."
-            )
-
-    # Increment usage
-    org.ai_messages_this_month += 1
-    db.commit()
+    # Check quota and increment in one statement (no limit for unlimited plans)
+    used = increment_usage(
+        db, org.id, models.USAGE_METRIC_AI_MESSAGES, limit=limit if limit != -1 else None
+    )
+    if used is None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"AI message quota exceeded. You've used {limit}/{limit} messages this month."
+        )
 
 
 def get_lead_context(db: Session, lead_id: int, org_id: int) -> Optional[dict]:
@@ -145,15 +145,30 @@ def get_lead_context(db: Session, lead_id: int, org_id: int) -> Optional[dict]:
     }
 
 
-# --- API Endpoints ---
+def load_conversation_history(db: Session, conversation_id: int) -> list[dict]:
+    """The most recent HISTORY_MESSAGES messages of a conversation, oldest first."""
+    recent = (
+        db.query(models.ChatMessage.role, models.ChatMessage.content)
+        .filter(models.ChatMessage.conversation_id == conversation_id)
+        .order_by(models.ChatMessage.created_at.desc(), models.ChatMessage.id.desc())
+        .limit(HISTORY_MESSAGES)
+        .all()
+    )
+    return [{"role": role, "content": content} for role, content in reversed(recent)]
 
-@router.post("/messages", response_model=SendMessageResponse)
-async def send_message(
+
+def _start_turn(
+    db: Session,
     req: SendMessageRequest,
-    db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user),
-):
-    """Send a message to the AI consultant and get a response."""
+    user: models.User,
+) -> tuple[models.Organization, models.ChatConversation, dict]:
+    """
+    Check access and quota, then resolve the conversation for a consultant turn.
+
+    Returns the org, the conversation and the keyword arguments for
+    ai_consultant.chat() / chat_stream(). One AI message is counted against
+    the quota here; callers give it back if no reply is produced.
+    """
     org = db.get(models.Organization, user.organization_id)
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
@@ -177,6 +192,7 @@ async def send_message(
             models.ChatConversation.user_id == user.id,
         ).first()
         if not conversation:
+            decrement_usage(db, org.id, models.USAGE_METRIC_AI_MESSAGES)
             raise HTTPException(status_code=404, detail="Conversation not found")
     else:
         # Create new conversation
@@ -202,37 +218,34 @@ async def send_message(
             )
 
     # Use WMEM + last_messages if provided (cost-efficient mode)
-    # Otherwise fall back to full DB history
+    # Otherwise fall back to recent DB history
     if req.wmem_context or req.last_messages:
         conversation_history = [
             {"role": msg.role, "content": msg.content}
             for msg in (req.last_messages or [])
         ]
     else:
-        # Fallback: Get conversation history from DB
-        history_messages = db.query(models.ChatMessage).filter(
-            models.ChatMessage.conversation_id == conversation.id
-        ).order_by(models.ChatMessage.created_at).all()
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in history_messages
-        ]
+        conversation_history = load_conversation_history(db, conversation.id)
+
+    chat_kwargs = {
+        "message": req.message,
+        "conversation_history": conversation_history,
+        "context_type": req.context_type,
+        "context_data": context_data,
+        "wmem_context": req.wmem_context,
+    }
+    return org, conversation, chat_kwargs
 
-    # Call AI service
-    try:
-        response_text, input_tokens, output_tokens = await ai_consultant.chat(
-            message=req.message,
-            conversation_history=conversation_history,
-            context_type=req.context_type,
-            context_data=context_data,
-            wmem_context=req.wmem_context,
-        )
-    except AIConsultantError as e:
-        # Decrement usage on error
-        org.ai_messages_this_month = max(0, org.ai_messages_this_month - 1)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
 
+def _finish_turn(
+    db: Session,
+    conversation: models.ChatConversation,
+    req: SendMessageRequest,
+    response_text: str,
+    input_tokens: int,
+    output_tokens: int,
+) -> SendMessageResponse:
+    """Store the user message and the AI reply."""
     # Save user message
     user_message = models.ChatMessage(
         conversation_id=conversation.id,
@@ -271,6 +284,111 @@ async def send_message(
     )
 
 
+def _finish_streamed_turn(
+    conversation_id: int,
+    req: SendMessageRequest,
+    result: ConsultantStreamResult,
+) -> SendMessageResponse:
+    """_finish_turn for a completed stream (runs after the handler has returned)."""
+    # The request-scoped session is closed once the handler returns, so the
+    # stream gets its own session and reloads the conversation.
+    db = SessionLocal()
+    try:
+        conversation = db.get(models.ChatConversation, conversation_id)
+        return _finish_turn(db, conversation, req, result.text, result.input_tokens, result.output_tokens)
+    finally:
+        db.close()
+
+
+def _give_back_ai_message(organization_id: int) -> None:
+    db = SessionLocal()
+    try:
+        decrement_usage(db, organization_id, models.USAGE_METRIC_AI_MESSAGES)
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# --- API Endpoints ---
+
+@router.post("/messages", response_model=SendMessageResponse)
+async def send_message(
+    req: SendMessageRequest,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    """Send a message to the AI consultant and get a response."""
+    org, conversation, chat_kwargs = await run_in_threadpool(_start_turn, db, req, user)
+
+    # Call AI service
+    try:
+        response_text, input_tokens, output_tokens = await ai_consultant.chat(**chat_kwargs)
+    except AIConsultantError as e:
+        # Decrement usage on error
+        await run_in_threadpool(decrement_usage, db, org.id, models.USAGE_METRIC_AI_MESSAGES)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return await run_in_threadpool(
+        _finish_turn, db, conversation, req, response_text, input_tokens, output_tokens
+    )
+
+
+@router.post("/messages/stream")
+async def stream_message(
+    req: SendMessageRequest,
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    """
+    Send a message to the AI consultant and stream the reply as server-sent events.
+
+    Events:
+    - token: {"text": "..."} for each chunk of the reply
+    - done: same body as POST /messages
+    - error: {"detail": "..."} if the AI service failed mid-stream
+
+    Access, quota and conversation checks happen before the stream opens,
+    so those failures are still regular HTTP errors. The AI message counted
+    for this turn is given back unless the reply finishes and is saved.
+    """
+    org, conversation, chat_kwargs = await run_in_threadpool(_start_turn, db, req, user)
+    org_id = org.id
+    conversation_id = conversation.id
+    result = ConsultantStreamResult()
+    chunks = ai_consultant.chat_stream(result=result, **chat_kwargs)
+
+    async def events():
+        finished = False
+        try:
+            async for chunk in chunks:
+                yield _sse("token", {"text": chunk})
+
+            response = await run_in_threadpool(_finish_streamed_turn, conversation_id, req, result)
+            finished = True
+            yield _sse("done", response.model_dump())
+        except AIConsultantError as e:
+            yield _sse("error", {"detail": str(e)})
+        except Exception as e:
+            logger.error(f"AI consultant stream failed: {e}")
+            yield _sse("error", {"detail": "AI service temporarily unavailable"})
+        finally:
+            # Failed or abandoned streams don't count against the quota;
+            # shielded so a client disconnect doesn't skip it
+            if not finished:
+                with anyio.CancelScope(shield=True):
+                    await run_in_threadpool(_give_back_ai_message, org_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/conversations", response_model=list[ConversationSummary])
 def list_conversations(
     db: Session = Depends(get_db),
@@ -376,7 +494,7 @@ def get_ai_usage(
 
     limits = get_plan_limits(org.plan)
     message_limit = limits.ai_messages_per_month
-    messages_used = org.ai_messages_this_month
+    messages_used = get_usage(db, org.id, models.USAGE_METRIC_AI_MESSAGES)
 
     # Calculate remaining
     if message_limit == -1:
@@ -390,7 +508,7 @@ def get_ai_usage(
         messages_used=messages_used,
         messages_limit=message_limit,
         messages_remaining=messages_remaining,
-        reset_date=org.ai_messages_month_reset,
+        reset_date=next_period_start(),
         ai_enabled=message_limit != 0,
         ai_features=limits.ai_features,
     )
@@ -1,13 +1,16 @@
 """Chat Widget API routes - DeepSeek-powered AI chat for customer websites."""
 
+import asyncio
 import json
 import logging
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import FileResponse, JSONResponse
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
@@ -15,10 +18,19 @@ from sqlalchemy import func
 
 from app.api.deps.auth import get_db, get_current_user
 from app.db import models
+from app.db.session import SessionLocal
 from app.core.plans import get_plan_limits, validate_message_tokens, validate_conversation_turns
 from app.core.rate_limit import check_chat_widget_rate_limit, check_chat_session_rate_limit
+from app.services.events import event_bus, ChatStarted, ChatLeadCaptured, LeadCreated
+from app.services.chat_context import ChatContext, load_chat_context
+from app.services.widget_snapshot import WidgetSnapshot, get_widget_snapshot, widget_snapshots
+from app.services.chat_response_cache import cached_first_reply, store_first_reply
+from app.services.usage import decrement_usage, get_usage, increment_usage
 from app.services.ai_chat import (
+    ChatStreamResult,
     chat_completion,
+    chat_completion_stream,
+    estimate_tokens,
     extract_email_from_message,
     extract_name_from_message,
     extract_phone_from_message,
@@ -26,42 +38,45 @@ from app.services.ai_chat import (
 
 logger = logging.getLogger(__name__)
 
+# Messages returned with a conversation; older ones are paged via /messages
+CONVERSATION_DETAIL_MESSAGES = 100
+
+# Pinned first-turn replies per widget
+MAX_CANNED_ANSWERS = 20
+
 
 # ============================================================================
 # Plan Limit Enforcement Helpers
 # ============================================================================
 
 
-def estimate_tokens(text: str) -> int:
-    """Estimate token count for text (rough: ~4 chars per token for English)."""
-    return len(text) // 4 + 1
+def get_monthly_conversation_count(db: Session, org_id: int) -> int:
+    """Conversations started this month for an organization."""
+    return get_usage(db, org_id, models.USAGE_METRIC_CHAT_CONVERSATIONS)
 
 
-def get_monthly_conversation_count(db: Session, org_id: int) -> int:
-    """Count conversations started this month for an organization."""
-    start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+def conversation_limit_error(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Monthly conversation limit reached ({limit}). "
+               f"Please upgrade your plan for more conversations."
+    )
 
-    # Get all widget config IDs for this org
-    config_ids = [
-        c.id for c in
-        db.query(models.ChatWidgetConfig.id)
-        .filter(models.ChatWidgetConfig.organization_id == org_id)
-        .all()
-    ]
 
-    if not config_ids:
-        return 0
+def reserve_conversation(db: Session, org_id: int, plan: str) -> None:
+    """
+    Count a new conversation against the org's monthly limit.
 
-    count = (
-        db.query(func.count(models.ChatWidgetConversation.id))
-        .filter(
-            models.ChatWidgetConversation.config_id.in_(config_ids),
-            models.ChatWidgetConversation.created_at >= start_of_month,
-        )
-        .scalar()
+    The limit check and the increment are one statement, so two visitors
+    can't both start the last conversation of the month.
+    """
+    limit = get_plan_limits(plan).chat_conversations_per_month
+    reserved = increment_usage(
+        db, org_id, models.USAGE_METRIC_CHAT_CONVERSATIONS,
+        limit=None if limit == -1 else limit,
     )
-
-    return count or 0
+    if reserved is None:
+        raise conversation_limit_error(limit)
 
 
 def get_widget_count(db: Session, org_id: int) -> int:
@@ -78,21 +93,26 @@ def enforce_conversation_limits(
     config: models.ChatWidgetConfig,
     conversation: Optional[models.ChatWidgetConversation],
     message: str,
+    plan: Optional[str] = None,
 ) -> None:
     """
     Enforce all conversation limits. Raises HTTPException if any limit exceeded.
 
+    Pass the org's plan when the caller already has it (e.g. from a widget
+    snapshot) to skip loading the organization.
+
     Checks:
     1. Monthly conversation limit
     2. Message token limit
     3. Conversation turn limit
     """
     # Get org and plan
-    org = db.query(models.Organization).filter(models.Organization.id == config.organization_id).first()
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
+    if plan is None:
+        org = db.query(models.Organization).filter(models.Organization.id == config.organization_id).first()
+        if not org:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        plan = org.plan or "free"
 
-    plan = org.plan or "free"
     limits = get_plan_limits(plan)
 
     # Check if AI chat is enabled for this plan
@@ -107,11 +127,7 @@ def enforce_conversation_limits(
         if limits.chat_conversations_per_month != -1:  # -1 = unlimited
             current_count = get_monthly_conversation_count(db, config.organization_id)
             if current_count >= limits.chat_conversations_per_month:
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Monthly conversation limit reached ({limits.chat_conversations_per_month}). "
-                           f"Please upgrade your plan for more conversations."
-                )
+                raise conversation_limit_error(limits.chat_conversations_per_month)
 
     # Check message token limit
     message_tokens = estimate_tokens(message)
@@ -218,6 +234,13 @@ CHAT_WIDGET_TEMPLATES = {
 }
 
 
+class CannedAnswer(BaseModel):
+    """An owner-pinned reply to a common opening question."""
+
+    question: str = Field(..., min_length=1, max_length=200)
+    answer: str = Field(..., min_length=1, max_length=2000)
+
+
 class ChatWidgetConfigRequest(BaseModel):
     """Request model for creating/updating chat widget configuration."""
 
@@ -241,6 +264,7 @@ class ChatWidgetConfigRequest(BaseModel):
     collect_name: bool = Field(default=True)
     collect_company: bool = Field(default=False)
     quick_replies: Optional[list[str]] = Field(None)  # List of quick reply buttons
+    canned_answers: Optional[list[CannedAnswer]] = Field(None)  # Instant replies to first-turn questions
 
     # Widget appearance
     primary_color: str = Field(default="#4f46e5", max_length=7)
@@ -299,6 +323,7 @@ class ChatWidgetConfigResponse(BaseModel):
     collect_name: bool
     collect_company: bool
     quick_replies: Optional[list[str]]
+    canned_answers: Optional[list[CannedAnswer]] = None
 
     # Widget appearance
     primary_color: str
@@ -354,8 +379,24 @@ class ConversationSummary(BaseModel):
     updated_at: datetime
 
 
+class ConversationMessage(BaseModel):
+    """One message in a chat widget conversation."""
+
+    id: int
+    role: str
+    content: str
+    created_at: datetime
+
+
+class ConversationMessagesPage(BaseModel):
+    """A page of conversation messages, oldest first."""
+
+    messages: list[ConversationMessage]
+    next_before_id: Optional[int] = None  # Pass as before_id to load older messages
+
+
 class ConversationDetail(BaseModel):
-    """Full conversation with transcript."""
+    """Conversation with its most recent messages."""
 
     id: int
     session_id: str
@@ -364,10 +405,12 @@ class ConversationDetail(BaseModel):
     lead_name: Optional[str]
     lead_phone: Optional[str]
     lead_captured_at: Optional[datetime]
-    transcript: list[dict]  # Parsed JSON messages
+    transcript: list[dict]  # Most recent messages, oldest first
+    has_more_messages: bool = False
     message_count: int
     total_tokens_input: int
     total_tokens_output: int
+    context_tokens_saved: int = 0  # Prompt tokens avoided by the context window
     created_at: datetime
     updated_at: datetime
 
@@ -448,6 +491,22 @@ def _parse_quick_replies(quick_replies_json: Optional[str]) -> Optional[list[str
         return None
 
 
+def _parse_canned_answers(canned_answers_json: Optional[str]) -> Optional[list[CannedAnswer]]:
+    """Parse canned_answers from JSON string to list."""
+    if not canned_answers_json:
+        return None
+    try:
+        return [CannedAnswer(**item) for item in json.loads(canned_answers_json)]
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return None
+
+
+def _dump_canned_answers(canned_answers: Optional[list[CannedAnswer]]) -> Optional[str]:
+    if not canned_answers:
+        return None
+    return json.dumps([item.model_dump() for item in canned_answers])
+
+
 def _config_to_response(config: models.ChatWidgetConfig) -> ChatWidgetConfigResponse:
     """Helper to convert config model to response."""
     return ChatWidgetConfigResponse(
@@ -471,6 +530,7 @@ def _config_to_response(config: models.ChatWidgetConfig) -> ChatWidgetConfigResp
         collect_name=config.collect_name if config.collect_name is not None else True,
         collect_company=config.collect_company if config.collect_company is not None else False,
         quick_replies=_parse_quick_replies(config.quick_replies),
+        canned_answers=_parse_canned_answers(config.canned_answers),
         primary_color=config.primary_color,
         widget_position=config.widget_position,
         bubble_icon=config.bubble_icon or "chat",
@@ -606,6 +666,12 @@ def _validate_config_request(req: ChatWidgetConfigRequest):
             detail="Maximum 5 quick replies allowed",
         )
 
+    if req.canned_answers and len(req.canned_answers) > MAX_CANNED_ANSWERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {MAX_CANNED_ANSWERS} canned answers allowed",
+        )
+
 
 class TemplateInfo(BaseModel):
     """Template information for quick setup."""
@@ -702,6 +768,7 @@ def create_chat_widget_config(
         collect_name=req.collect_name,
         collect_company=req.collect_company,
         quick_replies=json.dumps(req.quick_replies) if req.quick_replies else None,
+        canned_answers=_dump_canned_answers(req.canned_answers),
         primary_color=req.primary_color,
         widget_position=req.widget_position,
         bubble_icon=req.bubble_icon,
@@ -774,6 +841,9 @@ def update_chat_widget_config(
     config.collect_name = req.collect_name
     config.collect_company = req.collect_company
     config.quick_replies = json.dumps(req.quick_replies) if req.quick_replies else None
+    # Only replace pinned answers when sent (older dashboard builds omit the field)
+    if "canned_answers" in req.model_fields_set:
+        config.canned_answers = _dump_canned_answers(req.canned_answers)
     config.primary_color = req.primary_color
     config.widget_position = req.widget_position
     config.bubble_icon = req.bubble_icon
@@ -802,6 +872,7 @@ def update_chat_widget_config(
 
     db.commit()
     db.refresh(config)
+    widget_snapshots.invalidate(widget_key)
 
     return _config_to_response(config)
 
@@ -827,6 +898,7 @@ def delete_chat_widget_config(
 
     db.delete(config)
     db.commit()
+    widget_snapshots.invalidate(widget_key)
 
     return {"message": "Widget configuration deleted"}
 
@@ -926,13 +998,39 @@ def list_conversations(
     ]
 
 
+def _get_messages_page(
+    db: Session,
+    conversation_id: int,
+    limit: int,
+    before_id: Optional[int] = None,
+) -> ConversationMessagesPage:
+    """Newest `limit` messages (older than before_id), returned oldest first."""
+    query = db.query(models.ChatWidgetMessage).filter(
+        models.ChatWidgetMessage.conversation_id == conversation_id
+    )
+    if before_id is not None:
+        query = query.filter(models.ChatWidgetMessage.id < before_id)
+
+    rows = query.order_by(models.ChatWidgetMessage.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = list(reversed(rows[:limit]))
+
+    return ConversationMessagesPage(
+        messages=[
+            ConversationMessage(id=m.id, role=m.role, content=m.content, created_at=m.created_at)
+            for m in rows
+        ],
+        next_before_id=rows[0].id if has_more and rows else None,
+    )
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetail)
 def get_conversation(
     conversation_id: int,
     db: Session = Depends(get_db),
     user: models.User = Depends(get_current_user),
 ):
-    """Get a specific conversation with full transcript."""
+    """Get a specific conversation with its most recent messages."""
     # Get all config IDs for this org
     config_ids = [
         c.id for c in
@@ -955,11 +1053,7 @@ def get_conversation(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Parse transcript JSON
-    try:
-        transcript = json.loads(conversation.transcript) if conversation.transcript else []
-    except json.JSONDecodeError:
-        transcript = []
+    page = _get_messages_page(db, conversation.id, limit=CONVERSATION_DETAIL_MESSAGES)
 
     return ConversationDetail(
         id=conversation.id,
@@ -969,15 +1063,41 @@ def get_conversation(
         lead_name=conversation.lead_name,
         lead_phone=conversation.lead_phone,
         lead_captured_at=conversation.lead_captured_at,
-        transcript=transcript,
+        transcript=[{"role": m.role, "content": m.content} for m in page.messages],
+        has_more_messages=page.next_before_id is not None,
         message_count=conversation.message_count,
         total_tokens_input=conversation.total_tokens_input,
         total_tokens_output=conversation.total_tokens_output,
+        context_tokens_saved=conversation.context_tokens_saved or 0,
         created_at=conversation.created_at,
         updated_at=conversation.updated_at,
     )
 
 
+@router.get("/conversations/{conversation_id}/messages", response_model=ConversationMessagesPage)
+def list_conversation_messages(
+    conversation_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(CONVERSATION_DETAIL_MESSAGES, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user: models.User = Depends(get_current_user),
+):
+    """Page backwards through a conversation's messages."""
+    conversation = (
+        db.query(models.ChatWidgetConversation.id)
+        .join(models.ChatWidgetConfig, models.ChatWidgetConfig.id == models.ChatWidgetConversation.config_id)
+        .filter(
+            models.ChatWidgetConversation.id == conversation_id,
+            models.ChatWidgetConfig.organization_id == user.organization_id,
+        )
+        .first()
+    )
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return _get_messages_page(db, conversation_id, limit=limit, before_id=before_id)
+
+
 @router.delete("/conversations/{conversation_id}")
 def delete_conversation(
     conversation_id: int,
@@ -1214,14 +1334,8 @@ def get_public_widget_config(
     )
 
 
-@public_router.post("/message", response_model=ChatMessageResponse)
-async def send_chat_message(
-    widget_key: str,
-    req: ChatMessageRequest,
-    request: Request,
-    db: Session = Depends(get_db),
-):
-    """Send a message and get an AI response."""
+def _check_chat_rate_limits(req: ChatMessageRequest, request: Request) -> Optional[ChatMessageResponse]:
+    """Return a friendly canned response if the visitor is rate limited."""
     # =========================================================================
     # RATE LIMITING - Prevent spam/abuse (20 messages per minute per IP)
     # =========================================================================
@@ -1247,28 +1361,26 @@ async def send_chat_message(
             captured_phone=None,
         )
 
-    # Look up widget config by widget_key (with booking config for AI prompt)
-    from sqlalchemy.orm import joinedload
-    config = (
-        db.query(models.ChatWidgetConfig)
-        .options(joinedload(models.ChatWidgetConfig.booking_config))
-        .filter(models.ChatWidgetConfig.widget_key == widget_key)
-        .first()
-    )
+    return None
+
+
+def _load_chat_turn(
+    widget_key: str,
+    req: ChatMessageRequest,
+    db: Session,
+) -> tuple[WidgetSnapshot, models.ChatWidgetConversation, ChatContext]:
+    """
+    Resolve the widget, enforce plan limits and get (or start) the conversation.
+
+    Returns the widget snapshot, the conversation and the bounded LLM
+    context for this turn (recent messages plus the visitor's new message).
+    """
+    # Widget config, booking page, meeting types and plan come from the
+    # per-process snapshot cache, so later turns don't re-read configuration
+    config = get_widget_snapshot(db, widget_key)
     if not config or not config.is_active:
         raise HTTPException(status_code=404, detail="Chat widget not available")
 
-    # Load meeting types if booking is enabled (for AI context)
-    if getattr(config, 'booking_enabled', False) and config.booking_config:
-        config.booking_config.meeting_types = (
-            db.query(models.MeetingType)
-            .filter(
-                models.MeetingType.booking_config_id == config.booking_config.id,
-                models.MeetingType.is_active == True,
-            )
-            .all()
-        )
-
     # Check if conversation exists (don't create yet - need to check limits first)
     existing_conversation = (
         db.query(models.ChatWidgetConversation)
@@ -1287,6 +1399,7 @@ async def send_chat_message(
         config=config,
         conversation=existing_conversation,  # None if new conversation
         message=req.message,
+        plan=config.plan,
     )
 
     # Now safe to create conversation if it doesn't exist
@@ -1295,6 +1408,7 @@ async def send_chat_message(
         conversation = existing_conversation
     else:
         is_new_conversation = True
+        reserve_conversation(db, config.organization_id, config.plan)
         conversation = models.ChatWidgetConversation(
             config_id=config.id,
             session_id=req.session_id,
@@ -1305,44 +1419,37 @@ async def send_chat_message(
             total_tokens_output=0,
         )
         db.add(conversation)
-        db.commit()
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            decrement_usage(db, config.organization_id, models.USAGE_METRIC_CHAT_CONVERSATIONS)
+            raise
         db.refresh(conversation)
 
-        # Fire webhook for new chat conversation
-        from app.services.webhook_service import fire_chat_started_webhook
-        fire_chat_started_webhook(
-            org_id=config.organization_id,
-            conversation=conversation,
-            config=config,
-            background_tasks=None,  # Fire synchronously for simplicity
-        )
-
-    # Parse existing transcript
-    try:
-        transcript = json.loads(conversation.transcript) if conversation.transcript else []
-    except json.JSONDecodeError:
-        transcript = []
+        event_bus.publish(ChatStarted(org_id=config.organization_id, conversation_id=conversation.id))
 
-    # Add user message to transcript
-    transcript.append({"role": "user", "content": req.message})
+    context = load_chat_context(db, conversation, req.message)
 
-    # Build messages for API (system prompt is built inside chat_completion)
-    api_messages = [{"role": m["role"], "content": m["content"]} for m in transcript]
+    return config, conversation, context
 
-    # Call DeepSeek
-    try:
-        response_text, input_tokens, output_tokens = await chat_completion(
-            config=config,
-            messages=api_messages,
-            max_tokens=256,
-            timezone=req.timezone,
-        )
-    except Exception as e:
-        logger.error(f"Chat completion failed: {e}")
-        raise HTTPException(status_code=500, detail="AI service temporarily unavailable")
 
-    # Add assistant response to transcript
-    transcript.append({"role": "assistant", "content": response_text})
+def _finish_chat_turn(
+    db: Session,
+    config: WidgetSnapshot,
+    conversation: models.ChatWidgetConversation,
+    req: ChatMessageRequest,
+    response_text: str,
+    input_tokens: int,
+    output_tokens: int,
+    tokens_saved: int = 0,
+) -> ChatMessageResponse:
+    """Store the assistant reply and token usage, and capture any lead info."""
+    # Append this turn (no rewrite of earlier messages)
+    db.add_all([
+        models.ChatWidgetMessage(conversation_id=conversation.id, role="user", content=req.message),
+        models.ChatWidgetMessage(conversation_id=conversation.id, role="assistant", content=response_text),
+    ])
 
     # Check for lead capture in user message
     captured_email = None
@@ -1370,10 +1477,10 @@ async def send_chat_message(
         conversation.lead_name = name
 
     # Update conversation
-    conversation.transcript = json.dumps(transcript)
-    conversation.message_count = len([m for m in transcript if m["role"] == "user"])
+    conversation.message_count = (conversation.message_count or 0) + 1
     conversation.total_tokens_input += input_tokens
     conversation.total_tokens_output += output_tokens
+    conversation.context_tokens_saved = (conversation.context_tokens_saved or 0) + tokens_saved
     conversation.updated_at = datetime.utcnow()
 
     # Update page_url if not set
@@ -1388,56 +1495,16 @@ async def send_chat_message(
         try:
             created_lead = create_lead_from_conversation(db, config, conversation)
 
-            # Fire webhooks for lead capture
+            # Webhooks and notification emails run off the request path
             if lead_captured:
-                from app.services.webhook_service import fire_chat_lead_captured_webhook, fire_lead_created_webhook
-                fire_chat_lead_captured_webhook(
-                    org_id=config.organization_id,
-                    conversation=conversation,
-                    config=config,
-                    background_tasks=None,
-                )
-
-                # Also fire lead.created if we actually created a new lead
+                event_bus.publish(ChatLeadCaptured(org_id=config.organization_id, conversation_id=conversation.id))
                 if created_lead:
-                    fire_lead_created_webhook(
+                    event_bus.publish(LeadCreated(
                         org_id=config.organization_id,
-                        lead=created_lead,
+                        lead_id=created_lead.id,
                         source="chat_widget",
-                        background_tasks=None,
-                    )
-
-                    # Send email notification to org users (same pattern as leads.py)
-                    try:
-                        from app.services.email import send_new_lead_notification
-                        from app.api.routes.integrations_notifications import get_org_notification_settings
-
-                        notification_settings = get_org_notification_settings(db, config.organization_id)
-                        should_notify = (
-                            notification_settings is None
-                            or notification_settings.new_lead
-                        )
-
-                        if should_notify:
-                            recipients = [
-                                u.email
-                                for u in db.query(models.User)
-                                .filter(models.User.organization_id == config.organization_id)
-                                .all()
-                                if u.email
-                            ]
-                            if recipients:
-                                lead_display = created_lead.first_name or created_lead.email or "New lead"
-                                send_new_lead_notification(
-                                    recipients,
-                                    lead_display,
-                                    created_lead.email,
-                                    created_lead.company,
-                                    "AI Chat",
-                                    config.business_name,
-                                )
-                    except Exception as email_err:
-                        logger.error(f"Failed to send lead notification email: {email_err}")
+                        sync_to_crm=False,
+                    ))
         except Exception as e:
             # Log but don't fail the chat - lead creation is secondary
             logger.error(f"Failed to create lead from conversation: {e}")
@@ -1450,6 +1517,195 @@ async def send_chat_message(
     )
 
 
+def _first_turn_reply(
+    config: WidgetSnapshot,
+    context: ChatContext,
+    req: ChatMessageRequest,
+) -> tuple[Optional[str], Optional[tuple]]:
+    """
+    Instant reply for the visitor's opening message (see chat_response_cache).
+
+    Returns (reply, cache_key). Never used once the conversation has any
+    history, or for messages carrying contact details.
+    """
+    if context.turn_count != 1 or len(context.messages) != 1 or context.note:
+        return None, None
+    if (
+        extract_email_from_message(req.message)
+        or extract_phone_from_message(req.message)
+        or extract_name_from_message(req.message)
+    ):
+        return None, None
+    return cached_first_reply(config, req.message, req.timezone)
+
+
+def _finish_streamed_turn(
+    widget_key: str,
+    config: WidgetSnapshot,
+    conversation_id: int,
+    req: ChatMessageRequest,
+    result: ChatStreamResult,
+    tokens_saved: int,
+) -> ChatMessageResponse:
+    """_finish_chat_turn for a stream (runs after the handler has returned)."""
+    # The request-scoped session is closed once the handler returns, so the
+    # stream gets its own session and reloads the config and conversation.
+    db = SessionLocal()
+    try:
+        config = get_widget_snapshot(db, widget_key) or config
+        conversation = db.get(models.ChatWidgetConversation, conversation_id)
+        return _finish_chat_turn(
+            db, config, conversation, req,
+            result.text, result.input_tokens, result.output_tokens,
+            tokens_saved=tokens_saved,
+        )
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@public_router.post("/message", response_model=ChatMessageResponse)
+async def send_chat_message(
+    widget_key: str,
+    req: ChatMessageRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Send a message and get an AI response.
+
+    The session is synchronous, so database work runs in the threadpool and
+    only the LLM call awaits on the event loop. Webhooks, notification
+    emails and CRM sync are published to the event bus, never run here.
+    """
+    limited = _check_chat_rate_limits(req, request)
+    if limited:
+        return limited
+
+    config, conversation, context = await run_in_threadpool(_load_chat_turn, widget_key, req, db)
+
+    cached_reply, cache_key = _first_turn_reply(config, context, req)
+    if cached_reply:
+        return await run_in_threadpool(_finish_chat_turn, db, config, conversation, req, cached_reply, 0, 0)
+
+    # Call DeepSeek
+    try:
+        response_text, input_tokens, output_tokens = await chat_completion(
+            config=config,
+            messages=context.messages,
+            max_tokens=256,
+            timezone=req.timezone,
+            turn_count=context.turn_count,
+            context_note=context.note,
+        )
+    except Exception as e:
+        logger.error(f"Chat completion failed: {e}")
+        raise HTTPException(status_code=500, detail="AI service temporarily unavailable")
+
+    if cache_key:
+        store_first_reply(cache_key, response_text)
+
+    return await run_in_threadpool(
+        _finish_chat_turn,
+        db, config, conversation, req, response_text, input_tokens, output_tokens,
+        tokens_saved=context.tokens_saved,
+    )
+
+
+@public_router.post("/message/stream")
+async def stream_chat_message(
+    widget_key: str,
+    req: ChatMessageRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Send a message and stream the AI response as server-sent events.
+
+    Events:
+    - token: {"text": "..."} for each chunk of the reply
+    - done: same body as POST /message, plus ttft_ms (time to first token)
+    - error: {"detail": "..."} if no provider could answer
+
+    Limits and widget lookup are checked before the stream opens, so those
+    failures are still regular HTTP errors. As with POST /message, database
+    work runs in the threadpool.
+    """
+    limited = _check_chat_rate_limits(req, request)
+    if limited:
+        async def limited_events():
+            yield _sse("token", {"text": limited.response})
+            yield _sse("done", {**limited.model_dump(), "ttft_ms": None})
+
+        return StreamingResponse(limited_events(), media_type="text/event-stream")
+
+    config, conversation, context = await run_in_threadpool(_load_chat_turn, widget_key, req, db)
+    conversation_id = conversation.id
+
+    cached_reply, cache_key = _first_turn_reply(config, context, req)
+    if cached_reply:
+        response = await run_in_threadpool(_finish_chat_turn, db, config, conversation, req, cached_reply, 0, 0)
+
+        async def cached_events():
+            yield _sse("token", {"text": cached_reply})
+            yield _sse("done", {**response.model_dump(), "ttft_ms": 0})
+
+        return StreamingResponse(cached_events(), media_type="text/event-stream")
+
+    result = ChatStreamResult()
+    chunks = chat_completion_stream(
+        config=config,
+        messages=context.messages,
+        result=result,
+        max_tokens=256,
+        timezone=req.timezone,
+        turn_count=context.turn_count,
+        context_note=context.note,
+    )
+
+    async def finish() -> ChatMessageResponse:
+        # Shielded: a client disconnect cancels the stream, but the turn was
+        # already counted and must still be stored
+        with anyio.CancelScope(shield=True):
+            return await run_in_threadpool(
+                _finish_streamed_turn, widget_key, config, conversation_id, req, result, context.tokens_saved
+            )
+
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield _sse("token", {"text": chunk})
+        except (GeneratorExit, asyncio.CancelledError):
+            # Client went away mid-stream: keep whatever text arrived
+            logger.info(f"Chat stream closed by client after {len(result.text)} chars")
+            await finish()
+            raise
+        except Exception as e:
+            logger.error(f"Chat completion stream failed: {e}")
+            yield _sse("error", {"detail": "AI service temporarily unavailable"})
+            return
+
+        logger.info(
+            f"Chat stream finished (provider={result.provider}, ttft={result.ttft_ms}ms)",
+            extra={"event": "chat_stream_finished", "provider": result.provider, "ttft_ms": result.ttft_ms},
+        )
+        if cache_key:
+            store_first_reply(cache_key, result.text)
+
+        response = await finish()
+        yield _sse("done", {**response.model_dump(), "ttft_ms": result.ttft_ms})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @public_router.get("/widget.js")
 def get_widget_js():
     """Serve the embeddable chat widget JavaScript bundle."""
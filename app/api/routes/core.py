@@ -6,6 +6,13 @@ from fastapi.responses import HTMLResponse
 from sqlalchemy import text
 
 from app.db.session import SessionLocal
+from app.integrations.company_cache import company_cache
+from app.integrations.credentials import credential_cache
+from app.integrations.rate_limits import crm_rate_limiter
+from app.services.crm_sync import crm_sync_worker
+from app.services.events import event_bus
+from app.services.ai_chat import chat_stream_stats, llm_router
+from app.services.chat_response_cache import chat_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -78,3 +85,30 @@ def health():
 def healthz():
     """Kubernetes-style health check (alias for /health)."""
     return _check_health()
+
+
+@router.get("/health/events", tags=["Core"])
+def health_events():
+    """Event bus queue depth and per-consumer latency/error counts (no error messages; the endpoint is public)."""
+    return event_bus.summary()
+
+
+@router.get("/health/chat", tags=["Core"])
+def health_chat():
+    """AI provider health (circuits, latency, hedging, time-to-first-token) and first-turn cache hit rate."""
+    return {
+        "router": llm_router.stats(),
+        "streams": chat_stream_stats.snapshot(),
+        "first_turn_cache": chat_response_cache.stats(),
+    }
+
+
+@router.get("/health/crm", tags=["Core"])
+def health_crm():
+    """CRM API budgets per provider (no per-org detail; the endpoint is public), credential and company cache hit rates, and sync outbox."""
+    return {
+        "rate_limits": crm_rate_limiter.summary(),
+        "credentials": credential_cache.stats(),
+        "companies": company_cache.stats(),
+        "sync_jobs": crm_sync_worker.stats(),
+    }
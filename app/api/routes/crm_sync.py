@@ -0,0 +1,174 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.api.deps.auth import get_current_user, get_db
+from app.crud import crm_backfill as backfill_crud
+from app.crud import crm_sync_job as job_crud
+from app.db import models
+from app.services.crm_backfill import crm_backfill_runner
+from app.services.crm_sync import CRM_PUSHERS, crm_sync_worker
+
+router = APIRouter(prefix="/integrations/crm-sync", tags=["Integrations"])
+
+
+class CRMSyncJobSchema(BaseModel):
+    id: int
+    lead_id: int
+    provider: str
+    status: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    external_id: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CRMBackfillCreate(BaseModel):
+    provider: Optional[str] = None  # Defaults to the org's active CRM
+
+
+class CRMBackfillSchema(BaseModel):
+    id: int
+    provider: str
+    status: str
+    total: int
+    processed: int
+    synced: int
+    failed: int
+    last_lead_id: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+@router.get("/jobs", response_model=List[CRMSyncJobSchema])
+def list_sync_jobs(
+    status: Optional[str] = Query(None, description="pending, running, succeeded or dead"),
+    limit: int = Query(100, ge=1, le=500),
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """CRM sync jobs for the current organization, newest first."""
+    return job_crud.list_jobs(db, user.organization_id, status=status, limit=limit)
+
+
+@router.post("/jobs/replay")
+def replay_dead_sync_jobs(
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Requeue every dead-lettered sync job of the current organization."""
+    replayed = job_crud.replay_dead_jobs(db, user.organization_id)
+    if replayed:
+        crm_sync_worker.wake()
+    return {"replayed": replayed}
+
+
+@router.post("/jobs/{job_id}/replay", response_model=CRMSyncJobSchema)
+def replay_sync_job(
+    job_id: int,
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Requeue a dead-lettered sync job."""
+    job = job_crud.replay_job(db, user.organization_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    if job.status != models.CRM_SYNC_PENDING:
+        raise HTTPException(status_code=409, detail=f"Only dead jobs can be replayed (job is {job.status})")
+    crm_sync_worker.wake()
+    return job
+
+
+@router.post("/backfills", response_model=CRMBackfillSchema, status_code=201)
+def start_backfill(
+    payload: CRMBackfillCreate,
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Start pushing the organization's existing leads into a CRM, in bulk."""
+    provider = payload.provider
+    if not provider:
+        org = db.get(models.Organization, user.organization_id)
+        provider = (org.active_crm if org else None) or "hubspot"
+    provider = provider.lower()
+    if provider not in CRM_PUSHERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported CRM provider: {provider}")
+    if backfill_crud.get_active_backfill(db, user.organization_id, provider):
+        raise HTTPException(status_code=409, detail=f"A {provider} backfill is already in progress")
+
+    backfill = backfill_crud.create_backfill(db, user.organization_id, provider)
+    crm_backfill_runner.wake()
+    return backfill
+
+
+@router.get("/backfills", response_model=List[CRMBackfillSchema])
+def list_backfills(
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Backfills of the current organization, newest first."""
+    return backfill_crud.list_backfills(db, user.organization_id)
+
+
+@router.get("/backfills/{backfill_id}", response_model=CRMBackfillSchema)
+def get_backfill(
+    backfill_id: int,
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """A backfill's progress."""
+    backfill = backfill_crud.get_backfill(db, user.organization_id, backfill_id)
+    if not backfill:
+        raise HTTPException(status_code=404, detail="Backfill not found")
+    return backfill
+
+
+@router.post("/backfills/{backfill_id}/cancel", response_model=CRMBackfillSchema)
+def cancel_backfill(
+    backfill_id: int,
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Stop a backfill after the batch in flight."""
+    backfill = backfill_crud.get_backfill(db, user.organization_id, backfill_id)
+    if not backfill:
+        raise HTTPException(status_code=404, detail="Backfill not found")
+    backfill = backfill_crud.cancel_backfill(db, backfill)
+    if backfill.status != models.CRM_BACKFILL_CANCELLED:
+        raise HTTPException(status_code=409, detail=f"Backfill already finished ({backfill.status})")
+    return backfill
+
+
+@router.post("/backfills/{backfill_id}/resume", response_model=CRMBackfillSchema)
+def resume_backfill(
+    backfill_id: int,
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Continue a failed or cancelled backfill from its checkpoint."""
+    backfill = backfill_crud.get_backfill(db, user.organization_id, backfill_id)
+    if not backfill:
+        raise HTTPException(status_code=404, detail="Backfill not found")
+    if backfill.status not in (models.CRM_BACKFILL_FAILED, models.CRM_BACKFILL_CANCELLED):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Only failed or cancelled backfills can be resumed (backfill is {backfill.status})",
+        )
+    if backfill_crud.get_active_backfill(db, user.organization_id, backfill.provider):
+        raise HTTPException(status_code=409, detail=f"A {backfill.provider} backfill is already in progress")
+    backfill = backfill_crud.resume_backfill(db, backfill)
+    crm_backfill_runner.wake()
+    return backfill
@@ -25,6 +25,7 @@ from app.api.deps.auth import get_db, get_current_user
 from app.core.config import settings
 from app.core.security import COOKIE_SECURE, COOKIE_SAMESITE, COOKIE_DOMAIN
 from app.db import models
+from app.integrations.token_manager import HUBSPOT_TOKEN_URL, TokenRefreshError, refresh_access_token, token_expires_at
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,6 @@ router = APIRouter(prefix="/integrations/hubspot", tags=["Integrations: HubSpot"
 
 # HubSpot OAuth URLs
 HUBSPOT_AUTH_URL = "https://app.hubspot.com/oauth/authorize"
-HUBSPOT_TOKEN_URL = "https://api.hubapi.com/oauth/v1/token"
 
 # Required scopes for full CRM access (contacts, companies, deals)
 HUBSPOT_SCOPES = [
@@ -272,6 +272,7 @@ async def hubspot_auth_callback(
         cred.access_token = access_token
         cred.refresh_token = refresh_token or cred.refresh_token
         cred.scopes = json.dumps(scopes_meta)
+        cred.expires_at = token_expires_at(expires_in)
         cred.is_active = True
         db.add(cred)
     else:
@@ -282,6 +283,7 @@ async def hubspot_auth_callback(
             access_token=access_token,
             refresh_token=refresh_token,
             scopes=json.dumps(scopes_meta),
+            expires_at=token_expires_at(expires_in),
             is_active=True,
         )
         db.add(cred)
@@ -334,34 +336,11 @@ async def hubspot_refresh_token(
     if not cred or not cred.refresh_token:
         raise HTTPException(status_code=400, detail="No HubSpot OAuth credential found")
 
-    token_data = {
-        "grant_type": "refresh_token",
-        "client_id": settings.hubspot_client_id,
-        "client_secret": settings.hubspot_client_secret,
-        "refresh_token": cred.refresh_token,
-    }
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            HUBSPOT_TOKEN_URL,
-            data=token_data,
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-
-        if resp.status_code >= 400:
-            raise HTTPException(
-                status_code=502,
-                detail=f"HubSpot token refresh failed: {resp.text[:200]}"
-            )
-
-        token_json = resp.json()
-
-    cred.access_token = token_json.get("access_token", cred.access_token)
-    if token_json.get("refresh_token"):
-        cred.refresh_token = token_json["refresh_token"]
-
-    db.add(cred)
-    db.commit()
+    # Shares an in-flight refresh with any CRM call refreshing the same token
+    try:
+        await refresh_access_token(org_id, "hubspot")
+    except TokenRefreshError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
 
     return {"status": "ok", "message": "Token refreshed"}
 
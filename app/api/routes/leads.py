@@ -1,7 +1,7 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Header, Body, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Body, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 import sqlalchemy as sa
@@ -13,23 +13,13 @@ from app.crud import lead as lead_crud
 from app.api.routes.auth import get_current_user  # reuse auth dependency
 
 # CRM integrations
-from app.integrations.hubspot import (
-    create_lead_full as hubspot_create_lead_full,
-    fetch_all_contacts as hubspot_fetch_all_contacts,
-)
-from app.integrations import nutshell
-from app.integrations.pipedrive import create_lead as pipedrive_create_lead
-from app.integrations.salesforce import create_lead as salesforce_create_lead
-from app.integrations.zoho import create_lead as zoho_create_lead
-
-# Email notifications
-from app.services.email import send_new_lead_notification, send_crm_error_notification
+from app.integrations.hubspot import fetch_all_contacts as hubspot_fetch_all_contacts
 
 # Lead processing (sanitization, spam, dedupe)
 from app.services.lead_processing import process_lead, sanitize_string
 
-# Notification settings helper
-from app.api.routes.integrations_notifications import get_org_notification_settings
+# Side effects (CRM sync, notifications, webhooks) run as event consumers
+from app.services.events import event_bus, LeadCreated, LeadUpdated
 
 import logging
 
@@ -38,168 +28,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-# ---- CRM Sync Wrappers with Error Notifications ----
-
-async def _sync_to_hubspot_with_notification(
-    org_id: int,
-    org_name: Optional[str],
-    lead_name: str,
-    email: str,
-    first_name: str,
-    last_name: str,
-    phone: str,
-    company: str = "",
-):
-    """Sync lead to HubSpot with full entity creation (contact + company + association)."""
-    try:
-        await hubspot_create_lead_full(
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            phone=phone,
-            company_name=company,
-            organization_id=org_id,
-        )
-    except Exception as exc:
-        logger.error(f"HubSpot sync failed for org {org_id}: {exc}")
-        _maybe_send_crm_error_notification(org_id, org_name, "hubspot", str(exc), lead_name)
-
-
-async def _sync_to_pipedrive_with_notification(
-    org_id: int,
-    org_name: Optional[str],
-    lead_name: str,
-    title: str,
-    name: str,
-    email: str,
-):
-    """Sync lead to Pipedrive, sending error notification on failure if enabled."""
-    try:
-        result = await pipedrive_create_lead(
-            title=title,
-            name=name,
-            email=email,
-            organization_id=org_id,
-        )
-        if result is None:
-            logger.error(f"Pipedrive sync failed for org {org_id}: returned None")
-            _maybe_send_crm_error_notification(
-                org_id, org_name, "pipedrive",
-                "Failed to create lead in Pipedrive. Check API credentials.",
-                lead_name,
-            )
-    except Exception as exc:
-        logger.error(f"Pipedrive sync failed for org {org_id}: {exc}")
-        _maybe_send_crm_error_notification(org_id, org_name, "pipedrive", str(exc), lead_name)
-
-
-async def _sync_to_salesforce_with_notification(
-    org_id: int,
-    org_name: Optional[str],
-    lead_name: str,
-    email: str,
-    first_name: str,
-    last_name: str,
-    company: str,
-):
-    """Sync lead to Salesforce, sending error notification on failure if enabled."""
-    try:
-        await salesforce_create_lead(
-            org_id=org_id,
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            company=company,
-        )
-    except Exception as exc:
-        logger.error(f"Salesforce sync failed for org {org_id}: {exc}")
-        _maybe_send_crm_error_notification(org_id, org_name, "salesforce", str(exc), lead_name)
-
-
-async def _sync_to_nutshell_with_notification(
-    org_id: int,
-    org_name: Optional[str],
-    lead_name: str,
-    description: str,
-    contact_name: str,
-    contact_email: str,
-):
-    """Sync lead to Nutshell, sending error notification on failure if enabled."""
-    try:
-        await nutshell.create_lead(
-            description=description,
-            contact_name=contact_name,
-            contact_email=contact_email,
-        )
-    except Exception as exc:
-        logger.error(f"Nutshell sync failed for org {org_id}: {exc}")
-        _maybe_send_crm_error_notification(org_id, org_name, "nutshell", str(exc), lead_name)
-
-
-async def _sync_to_zoho_with_notification(
-    org_id: int,
-    org_name: Optional[str],
-    lead_name: str,
-    email: str,
-    first_name: str,
-    last_name: str,
-    company: str = "",
-    phone: str = "",
-):
-    """Sync lead to Zoho CRM, sending error notification on failure if enabled."""
-    try:
-        await zoho_create_lead(
-            title=f"Lead from {email}",
-            name=f"{first_name} {last_name}".strip() or email,
-            email=email,
-            company=company,
-            phone=phone,
-            organization_id=org_id,
-        )
-    except Exception as exc:
-        logger.error(f"Zoho sync failed for org {org_id}: {exc}")
-        _maybe_send_crm_error_notification(org_id, org_name, "zoho", str(exc), lead_name)
-
-
-def _maybe_send_crm_error_notification(
-    org_id: int,
-    org_name: Optional[str],
-    crm_provider: str,
-    error_message: str,
-    lead_name: Optional[str],
-):
-    """Check notification settings and send CRM error notification if enabled."""
-    db = SessionLocal()
-    try:
-        notification_settings = get_org_notification_settings(db, org_id)
-        should_notify = (
-            notification_settings is None  # Default: enabled
-            or notification_settings.crm_error
-        )
-
-        if not should_notify:
-            return
-
-        recipients = [
-            user.email
-            for user in db.query(models.User)
-            .filter(models.User.organization_id == org_id)
-            .all()
-            if user.email
-        ]
-
-        if recipients:
-            send_crm_error_notification(
-                recipients=recipients,
-                crm_provider=crm_provider,
-                error_message=error_message,
-                lead_name=lead_name,
-                organization_name=org_name,
-            )
-    finally:
-        db.close()
-
-
 # Local DB dependency
 def get_db():
     db = SessionLocal()
@@ -221,130 +49,9 @@ KNOWN_LEAD_FIELDS = {
 }
 
 
-def _sync_new_lead(
-    db: Session,
-    org: models.Organization,
-    db_lead: models.Lead,
-    background_tasks: BackgroundTasks,
-    source_label: str = "public_api",
-):
-    """Sync a new lead to CRM, send email notifications, and fire outbound webhooks."""
-    provider = (org.active_crm or "hubspot").lower()
-
-    # Common fields
-    email = db_lead.email
-    first_name = getattr(db_lead, "first_name", None) or ""
-    last_name = getattr(db_lead, "last_name", None) or ""
-    phone = getattr(db_lead, "phone", None) or ""
-    company = getattr(db_lead, "company", None) or ""
-    name_field = getattr(db_lead, "name", None) or ""
-    display_name = name_field or f"{first_name} {last_name}".strip() or email
-
-    org_name = getattr(org, "name", None)
-
-    # HubSpot: create contact + company + association
-    if provider == "hubspot":
-        background_tasks.add_task(
-            _sync_to_hubspot_with_notification,
-            org_id=org.id,
-            org_name=org_name,
-            lead_name=display_name,
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            phone=phone,
-            company=company,
-        )
-
-    # Pipedrive: person plus lead
-    elif provider == "pipedrive":
-        title = f"{db_lead.source or 'Site2CRM'} lead from {email}"
-        background_tasks.add_task(
-            _sync_to_pipedrive_with_notification,
-            org_id=org.id,
-            org_name=org_name,
-            lead_name=display_name,
-            title=title,
-            name=display_name,
-            email=email,
-        )
-
-    # Salesforce: Lead sObject
-    elif provider == "salesforce":
-        background_tasks.add_task(
-            _sync_to_salesforce_with_notification,
-            org_id=org.id,
-            org_name=org_name,
-            lead_name=display_name,
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            company=company,
-        )
-
-    # Nutshell: JSON RPC newLead
-    elif provider == "nutshell":
-        description = f"{db_lead.source or 'Site2CRM'} lead from {email}"
-        background_tasks.add_task(
-            _sync_to_nutshell_with_notification,
-            org_id=org.id,
-            org_name=org_name,
-            lead_name=display_name,
-            description=description,
-            contact_name=display_name,
-            contact_email=email,
-        )
-
-    # Zoho: REST API Lead creation
-    elif provider == "zoho":
-        background_tasks.add_task(
-            _sync_to_zoho_with_notification,
-            org_id=org.id,
-            org_name=org_name,
-            lead_name=display_name,
-            email=email,
-            first_name=first_name,
-            last_name=last_name,
-            company=company,
-            phone=phone,
-        )
-
-    # Email notifications to organization users (only for new leads, if enabled)
-    notification_settings = get_org_notification_settings(db, org.id)
-    should_send_new_lead_email = (
-        notification_settings is None  # Default: enabled
-        or notification_settings.new_lead
-    )
-
-    if should_send_new_lead_email:
-        recipients = [
-            user.email
-            for user in db.query(models.User)
-            .filter(models.User.organization_id == org.id)
-            .all()
-            if user.email
-        ]
-
-        if recipients:
-            background_tasks.add_task(
-                send_new_lead_notification,
-                recipients,
-                display_name or email or "New lead",
-                db_lead.email,
-                company,
-                db_lead.source,
-                org_name,
-            )
-
-    # Fire webhook for lead created
-    from app.services.webhook_service import fire_lead_created_webhook
-    fire_lead_created_webhook(org.id, db_lead, source=source_label, background_tasks=background_tasks)
-
-
 @router.post("/public/leads", response_model=dict)
 def public_create_lead(
     request: Request,
-    background_tasks: BackgroundTasks,
     payload: dict = Body(...),
     db: Session = Depends(get_db),
     x_org_key: Optional[str] = Header(None, alias="X-Org-Key"),
@@ -422,12 +129,12 @@ def public_create_lead(
 
         # Create new lead with sanitized data
         lead = LeadCreate(**{k: v for k, v in sanitized_data.items() if k in KNOWN_LEAD_FIELDS or k == "organization_id"})
-        db_lead = lead_crud.create_lead(db, lead)
+        db_lead = lead_crud.create_lead(db, lead, sync_to_crm=True)
         is_new = True
 
     # Only sync to CRM and send notifications for NEW leads (not duplicates)
     if is_new:
-        _sync_new_lead(db, org, db_lead, background_tasks, source_label="public_api")
+        event_bus.publish(LeadCreated(org_id=org.id, lead_id=db_lead.id, source="public_api"))
 
     # Return appropriate message
     if is_new:
@@ -441,7 +148,6 @@ def public_create_lead(
 @router.post("/public/google-ads/leads", response_model=dict)
 def google_ads_lead_webhook(
     request: Request,
-    background_tasks: BackgroundTasks,
     payload: dict = Body(...),
     db: Session = Depends(get_db),
 ):
@@ -555,12 +261,12 @@ def google_ads_lead_webhook(
             k: v for k, v in sanitized_data.items()
             if k in KNOWN_LEAD_FIELDS or k == "organization_id"
         })
-        db_lead = lead_crud.create_lead(db, lead_create)
+        db_lead = lead_crud.create_lead(db, lead_create, sync_to_crm=True)
         is_new = True
 
     # 5. CRM sync + notifications + outbound webhooks
     if is_new:
-        _sync_new_lead(db, org, db_lead, background_tasks, source_label="google_ads")
+        event_bus.publish(LeadCreated(org_id=org.id, lead_id=db_lead.id, source="google_ads"))
 
     return {}  # Google expects empty 200 response
 
@@ -871,7 +577,6 @@ def get_lead(
 def update_lead(
     lead_id: int,
     updates: dict = Body(...),
-    background_tasks: BackgroundTasks = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -920,9 +625,7 @@ def update_lead(
         db.commit()
         db.refresh(lead)
 
-        # Fire webhook for lead update
-        from app.services.webhook_service import fire_lead_updated_webhook
-        fire_lead_updated_webhook(org_id, lead, changed_fields, background_tasks)
+        event_bus.publish(LeadUpdated(org_id=org_id, lead_id=lead.id, changed_fields=tuple(changed_fields)))
 
         logger.info(f"Lead {lead_id} updated: fields={changed_fields}")
 
@@ -933,7 +636,6 @@ def update_lead(
 def add_note_to_lead(
     lead_id: int,
     note_data: dict = Body(...),
-    background_tasks: BackgroundTasks = None,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -982,9 +684,7 @@ def add_note_to_lead(
     db.commit()
     db.refresh(activity)
 
-    # Fire webhook for lead update
-    from app.services.webhook_service import fire_lead_updated_webhook
-    fire_lead_updated_webhook(org_id, lead, ["notes"], background_tasks)
+    event_bus.publish(LeadUpdated(org_id=org_id, lead_id=lead.id, changed_fields=("notes",)))
 
     logger.info(f"Note added to lead {lead_id}")
 
@@ -9,9 +9,13 @@ Endpoints:
 - POST /oauth/token - Token exchange (code → tokens, refresh → new tokens)
 - GET /oauth/me - Get current user/org info (for testing auth)
 """
+import hashlib
 import json
 import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from threading import Lock
 from typing import Optional
 import logging
 
@@ -34,6 +38,9 @@ ACCESS_TOKEN_EXPIRE_HOURS = 24
 REFRESH_TOKEN_EXPIRE_DAYS = 30
 AUTHORIZATION_CODE_EXPIRE_MINUTES = 10
 
+# How long a resolved access token is trusted before re-reading oauth_tokens
+TOKEN_CACHE_TTL = 60
+
 
 def get_db():
     db = SessionLocal()
@@ -395,6 +402,8 @@ async def token(
         refresh_expires = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
 
         # Update token record
+        if token_record.access_token:
+            token_cache.invalidate(token_record.access_token)
         token_record.access_token = access_token
         token_record.refresh_token = new_refresh_token
         token_record.access_token_expires_at = access_expires
@@ -442,6 +451,8 @@ async def token(
         new_access_token = generate_token(32)
         access_expires = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
 
+        # The previous access token stops working immediately
+        token_cache.invalidate(token_record.access_token)
         token_record.access_token = new_access_token
         token_record.access_token_expires_at = access_expires
 
@@ -467,12 +478,80 @@ async def token(
 # Me Endpoint (for testing authentication)
 # ============================================================================
 
+def hash_access_token(access_token: str) -> str:
+    """Cache key for an access token (raw tokens are never kept in memory)."""
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """What a bearer token resolves to."""
+
+    user_id: int
+    organization_id: int
+    scopes: str
+    expires_at: datetime
+    cached_at: float
+
+
+class OAuthTokenCache:
+    """
+    Short-TTL map from access-token hash to its user/org/scopes/expiry.
+
+    oauth_tokens stays the source of truth: rotating or deleting a token
+    must call invalidate(), and anything changed out of band is picked up
+    within TOKEN_CACHE_TTL seconds.
+    """
+
+    def __init__(self, ttl_seconds: int = TOKEN_CACHE_TTL):
+        self._ttl = ttl_seconds
+        self._tokens: dict[str, CachedToken] = {}
+        self._lock = Lock()
+
+    def get(self, access_token: str) -> Optional[CachedToken]:
+        key = hash_access_token(access_token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry and time.time() - entry.cached_at < self._ttl:
+                return entry
+            self._tokens.pop(key, None)
+            return None
+
+    def set(self, access_token: str, token_record: models.OAuthToken) -> CachedToken:
+        entry = CachedToken(
+            user_id=token_record.user_id,
+            organization_id=token_record.organization_id,
+            scopes=token_record.scopes,
+            expires_at=token_record.access_token_expires_at,
+            cached_at=time.time(),
+        )
+        with self._lock:
+            self._tokens[hash_access_token(access_token)] = entry
+        return entry
+
+    def invalidate(self, access_token: Optional[str] = None):
+        """Drop one token (or every token) from the cache."""
+        with self._lock:
+            if access_token is None:
+                self._tokens.clear()
+            else:
+                self._tokens.pop(hash_access_token(access_token), None)
+
+
+# Global token cache instance
+token_cache = OAuthTokenCache()
+
+
 def get_oauth_user(
     request: Request,
     db: Session = Depends(get_db),
 ) -> tuple[models.User, models.Organization]:
     """
     Dependency to get user from OAuth Bearer token.
+
+    Cached tokens load user and org by primary key (served from the session
+    identity map when already loaded); uncached tokens load token, user and
+    org in a single join.
     """
     auth_header = request.headers.get("Authorization", "")
 
@@ -484,31 +563,45 @@ def get_oauth_user(
 
     access_token = auth_header[7:]  # Remove "Bearer " prefix
 
-    token_record = db.query(models.OAuthToken).filter(
-        models.OAuthToken.access_token == access_token,
-    ).first()
+    cached = token_cache.get(access_token)
+    if cached:
+        user = db.get(models.User, cached.user_id)
+        org = db.get(models.Organization, cached.organization_id)
+        row = (user, org) if user and org else None
+    else:
+        row = db.query(models.OAuthToken, models.User, models.Organization).join(
+            models.User, models.User.id == models.OAuthToken.user_id
+        ).join(
+            models.Organization, models.Organization.id == models.OAuthToken.organization_id
+        ).filter(
+            models.OAuthToken.access_token == access_token,
+        ).first()
 
-    if not token_record:
-        raise HTTPException(
-            status_code=401,
-            detail={"error": "unauthorized", "message": "Invalid access token"}
-        )
+        if not row:
+            raise HTTPException(
+                status_code=401,
+                detail={"error": "unauthorized", "message": "Invalid access token"}
+            )
+
+        token_record, user, org = row
+        cached = token_cache.set(access_token, token_record)
+        row = (user, org)
 
-    if token_record.access_token_expires_at < datetime.utcnow():
+    if cached.expires_at < datetime.utcnow():
+        token_cache.invalidate(access_token)
         raise HTTPException(
             status_code=401,
             detail={"error": "unauthorized", "message": "Access token expired"}
         )
 
-    user = db.query(models.User).filter(models.User.id == token_record.user_id).first()
-    org = db.query(models.Organization).filter(models.Organization.id == token_record.organization_id).first()
-
-    if not user or not org:
+    if not row:
+        token_cache.invalidate(access_token)
         raise HTTPException(
             status_code=401,
             detail={"error": "unauthorized", "message": "User or organization not found"}
         )
 
+    user, org = row
     return user, org
 
 
@@ -12,6 +12,7 @@ from app.schemas.user import UserCreate
 from app.core.security import get_password_hash, create_access_token, create_refresh_token
 from app.core.rate_limit import check_rate_limit
 from app.services.email import send_email_verification
+from app.services.usage import get_org_usage
 from uuid import uuid4
 from sqlalchemy.exc import IntegrityError
 
@@ -250,6 +251,8 @@ def get_current_organization(
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
+    usage = get_org_usage(db, org.id)
+
     return {
         "id": org.id,
         "name": org.name,
@@ -259,8 +262,8 @@ def get_current_organization(
         "subscription_status": org.subscription_status,
         "current_period_end": org.current_period_end.isoformat() if org.current_period_end else None,
         "trial_ends_at": org.trial_ends_at.isoformat() if org.trial_ends_at else None,
-        "leads_this_month": org.leads_this_month,
-        "ai_messages_this_month": org.ai_messages_this_month,
+        "leads_this_month": usage[models.USAGE_METRIC_LEADS],
+        "ai_messages_this_month": usage[models.USAGE_METRIC_AI_MESSAGES],
         "active_crm": org.active_crm,
         "created_at": org.created_at.isoformat() if org.created_at else None,
         "onboarding_completed": org.onboarding_completed,
@@ -25,6 +25,7 @@ from app.api.deps.auth import get_db, get_current_user
 from app.core.config import settings
 from app.core.security import COOKIE_SECURE, COOKIE_SAMESITE, COOKIE_DOMAIN
 from app.db import models
+from app.integrations.token_manager import PIPEDRIVE_TOKEN_URL, TokenRefreshError, refresh_access_token, token_expires_at
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,6 @@ router = APIRouter(prefix="/integrations/pipedrive", tags=["Integrations: Pipedr
 
 # Pipedrive OAuth URLs
 PIPEDRIVE_AUTH_URL = "https://oauth.pipedrive.com/oauth/authorize"
-PIPEDRIVE_TOKEN_URL = "https://oauth.pipedrive.com/oauth/token"
 
 
 def _require_pipedrive_env() -> None:
@@ -265,6 +265,7 @@ async def pipedrive_auth_callback(
         cred.access_token = access_token
         cred.refresh_token = refresh_token or cred.refresh_token
         cred.scopes = json.dumps(scopes_meta)
+        cred.expires_at = token_expires_at(expires_in)
         cred.is_active = True
         db.add(cred)
     else:
@@ -275,6 +276,7 @@ async def pipedrive_auth_callback(
             access_token=access_token,
             refresh_token=refresh_token,
             scopes=json.dumps(scopes_meta),
+            expires_at=token_expires_at(expires_in),
             is_active=True,
         )
         db.add(cred)
@@ -327,54 +329,11 @@ async def pipedrive_refresh_token(
     if not cred or not cred.refresh_token:
         raise HTTPException(status_code=400, detail="No Pipedrive OAuth credential found")
 
-    credentials = base64.b64encode(
-        f"{settings.pipedrive_client_id}:{settings.pipedrive_client_secret}".encode()
-    ).decode()
-
-    token_data = {
-        "grant_type": "refresh_token",
-        "refresh_token": cred.refresh_token,
-    }
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            PIPEDRIVE_TOKEN_URL,
-            data=token_data,
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Authorization": f"Basic {credentials}",
-            },
-        )
-
-        if resp.status_code >= 400:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Pipedrive token refresh failed: {resp.text[:200]}"
-            )
-
-        token_json = resp.json()
-
-    cred.access_token = token_json.get("access_token", cred.access_token)
-    if token_json.get("refresh_token"):
-        cred.refresh_token = token_json["refresh_token"]
-
-    # Update metadata
-    if cred.scopes:
-        try:
-            meta = json.loads(cred.scopes)
-        except Exception:
-            meta = {}
-    else:
-        meta = {}
-
-    if token_json.get("expires_in"):
-        meta["expires_in"] = token_json["expires_in"]
-    if token_json.get("api_domain"):
-        meta["api_domain"] = token_json["api_domain"]
-    cred.scopes = json.dumps(meta)
-
-    db.add(cred)
-    db.commit()
+    # Shares an in-flight refresh with any CRM call refreshing the same token
+    try:
+        await refresh_access_token(org_id, "pipedrive")
+    except TokenRefreshError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
 
     return {"status": "ok", "message": "Token refreshed"}
 
@@ -6,20 +6,27 @@ Endpoints:
 - GET /webhooks - List all webhooks for organization
 - POST /webhooks - Create a new webhook subscription
 - GET /webhooks/{id} - Get webhook details
+- PATCH /webhooks/{id} - Enable/disable a webhook subscription
 - DELETE /webhooks/{id} - Delete webhook subscription
 - GET /webhooks/{id}/deliveries - Get delivery logs
 """
+import base64
 import secrets
 from typing import Optional, List
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, HttpUrl, field_validator
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
 from app.db import models
 from app.api.routes.auth import get_current_user
+from app.services.webhook_service import (
+    invalidate_webhook_subscriptions,
+    decode_delivery_payload,
+)
 
 import logging
 
@@ -27,6 +34,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Delivery log totals are counted up to this many rows, then reported as estimates
+DELIVERY_COUNT_CAP = 1000
+
 
 def get_db():
     db = SessionLocal()
@@ -51,6 +61,11 @@ class WebhookCreate(BaseModel):
         return v
 
 
+class WebhookUpdate(BaseModel):
+    is_active: Optional[bool] = None
+    description: Optional[str] = None
+
+
 class WebhookResponse(BaseModel):
     id: int
     url: str
@@ -89,15 +104,43 @@ class WebhookDeliveryResponse(BaseModel):
     attempt_number: int
     is_success: bool
 
-    class Config:
-        from_attributes = True
-
 
 class WebhookDeliveryListResponse(BaseModel):
     items: List[WebhookDeliveryResponse]
     total: int
+    total_is_estimate: bool = False
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+def _encode_delivery_cursor(delivery: models.WebhookDelivery) -> str:
+    raw = f"{delivery.delivered_at.isoformat()}|{delivery.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_delivery_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        delivered_at, delivery_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(delivered_at), int(delivery_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _delivery_response(delivery: models.WebhookDelivery) -> WebhookDeliveryResponse:
+    return WebhookDeliveryResponse(
+        id=delivery.id,
+        event=delivery.event,
+        payload=decode_delivery_payload(delivery),
+        response_status=delivery.response_status,
+        response_body=delivery.response_body,
+        error_message=delivery.error_message,
+        delivered_at=delivery.delivered_at,
+        duration_ms=delivery.duration_ms,
+        attempt_number=delivery.attempt_number,
+        is_success=delivery.is_success,
+    )
 
 
 # ---- Endpoints ----
@@ -170,6 +213,7 @@ def create_webhook(
     db.add(webhook)
     db.commit()
     db.refresh(webhook)
+    invalidate_webhook_subscriptions(org_id)
 
     logger.info(
         f"Webhook created: org={org_id} event={req.event} url={req.url}",
@@ -214,6 +258,43 @@ def get_webhook(
     return WebhookResponse.model_validate(webhook)
 
 
+@router.patch("/webhooks/{webhook_id}", response_model=WebhookResponse, tags=["Webhooks"])
+def update_webhook(
+    webhook_id: int,
+    req: WebhookUpdate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Enable/disable a webhook or change its description."""
+    org_id = current_user.organization_id
+    if org_id is None:
+        raise HTTPException(status_code=403, detail="No organization assigned")
+
+    webhook = db.query(models.Webhook).filter(
+        models.Webhook.id == webhook_id,
+        models.Webhook.organization_id == org_id,
+    ).first()
+
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+
+    if req.is_active is not None:
+        webhook.is_active = req.is_active
+    if req.description is not None:
+        webhook.description = req.description
+
+    db.commit()
+    db.refresh(webhook)
+    invalidate_webhook_subscriptions(org_id)
+
+    logger.info(
+        f"Webhook updated: org={org_id} id={webhook_id} active={webhook.is_active}",
+        extra={"event": "webhook_updated", "org_id": org_id, "webhook_id": webhook_id}
+    )
+
+    return WebhookResponse.model_validate(webhook)
+
+
 @router.delete("/webhooks/{webhook_id}", status_code=204, tags=["Webhooks"])
 def delete_webhook(
     webhook_id: int,
@@ -240,6 +321,7 @@ def delete_webhook(
 
     db.delete(webhook)
     db.commit()
+    invalidate_webhook_subscriptions(org_id)
 
     return None
 
@@ -249,10 +331,18 @@ def list_webhook_deliveries(
     webhook_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Get delivery logs for a webhook (for debugging)."""
+    """
+    Get delivery logs for a webhook (for debugging).
+
+    Pass `cursor` (the previous page's `next_cursor`) for keyset pagination;
+    `page` is still accepted for the first few pages. When there are more
+    than DELIVERY_COUNT_CAP deliveries, `total` is the cap and
+    `total_is_estimate` is true.
+    """
     org_id = current_user.organization_id
     if org_id is None:
         raise HTTPException(status_code=403, detail="No organization assigned")
@@ -266,23 +356,50 @@ def list_webhook_deliveries(
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
 
-    # Get total count
-    total = db.query(models.WebhookDelivery).filter(
+    # Count at most DELIVERY_COUNT_CAP rows instead of the whole history
+    capped = db.query(models.WebhookDelivery.id).filter(
         models.WebhookDelivery.webhook_id == webhook_id
-    ).count()
-
-    # Get paginated deliveries
-    deliveries = db.query(models.WebhookDelivery).filter(
+    ).limit(DELIVERY_COUNT_CAP + 1).subquery()
+    total = db.query(func.count()).select_from(capped).scalar()
+    total_is_estimate = total > DELIVERY_COUNT_CAP
+    if total_is_estimate:
+        total = DELIVERY_COUNT_CAP
+
+    # Get paginated deliveries (keyset on the (webhook_id, delivered_at) index)
+    query = db.query(models.WebhookDelivery).filter(
         models.WebhookDelivery.webhook_id == webhook_id
-    ).order_by(
-        models.WebhookDelivery.delivered_at.desc()
-    ).offset((page - 1) * page_size).limit(page_size).all()
+    )
+    if cursor:
+        cursor_at, cursor_id = _decode_delivery_cursor(cursor)
+        query = query.filter(
+            or_(
+                models.WebhookDelivery.delivered_at < cursor_at,
+                and_(
+                    models.WebhookDelivery.delivered_at == cursor_at,
+                    models.WebhookDelivery.id < cursor_id,
+                ),
+            )
+        )
+
+    query = query.order_by(
+        models.WebhookDelivery.delivered_at.desc(),
+        models.WebhookDelivery.id.desc(),
+    )
+    if not cursor:
+        query = query.offset((page - 1) * page_size)
+
+    deliveries = query.limit(page_size + 1).all()
+
+    has_more = len(deliveries) > page_size
+    deliveries = deliveries[:page_size]
 
     return WebhookDeliveryListResponse(
-        items=[WebhookDeliveryResponse.model_validate(d) for d in deliveries],
+        items=[_delivery_response(d) for d in deliveries],
         total=total,
+        total_is_estimate=total_is_estimate,
         page=page,
         page_size=page_size,
+        next_cursor=_encode_delivery_cursor(deliveries[-1]) if has_more else None,
     )
 
 
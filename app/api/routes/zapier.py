@@ -0,0 +1,198 @@
+# app/api/routes/zapier.py
+"""
+Polling triggers for Zapier (OAuth Bearer auth).
+
+Endpoints:
+- GET /zapier/triggers/new-leads - Leads created after a cursor
+- GET /zapier/triggers/updated-leads - Leads updated after a cursor
+- GET /zapier/triggers/chat-captures - Chat conversations that captured a lead
+- GET /zapier/triggers/new-bookings - Bookings created after a cursor
+
+Each trigger returns a JSON array (what Zapier polling expects). Every item
+carries a `cursor`; pass the last one back as `?cursor=` to get only newer
+items in ascending order. Without a cursor the newest `limit` items are
+returned newest-first, which is what Zapier's deduplicating poller wants.
+
+Cursors are keyset positions (timestamp, id) so each poll is an index range
+scan, not a scan of the org's history.
+"""
+import base64
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.api.routes.oauth import get_db, get_oauth_user
+from app.services.webhook_service import (
+    build_lead_created_data,
+    build_lead_updated_data,
+    build_chat_lead_captured_data,
+)
+
+router = APIRouter(prefix="/zapier", tags=["Zapier"])
+
+# Default and max items per poll
+TRIGGER_PAGE_SIZE = 50
+TRIGGER_MAX_PAGE_SIZE = 100
+
+
+# ---- Cursor helpers ----
+
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_page(query, ts_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Apply keyset filter/order on (ts_column, id_column) and return rows.
+
+    Rows without a timestamp (legacy leads predate updated_at) have no
+    position in the keyset, so they're left out.
+    """
+    query = query.filter(ts_column.isnot(None))
+    if cursor:
+        after_ts, after_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                ts_column > after_ts,
+                and_(ts_column == after_ts, id_column > after_id),
+            )
+        ).order_by(ts_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(ts_column.desc(), id_column.desc())
+    return query.limit(limit).all()
+
+
+# ---- Triggers ----
+
+@router.get("/triggers/new-leads")
+def new_leads_trigger(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRIGGER_PAGE_SIZE, ge=1, le=TRIGGER_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    auth: tuple[models.User, models.Organization] = Depends(get_oauth_user),
+):
+    """Leads created after the cursor (uses ix_leads_org_created)."""
+    _, org = auth
+    query = db.query(models.Lead).filter(models.Lead.organization_id == org.id)
+    leads = _keyset_page(query, models.Lead.created_at, models.Lead.id, cursor, limit)
+
+    return [
+        {
+            "id": lead.id,
+            "cursor": _encode_cursor(lead.created_at, lead.id),
+            **build_lead_created_data(lead),
+        }
+        for lead in leads
+    ]
+
+
+@router.get("/triggers/updated-leads")
+def updated_leads_trigger(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRIGGER_PAGE_SIZE, ge=1, le=TRIGGER_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    auth: tuple[models.User, models.Organization] = Depends(get_oauth_user),
+):
+    """Leads updated after the cursor (uses ix_leads_org_updated)."""
+    _, org = auth
+    query = db.query(models.Lead).filter(models.Lead.organization_id == org.id)
+    leads = _keyset_page(query, models.Lead.updated_at, models.Lead.id, cursor, limit)
+
+    return [
+        {
+            # A lead can fire this trigger many times; the id includes the version
+            "id": f"{lead.id}-{int(lead.updated_at.timestamp())}",
+            "cursor": _encode_cursor(lead.updated_at, lead.id),
+            **build_lead_updated_data(lead, []),
+        }
+        for lead in leads
+    ]
+
+
+@router.get("/triggers/chat-captures")
+def chat_captures_trigger(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRIGGER_PAGE_SIZE, ge=1, le=TRIGGER_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    auth: tuple[models.User, models.Organization] = Depends(get_oauth_user),
+):
+    """Chat conversations that captured contact info after the cursor."""
+    _, org = auth
+    config_ids = select(models.ChatWidgetConfig.id).where(
+        models.ChatWidgetConfig.organization_id == org.id
+    )
+    query = db.query(models.ChatWidgetConversation).filter(
+        models.ChatWidgetConversation.config_id.in_(config_ids),
+        models.ChatWidgetConversation.lead_captured_at.isnot(None),
+    )
+    conversations = _keyset_page(
+        query,
+        models.ChatWidgetConversation.lead_captured_at,
+        models.ChatWidgetConversation.id,
+        cursor,
+        limit,
+    )
+
+    return [
+        {
+            "id": conversation.id,
+            "cursor": _encode_cursor(conversation.lead_captured_at, conversation.id),
+            **build_chat_lead_captured_data(conversation, conversation.config),
+        }
+        for conversation in conversations
+    ]
+
+
+@router.get("/triggers/new-bookings")
+def new_bookings_trigger(
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRIGGER_PAGE_SIZE, ge=1, le=TRIGGER_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    auth: tuple[models.User, models.Organization] = Depends(get_oauth_user),
+):
+    """Bookings created after the cursor."""
+    _, org = auth
+    meeting_type_ids = (
+        select(models.MeetingType.id)
+        .join(models.BookingConfig, models.MeetingType.booking_config_id == models.BookingConfig.id)
+        .where(models.BookingConfig.organization_id == org.id)
+    )
+    query = db.query(models.Booking).filter(models.Booking.meeting_type_id.in_(meeting_type_ids))
+    bookings = _keyset_page(query, models.Booking.created_at, models.Booking.id, cursor, limit)
+
+    return [
+        {
+            "id": booking.id,
+            "cursor": _encode_cursor(booking.created_at, booking.id),
+            "booking_id": booking.id,
+            "lead_id": booking.lead_id,
+            "meeting_type": booking.meeting_type.name,
+            "guest_name": booking.guest_name,
+            "guest_email": booking.guest_email,
+            "guest_phone": booking.guest_phone,
+            "guest_company": booking.guest_company,
+            "guest_notes": booking.guest_notes,
+            "scheduled_at": booking.scheduled_at.isoformat(),
+            "duration_minutes": booking.duration_minutes,
+            "timezone": booking.timezone,
+            "status": booking.status,
+            "meeting_link": booking.meeting_link,
+            "source": booking.source,
+            "created_at": booking.created_at.isoformat(),
+        }
+        for booking in bookings
+    ]
@@ -74,6 +74,9 @@ class Settings(BaseSettings):
     CLOUDFLARE_API_TOKEN: str = ""
     CLOUDFLARE_AI_MODEL: str = "@cf/meta/llama-3.2-3b-instruct"
 
+    # Webhook delivery logs
+    webhook_compress_payloads: bool = True  # zlib-compress stored delivery payloads
+
     frontend_base_url: str = "http://127.0.0.1:5173"
     api_base_url: str = "https://api.site2crm.io"  # Used for widget embed code
 
@@ -31,6 +31,8 @@ class PlanLimits:
     booking_custom_colors: bool = False  # Can customize booking page colors
     booking_reminders: int = 1  # Number of reminder emails (1 = 24hr only)
     booking_team_scheduling: bool = False  # Round-robin / team scheduling
+    # Webhook delivery log retention
+    webhook_log_retention_days: int = 7
 
 
 # AI feature definitions
@@ -64,6 +66,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=False,
         booking_reminders=1,
         booking_team_scheduling=False,
+        webhook_log_retention_days=7,
     ),
     # Trial - full Pro access for 14 days
     "trial": PlanLimits(
@@ -88,6 +91,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=True,
         booking_reminders=3,
         booking_team_scheduling=True,
+        webhook_log_retention_days=14,
     ),
     # Starter $29/mo - Basic AI, limited tokens
     "starter": PlanLimits(
@@ -112,6 +116,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=True,
         booking_reminders=2,
         booking_team_scheduling=False,
+        webhook_log_retention_days=14,
     ),
     # AppSumo lifetime - No AI, generous leads
     "appsumo": PlanLimits(
@@ -136,6 +141,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=False,
         booking_reminders=1,
         booking_team_scheduling=False,
+        webhook_log_retention_days=14,
     ),
     # Pro $79/mo - Full AI, higher limits
     "pro": PlanLimits(
@@ -160,6 +166,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=True,
         booking_reminders=3,
         booking_team_scheduling=True,
+        webhook_log_retention_days=30,
     ),
     # Pro AI (deprecated, maps to Pro)
     "pro_ai": PlanLimits(
@@ -184,6 +191,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=True,
         booking_reminders=3,
         booking_team_scheduling=True,
+        webhook_log_retention_days=30,
     ),
     # Enterprise - Unlimited everything
     "enterprise": PlanLimits(
@@ -208,6 +216,7 @@ PLAN_LIMITS: Dict[str, PlanLimits] = {
         booking_custom_colors=True,
         booking_reminders=-1,  # Unlimited custom reminders
         booking_team_scheduling=True,
+        webhook_log_retention_days=90,
     ),
 }
 
@@ -358,3 +367,10 @@ def validate_bookings_count(plan: str, current_month_count: int) -> tuple[bool,
     if current_month_count >= limit:
         return False, f"Monthly booking limit reached ({limit}). Please upgrade for more bookings."
     return True, ""
+
+
+# Webhook helpers
+def get_webhook_log_retention_days(plan: str) -> int:
+    """Get how many days of webhook delivery logs a plan keeps."""
+    limits = get_plan_limits(plan)
+    return limits.webhook_log_retention_days
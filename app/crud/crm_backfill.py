@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_BACKFILL_STATUSES = (models.CRM_BACKFILL_PENDING, models.CRM_BACKFILL_RUNNING)
+
+
+def backfill_leads_query(db: Session, organization_id: int, provider: str, after_id: int, until_id: int):
+    """
+    The org's leads a backfill still has to push, oldest first.
+
+    Leads the outbox has already synced to this provider, or is about to,
+    are left out; leads whose outbox job is dead are included.
+    """
+    Job = models.CRMSyncJob
+    handled = exists().where(
+        Job.lead_id == models.Lead.id,
+        Job.provider == provider,
+        Job.status != models.CRM_SYNC_DEAD,
+    )
+    return (
+        db.query(models.Lead)
+        .filter(
+            models.Lead.organization_id == organization_id,
+            models.Lead.id > after_id,
+            models.Lead.id <= until_id,
+            models.Lead.email.isnot(None),
+            ~handled,
+        )
+        .order_by(models.Lead.id)
+    )
+
+
+def get_active_backfill(db: Session, organization_id: int, provider: str) -> Optional[models.CRMBackfill]:
+    return db.query(models.CRMBackfill).filter(
+        models.CRMBackfill.organization_id == organization_id,
+        models.CRMBackfill.provider == provider,
+        models.CRMBackfill.status.in_(ACTIVE_BACKFILL_STATUSES),
+    ).first()
+
+
+def create_backfill(db: Session, organization_id: int, provider: str) -> models.CRMBackfill:
+    """
+    Queue a backfill of every lead the org has now.
+
+    Callers check get_active_backfill first: an org runs one backfill per
+    provider at a time.
+    """
+    until_id = db.query(func.max(models.Lead.id)).filter(
+        models.Lead.organization_id == organization_id
+    ).scalar() or 0
+    backfill = models.CRMBackfill(
+        organization_id=organization_id,
+        provider=provider,
+        status=models.CRM_BACKFILL_PENDING,
+        until_lead_id=until_id,
+        last_lead_id=0,
+        total=backfill_leads_query(db, organization_id, provider, 0, until_id).count(),
+    )
+    db.add(backfill)
+    db.commit()
+    db.refresh(backfill)
+    return backfill
+
+
+def get_backfill(db: Session, organization_id: int, backfill_id: int) -> Optional[models.CRMBackfill]:
+    return db.query(models.CRMBackfill).filter(
+        models.CRMBackfill.id == backfill_id,
+        models.CRMBackfill.organization_id == organization_id,
+    ).first()
+
+
+def list_backfills(db: Session, organization_id: int, limit: int = 50) -> List[models.CRMBackfill]:
+    """An org's backfills, newest first."""
+    return (
+        db.query(models.CRMBackfill)
+        .filter(models.CRMBackfill.organization_id == organization_id)
+        .order_by(models.CRMBackfill.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def cancel_backfill(db: Session, backfill: models.CRMBackfill) -> models.CRMBackfill:
+    """
+    Cancel a pending or running backfill. A runner stops after the batch
+    in flight; leads already pushed stay in the CRM.
+    """
+    if backfill.status in ACTIVE_BACKFILL_STATUSES:
+        backfill.status = models.CRM_BACKFILL_CANCELLED
+        backfill.locked_at = None
+        backfill.completed_at = datetime.utcnow()
+        db.commit()
+        db.refresh(backfill)
+    return backfill
+
+
+def resume_backfill(db: Session, backfill: models.CRMBackfill) -> models.CRMBackfill:
+    """Requeue a failed or cancelled backfill; it continues from its checkpoint."""
+    if backfill.status in (models.CRM_BACKFILL_FAILED, models.CRM_BACKFILL_CANCELLED):
+        backfill.status = models.CRM_BACKFILL_PENDING
+        backfill.locked_at = None
+        backfill.last_error = None
+        backfill.completed_at = None
+        db.commit()
+        db.refresh(backfill)
+    return backfill
@@ -0,0 +1,89 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_crm_sync(db: Session, lead: models.Lead) -> Optional[models.CRMSyncJob]:
+    """
+    Add a CRM sync job for a new lead to the session, without committing.
+
+    Callers add it in the same transaction as the lead, so a lead is never
+    stored without its sync job (or the job without its lead).
+    """
+    if not lead.organization_id:
+        return None
+    org = db.get(models.Organization, lead.organization_id)
+    if not org:
+        return None
+
+    if lead.id is None:
+        db.flush()
+    job = models.CRMSyncJob(
+        organization_id=lead.organization_id,
+        lead_id=lead.id,
+        provider=(org.active_crm or "hubspot").lower(),
+        status=models.CRM_SYNC_PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+def list_jobs(
+    db: Session,
+    organization_id: int,
+    status: Optional[str] = None,
+    limit: int = 100,
+) -> List[models.CRMSyncJob]:
+    """An org's sync jobs, newest first."""
+    q = db.query(models.CRMSyncJob).filter(models.CRMSyncJob.organization_id == organization_id)
+    if status:
+        q = q.filter(models.CRMSyncJob.status == status)
+    return q.order_by(models.CRMSyncJob.id.desc()).limit(limit).all()
+
+
+def replay_job(db: Session, organization_id: int, job_id: int) -> Optional[models.CRMSyncJob]:
+    """
+    Put a dead job back in the queue with a fresh set of attempts.
+
+    Returns None if the org has no such job; jobs that aren't dead are
+    returned unchanged.
+    """
+    job = db.query(models.CRMSyncJob).filter(
+        models.CRMSyncJob.id == job_id,
+        models.CRMSyncJob.organization_id == organization_id,
+    ).first()
+    if not job:
+        return None
+    if job.status == models.CRM_SYNC_DEAD:
+        _reset(job)
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def replay_dead_jobs(db: Session, organization_id: int) -> int:
+    """Requeue all of an org's dead jobs; returns how many."""
+    jobs = db.query(models.CRMSyncJob).filter(
+        models.CRMSyncJob.organization_id == organization_id,
+        models.CRMSyncJob.status == models.CRM_SYNC_DEAD,
+    ).all()
+    for job in jobs:
+        _reset(job)
+    db.commit()
+    return len(jobs)
+
+
+def _reset(job: models.CRMSyncJob) -> None:
+    job.status = models.CRM_SYNC_PENDING
+    job.attempts = 0
+    job.next_attempt_at = datetime.utcnow()
+    job.locked_at = None
+    job.last_error = None
@@ -7,6 +7,8 @@ from sqlalchemy import func, extract
 from app.db import models
 from app.schemas.lead import LeadCreate, LeadUpdate
 from app.core.plans import get_plan_limits
+from app.crud.crm_sync_job import enqueue_crm_sync
+from app.services.usage import get_usage, increment_usage
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +31,7 @@ def check_lead_limit(db: Session, organization_id: int) -> Tuple[bool, int, int,
     """
     Check if organization can create more leads this month.
     Returns (allowed, current_count, limit, is_hard_limit).
-    Also resets the monthly counter if needed.
+    Also resets the usage alert flags at the start of a new month.
 
     Hard limit plans (appsumo) will return 429; soft limit plans log warning but accept.
     """
@@ -39,16 +41,16 @@ def check_lead_limit(db: Session, organization_id: int) -> Tuple[bool, int, int,
 
     now = datetime.utcnow()
 
-    # Reset counter if it's a new month
+    # Reset usage alert flags for a new month (the count itself lives in a
+    # per-month usage_counters row, so it needs no reset)
     if org.leads_month_reset is None or org.leads_month_reset.month != now.month or org.leads_month_reset.year != now.year:
-        org.leads_this_month = 0
         org.leads_month_reset = now
-        # Also reset usage alert flags for new month
         org.usage_alert_80_sent = False
         org.usage_alert_100_sent = False
         db.commit()
 
     limits = get_plan_limits(org.plan)
+    current = get_usage(db, organization_id, models.USAGE_METRIC_LEADS)
 
     # AppSumo plans have hard limits (429 when exceeded)
     # Other plans have soft limits (warning only)
@@ -56,33 +58,31 @@ def check_lead_limit(db: Session, organization_id: int) -> Tuple[bool, int, int,
 
     # -1 means unlimited
     if limits.leads_per_month == -1:
-        return True, org.leads_this_month, -1, False
+        return True, current, -1, False
 
-    allowed = org.leads_this_month < limits.leads_per_month
-    return allowed, org.leads_this_month, limits.leads_per_month, is_hard_limit
+    allowed = current < limits.leads_per_month
+    return allowed, current, limits.leads_per_month, is_hard_limit
 
 
 def increment_lead_count(db: Session, organization_id: int) -> None:
     """Increment the lead counter for an organization and check usage thresholds."""
     org = db.get(models.Organization, organization_id)
     if org:
-        org.leads_this_month += 1
-        db.commit()
+        current = increment_usage(db, organization_id, models.USAGE_METRIC_LEADS)
 
         # Check if we need to send usage alerts
         limits = get_plan_limits(org.plan)
         if limits.leads_per_month > 0:  # Only for plans with limits
-            check_and_send_usage_alerts(db, org, limits.leads_per_month)
+            check_and_send_usage_alerts(db, org, current, limits.leads_per_month)
 
 
-def check_and_send_usage_alerts(db: Session, org: models.Organization, limit: int) -> None:
+def check_and_send_usage_alerts(db: Session, org: models.Organization, current: int, limit: int) -> None:
     """
     Check usage thresholds and send alert emails if needed.
     Sends emails at 80% and 100% usage, once per month.
     """
     from app.services.email import send_usage_warning_email, send_usage_limit_reached_email
 
-    current = org.leads_this_month
     percentage = int((current / limit) * 100)
 
     # Get organization owner/admin emails for notifications
@@ -136,10 +136,16 @@ def _get_org_admin_emails(db: Session, organization_id: int) -> List[str]:
     return [u.email for u in users if u.email]
 
 
-def create_lead(db: Session, lead_in: LeadCreate, enforce_limit: bool = True) -> models.Lead:
+def create_lead(
+    db: Session,
+    lead_in: LeadCreate,
+    enforce_limit: bool = True,
+    sync_to_crm: bool = False,
+) -> models.Lead:
     """
     Create a lead, carrying through organization_id when provided.
     If enforce_limit is True, will increment the lead counter.
+    If sync_to_crm is True, a CRM sync job is committed along with the lead.
     """
     obj = models.Lead(
         email=lead_in.email,
@@ -163,6 +169,8 @@ def create_lead(db: Session, lead_in: LeadCreate, enforce_limit: bool = True) ->
         form_variant_id=lead_in.form_variant_id,
     )
     db.add(obj)
+    if sync_to_crm:
+        enqueue_crm_sync(db, obj)
     db.commit()
     db.refresh(obj)
 
@@ -8,8 +8,10 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     JSON,
+    LargeBinary,
     Numeric,
     String,
     Text,
@@ -72,14 +74,16 @@ class Organization(Base):
     trial_started_at = Column(DateTime, nullable=True)
     onboarding_completed = Column(Boolean, nullable=False, default=False)
     team_size = Column(String(20), nullable=True)  # "just_me", "2-5", "6-20", "20+"
+    # Legacy lead counter, superseded by usage_counters (leads_month_reset
+    # still marks the month the usage alert flags below belong to)
     leads_this_month = Column(Integer, nullable=False, default=0)
-    leads_month_reset = Column(DateTime, nullable=True)  # When to reset the counter
+    leads_month_reset = Column(DateTime, nullable=True)
 
     # Usage alert tracking (reset monthly with leads_month_reset)
     usage_alert_80_sent = Column(Boolean, nullable=False, default=False)
     usage_alert_100_sent = Column(Boolean, nullable=False, default=False)
 
-    # AI usage tracking
+    # Legacy AI usage counter, superseded by usage_counters
     ai_messages_this_month = Column(Integer, nullable=False, default=0)
     ai_messages_month_reset = Column(DateTime, nullable=True)
 
@@ -163,6 +167,12 @@ class Lead(Base):
     # Activities relationship
     activities = relationship("LeadActivity", back_populates="lead", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset scans for polling triggers ("leads since cursor")
+        Index("ix_leads_org_created", "organization_id", "created_at", "id"),
+        Index("ix_leads_org_updated", "organization_id", "updated_at", "id"),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -632,6 +642,7 @@ class ChatWidgetConfig(Base):
     collect_name = Column(Boolean, nullable=False, default=True)
     collect_company = Column(Boolean, nullable=False, default=False)
     quick_replies = Column(Text, nullable=True)  # JSON array of quick reply buttons
+    canned_answers = Column(Text, nullable=True)  # JSON array of {"question", "answer"} pinned first-turn replies
 
     # Widget appearance
     primary_color = Column(String(7), nullable=False, default="#4f46e5")  # Hex color
@@ -696,9 +707,15 @@ class ChatWidgetConversation(Base):
     lead_phone = Column(String(50), nullable=True)
     lead_captured_at = Column(DateTime, nullable=True)
 
-    # Conversation data
-    transcript = Column(Text, nullable=False, default="[]")  # JSON array of messages
-    message_count = Column(Integer, nullable=False, default=0)
+    # Conversation data (messages live in chat_widget_messages)
+    transcript = Column(Text, nullable=False, default="[]")  # Legacy JSON array, no longer written
+    message_count = Column(Integer, nullable=False, default=0)  # Visitor messages
+
+    # Rolling summary of messages that fell out of the LLM context window
+    context_summary = Column(Text, nullable=True)
+    context_summary_upto_id = Column(Integer, nullable=True)  # Last chat_widget_messages.id folded in
+    context_summarized_tokens = Column(Integer, nullable=False, default=0)  # Estimated tokens folded away
+    context_tokens_saved = Column(Integer, nullable=False, default=0)  # Prompt tokens avoided, all turns
 
     # Token tracking for cost analysis
     total_tokens_input = Column(Integer, nullable=False, default=0)
@@ -708,6 +725,41 @@ class ChatWidgetConversation(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     config = relationship("ChatWidgetConfig", back_populates="conversations")
+    messages = relationship(
+        "ChatWidgetMessage",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="ChatWidgetMessage.id",
+    )
+
+    __table_args__ = (
+        Index("ix_chat_widget_conversations_config_captured", "config_id", "lead_captured_at", "id"),
+    )
+
+
+class ChatWidgetMessage(Base):
+    """Individual messages in a chat widget conversation (append-only)."""
+
+    __tablename__ = "chat_widget_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(
+        Integer,
+        ForeignKey("chat_widget_conversations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    role = Column(String(20), nullable=False)  # "user" or "assistant"
+    content = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    conversation = relationship("ChatWidgetConversation", back_populates="messages")
+
+    __table_args__ = (
+        # History reads and pagination are range scans within one conversation
+        Index("ix_chat_widget_messages_conversation_id_id", "conversation_id", "id"),
+    )
 
 
 class FormVariant(Base):
@@ -825,7 +877,8 @@ class WebhookDelivery(Base):
 
     # Delivery details
     event = Column(String(50), nullable=False)  # Event type at time of delivery
-    payload = Column(Text, nullable=False)  # JSON payload sent
+    payload = Column(Text, nullable=True)  # JSON payload sent (NULL when stored compressed)
+    payload_compressed = Column(LargeBinary, nullable=True)  # zlib-compressed JSON payload
     response_status = Column(Integer, nullable=True)  # HTTP status code
     response_body = Column(Text, nullable=True)  # Response body (truncated)
     error_message = Column(String(500), nullable=True)  # Error if delivery failed
@@ -840,6 +893,11 @@ class WebhookDelivery(Base):
 
     webhook = relationship("Webhook", back_populates="deliveries")
 
+    __table_args__ = (
+        # Delivery log pagination and retention both scan by webhook + time
+        Index("ix_webhook_deliveries_webhook_delivered", "webhook_id", "delivered_at"),
+    )
+
 
 # ============================================================================
 # OAuth 2.0 Models (for Zapier and other integrations)
@@ -1088,6 +1146,10 @@ class Booking(Base):
     lead = relationship("Lead", backref="bookings")
     reminders = relationship("BookingReminder", back_populates="booking", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_bookings_meeting_type_created", "meeting_type_id", "created_at", "id"),
+    )
+
 
 class BookingReminder(Base):
     """Track reminder emails sent for bookings."""
@@ -1106,3 +1168,145 @@ class BookingReminder(Base):
 
     # Relationships
     booking = relationship("Booking", back_populates="reminders")
+
+
+# ============================================================================
+# Usage Metering
+# ============================================================================
+
+USAGE_METRIC_LEADS = "leads"
+USAGE_METRIC_CHAT_CONVERSATIONS = "chat_conversations"
+USAGE_METRIC_BOOKINGS = "bookings"
+USAGE_METRIC_AI_MESSAGES = "ai_messages"
+
+
+class UsageCounter(Base):
+    """Monthly usage of a plan-limited metric, one row per org, metric and month."""
+
+    __tablename__ = "usage_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(
+        Integer,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    metric = Column(String(40), nullable=False)  # One of the USAGE_METRIC_* values
+    period = Column(Date, nullable=False)  # First day of the month (UTC)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("organization_id", "metric", "period", name="uq_usage_counters_org_metric_period"),
+    )
+
+
+# CRMSyncJob.status values
+CRM_SYNC_PENDING = "pending"  # Waiting for its first attempt or a retry
+CRM_SYNC_RUNNING = "running"  # Claimed by a worker
+CRM_SYNC_SUCCEEDED = "succeeded"
+CRM_SYNC_DEAD = "dead"  # Out of retries; replayable from the API
+
+
+class CRMSyncJob(Base):
+    """Outbox entry for pushing one lead to the org's CRM, written with the lead."""
+
+    __tablename__ = "crm_sync_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(
+        Integer,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    lead_id = Column(
+        Integer,
+        ForeignKey("leads.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    provider = Column(String(20), nullable=False)  # Org's active CRM when the lead arrived
+    # False for backfill retries: they neither wait for nor hold up the org's live syncs
+    ordered = Column(Boolean, nullable=False, default=True)
+
+    status = Column(String(20), nullable=False, default=CRM_SYNC_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)  # When a worker claimed it
+    last_error = Column(String(500), nullable=True)
+    external_id = Column(String(100), nullable=True)  # Record id in the CRM
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Worker polling: due jobs in order
+        Index("ix_crm_sync_jobs_status_next_attempt", "status", "next_attempt_at"),
+        # Per-org ordering check and the replay API
+        Index("ix_crm_sync_jobs_org_status", "organization_id", "status", "id"),
+    )
+
+
+class CRMCompanyCacheEntry(Base):
+    """A CRM company id resolved from a normalized company name, per org and provider."""
+
+    __tablename__ = "crm_company_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(
+        Integer,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=True,  # NULL for the app-wide HubSpot account (marketing forms)
+    )
+    provider = Column(String(20), nullable=False)
+    normalized_name = Column(String(255), nullable=False)
+    external_id = Column(String(100), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "organization_id", "provider", "normalized_name", name="uq_crm_company_cache_org_provider_name"
+        ),
+    )
+
+
+# CRMBackfill.status values
+CRM_BACKFILL_PENDING = "pending"  # Waiting for a runner
+CRM_BACKFILL_RUNNING = "running"
+CRM_BACKFILL_COMPLETED = "completed"
+CRM_BACKFILL_CANCELLED = "cancelled"
+CRM_BACKFILL_FAILED = "failed"  # A whole batch failed (e.g. credentials); resumable from the API
+
+
+class CRMBackfill(Base):
+    """Bulk sync of an org's existing leads into a newly connected CRM, checkpointed by lead id."""
+
+    __tablename__ = "crm_backfills"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(
+        Integer,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    provider = Column(String(20), nullable=False)
+
+    status = Column(String(20), nullable=False, default=CRM_BACKFILL_PENDING)
+    until_lead_id = Column(Integer, nullable=False)  # Newer leads go through the outbox
+    last_lead_id = Column(Integer, nullable=False, default=0)  # Checkpoint: leads up to here are done
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    synced = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    locked_at = Column(DateTime, nullable=True)  # Runner heartbeat, refreshed every batch
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_crm_backfills_status", "status"),
+        Index("ix_crm_backfills_org_provider", "organization_id", "provider"),
+    )
@@ -0,0 +1,207 @@
+# app/integrations/company_cache.py
+"""
+Per-org company resolution cache for CRM company lookups.
+
+Syncing a lead with a company name searched the CRM for the company
+before creating or associating it, although the same names ("Acme Inc")
+arrive over and over. Resolved ids are now kept per (organization,
+provider), keyed by the normalized company name, so a repeat company
+skips the search call entirely.
+
+Entries live in the crm_company_cache table so they survive restarts,
+with a bounded per-process map in front of it:
+
+- Seeded from search and create results (remember_companies).
+- Dropped when the CRM answers 404 for a cached id, e.g. because the
+  company was deleted or merged (forget_companies). The next sync then
+  searches again.
+
+organization_id is None for the app-wide HubSpot account used by
+marketing forms.
+"""
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy.exc import IntegrityError
+
+from app.db import models
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in each process; the table holds the rest
+COMPANY_CACHE_MAX_ENTRIES = 10000
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s&]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_Key = tuple[Optional[int], str, str]
+
+
+def normalize_company_name(name: Optional[str]) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a company name ("Acme, Inc." -> "acme inc")."""
+    name = _PUNCTUATION_RE.sub(" ", (name or "").casefold())
+    return _WHITESPACE_RE.sub(" ", name).strip()[:255]
+
+
+class CompanyCache:
+    """Per-process LRU map from (organization_id, provider, normalized name) to the CRM company id."""
+
+    def __init__(self, max_entries: int = COMPANY_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[_Key, str]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def get(self, key: _Key) -> Optional[str]:
+        with self._lock:
+            external_id = self._entries.get(key)
+            if external_id is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return external_id
+
+    def set(self, key: _Key, external_id: str):
+        with self._lock:
+            self._entries[key] = external_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, organization_id: Optional[int], provider: str, external_ids: Set[str]):
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if k[:2] == (organization_id, provider) and v in external_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global company cache instance
+company_cache = CompanyCache()
+
+
+def _org_filter(organization_id: Optional[int]):
+    column = models.CRMCompanyCacheEntry.organization_id
+    return column.is_(None) if organization_id is None else column == organization_id
+
+
+def _load(organization_id: Optional[int], provider: str, names: list[str]) -> Dict[str, str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.CRMCompanyCacheEntry).filter(
+            _org_filter(organization_id),
+            models.CRMCompanyCacheEntry.provider == provider,
+            models.CRMCompanyCacheEntry.normalized_name.in_(names),
+        ).all()
+        return {row.normalized_name: row.external_id for row in rows}
+    finally:
+        db.close()
+
+
+def _store(organization_id: Optional[int], provider: str, ids: Dict[str, str]) -> None:
+    db = SessionLocal()
+    try:
+        existing = {
+            row.normalized_name: row
+            for row in db.query(models.CRMCompanyCacheEntry).filter(
+                _org_filter(organization_id),
+                models.CRMCompanyCacheEntry.provider == provider,
+                models.CRMCompanyCacheEntry.normalized_name.in_(list(ids)),
+            )
+        }
+        now = datetime.utcnow()
+        for name, external_id in ids.items():
+            row = existing.get(name)
+            if row:
+                row.external_id = external_id
+                row.updated_at = now
+            else:
+                db.add(models.CRMCompanyCacheEntry(
+                    organization_id=organization_id,
+                    provider=provider,
+                    normalized_name=name,
+                    external_id=external_id,
+                ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # Another sync stored the same names concurrently
+    finally:
+        db.close()
+
+
+def _delete(organization_id: Optional[int], provider: str, external_ids: list[str]) -> None:
+    db = SessionLocal()
+    try:
+        db.query(models.CRMCompanyCacheEntry).filter(
+            _org_filter(organization_id),
+            models.CRMCompanyCacheEntry.provider == provider,
+            models.CRMCompanyCacheEntry.external_id.in_(external_ids),
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def lookup_companies(organization_id: Optional[int], provider: str, names: Iterable[str]) -> Dict[str, str]:
+    """Cached company ids for the names that have one, keyed by normalized name."""
+    found: Dict[str, str] = {}
+    misses = []
+    for name in {normalize_company_name(n) for n in names} - {""}:
+        external_id = company_cache.get((organization_id, provider, name))
+        if external_id:
+            found[name] = external_id
+        else:
+            misses.append(name)
+
+    if misses:
+        loaded = await asyncio.to_thread(_load, organization_id, provider, misses)
+        for name, external_id in loaded.items():
+            company_cache.set((organization_id, provider, name), external_id)
+        found.update(loaded)
+    return found
+
+
+async def lookup_company(organization_id: Optional[int], provider: str, name: str) -> Optional[str]:
+    """The cached company id for a name, or None."""
+    return (await lookup_companies(organization_id, provider, [name])).get(normalize_company_name(name))
+
+
+async def remember_companies(organization_id: Optional[int], provider: str, ids: Dict[str, str]) -> None:
+    """Cache company ids by (unnormalized) name, from search or create results."""
+    normalized = {normalize_company_name(name): str(external_id) for name, external_id in ids.items() if external_id}
+    normalized.pop("", None)
+    if not normalized:
+        return
+    for name, external_id in normalized.items():
+        company_cache.set((organization_id, provider, name), external_id)
+    await asyncio.to_thread(_store, organization_id, provider, normalized)
+
+
+async def forget_companies(organization_id: Optional[int], provider: str, external_ids: Iterable[str]) -> None:
+    """Drop cached ids the CRM no longer knows (404)."""
+    ids = {str(external_id) for external_id in external_ids}
+    if not ids:
+        return
+    company_cache.forget(organization_id, provider, ids)
+    await asyncio.to_thread(_delete, organization_id, provider, list(ids))
+    logger.info(f"Dropped {len(ids)} stale {provider} company ids for org {organization_id}")
@@ -0,0 +1,210 @@
+# app/integrations/credentials.py
+"""
+Cached CRM credentials.
+
+Every CRM call needs the org's active IntegrationCredential. Reading it
+with a fresh SessionLocal() per call put several blocking database round
+trips on the event loop for each synced lead, so integrations read a
+per-process cache keyed by (organization_id, provider) instead. On a miss
+the row is loaded in a worker thread.
+
+Entries expire after CREDENTIAL_CACHE_TTL, or shortly before the access
+token itself expires. Writes invalidate through SQLAlchemy hooks rather
+than at each call site, since credentials are written by every OAuth
+callback, refresh and disconnect route, upsert_credential and account
+deletion:
+
+- ORM inserts/updates/deletes drop the (org, provider) entry at flush and
+  again after commit, so a read racing the commit can't re-cache the old
+  row.
+- Bulk query.update()/delete() on the table (used to deactivate old
+  credentials) clears the whole cache, as the affected rows aren't known.
+
+The hooks only reach the process that made the write. Other API workers
+and the sync worker keep serving what they cached for up to
+CREDENTIAL_CACHE_TTL, which is kept short for that reason: a disconnect or
+reconnect elsewhere takes effect within that window. A token refreshed
+elsewhere is picked up sooner, because a 401 makes the token manager
+re-read the row from the database.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.db import models
+from app.db.session import SessionLocal
+
+# Seconds a credential is served from cache. This bounds how long other
+# processes keep using a credential after it is disconnected or replaced.
+CREDENTIAL_CACHE_TTL = 30
+
+# Entries holding an expiring token are dropped this long before it expires
+CREDENTIAL_EXPIRY_SKEW_SECONDS = 60
+
+# Session.info key for (org, provider) pairs written in the open transaction
+_PENDING_KEY = "crm_credentials_written"
+_ALL = object()  # Pending marker: a bulk write touched unknown rows
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CRMCredential:
+    """Read-only copy of an org's active IntegrationCredential."""
+
+    organization_id: int
+    provider: str
+    auth_type: str
+    access_token: Optional[str]
+    refresh_token: Optional[str]
+    expires_at: Optional[datetime]
+    metadata: dict = field(default_factory=dict)  # Parsed `scopes` JSON (instance_url, api_domain, ...)
+
+
+class CredentialCache:
+    """Per-process map from (organization_id, provider) to the active credential (or None)."""
+
+    def __init__(self, ttl_seconds: int = CREDENTIAL_CACHE_TTL):
+        self._ttl = ttl_seconds
+        self._entries: dict[tuple[int, str], tuple[Optional[CRMCredential], float]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def get(self, organization_id: int, provider: str):
+        """The cached credential, None if the org has none, or _MISSING on a miss."""
+        key = (organization_id, provider)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() < entry[1]:
+                self._hits += 1
+                return entry[0]
+            self._entries.pop(key, None)
+            self._misses += 1
+            return _MISSING
+
+    def set(self, organization_id: int, provider: str, credential: Optional[CRMCredential]):
+        expires = time.time() + self._ttl
+        if credential and credential.expires_at:
+            token_expires = (credential.expires_at - datetime.utcnow()).total_seconds()
+            expires = min(expires, time.time() + token_expires - CREDENTIAL_EXPIRY_SKEW_SECONDS)
+        with self._lock:
+            self._entries[(organization_id, provider)] = (credential, expires)
+
+    def invalidate(self, organization_id: int, provider: str):
+        with self._lock:
+            self._entries.pop((organization_id, provider), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global credential cache instance
+credential_cache = CredentialCache()
+
+
+def _parse_metadata(scopes: Optional[str]) -> dict:
+    try:
+        meta = json.loads(scopes) if scopes else {}
+    except (TypeError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def _load_credential(organization_id: int, provider: str) -> Optional[CRMCredential]:
+    db = SessionLocal()
+    try:
+        cred = (
+            db.query(models.IntegrationCredential)
+            .filter(
+                models.IntegrationCredential.organization_id == organization_id,
+                models.IntegrationCredential.provider == provider,
+                models.IntegrationCredential.is_active.is_(True),
+            )
+            .order_by(models.IntegrationCredential.updated_at.desc())
+            .first()
+        )
+        if not cred:
+            return None
+        return CRMCredential(
+            organization_id=organization_id,
+            provider=provider,
+            auth_type=cred.auth_type or "pat",
+            access_token=cred.access_token,
+            refresh_token=cred.refresh_token,
+            expires_at=cred.expires_at,
+            metadata=_parse_metadata(cred.scopes),
+        )
+    finally:
+        db.close()
+
+
+async def get_credential(organization_id: int, provider: str) -> Optional[CRMCredential]:
+    """The org's active credential for a CRM (None if not connected), cached."""
+    cached = credential_cache.get(organization_id, provider)
+    if cached is not _MISSING:
+        return cached
+
+    credential = await asyncio.to_thread(_load_credential, organization_id, provider)
+    credential_cache.set(organization_id, provider, credential)
+    return credential
+
+
+# ---------------------------------------------------------------
+# INVALIDATION
+# ---------------------------------------------------------------
+@event.listens_for(models.IntegrationCredential, "after_insert")
+@event.listens_for(models.IntegrationCredential, "after_update")
+@event.listens_for(models.IntegrationCredential, "after_delete")
+def _invalidate_on_write(mapper, connection, target):
+    credential_cache.invalidate(target.organization_id, target.provider)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add((target.organization_id, target.provider))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and (
+        orm_execute_state.bind_mapper is models.IntegrationCredential.__mapper__
+    ):
+        credential_cache.clear()
+        orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if _ALL in pending:
+        credential_cache.clear()
+        return
+    for organization_id, provider in pending:
+        credential_cache.invalidate(organization_id, provider)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
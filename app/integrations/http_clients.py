@@ -0,0 +1,114 @@
+# app/integrations/http_clients.py
+"""
+Shared, pooled HTTP clients for the CRM integrations.
+
+Opening an httpx.AsyncClient per call means a fresh TCP connection and TLS
+handshake for every CRM request (four of them for one HubSpot lead). The
+registry instead keeps one keep-alive client per CRM, opened in the app
+lifespan and closed on shutdown, with timeouts and pool limits tuned per
+provider. httpx pools connections per origin inside a client, so a single
+client also covers per-org hosts such as Salesforce instance URLs and
+Zoho's regional API domains.
+
+Integration code borrows a client with:
+
+    async with crm_clients.client("hubspot") as client:
+        ...
+
+Calls made outside the app's event loop (scripts, tests, events dispatched
+on a throwaway loop) can't share those connections, so they get a one-off
+client with the same settings that is closed after use.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CRMClientSettings:
+    """Timeouts and connection pool limits for one CRM."""
+
+    timeout: httpx.Timeout
+    limits: httpx.Limits
+
+
+CRM_CLIENT_SETTINGS: dict[str, CRMClientSettings] = {
+    # Lead sync fans out into several calls per lead; stats pages fan out per owner
+    "hubspot": CRMClientSettings(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0),
+    ),
+    "pipedrive": CRMClientSettings(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    ),
+    # SOQL aggregate queries over large orgs can be slow to answer
+    "salesforce": CRMClientSettings(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_connections=30, max_keepalive_connections=10, keepalive_expiry=60.0),
+    ),
+    "zoho": CRMClientSettings(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    ),
+    "nutshell": CRMClientSettings(
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0),
+    ),
+}
+
+
+class CRMClientRegistry:
+    """One pooled httpx.AsyncClient per CRM for the lifetime of the app."""
+
+    def __init__(self, settings: Optional[dict[str, CRMClientSettings]] = None):
+        self._settings = settings or CRM_CLIENT_SETTINGS
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _new_client(self, provider: str) -> httpx.AsyncClient:
+        settings = self._settings[provider]
+        return httpx.AsyncClient(timeout=settings.timeout, limits=settings.limits)
+
+    async def start(self):
+        """Open the shared clients on the running loop (called from the app lifespan)."""
+        if self._clients:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._clients = {provider: self._new_client(provider) for provider in self._settings}
+        logger.info(f"CRM HTTP clients opened for {', '.join(self._clients)}")
+
+    async def stop(self):
+        """Close the shared clients and their pooled connections."""
+        clients, self._clients, self._loop = self._clients, {}, None
+        await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
+        if clients:
+            logger.info("CRM HTTP clients closed")
+
+    def _shared(self, provider: str) -> Optional[httpx.AsyncClient]:
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        return self._clients.get(provider) if on_loop else None
+
+    @asynccontextmanager
+    async def client(self, provider: str) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the provider's pooled client (or a one-off client off the app loop)."""
+        shared = self._shared(provider)
+        if shared is not None:
+            yield shared
+            return
+
+        async with self._new_client(provider) as client:
+            yield client
+
+
+# Global registry, started and stopped in main.py's lifespan
+crm_clients = CRMClientRegistry()
@@ -1,9 +1,9 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Union
-import httpx
 
-from app.db.session import SessionLocal
-from app.db import models
+from app.integrations.credentials import get_credential
+from app.integrations.http_clients import crm_clients
+from app.integrations.rate_limits import crm_rate_limiter, gather_limited
 from app.core.config import settings
 
 
@@ -13,22 +13,9 @@ NUTSHELL_API_URL = "https://api.nutshell.com/v1/json"
 # ---------------------------------------------------------------------
 # TOKEN LOADING
 # ---------------------------------------------------------------------
-def _get_org_token(organization_id: int) -> Optional[str]:
-    db = SessionLocal()
-    try:
-        cred = (
-            db.query(models.IntegrationCredential)
-            .filter(
-                models.IntegrationCredential.organization_id == organization_id,
-                models.IntegrationCredential.provider == "nutshell",
-                models.IntegrationCredential.is_active == True,
-            )
-            .order_by(models.IntegrationCredential.updated_at.desc())
-            .first()
-        )
-        return cred.access_token if cred else None
-    finally:
-        db.close()
+async def _get_org_token(organization_id: int) -> Optional[str]:
+    cred = await get_credential(organization_id, "nutshell")
+    return cred.access_token if cred else None
 
 
 # ---------------------------------------------------------------------
@@ -38,6 +25,7 @@ async def _nutshell_request(
     method: str,
     params: Dict[str, Any],
     token: Optional[str],
+    organization_id: Optional[int] = None,
 ) -> Union[Dict[str, Any], str, None]:
 
     api_key = token or settings.nutshell_api_key
@@ -51,9 +39,13 @@ async def _nutshell_request(
         "id": "1",
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with crm_clients.client("nutshell") as client:
         try:
-            resp = await client.post(
+            resp = await crm_rate_limiter.send(
+                client,
+                "nutshell",
+                organization_id,
+                "POST",
                 NUTSHELL_API_URL,
                 json=payload,
                 auth=(api_key, ""),
@@ -82,12 +74,13 @@ async def get_owners(
     organization_id: Optional[int] = None,
 ) -> Union[List[Dict[str, Any]], Dict[str, str]]:
 
-    token = _get_org_token(organization_id) if organization_id else None
+    token = await _get_org_token(organization_id) if organization_id else None
 
     result = await _nutshell_request(
         "findUsers",
         params={"filter": {}},
         token=token,
+        organization_id=organization_id,
     )
 
     if result == "unauthorized":
@@ -119,6 +112,7 @@ async def _count_deals_created_since(
     owner_id: str,
     since_ms: int,
     token: Optional[str],
+    organization_id: Optional[int] = None,
 ) -> int:
 
     since_iso = datetime.fromtimestamp(since_ms / 1000, timezone.utc).isoformat()
@@ -133,6 +127,7 @@ async def _count_deals_created_since(
             "orderBy": "createdTime",
         },
         token=token,
+        organization_id=organization_id,
     )
 
     if result in ("unauthorized", "connection_failed"):
@@ -156,7 +151,7 @@ async def get_salespeople_stats(
     **kwargs: Any,
 ) -> List[Dict[str, Any]]:
 
-    token = _get_org_token(organization_id) if organization_id else None
+    token = await _get_org_token(organization_id) if organization_id else None
 
     owners_resp = await get_owners(organization_id=organization_id)
 
@@ -182,20 +177,25 @@ async def get_salespeople_stats(
     since = now - timedelta(days=max(0, int(days)))
     since_ms = int(since.timestamp() * 1000)
 
+    # Deal searches for all owners run concurrently rather than one after another
+    deal_counts = await gather_limited(
+        _count_deals_created_since(
+            owner_id=str(o.get("id") or ""),
+            since_ms=since_ms,
+            token=token,
+            organization_id=organization_id,
+        )
+        for o in owners
+    )
+
     rows: List[Dict[str, Any]] = []
 
-    for o in owners:
+    for o, new_deals in zip(owners, deal_counts):
         oid = str(o.get("id") or "")
         name = " ".join(
             filter(None, [o.get("firstName"), o.get("lastName")])
         ).strip() or (o.get("email") or oid)
 
-        new_deals = await _count_deals_created_since(
-            owner_id=oid,
-            since_ms=since_ms,
-            token=token,
-        )
-
         rows.append(
             {
                 "owner_id": oid,
@@ -242,35 +242,50 @@ async def create_lead(
     Create a new lead in Nutshell CRM.
 
     Nutshell requires creating a contact first, then linking to a lead.
-    Uses JSON-RPC methods: newContact, newLead
+    An existing contact with the same email is reused, so a retried sync
+    doesn't create a duplicate contact.
+    Uses JSON-RPC methods: searchByEmail, newContact, newLead
     """
-    token = _get_org_token(organization_id) if organization_id else None
+    token = await _get_org_token(organization_id) if organization_id else None
 
     # Parse name into first/last
     name_parts = (contact_name or contact_email or "Unknown").strip().split(" ", 1)
     first_name = name_parts[0]
     last_name = name_parts[1] if len(name_parts) > 1 else ""
 
-    # Step 1: Create or find contact
-    contact_result = await _nutshell_request(
-        "newContact",
-        params={
-            "contact": {
-                "name": {
-                    "givenName": first_name,
-                    "familyName": last_name,
-                },
-                "email": [contact_email] if contact_email else [],
-            }
-        },
-        token=token,
-    )
+    # Step 1: Find or create contact
+    contact_id = None
+    if contact_email:
+        found = await _nutshell_request(
+            "searchByEmail",
+            params={"emailAddressString": contact_email},
+            token=token,
+            organization_id=organization_id,
+        )
+        if isinstance(found, dict) and found.get("contacts"):
+            contact_id = found["contacts"][0].get("id")
+
+    if not contact_id:
+        contact_result = await _nutshell_request(
+            "newContact",
+            params={
+                "contact": {
+                    "name": {
+                        "givenName": first_name,
+                        "familyName": last_name,
+                    },
+                    "email": [contact_email] if contact_email else [],
+                }
+            },
+            token=token,
+            organization_id=organization_id,
+        )
 
-    if isinstance(contact_result, str):
-        # Contact creation failed, try to create lead without contact
-        contact_id = None
-    else:
-        contact_id = contact_result.get("id") if contact_result else None
+        if isinstance(contact_result, str):
+            # Contact creation failed, try to create lead without contact
+            contact_id = None
+        else:
+            contact_id = contact_result.get("id") if contact_result else None
 
     # Step 2: Create lead
     lead_params: Dict[str, Any] = {
@@ -287,6 +302,7 @@ async def create_lead(
         "newLead",
         params=lead_params,
         token=token,
+        organization_id=organization_id,
     )
 
     if isinstance(lead_result, str):
@@ -2,56 +2,63 @@ from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Union
 
 import logging
-import httpx
-from app.db.session import SessionLocal
-from app.db import models
+from app.integrations.http_clients import crm_clients
+from app.integrations.rate_limits import crm_rate_limiter, gather_limited
+from app.integrations.token_manager import get_access_token, refresh_after_unauthorized
 
 logger = logging.getLogger(__name__)
 
 PIPEDRIVE_BASE_URL = "https://api.pipedrive.com/v1"
 
 
-def _get_org_token(organization_id: int) -> Optional[str]:
-    db = SessionLocal()
-    try:
-        cred = (
-            db.query(models.IntegrationCredential)
-            .filter(
-                models.IntegrationCredential.organization_id == organization_id,
-                models.IntegrationCredential.provider == "pipedrive",
-                models.IntegrationCredential.is_active == True,
-            )
-            .order_by(models.IntegrationCredential.updated_at.desc())
-            .first()
-        )
-        return cred.access_token if cred else None
-    finally:
-        db.close()
+async def _get_org_token(organization_id: int) -> Optional[str]:
+    return await get_access_token(organization_id, "pipedrive")
 
 
 async def _request(
     method: str,
     url: str,
     token: Optional[str],
+    organization_id: Optional[int] = None,
     **kwargs: Any,
 ) -> Union[Dict[str, Any], str, None]:
+    """
+    Make an authenticated Pipedrive request.
+
+    With organization_id, a 401 refreshes the org's token and retries once.
+    """
 
     if not token:
         logger.warning("Pipedrive request attempted without token for url %s", url)
         return "unauthorized"
 
     params = kwargs.pop("params", {}) or {}
-    params["api_token"] = token
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with crm_clients.client("pipedrive") as client:
         try:
-            resp = await client.request(
+            resp = await crm_rate_limiter.send(
+                client,
+                "pipedrive",
+                organization_id,
                 method,
                 url,
-                params=params,
+                params={**params, "api_token": token},
                 **kwargs,
             )
 
+            if resp.status_code == 401 and organization_id is not None:
+                new_token = await refresh_after_unauthorized(organization_id, "pipedrive", token)
+                if new_token:
+                    resp = await crm_rate_limiter.send(
+                        client,
+                        "pipedrive",
+                        organization_id,
+                        method,
+                        url,
+                        params={**params, "api_token": new_token},
+                        **kwargs,
+                    )
+
             if resp.status_code in (401, 403):
                 logger.warning(
                     "Pipedrive unauthorized for url %s status %s",
@@ -83,10 +90,10 @@ async def get_owners(
     organization_id: Optional[int] = None,
 ) -> Union[List[Dict[str, Any]], Dict[str, str]]:
 
-    token = _get_org_token(organization_id) if organization_id else None
+    token = await _get_org_token(organization_id) if organization_id else None
     url = f"{PIPEDRIVE_BASE_URL}/users"
 
-    data = await _request("GET", url, token)
+    data = await _request("GET", url, token, organization_id)
 
     if data == "unauthorized":
         return {"warning": "Pipedrive token missing or invalid."}
@@ -115,6 +122,7 @@ async def _count_deals_created_since(
     owner_id: str,
     since_ms: int,
     token: Optional[str],
+    organization_id: Optional[int] = None,
 ) -> int:
 
     since_iso = datetime.fromtimestamp(since_ms / 1000, timezone.utc).isoformat()
@@ -127,7 +135,7 @@ async def _count_deals_created_since(
         "since": since_iso,
     }
 
-    data = await _request("GET", url, token, params=params)
+    data = await _request("GET", url, token, organization_id, params=params)
 
     if data == "unauthorized":
         return 0
@@ -147,7 +155,7 @@ async def get_salespeople_stats(
     **kwargs: Any,
 ) -> List[Dict[str, Any]]:
 
-    token = _get_org_token(organization_id) if organization_id else None
+    token = await _get_org_token(organization_id) if organization_id else None
 
     owners_resp = await get_owners(organization_id=organization_id)
 
@@ -172,18 +180,23 @@ async def get_salespeople_stats(
     since = now - timedelta(days=max(0, int(days)))
     since_ms = int(since.timestamp() * 1000)
 
+    # Deal searches for all owners run concurrently rather than one after another
+    deal_counts = await gather_limited(
+        _count_deals_created_since(
+            owner_id=str(o.get("id") or ""),
+            since_ms=since_ms,
+            token=token,
+            organization_id=organization_id,
+        )
+        for o in owners
+    )
+
     rows: List[Dict[str, Any]] = []
 
-    for o in owners:
+    for o, new_deals in zip(owners, deal_counts):
         oid = str(o.get("id") or "")
         name = o.get("firstName") or o.get("email") or oid
 
-        new_deals = await _count_deals_created_since(
-            owner_id=oid,
-            since_ms=since_ms,
-            token=token,
-        )
-
         rows.append(
             {
                 "owner_id": oid,
@@ -215,41 +228,103 @@ async def owners_stats(
     )
 
 
+async def search_person_by_email(
+    email: str,
+    token: Optional[str],
+    organization_id: Optional[int] = None,
+) -> Union[Dict[str, Any], str, None]:
+    """
+    Find a person by exact email.
+
+    Returns the person, None if there is no match, or the _request error
+    string if the search failed.
+    """
+    data = await _request(
+        "GET",
+        f"{PIPEDRIVE_BASE_URL}/persons/search",
+        token,
+        organization_id,
+        params={"term": email, "fields": "email", "exact_match": "true", "limit": 1},
+    )
+    if isinstance(data, str):
+        return data
+    items = ((data or {}).get("data") or {}).get("items") or []
+    return items[0].get("item") if items else None
+
+
+async def _find_lead(
+    person_id: int,
+    title: str,
+    token: Optional[str],
+    organization_id: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """The person's existing lead with this title, if any."""
+    data = await _request(
+        "GET",
+        f"{PIPEDRIVE_BASE_URL}/leads",
+        token,
+        organization_id,
+        params={"person_id": person_id, "archived_status": "not_archived"},
+    )
+    if isinstance(data, str) or data is None:
+        return None
+    for lead in data.get("data") or []:
+        if lead.get("title") == title:
+            return lead
+    return None
+
+
 async def create_lead(
     title: str,
     name: str,
     email: str,
     organization_id: Optional[int] = None,
 ) -> Optional[Dict[str, Any]]:
+    """
+    Create a person and a lead in Pipedrive.
 
-    token = _get_org_token(organization_id) if organization_id else None
+    The person is looked up by email first, and an existing lead with the
+    same title is reused, so a retried sync doesn't create duplicates.
+    """
+    token = await _get_org_token(organization_id) if organization_id else None
 
-    person_url = f"{PIPEDRIVE_BASE_URL}/persons"
-    person_payload = {
-        "name": name or email,
-        "email": [
-            {
-                "value": email,
-                "primary": True,
-                "label": "work",
-            }
-        ],
-    }
+    existing = await search_person_by_email(email, token, organization_id) if email else None
+    if isinstance(existing, str):
+        return None
 
-    person_data = await _request(
-        "POST",
-        person_url,
-        token,
-        json=person_payload,
-    )
+    if existing and existing.get("id"):
+        person_id = existing["id"]
+        lead = await _find_lead(person_id, title, token, organization_id)
+        if lead:
+            return lead
+    else:
+        person_url = f"{PIPEDRIVE_BASE_URL}/persons"
+        person_payload = {
+            "name": name or email,
+            "email": [
+                {
+                    "value": email,
+                    "primary": True,
+                    "label": "work",
+                }
+            ],
+        }
+
+        person_data = await _request(
+            "POST",
+            person_url,
+            token,
+            organization_id,
+            json=person_payload,
+        )
 
-    if isinstance(person_data, str) or person_data is None:
-        return None
+        if isinstance(person_data, str) or person_data is None:
+            return None
 
-    person = person_data.get("data") or {}
-    person_id = person.get("id")
-    if not person_id:
-        return None
+        person = person_data.get("data") or {}
+        person_id = person.get("id")
+        if not person_id:
+            return None
 
     lead_url = f"{PIPEDRIVE_BASE_URL}/leads"
     lead_payload = {
@@ -261,6 +336,7 @@ async def create_lead(
         "POST",
         lead_url,
         token,
+        organization_id,
         json=lead_payload,
     )
 
@@ -0,0 +1,341 @@
+# app/integrations/rate_limits.py
+"""
+Outbound rate limiting for the CRM APIs.
+
+Each CRM enforces a burst limit per connected account, plus a daily budget.
+Without throttling, a campaign burst of lead syncs trips the burst limit.
+The 429s that follow were treated like any other error, so leads failed
+to sync and stats pages showed zeros.
+
+Every CRM request goes through crm_rate_limiter.send(), which keeps a token
+bucket per (provider, organization) sized from the provider's published
+burst limit:
+
+- When the bucket is empty, callers queue for the next free slot instead of
+  failing.
+- A 429 pauses the whole account for its Retry-After (or an exponential
+  backoff if there is no header) before the request is retried. It also
+  halves the bucket's refill rate, which then recovers gradually as
+  requests succeed again.
+- A Retry-After longer than MAX_RETRY_AFTER_SECONDS means the daily budget
+  is spent. That 429 is returned to the caller instead of being waited out.
+- The remaining burst and daily budget that providers report in response
+  headers are recorded per account in stats(). /health/crm is public, so it
+  only shows summary(), the totals per provider.
+
+Buckets use a thread lock and reserve slots up front, rather than holding
+asyncio primitives, so they can be shared by the app loop and the
+throwaway loops that events are dispatched on.
+"""
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Any, Awaitable, Iterable, Optional, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 429 retries per request before the response is returned to the caller
+MAX_RATE_LIMIT_RETRIES = 3
+
+# Longer Retry-After values (daily budget exhausted) aren't waited out
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+# Backoff when a 429 carries no Retry-After: 1s, 2s, 4s
+BACKOFF_BASE_SECONDS = 1.0
+
+# Adaptive refill rate: halved on each 429, recovered per successful request
+MIN_RATE_FACTOR = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+# Requests one call fans out concurrently (e.g. a deal count per owner)
+FANOUT_CONCURRENCY = 8
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ProviderRateLimit:
+    """A provider's published burst limit, and where it reports remaining budget."""
+
+    requests: int
+    per_seconds: float
+    burst_remaining_header: Optional[str] = None
+    daily_remaining_header: Optional[str] = None
+
+
+CRM_RATE_LIMITS: dict[str, ProviderRateLimit] = {
+    # Public apps: 100 requests per 10 seconds per connected account
+    "hubspot": ProviderRateLimit(
+        requests=100,
+        per_seconds=10.0,
+        burst_remaining_header="X-HubSpot-RateLimit-Remaining",
+        daily_remaining_header="X-HubSpot-RateLimit-Daily-Remaining",
+    ),
+    # HubSpot CRM search endpoints: 5 requests per second per account, limited
+    # apart from the general bucket and answered without rate limit headers
+    "hubspot-search": ProviderRateLimit(requests=5, per_seconds=1.0),
+    # Token-based burst limit over a rolling 2 second window (lowest plan)
+    "pipedrive": ProviderRateLimit(
+        requests=20,
+        per_seconds=2.0,
+        burst_remaining_header="X-RateLimit-Remaining",
+        daily_remaining_header="X-Daily-Requests-Left",
+    ),
+    # Concurrency limit of the Standard edition; credits are metered per day
+    "zoho": ProviderRateLimit(
+        requests=10,
+        per_seconds=1.0,
+        daily_remaining_header="X-RATELIMIT-DAY-REMAINING",
+    ),
+    # No burst limit, but a 24h API request allocation reported in Sforce-Limit-Info
+    "salesforce": ProviderRateLimit(
+        requests=25,
+        per_seconds=1.0,
+        daily_remaining_header="Sforce-Limit-Info",
+    ),
+    # No published limit; kept conservative
+    "nutshell": ProviderRateLimit(requests=10, per_seconds=1.0),
+}
+
+_SFORCE_USAGE_RE = re.compile(r"api-usage=(\d+)/(\d+)")
+
+
+def _header_int(headers: httpx.Headers, name: Optional[str]) -> Optional[int]:
+    value = headers.get(name) if name else None
+    if value is None:
+        return None
+    match = _SFORCE_USAGE_RE.search(value)
+    if match:
+        used, limit = (int(n) for n in match.groups())
+        return max(0, limit - used)
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def retry_after_seconds(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket for one (provider, account), with 429 pauses and an adaptive rate."""
+
+    def __init__(self, limit: ProviderRateLimit):
+        self.limit = limit
+        self._capacity = float(limit.requests)
+        self._base_rate = limit.requests / limit.per_seconds
+        self._rate_factor = 1.0
+        self._tokens = self._capacity
+        self._updated = time.monotonic()  # In the future while paused by a 429
+        self._paused_until = 0.0
+        self._lock = Lock()
+
+        self._requests = 0
+        self._queued = 0
+        self._queued_seconds = 0.0
+        self._rate_limited = 0
+        self._burst_remaining: Optional[int] = None
+        self._daily_remaining: Optional[int] = None
+
+    def _rate(self) -> float:
+        return self._base_rate * self._rate_factor
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate())
+            self._updated = now
+
+    def _reserve(self) -> float:
+        """Take a token (going into debt if empty) and return the wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._updated - now) + max(0.0, -self._tokens) / self._rate()
+            self._requests += 1
+            if wait > 0:
+                self._queued += 1
+                self._queued_seconds += wait
+            return wait
+
+    async def acquire(self):
+        """Wait for a request slot."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # A 429 seen while this caller was queued pauses it too
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Stop sending for `seconds` after a 429 and slow the refill rate."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._rate_limited += 1
+            if now >= self._paused_until:  # Concurrent 429s from one burst slow the rate once
+                self._rate_factor = max(MIN_RATE_FACTOR, self._rate_factor / 2)
+            until = now + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = max(self._updated, until)
+
+    def record_response(self, response: httpx.Response):
+        """Track reported budget; successful requests let the rate recover."""
+        headers = response.headers
+        with self._lock:
+            burst = _header_int(headers, self.limit.burst_remaining_header)
+            daily = _header_int(headers, self.limit.daily_remaining_header)
+            if burst is not None:
+                self._burst_remaining = burst
+            if daily is not None:
+                self._daily_remaining = daily
+            if response.status_code != 429:
+                self._rate_factor = min(1.0, self._rate_factor + RATE_RECOVERY_STEP)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(max(0.0, self._tokens), 2),
+                "capacity": int(self._capacity),
+                "rate_per_second": round(self._rate(), 3),
+                "requests": self._requests,
+                "queued": self._queued,
+                "queued_seconds": round(self._queued_seconds, 3),
+                "rate_limited": self._rate_limited,
+                "burst_remaining": self._burst_remaining,
+                "daily_remaining": self._daily_remaining,
+            }
+
+
+class CRMRateLimiter:
+    """Token buckets per (provider, account), created on first use."""
+
+    def __init__(self, limits: Optional[dict[str, ProviderRateLimit]] = None):
+        self._limits = limits or CRM_RATE_LIMITS
+        self._buckets: dict[tuple[str, Optional[int]], TokenBucket] = {}
+        self._lock = Lock()
+
+    def bucket(self, provider: str, account: Optional[int]) -> TokenBucket:
+        key = (provider, account)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self._limits[provider])
+            return bucket
+
+    async def send(
+        self,
+        client: httpx.AsyncClient,
+        provider: str,
+        account: Optional[int],
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a CRM request within the account's rate limit.
+
+        account is the organization whose credential the request uses (None
+        for the app-wide key). A 429 is retried up to MAX_RATE_LIMIT_RETRIES
+        times; if it persists, or the wait exceeds MAX_RETRY_AFTER_SECONDS,
+        the 429 response is returned.
+        """
+        bucket = self.bucket(provider, account)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await bucket.acquire()
+            resp = await client.request(method, url, **kwargs)
+            bucket.record_response(resp)
+            if resp.status_code != 429:
+                return resp
+
+            delay = retry_after_seconds(resp.headers)
+            if delay is None:
+                delay = BACKOFF_BASE_SECONDS * 2 ** attempt
+            if attempt == MAX_RATE_LIMIT_RETRIES or delay > MAX_RETRY_AFTER_SECONDS:
+                break
+            logger.warning(
+                f"{provider} rate limited for account {account}, retrying in {delay:.1f}s",
+                extra={"event": "crm_rate_limited", "provider": provider, "organization_id": account},
+            )
+            bucket.pause(delay)
+        return resp
+
+    def stats(self) -> dict:
+        """Bucket state and reported remaining budget per provider and account."""
+        with self._lock:
+            buckets = list(self._buckets.items())
+        stats: dict[str, dict] = {}
+        for (provider, account), bucket in buckets:
+            stats.setdefault(provider, {})[str(account) if account is not None else "default"] = bucket.stats()
+        return stats
+
+    def summary(self) -> dict:
+        """
+        Totals per provider across accounts, for the public health check.
+
+        Leaves out organization ids and per-account budgets; the lowest
+        reported remaining budget shows whether any account is close to
+        running out.
+        """
+        summary: dict[str, dict] = {}
+        for provider, accounts in self.stats().items():
+            buckets = list(accounts.values())
+            remaining = [b["daily_remaining"] for b in buckets if b["daily_remaining"] is not None]
+            summary[provider] = {
+                "accounts": len(buckets),
+                "requests": sum(b["requests"] for b in buckets),
+                "queued": sum(b["queued"] for b in buckets),
+                "queued_seconds": round(sum(b["queued_seconds"] for b in buckets), 3),
+                "rate_limited": sum(b["rate_limited"] for b in buckets),
+                "min_daily_remaining": min(remaining) if remaining else None,
+            }
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Global limiter shared by all CRM integrations
+crm_rate_limiter = CRMRateLimiter()
+
+
+async def gather_limited(aws: Iterable[Awaitable[T]], limit: int = FANOUT_CONCURRENCY) -> list[T]:
+    """
+    asyncio.gather with at most `limit` awaitables in flight, results in order.
+
+    Fan-out still goes through the account's bucket, so the limit only caps
+    how many requests queue on it at once.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
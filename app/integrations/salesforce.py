@@ -3,19 +3,39 @@ from __future__ import annotations
 
 from typing import List, Dict, Any, Optional, Tuple
 
-import httpx
-import json
+import asyncio
+import csv
+import io
 import os
+import time
+import httpx
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.db import models
-from app.db.session import SessionLocal  # for background tasks
+from app.integrations.credentials import get_credential
+from app.integrations.http_clients import crm_clients
+from app.integrations.rate_limits import crm_rate_limiter
+from app.integrations.token_manager import get_access_token, refresh_after_unauthorized
 
 API_VERSION = os.getenv("SALESFORCE_API_VERSION", "60.0")  # safe default
 
+# Bulk API 2.0 ingest jobs: how often to poll, and how long to wait for one
+BULK_POLL_SECONDS = 2.0
+BULK_TIMEOUT_SECONDS = 900
+
+# Emails per duplicate-check SOQL query (keeps the query well under the URL limit)
+BULK_DEDUPE_CHUNK = 200
+
+
+class SalesforceRequestError(HTTPException):
+    """Salesforce answered with an error: a 502 to API callers, keeping Salesforce's own status."""
+
+    def __init__(self, upstream_status: int, detail: str):
+        super().__init__(status_code=502, detail=detail)
+        self.upstream_status = upstream_status
 
-def _get_active_sf_credential(db: Session, org_id: int) -> Tuple[str, str]:
+
+async def _get_active_sf_credential(org_id: int) -> Tuple[str, str]:
     """
     Returns (access_token, instance_url).
 
@@ -25,28 +45,12 @@ def _get_active_sf_credential(db: Session, org_id: int) -> Tuple[str, str]:
 
     The access token should be the Bearer token stored in access_token.
     """
-    cred = (
-        db.query(models.IntegrationCredential)
-        .filter(
-            models.IntegrationCredential.organization_id == org_id,
-            models.IntegrationCredential.provider == "salesforce",
-            models.IntegrationCredential.is_active == True,  # noqa: E712
-        )
-        .order_by(models.IntegrationCredential.updated_at.desc())
-        .first()
-    )
+    cred = await get_credential(org_id, "salesforce")
     if not cred or not cred.access_token:
         raise HTTPException(status_code=400, detail="No active Salesforce credential configured")
 
-    # Attempt to extract instance_url from scopes JSON (cheap stash spot),
-    # else fallback to env for local dev.
-    instance_url: Optional[str] = None
-    if cred.scopes:
-        try:
-            meta = json.loads(cred.scopes)
-            instance_url = meta.get("instance_url") or meta.get("instanceUrl")
-        except Exception:
-            pass
+    # instance_url is stashed in the scopes JSON, else fallback to env for local dev.
+    instance_url: Optional[str] = cred.metadata.get("instance_url") or cred.metadata.get("instanceUrl")
     if not instance_url:
         instance_url = os.getenv("SALESFORCE_INSTANCE_URL")
 
@@ -56,19 +60,51 @@ def _get_active_sf_credential(db: Session, org_id: int) -> Tuple[str, str]:
             detail="Salesforce instance_url not found; please reconnect Salesforce (or set SALESFORCE_INSTANCE_URL).",
         )
 
-    return cred.access_token, instance_url.rstrip("/")
+    # Refreshed first if the session is about to expire
+    access_token = await get_access_token(org_id, "salesforce") or cred.access_token
+    return access_token, instance_url.rstrip("/")
 
 
-async def _sf_query(instance_url: str, access_token: str, soql: str) -> Dict[str, Any]:
-    url = f"{instance_url}/services/data/v{API_VERSION}/query"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    params = {"q": soql}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=headers, params=params)
+async def _sf_request(org_id: int, access_token: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Send a Salesforce API request within the org's rate limit; an expired
+    session is refreshed and the request retried once.
+    """
+    headers = kwargs.pop("headers", {})
+
+    async def send(token: str) -> httpx.Response:
+        return await crm_rate_limiter.send(
+            client, "salesforce", org_id, method, url, headers={**headers, "Authorization": f"Bearer {token}"}, **kwargs
+        )
+
+    async with crm_clients.client("salesforce") as client:
+        r = await send(access_token)
+        if r.status_code == 401:
+            new_token = await refresh_after_unauthorized(org_id, "salesforce", access_token)
+            if new_token:
+                r = await send(new_token)
+        return r
+
+
+async def _sf_query(org_id: int, instance_url: str, access_token: str, soql: str) -> Dict[str, Any]:
+    """Run a SOQL query, following nextRecordsUrl until every batch of records is fetched."""
+    url: Optional[str] = f"{instance_url}/services/data/v{API_VERSION}/query"
+    params: Optional[Dict[str, str]] = {"q": soql}
+    records: List[Dict[str, Any]] = []
+    result: Dict[str, Any] = {}
+    while url:
+        r = await _sf_request(org_id, access_token, "GET", url, params=params)
         if r.status_code >= 400:
             # surface the SF error text for debugging
             raise HTTPException(status_code=502, detail=f"Salesforce error {r.status_code}: {r.text}")
-        return r.json()
+        result = r.json()
+        records.extend(result.get("records", []))
+        next_records_url = result.get("nextRecordsUrl")
+        url = f"{instance_url}{next_records_url}" if next_records_url and not result.get("done", True) else None
+        params = None
+    result.pop("nextRecordsUrl", None)
+    result.update(done=True, records=records)
+    return result
 
 
 def _last_n_days_clause(days: int) -> str:
@@ -126,7 +162,7 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
 
     Returns a list of rows compatible with your HubSpot stats schema.
     """
-    access_token, instance_url = _get_active_sf_credential(db, org_id)
+    access_token, instance_url = await _get_active_sf_credential(org_id)
     window = _last_n_days_clause(days)
 
     owner_map: Dict[str, Dict[str, Any]] = {}
@@ -140,8 +176,6 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
         "(TaskSubtype = 'Email' OR Type = 'Email') "
         "GROUP BY OwnerId"
     )
-    emails = await _sf_query(instance_url, access_token, soql_emails)
-    _merge_counts(owner_map, "emails_last_n_days", emails.get("records", []))
 
     # --- Calls (Task) ---
     soql_calls = (
@@ -151,8 +185,6 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
         "(TaskSubtype = 'Call' OR Type = 'Call') "
         "GROUP BY OwnerId"
     )
-    calls = await _sf_query(instance_url, access_token, soql_calls)
-    _merge_counts(owner_map, "calls_last_n_days", calls.get("records", []))
 
     # --- Meetings (Event) ---
     # We treat any Event in the window as a meeting; you can tighten with Type if your org uses it.
@@ -162,8 +194,6 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
         f"WHERE StartDateTime = {window} "
         "GROUP BY OwnerId"
     )
-    meetings = await _sf_query(instance_url, access_token, soql_meetings)
-    _merge_counts(owner_map, "meetings_last_n_days", meetings.get("records", []))
 
     # --- New Deals (Opportunity) ---
     soql_deals = (
@@ -172,7 +202,17 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
         f"WHERE CreatedDate = {window} "
         "GROUP BY OwnerId"
     )
-    deals = await _sf_query(instance_url, access_token, soql_deals)
+
+    # The four aggregates are independent, so they're issued concurrently
+    emails, calls, meetings, deals = await asyncio.gather(
+        *(
+            _sf_query(org_id, instance_url, access_token, soql)
+            for soql in (soql_emails, soql_calls, soql_meetings, soql_deals)
+        )
+    )
+    _merge_counts(owner_map, "emails_last_n_days", emails.get("records", []))
+    _merge_counts(owner_map, "calls_last_n_days", calls.get("records", []))
+    _merge_counts(owner_map, "meetings_last_n_days", meetings.get("records", []))
     _merge_counts(owner_map, "new_deals_last_n_days", deals.get("records", []))
 
     # If nothing found, short-circuit
@@ -182,7 +222,7 @@ async def get_salespeople_stats(*, db: Session, org_id: int, days: int) -> List[
     # Hydrate owner name/email
     owner_ids = ",".join([f"'{oid}'" for oid in owner_map.keys() if oid])
     soql_users = f"SELECT Id, Name, Email FROM User WHERE Id IN ({owner_ids})"
-    users = await _sf_query(instance_url, access_token, soql_users)
+    users = await _sf_query(org_id, instance_url, access_token, soql_users)
     _hydrate_owner_meta(owner_map, users.get("records", []))
 
     # Stable order: by owner_name then owner_id
@@ -202,17 +242,20 @@ async def create_lead(
     """
     Create a Lead in Salesforce for the given org.
     Uses the active Salesforce IntegrationCredential for that org.
-    Intended to be called from a FastAPI BackgroundTask.
+    An existing Lead with the same email is returned instead ({"id": ...}),
+    so a retried sync doesn't create a duplicate.
     """
     if not email:
         raise HTTPException(status_code=400, detail="Salesforce lead requires an email")
 
-    # open a short-lived session just for this background task
-    db = SessionLocal()
-    try:
-        access_token, instance_url = _get_active_sf_credential(db, org_id)
-    finally:
-        db.close()
+    access_token, instance_url = await _get_active_sf_credential(org_id)
+
+    escaped = email.replace("\\", "\\\\").replace("'", "\\'")
+    existing = await _sf_query(
+        org_id, instance_url, access_token, f"SELECT Id FROM Lead WHERE Email = '{escaped}' LIMIT 1"
+    )
+    if existing.get("records"):
+        return {"id": existing["records"][0]["Id"], "existing": True}
 
     first = first_name or ""
     last = last_name or "Unknown"
@@ -226,13 +269,134 @@ async def create_lead(
     }
 
     url = f"{instance_url}/services/data/v{API_VERSION}/sobjects/Lead"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
+    headers = {"Content-Type": "application/json"}
+
+    r = await _sf_request(org_id, access_token, "POST", url, headers=headers, json=payload)
+    if r.status_code >= 400:
+        raise SalesforceRequestError(r.status_code, f"Salesforce lead create failed: {r.text}")
+    return r.json() or {}
+
+
+def _soql_quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _read_csv(text: str) -> List[Dict[str, str]]:
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+async def _bulk_insert_leads(
+    org_id: int, instance_url: str, access_token: str, rows: List[Dict[str, str]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Insert Leads with a Bulk API 2.0 ingest job: create the job, upload the
+    CSV, close it, poll until Salesforce has processed it and read the
+    per-record results. Returns {lowercased email: {"id"} or {"error"}}.
+    """
+    jobs_url = f"{instance_url}/services/data/v{API_VERSION}/jobs/ingest"
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.post(url, headers=headers, json=payload)
+    r = await _sf_request(
+        org_id, access_token, "POST", jobs_url,
+        json={"object": "Lead", "operation": "insert", "contentType": "CSV", "lineEnding": "LF"},
+    )
+    if r.status_code >= 400:
+        raise HTTPException(status_code=502, detail=f"Salesforce bulk job create failed: {r.text}")
+    job_url = f"{jobs_url}/{r.json()['id']}"
+
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["FirstName", "LastName", "Email", "Company"], lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    r = await _sf_request(
+        org_id, access_token, "PUT", f"{job_url}/batches",
+        headers={"Content-Type": "text/csv"}, content=out.getvalue().encode(),
+    )
+    if r.status_code >= 400:
+        raise HTTPException(status_code=502, detail=f"Salesforce bulk upload failed: {r.text}")
+    r = await _sf_request(org_id, access_token, "PATCH", job_url, json={"state": "UploadComplete"})
+    if r.status_code >= 400:
+        raise HTTPException(status_code=502, detail=f"Salesforce bulk job close failed: {r.text}")
+
+    deadline = time.monotonic() + BULK_TIMEOUT_SECONDS
+    while True:
+        r = await _sf_request(org_id, access_token, "GET", job_url)
+        if r.status_code >= 400:
+            raise HTTPException(status_code=502, detail=f"Salesforce bulk job status failed: {r.text}")
+        info = r.json()
+        state = info.get("state")
+        if state == "JobComplete":
+            break
+        if state in ("Failed", "Aborted"):
+            raise HTTPException(
+                status_code=502, detail=f"Salesforce bulk job {state.lower()}: {info.get('errorMessage') or ''}"
+            )
+        if time.monotonic() > deadline:
+            await _sf_request(org_id, access_token, "PATCH", job_url, json={"state": "Aborted"})
+            raise HTTPException(status_code=504, detail="Salesforce bulk job timed out")
+        await asyncio.sleep(BULK_POLL_SECONDS)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for kind in ("successfulResults", "failedResults"):
+        r = await _sf_request(org_id, access_token, "GET", f"{job_url}/{kind}/")
         if r.status_code >= 400:
-            raise HTTPException(status_code=502, detail=f"Salesforce lead create failed: {r.text}")
-        return r.json() or {}
+            raise HTTPException(status_code=502, detail=f"Salesforce bulk {kind} failed: {r.text}")
+        for row in _read_csv(r.text):
+            email = (row.get("Email") or "").lower()
+            if row.get("sf__Error"):
+                results[email] = {"error": row["sf__Error"]}
+            else:
+                results[email] = {"id": row.get("sf__Id")}
+    return results
+
+
+async def create_leads_bulk(*, org_id: int, leads: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Create many Leads in Salesforce: the bulk form of create_lead.
+
+    Leads whose email already exists are found with batched SOQL queries
+    and returned instead ({"id", "existing": True}); the rest are inserted
+    in a single Bulk API 2.0 ingest job, so thousands of leads take a few
+    requests instead of two each.
+
+    Each lead is a dict with email, first_name, last_name and company.
+    Returns one result per lead, in order, with "id" and "existing", or
+    "error" for records Salesforce rejected. A failure of the whole job
+    raises HTTPException.
+    """
+    if not leads:
+        return []
+    access_token, instance_url = await _get_active_sf_credential(org_id)
+
+    emails = list(dict.fromkeys(lead["email"].lower() for lead in leads if lead.get("email")))
+    existing: Dict[str, str] = {}
+    for i in range(0, len(emails), BULK_DEDUPE_CHUNK):
+        chunk = emails[i:i + BULK_DEDUPE_CHUNK]
+        found = await _sf_query(
+            org_id, instance_url, access_token,
+            f"SELECT Id, Email FROM Lead WHERE Email IN ({', '.join(_soql_quote(e) for e in chunk)})",
+        )
+        for record in found.get("records", []):
+            existing.setdefault((record.get("Email") or "").lower(), record["Id"])
+
+    rows: Dict[str, Dict[str, str]] = {}
+    for lead in leads:
+        email = (lead.get("email") or "").lower()
+        if email and email not in existing and email not in rows:
+            rows[email] = {
+                "FirstName": lead.get("first_name") or "",
+                "LastName": lead.get("last_name") or "Unknown",
+                "Email": lead["email"],
+                "Company": lead.get("company") or "Unknown",
+            }
+    created = await _bulk_insert_leads(org_id, instance_url, access_token, list(rows.values())) if rows else {}
+
+    results: List[Dict[str, Any]] = []
+    for lead in leads:
+        email = (lead.get("email") or "").lower()
+        if not email:
+            results.append({"error": "Salesforce lead requires an email"})
+        elif email in existing:
+            results.append({"id": existing[email], "existing": True})
+        else:
+            results.append({"existing": False, **created.get(email, {"error": "Missing from the bulk job results"})})
+    return results
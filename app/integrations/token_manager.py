@@ -0,0 +1,251 @@
+# app/integrations/token_manager.py
+"""
+Single-flight OAuth token refresh for the CRM integrations.
+
+HubSpot, Pipedrive and Zoho access tokens expire after about an hour and
+Salesforce sessions time out, after which every CRM call fails with a 401
+until the token is refreshed. Integrations get their token through
+get_access_token(), which refreshes it shortly before expires_at, and call
+refresh_access_token() with the token that was rejected when a request
+comes back 401, then retry that request once.
+
+Refreshes for one (organization_id, provider) are serialized by a lock, so
+concurrent lead syncs that all hit an expired token share a single call to
+the provider's token endpoint: the first caller refreshes, and the others
+find a different token already stored when they get the lock and use it.
+The new token is written back to IntegrationCredential (which invalidates
+the credential cache) along with expires_at.
+
+The lock is per process, and the credential cache is only invalidated in
+the process that wrote the row. So under the lock the credential is
+re-read from the database rather than the cache: a token (or rotated
+refresh token) stored by another worker is picked up instead of being
+refreshed a second time with a refresh token that may no longer be valid.
+"""
+import asyncio
+import base64
+import json
+import logging
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import SessionLocal
+from app.integrations.credentials import CRMCredential, credential_cache, get_credential
+from app.integrations.http_clients import crm_clients
+
+logger = logging.getLogger(__name__)
+
+# Refresh tokens this long before they expire
+TOKEN_REFRESH_SKEW_SECONDS = 300
+
+HUBSPOT_TOKEN_URL = "https://api.hubapi.com/oauth/v1/token"
+PIPEDRIVE_TOKEN_URL = "https://oauth.pipedrive.com/oauth/token"
+DEFAULT_ZOHO_ACCOUNTS_URL = "https://accounts.zoho.com"
+
+
+class TokenRefreshError(Exception):
+    """The provider rejected the refresh token or the token endpoint failed."""
+
+
+def token_expires_at(expires_in: Any) -> Optional[datetime]:
+    """expires_at for a token response's `expires_in` (None if missing)."""
+    try:
+        seconds = int(expires_in)
+    except (TypeError, ValueError):
+        return None
+    return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+# ---------------------------------------------------------------
+# PROVIDER TOKEN ENDPOINTS
+# ---------------------------------------------------------------
+async def _post_token_request(provider: str, url: str, data: Dict[str, str], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    async with crm_clients.client(provider) as client:
+        resp = await client.post(
+            url,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded", **(headers or {})},
+        )
+    if resp.status_code >= 400:
+        raise TokenRefreshError(f"{provider} token refresh failed ({resp.status_code}): {resp.text[:200]}")
+    token_json = resp.json()
+    if not token_json.get("access_token"):
+        raise TokenRefreshError(f"{provider} token refresh returned no access token")
+    return token_json
+
+
+async def _refresh_hubspot(cred: CRMCredential) -> Dict[str, Any]:
+    return await _post_token_request("hubspot", HUBSPOT_TOKEN_URL, {
+        "grant_type": "refresh_token",
+        "client_id": settings.hubspot_client_id,
+        "client_secret": settings.hubspot_client_secret,
+        "refresh_token": cred.refresh_token,
+    })
+
+
+async def _refresh_pipedrive(cred: CRMCredential) -> Dict[str, Any]:
+    basic = base64.b64encode(
+        f"{settings.pipedrive_client_id}:{settings.pipedrive_client_secret}".encode()
+    ).decode()
+    return await _post_token_request(
+        "pipedrive",
+        PIPEDRIVE_TOKEN_URL,
+        {"grant_type": "refresh_token", "refresh_token": cred.refresh_token},
+        headers={"Authorization": f"Basic {basic}"},
+    )
+
+
+async def _refresh_zoho(cred: CRMCredential) -> Dict[str, Any]:
+    # Refresh against the accounts server of the datacenter the org connected through
+    accounts_url = cred.metadata.get("accounts_url") or settings.zoho_accounts_url or DEFAULT_ZOHO_ACCOUNTS_URL
+    return await _post_token_request("zoho", f"{accounts_url.rstrip('/')}/oauth/v2/token", {
+        "grant_type": "refresh_token",
+        "client_id": settings.zoho_client_id,
+        "client_secret": settings.zoho_client_secret,
+        "refresh_token": cred.refresh_token,
+    })
+
+
+async def _refresh_salesforce(cred: CRMCredential) -> Dict[str, Any]:
+    login_base = (settings.salesforce_login_base or "https://login.salesforce.com").rstrip("/")
+    return await _post_token_request("salesforce", f"{login_base}/services/oauth2/token", {
+        "grant_type": "refresh_token",
+        "client_id": settings.salesforce_client_id,
+        "client_secret": settings.salesforce_client_secret,
+        "refresh_token": cred.refresh_token,
+    })
+
+
+TOKEN_REFRESHERS: Dict[str, Callable[[CRMCredential], Awaitable[Dict[str, Any]]]] = {
+    "hubspot": _refresh_hubspot,
+    "pipedrive": _refresh_pipedrive,
+    "zoho": _refresh_zoho,
+    "salesforce": _refresh_salesforce,
+}
+
+
+# ---------------------------------------------------------------
+# PERSISTENCE
+# ---------------------------------------------------------------
+def _store_refreshed_token(organization_id: int, provider: str, token_json: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        cred = (
+            db.query(models.IntegrationCredential)
+            .filter(
+                models.IntegrationCredential.organization_id == organization_id,
+                models.IntegrationCredential.provider == provider,
+                models.IntegrationCredential.is_active.is_(True),
+            )
+            .order_by(models.IntegrationCredential.updated_at.desc())
+            .first()
+        )
+        if not cred:
+            return  # Disconnected while the refresh was in flight
+
+        cred.access_token = token_json["access_token"]
+        if token_json.get("refresh_token"):
+            cred.refresh_token = token_json["refresh_token"]
+        cred.expires_at = token_expires_at(token_json.get("expires_in"))
+
+        try:
+            meta = json.loads(cred.scopes) if cred.scopes else {}
+        except (TypeError, ValueError):
+            meta = {}
+        for key in ("expires_in", "api_domain", "instance_url"):
+            if token_json.get(key):
+                meta[key] = token_json[key]
+        cred.scopes = json.dumps(meta)
+
+        db.commit()
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------
+# SINGLE-FLIGHT REFRESH
+# ---------------------------------------------------------------
+# asyncio locks can't be shared across event loops, so they're kept per loop
+_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+
+
+def _refresh_lock(organization_id: int, provider: str) -> asyncio.Lock:
+    loop_locks = _locks.setdefault(asyncio.get_running_loop(), {})
+    return loop_locks.setdefault((organization_id, provider), asyncio.Lock())
+
+
+def _can_refresh(cred: Optional[CRMCredential]) -> bool:
+    return bool(cred and cred.auth_type == "oauth" and cred.refresh_token and cred.provider in TOKEN_REFRESHERS)
+
+
+def _expiring(cred: CRMCredential) -> bool:
+    if not cred.expires_at:
+        return False
+    return cred.expires_at - datetime.utcnow() < timedelta(seconds=TOKEN_REFRESH_SKEW_SECONDS)
+
+
+async def refresh_access_token(
+    organization_id: int,
+    provider: str,
+    stale_token: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Refresh the org's access token and return the new one.
+
+    Pass the token that was rejected as stale_token: if another caller has
+    already replaced it, that token is returned without a second refresh.
+    Without stale_token the refresh always happens (used by the /refresh
+    routes). Returns None if the org has no refreshable OAuth credential;
+    raises TokenRefreshError if the provider refuses the refresh.
+    """
+    async with _refresh_lock(organization_id, provider):
+        # Decide on the stored row: another worker may have refreshed already
+        credential_cache.invalidate(organization_id, provider)
+        cred = await get_credential(organization_id, provider)
+        if not _can_refresh(cred):
+            return None
+        if stale_token is not None and cred.access_token != stale_token:
+            return cred.access_token
+
+        token_json = await TOKEN_REFRESHERS[provider](cred)
+        await asyncio.to_thread(_store_refreshed_token, organization_id, provider, token_json)
+        logger.info("Refreshed %s access token for org %s", provider, organization_id)
+        return token_json["access_token"]
+
+
+async def get_access_token(organization_id: int, provider: str) -> Optional[str]:
+    """
+    The org's access token for a CRM, refreshed first if it's about to expire.
+
+    If the proactive refresh fails the current token is returned, and the
+    request's 401 handling gets the final say.
+    """
+    cred = await get_credential(organization_id, provider)
+    if not cred:
+        return None
+    if not (_can_refresh(cred) and _expiring(cred)):
+        return cred.access_token
+
+    try:
+        return await refresh_access_token(organization_id, provider, stale_token=cred.access_token) or cred.access_token
+    except TokenRefreshError as exc:
+        logger.warning("Proactive %s token refresh failed for org %s: %s", provider, organization_id, exc)
+        return cred.access_token
+
+
+async def refresh_after_unauthorized(organization_id: int, provider: str, rejected_token: Optional[str]) -> Optional[str]:
+    """
+    The token to retry a request with after it was rejected with a 401.
+
+    Returns None when there's nothing better to retry with (no refreshable
+    credential, or the refresh failed), so callers retry at most once.
+    """
+    try:
+        token = await refresh_access_token(organization_id, provider, stale_token=rejected_token)
+    except TokenRefreshError as exc:
+        logger.warning("%s token refresh after 401 failed for org %s: %s", provider, organization_id, exc)
+        return None
+    return token if token and token != rejected_token else None
@@ -9,50 +9,29 @@ Handles:
 """
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Union
-import json
 import logging
 
-import httpx
-from app.db.session import SessionLocal
-from app.db import models
+from app.integrations.credentials import get_credential
+from app.integrations.http_clients import crm_clients
+from app.integrations.rate_limits import crm_rate_limiter, gather_limited
+from app.integrations.token_manager import get_access_token, refresh_after_unauthorized
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_API_DOMAIN = "https://www.zohoapis.com"
 
 
-def _get_org_credentials(organization_id: int) -> Optional[Dict[str, Any]]:
+async def _get_org_credentials(organization_id: int) -> Optional[Dict[str, Any]]:
     """Get Zoho OAuth credentials for an organization."""
-    db = SessionLocal()
-    try:
-        cred = (
-            db.query(models.IntegrationCredential)
-            .filter(
-                models.IntegrationCredential.organization_id == organization_id,
-                models.IntegrationCredential.provider == "zoho",
-                models.IntegrationCredential.is_active == True,
-            )
-            .order_by(models.IntegrationCredential.updated_at.desc())
-            .first()
-        )
-        if not cred:
-            return None
-
-        # Parse metadata for api_domain
-        meta = {}
-        if cred.scopes:
-            try:
-                meta = json.loads(cred.scopes)
-            except Exception:
-                pass
+    cred = await get_credential(organization_id, "zoho")
+    if not cred:
+        return None
 
-        return {
-            "access_token": cred.access_token,
-            "refresh_token": cred.refresh_token,
-            "api_domain": meta.get("api_domain", DEFAULT_API_DOMAIN),
-        }
-    finally:
-        db.close()
+    return {
+        "access_token": await get_access_token(organization_id, "zoho"),
+        "refresh_token": cred.refresh_token,
+        "api_domain": cred.metadata.get("api_domain", DEFAULT_API_DOMAIN),
+    }
 
 
 async def _request(
@@ -62,9 +41,9 @@ async def _request(
     params: Optional[Dict[str, Any]] = None,
     json_data: Optional[Dict[str, Any]] = None,
 ) -> Union[Dict[str, Any], str, None]:
-    """Make authenticated request to Zoho CRM API."""
+    """Make authenticated request to Zoho CRM API (a 401 refreshes the token and retries once)."""
 
-    creds = _get_org_credentials(organization_id)
+    creds = await _get_org_credentials(organization_id)
     if not creds:
         logger.warning("Zoho request attempted without credentials for org %s", organization_id)
         return "unauthorized"
@@ -74,21 +53,39 @@ async def _request(
 
     url = f"{api_domain}/crm/v6{endpoint}"
 
-    headers = {
-        "Authorization": f"Zoho-oauthtoken {access_token}",
-        "Content-Type": "application/json",
-    }
+    def headers(token: Optional[str]) -> Dict[str, str]:
+        return {
+            "Authorization": f"Zoho-oauthtoken {token}",
+            "Content-Type": "application/json",
+        }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with crm_clients.client("zoho") as client:
         try:
-            resp = await client.request(
+            resp = await crm_rate_limiter.send(
+                client,
+                "zoho",
+                organization_id,
                 method,
                 url,
                 params=params,
                 json=json_data,
-                headers=headers,
+                headers=headers(access_token),
             )
 
+            if resp.status_code == 401:
+                new_token = await refresh_after_unauthorized(organization_id, "zoho", access_token)
+                if new_token:
+                    resp = await crm_rate_limiter.send(
+                        client,
+                        "zoho",
+                        organization_id,
+                        method,
+                        url,
+                        params=params,
+                        json=json_data,
+                        headers=headers(new_token),
+                    )
+
             if resp.status_code in (401, 403):
                 logger.warning("Zoho unauthorized for endpoint %s", endpoint)
                 return "unauthorized"
@@ -203,20 +200,24 @@ async def get_salespeople_stats(
     since = now - timedelta(days=max(0, int(days)))
     since_date = since.strftime("%Y-%m-%d")
 
+    # Deal searches for all owners run concurrently rather than one after another
+    deal_counts = await gather_limited(
+        _count_deals_created_since(
+            owner_id=str(o.get("id") or ""),
+            since_date=since_date,
+            organization_id=organization_id,
+        )
+        for o in owners
+    )
+
     rows: List[Dict[str, Any]] = []
 
-    for o in owners:
+    for o, new_deals in zip(owners, deal_counts):
         oid = str(o.get("id") or "")
         name = " ".join(
             filter(None, [o.get("firstName"), o.get("lastName")])
         ).strip() or (o.get("email") or oid)
 
-        new_deals = await _count_deals_created_since(
-            owner_id=oid,
-            since_date=since_date,
-            organization_id=organization_id,
-        )
-
         rows.append({
             "owner_id": oid,
             "owner_name": name,
@@ -247,6 +248,20 @@ async def owners_stats(
     )
 
 
+async def search_lead_by_email(email: str, organization_id: int) -> Union[Dict[str, Any], str, None]:
+    """
+    Find a lead by email.
+
+    Returns the lead, None if there is no match (Zoho answers 204), or the
+    _request error string if the search failed.
+    """
+    result = await _request("GET", "/Leads/search", organization_id, params={"email": email})
+    if isinstance(result, str) or result is None:
+        return result
+    leads = result.get("data") or []
+    return leads[0] if leads else None
+
+
 async def create_lead(
     title: str,
     name: str,
@@ -259,12 +274,22 @@ async def create_lead(
     """
     Create a new lead in Zoho CRM.
 
-    Zoho requires Last_Name at minimum for Leads.
+    Zoho requires Last_Name at minimum for Leads. An existing lead with the
+    same email is returned instead, so a retried sync doesn't create a
+    duplicate.
     """
     if not organization_id:
         logger.warning("create_lead called without organization_id")
         return None
 
+    if email:
+        existing = await search_lead_by_email(email, organization_id)
+        if isinstance(existing, str):
+            logger.error("Failed to search Zoho leads: %s", existing)
+            return None
+        if existing:
+            return existing
+
     # Parse name into first/last
     name_parts = (name or email or "Unknown").strip().split(" ", 1)
     first_name = name_parts[0]
@@ -2,18 +2,37 @@
 
 import json
 import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from threading import Lock
+from typing import AsyncIterator, Optional
 
 import httpx
 import pytz
 
 from app.core.config import settings
 from app.db.models import ChatWidgetConfig
+from app.services.llm_router import ProviderRouter
 
 logger = logging.getLogger(__name__)
 
 DEEPSEEK_API_URL = "https://api.deepseek.com/chat/completions"
+CLOUDFLARE_API_URL = "https://api.cloudflare.com/client/v4/accounts/{account_id}/ai/run/{model}"
+
+# Global provider router (health, circuit breakers, hedging)
+llm_router = ProviderRouter()
+
+
+def _cloudflare_configured() -> bool:
+    return bool(settings.CLOUDFLARE_ACCOUNT_ID and settings.CLOUDFLARE_API_TOKEN)
+
+
+def _cloudflare_url() -> str:
+    return CLOUDFLARE_API_URL.format(
+        account_id=settings.CLOUDFLARE_ACCOUNT_ID, model=settings.CLOUDFLARE_AI_MODEL
+    )
 
 
 async def _cloudflare_completion(
@@ -27,7 +46,7 @@ async def _cloudflare_completion(
     Returns:
         tuple: (response_text, input_tokens, output_tokens)
     """
-    if not settings.CLOUDFLARE_ACCOUNT_ID or not settings.CLOUDFLARE_API_TOKEN:
+    if not _cloudflare_configured():
         raise Exception("Cloudflare AI not configured")
 
     api_messages = [{"role": "system", "content": system_prompt}]
@@ -44,10 +63,8 @@ async def _cloudflare_completion(
         "Content-Type": "application/json",
     }
 
-    url = f"https://api.cloudflare.com/client/v4/accounts/{settings.CLOUDFLARE_ACCOUNT_ID}/ai/run/{settings.CLOUDFLARE_AI_MODEL}"
-
     async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(url, json=payload, headers=headers)
+        response = await client.post(_cloudflare_url(), json=payload, headers=headers)
         response.raise_for_status()
 
         data = response.json()
@@ -64,26 +81,155 @@ async def _cloudflare_completion(
             raise Exception(f"Cloudflare API error: {error_msg}")
 
 
+# =============================================================================
+# System prompt
+# =============================================================================
+
+# Compiled prompts kept per process (one per widget config version and stage)
+PROMPT_CACHE_MAX_ENTRIES = 1000
+
+
+class SystemPromptCache:
+    """
+    LRU of compiled static prompts keyed by (organization_id, widget_id,
+    updated_at, stage, booking fingerprint).
+
+    Editing the widget bumps updated_at, and the booking fingerprint covers
+    the booking page and meeting types the prompt embeds, so stale entries
+    simply stop being hit in every process, as soon as it reads the new
+    config (widget snapshots are re-read within WIDGET_SNAPSHOT_TTL).
+    Booking routes also call invalidate_system_prompts(org) to free the
+    org's old entries locally.
+    """
+
+    def __init__(self, max_entries: int = PROMPT_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._prompts: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            prompt = self._prompts.get(key)
+            if prompt is not None:
+                self._prompts.move_to_end(key)
+            return prompt
+
+    def set(self, key: tuple, prompt: str):
+        with self._lock:
+            self._prompts[key] = prompt
+            self._prompts.move_to_end(key)
+            while len(self._prompts) > self._max_entries:
+                self._prompts.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._prompts.clear()
+
+    def invalidate_org(self, organization_id: int):
+        """Drop every prompt compiled for an organization's widgets."""
+        with self._lock:
+            for key in [k for k in self._prompts if k[0] == organization_id]:
+                del self._prompts[key]
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+
+# Global compiled prompt cache
+system_prompt_cache = SystemPromptCache()
+
+
+def invalidate_system_prompts(organization_id: Optional[int] = None):
+    """Drop an org's compiled prompts (or all of them) after booking pages or meeting types change."""
+    if organization_id is None:
+        system_prompt_cache.clear()
+    else:
+        system_prompt_cache.invalidate_org(organization_id)
+
+
+def booking_fingerprint(config: ChatWidgetConfig) -> Optional[tuple]:
+    """The booking page and active meeting types as the prompt embeds them."""
+    booking_config = getattr(config, 'booking_config', None)
+    if not getattr(config, 'booking_enabled', False) or not booking_config:
+        return None
+    return (
+        booking_config.slug,
+        booking_config.business_name,
+        tuple(
+            (mt.name, mt.duration_minutes, mt.description)
+            for mt in getattr(booking_config, 'meeting_types', ())
+            if mt.is_active
+        ),
+    )
+
+
+def _conversation_stage(turn_count: int) -> str:
+    """Escalation stage for a visitor turn count."""
+    if turn_count <= 2:
+        return "early"
+    if turn_count <= 4:
+        return "middle"
+    return "late"
+
+
+def _visitor_local_time(timezone: Optional[str]) -> Optional[datetime]:
+    if not timezone:
+        return None
+    try:
+        return datetime.now(pytz.timezone(timezone))
+    except Exception:
+        return None  # Invalid timezone, skip time context
+
+
+def _part_of_day(user_time: datetime) -> str:
+    if user_time.hour < 12:
+        return "morning"
+    if user_time.hour < 17:
+        return "afternoon"
+    return "evening"
+
+
+def time_of_day(timezone: Optional[str]) -> Optional[str]:
+    """Visitor's part of day ("morning", "afternoon", "evening"), if known."""
+    user_time = _visitor_local_time(timezone)
+    return _part_of_day(user_time) if user_time else None
+
+
+def _time_context(timezone: Optional[str]) -> str:
+    """Per-turn time-of-day hint (kept out of the cached prompt)."""
+    user_time = _visitor_local_time(timezone)
+    if not user_time:
+        return ""
+
+    part_of_day = _part_of_day(user_time)
+    return f"\nCURRENT TIME: It is {part_of_day} for the user ({user_time.strftime('%I:%M %p')} their local time). Use appropriate greetings.\n"
+
+
 def build_system_prompt(config: ChatWidgetConfig, timezone: str = None, turn_count: int = 0) -> str:
-    """Build the system prompt from chat widget configuration."""
+    """
+    Build the system prompt from chat widget configuration.
 
-    # Get current time in user's timezone for appropriate greetings
-    time_context = ""
-    if timezone:
-        try:
-            tz = pytz.timezone(timezone)
-            user_time = datetime.now(tz)
-            hour = user_time.hour
-            if hour < 12:
-                time_of_day = "morning"
-            elif hour < 17:
-                time_of_day = "afternoon"
-            else:
-                time_of_day = "evening"
-            time_context = f"\nCURRENT TIME: It is {time_of_day} for the user ({user_time.strftime('%I:%M %p')} their local time). Use appropriate greetings.\n"
-        except Exception:
-            pass  # Invalid timezone, skip time context
+    The static part is compiled once per widget version and stage and then
+    reused byte-for-byte (which also lets provider-side prompt caching hit);
+    only the time-of-day line is appended per turn.
+    """
+    stage = _conversation_stage(turn_count)
 
+    key = None
+    if config.id is not None and config.updated_at is not None:
+        key = (config.organization_id, config.id, config.updated_at, stage, booking_fingerprint(config))
+
+    prompt = system_prompt_cache.get(key) if key else None
+    if prompt is None:
+        prompt = _build_static_prompt(config, stage)
+        if key:
+            system_prompt_cache.set(key, prompt)
+
+    return prompt + _time_context(timezone)
+
+
+def _build_static_prompt(config: ChatWidgetConfig, stage: str) -> str:
+    """Compile everything in the system prompt that doesn't change per turn."""
     tone_descriptions = {
         "friendly": "Friendly, warm, and approachable. Like a helpful colleague.",
         "professional": "Professional and polished. Courteous but businesslike.",
@@ -169,7 +315,7 @@ After their THIRD "no" -> Try again (ask what's holding them back)
 ONLY after {rebuttal_count} separate rejections can you say goodbye.
 
 ##########################################################################
-{time_context}
+
 ABOUT US:
 {config.business_description}
 
@@ -191,13 +337,13 @@ RULES:
         prompt += f"6. {config.restrictions}\n"
 
     # Build turn-based escalation instructions
-    if turn_count <= 2:
+    if stage == "early":
         escalation = """CONVERSATION FLOW:
 - You're in the EARLY stage. Be curious about their needs. Ask a simple question.
 - BUT always tie your response back to your product/service value.
 - Even in early messages, hint at the goal: "We actually help with exactly that..."
 """
-    elif turn_count <= 4:
+    elif stage == "middle":
         escalation = """CONVERSATION FLOW:
 - You're in the MIDDLE stage. You've built enough rapport. TIME TO PUSH.
 - You MUST direct them to the goal (link/signup/demo) in THIS response.
@@ -485,35 +631,59 @@ KEY RULES:
 """
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate token count for text (rough: ~4 chars per token for English)."""
+    return len(text) // 4 + 1
+
+
+def _turn_system_prompt(
+    config: ChatWidgetConfig,
+    messages: list[dict],
+    timezone: Optional[str],
+    turn_count: Optional[int],
+    context_note: Optional[str],
+) -> str:
+    """System prompt for one turn, plus any summarized earlier context."""
+    # Count user turns for escalation logic (callers sending a trimmed window pass the real count)
+    if turn_count is None:
+        turn_count = sum(1 for m in messages if m["role"] == "user")
+
+    system_prompt = build_system_prompt(config, timezone, turn_count)
+    if context_note:
+        system_prompt = f"{system_prompt}\n\n{context_note}"
+    return system_prompt
+
+
 async def chat_completion(
     config: ChatWidgetConfig,
     messages: list[dict],
     max_tokens: int = 256,
     timezone: str = None,
+    turn_count: Optional[int] = None,
+    context_note: Optional[str] = None,
 ) -> tuple[str, int, int]:
     """
     Send a chat completion request to DeepSeek with Cloudflare fallback.
 
+    Goes through llm_router: an unhealthy DeepSeek is skipped, and a slow
+    one is hedged with a Cloudflare request (first answer wins).
+
     Returns:
         tuple: (response_text, input_tokens, output_tokens)
     """
-    # Count user turns for escalation logic
-    turn_count = sum(1 for m in messages if m["role"] == "user")
-
-    system_prompt = build_system_prompt(config, timezone, turn_count)
+    system_prompt = _turn_system_prompt(config, messages, timezone, turn_count, context_note)
 
-    # Try DeepSeek first (primary)
+    providers = []
     if settings.DEEPSEEK_API_KEY:
-        try:
-            return await _deepseek_completion(messages, system_prompt, max_tokens)
-        except Exception as e:
-            logger.warning(f"DeepSeek failed, trying Cloudflare fallback: {e}")
+        providers.append(("deepseek", lambda: _deepseek_completion(messages, system_prompt, max_tokens)))
+    if _cloudflare_configured():
+        providers.append(("cloudflare", lambda: _cloudflare_completion(messages, system_prompt, max_tokens)))
 
-    # Fallback to Cloudflare
     try:
-        return await _cloudflare_completion(messages, system_prompt, max_tokens)
+        _, reply = await llm_router.call(providers)
+        return reply
     except Exception as e:
-        logger.error(f"All AI providers failed. Cloudflare error: {e}")
+        logger.error(f"All AI providers failed: {e}")
         raise Exception("AI service temporarily unavailable. Please try again.")
 
 
@@ -562,6 +732,216 @@ async def _deepseek_completion(
         return content, input_tokens, output_tokens
 
 
+# =============================================================================
+# Streaming
+# =============================================================================
+
+@dataclass
+class ChatStreamResult:
+    """Filled in while a streamed completion is consumed."""
+
+    parts: list[str] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    provider: Optional[str] = None
+    ttft_ms: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class ChatStreamStats:
+    """Rolling time-to-first-token samples per provider."""
+
+    def __init__(self, max_samples: int = 500):
+        self._samples: dict[str, deque] = {}
+        self._failures: dict[str, int] = {}
+        self._max_samples = max_samples
+        self._lock = Lock()
+
+    def record(self, provider: str, ttft_ms: float):
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self._max_samples)).append(ttft_ms)
+
+    def record_failure(self, provider: str):
+        with self._lock:
+            self._failures[provider] = self._failures.get(provider, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for provider in set(self._samples) | set(self._failures):
+                samples = sorted(self._samples.get(provider, ()))
+                result[provider] = {
+                    "streams": len(samples),
+                    "failures": self._failures.get(provider, 0),
+                    "ttft_p50_ms": round(samples[len(samples) // 2], 1) if samples else None,
+                    "ttft_p95_ms": round(samples[int(len(samples) * 0.95)], 1) if samples else None,
+                }
+            return result
+
+
+# Global time-to-first-token stats
+chat_stream_stats = ChatStreamStats()
+
+
+async def _iter_sse_data(response: httpx.Response) -> AsyncIterator[dict]:
+    """Yield parsed JSON payloads from an SSE response until [DONE]."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+async def _deepseek_stream(
+    messages: list[dict],
+    system_prompt: str,
+    max_tokens: int,
+    result: ChatStreamResult,
+) -> AsyncIterator[str]:
+    """Stream a chat completion from DeepSeek, yielding text deltas."""
+    api_messages = [{"role": "system", "content": system_prompt}]
+    api_messages.extend(messages)
+
+    payload = {
+        "model": "deepseek-chat",
+        "messages": api_messages,
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+
+    headers = {
+        "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        async with client.stream("POST", DEEPSEEK_API_URL, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for data in _iter_sse_data(response):
+                usage = data.get("usage")
+                if usage:
+                    result.input_tokens = usage.get("prompt_tokens", 0)
+                    result.output_tokens = usage.get("completion_tokens", 0)
+                for choice in data.get("choices") or []:
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
+
+async def _cloudflare_stream(
+    messages: list[dict],
+    system_prompt: str,
+    max_tokens: int,
+    result: ChatStreamResult,
+) -> AsyncIterator[str]:
+    """Stream a chat completion from Cloudflare Workers AI, yielding text deltas."""
+    if not _cloudflare_configured():
+        raise Exception("Cloudflare AI not configured")
+
+    api_messages = [{"role": "system", "content": system_prompt}]
+    api_messages.extend(messages)
+
+    payload = {
+        "messages": api_messages,
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "stream": True,
+    }
+
+    headers = {
+        "Authorization": f"Bearer {settings.CLOUDFLARE_API_TOKEN}",
+        "Content-Type": "application/json",
+    }
+
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        async with client.stream("POST", _cloudflare_url(), json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for data in _iter_sse_data(response):
+                usage = data.get("usage")
+                if usage:
+                    result.input_tokens = usage.get("prompt_tokens", 0)
+                    result.output_tokens = usage.get("completion_tokens", 0)
+                content = data.get("response")
+                if content:
+                    yield content
+
+
+def chat_completion_stream(
+    config: ChatWidgetConfig,
+    messages: list[dict],
+    result: ChatStreamResult,
+    max_tokens: int = 256,
+    timezone: str = None,
+    turn_count: Optional[int] = None,
+    context_note: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion (DeepSeek, falling back to Cloudflare).
+
+    The system prompt is built immediately, while config is still bound to
+    the caller's session; the returned iterator only does network I/O.
+    Usage and time-to-first-token are written to `result`. Fallback only
+    happens before the first token - a stream that breaks midway raises.
+    Providers with an open circuit in llm_router are skipped.
+    """
+    system_prompt = _turn_system_prompt(config, messages, timezone, turn_count, context_note)
+    return _stream_with_fallback(messages, system_prompt, max_tokens, result)
+
+
+async def _stream_with_fallback(
+    messages: list[dict],
+    system_prompt: str,
+    max_tokens: int,
+    result: ChatStreamResult,
+) -> AsyncIterator[str]:
+    streams = {"cloudflare": _cloudflare_stream}
+    if settings.DEEPSEEK_API_KEY:
+        streams = {"deepseek": _deepseek_stream, **streams}
+
+    start = time.perf_counter()
+    for provider in llm_router.select(list(streams)):
+        stream = streams[provider]
+        try:
+            async for chunk in stream(messages, system_prompt, max_tokens, result):
+                if result.ttft_ms is None:
+                    result.ttft_ms = round((time.perf_counter() - start) * 1000, 1)
+                    result.provider = provider
+                    chat_stream_stats.record(provider, result.ttft_ms)
+                    # Outcome only - time to first token isn't comparable to completion latency
+                    llm_router.health(provider).record_success()
+                result.parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            chat_stream_stats.record_failure(provider)
+            if result.parts:
+                logger.error(f"{provider} stream failed after first token: {e}")
+                raise
+            llm_router.health(provider).record_failure()
+            logger.warning(f"{provider} stream failed, trying next provider: {e}")
+            continue
+
+        if result.parts:
+            # Providers don't always report usage on streams; fall back to estimates
+            if not result.output_tokens:
+                result.output_tokens = estimate_tokens(result.text)
+            if not result.input_tokens:
+                result.input_tokens = estimate_tokens(system_prompt) + sum(
+                    estimate_tokens(m["content"]) for m in messages
+                )
+            return
+
+    logger.error("All AI providers failed to stream a response")
+    raise Exception("AI service temporarily unavailable. Please try again.")
+
+
 def extract_email_from_message(message: str) -> Optional[str]:
     """Extract email address from a message if present."""
     import re
@@ -1,8 +1,9 @@
 # app/services/ai_consultant.py
 """AI Lead Consultant service for Site2CRM."""
 
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import anthropic
 
@@ -75,6 +76,9 @@ CONTEXT_PROMPTS = {
 - Performance improvement tips""",
 }
 
+# Reply length cap for consultant responses
+MAX_RESPONSE_TOKENS = 1024
+
 
 class AIConsultantError(Exception):
     """Base exception for AI consultant errors."""
@@ -91,13 +95,26 @@ class AIFeatureNotAllowedError(AIConsultantError):
     pass
 
 
+@dataclass
+class ConsultantStreamResult:
+    """Filled in while a streamed consultant reply is consumed."""
+
+    parts: list[str] = field(default_factory=list)
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
 class AIConsultant:
     """AI Lead Consultant service."""
 
     def __init__(self):
         self.client = None
         if settings.anthropic_api_key:
-            self.client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+            self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
 
     def _ensure_client(self):
         """Ensure the Anthropic client is initialized."""
@@ -202,29 +219,14 @@ class AIConsultant:
             lines.append(f"New Deals: {stats['new_deals_count']}")
         return "\n".join(lines) if lines else "No salesperson stats available"
 
-    async def chat(
+    def _build_request(
         self,
         message: str,
         conversation_history: list[dict],
-        context_type: str = "general",
-        context_data: Optional[str] = None,
-        wmem_context: Optional[str] = None,
-    ) -> tuple[str, int, int]:
-        """
-        Send a message and get AI response.
-
-        Args:
-            message: The user's message
-            conversation_history: List of previous messages [{"role": "user"|"assistant", "content": "..."}]
-            context_type: Type of context (general, lead_analysis, coaching)
-            context_data: Pre-formatted context string
-            wmem_context: WMEM memory block for persistent context
-
-        Returns:
-            Tuple of (response_text, input_tokens, output_tokens)
-        """
-        self._ensure_client()
-
+        context_data: Optional[str],
+        wmem_context: Optional[str],
+    ) -> tuple[str, list[dict]]:
+        """Build the (system, messages) pair for a consultant turn."""
         # Build system prompt with context
         system = SYSTEM_PROMPT
         if wmem_context:
@@ -250,13 +252,42 @@ class AIConsultant:
             "content": user_content,
         })
 
+        return system, messages
+
+    async def chat(
+        self,
+        message: str,
+        conversation_history: list[dict],
+        context_type: str = "general",
+        context_data: Optional[str] = None,
+        wmem_context: Optional[str] = None,
+    ) -> tuple[str, int, int]:
+        """
+        Send a message and get AI response.
+
+        Args:
+            message: The user's message
+            conversation_history: List of previous messages [{"role": "user"|"assistant", "content": "..."}]
+            context_type: Type of context (general, lead_analysis, coaching)
+            context_data: Pre-formatted context string
+            wmem_context: WMEM memory block for persistent context
+
+        Returns:
+            Tuple of (response_text, input_tokens, output_tokens)
+        """
+        self._ensure_client()
+        system, messages = self._build_request(message, conversation_history, context_data, wmem_context)
+
         # Call Anthropic API
-        response = self.client.messages.create(
-            model=settings.anthropic_model,
-            max_tokens=1024,
-            system=system,
-            messages=messages,
-        )
+        try:
+            response = await self.client.messages.create(
+                model=settings.anthropic_model,
+                max_tokens=MAX_RESPONSE_TOKENS,
+                system=system,
+                messages=messages,
+            )
+        except anthropic.APIError as e:
+            raise AIConsultantError(f"AI service error: {e}") from e
 
         # Extract response
         response_text = response.content[0].text
@@ -265,6 +296,41 @@ class AIConsultant:
 
         return response_text, input_tokens, output_tokens
 
+    async def chat_stream(
+        self,
+        message: str,
+        conversation_history: list[dict],
+        result: ConsultantStreamResult,
+        context_type: str = "general",
+        context_data: Optional[str] = None,
+        wmem_context: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream an AI response, yielding text deltas.
+
+        Takes the same arguments as chat(). The full text and token usage
+        are filled into `result` once the stream completes.
+        """
+        self._ensure_client()
+        system, messages = self._build_request(message, conversation_history, context_data, wmem_context)
+
+        try:
+            async with self.client.messages.stream(
+                model=settings.anthropic_model,
+                max_tokens=MAX_RESPONSE_TOKENS,
+                system=system,
+                messages=messages,
+            ) as stream:
+                async for text in stream.text_stream:
+                    result.parts.append(text)
+                    yield text
+                final = await stream.get_final_message()
+        except anthropic.APIError as e:
+            raise AIConsultantError(f"AI service error: {e}") from e
+
+        result.input_tokens = final.usage.input_tokens
+        result.output_tokens = final.usage.output_tokens
+
     def generate_title(self, first_message: str) -> str:
         """Generate a conversation title from the first message."""
         # Simple truncation for now - could use AI for better titles
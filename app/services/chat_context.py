@@ -0,0 +1,145 @@
+# app/services/chat_context.py
+"""
+Context window management for chat widget conversations.
+
+Only the last CONTEXT_RECENT_TURNS visitor turns are sent to the LLM
+verbatim. Older messages are folded into a rolling summary stored on the
+conversation (updated incrementally, never rebuilt), and captured contact
+details are pinned next to it, so prompt size stays bounded no matter how
+long the chat runs.
+
+The summary is extractive (clipped lines per message) rather than another
+LLM call, so folding adds no latency or cost to the turn.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.services.ai_chat import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Visitor turns (with their replies) kept verbatim
+CONTEXT_RECENT_TURNS = 6
+
+# Per-message clip lengths in the summary
+SUMMARY_VISITOR_CHARS = 160
+SUMMARY_ASSISTANT_CHARS = 100
+
+# Oldest summary lines are dropped beyond this size
+SUMMARY_MAX_CHARS = 1500
+
+
+@dataclass
+class ChatContext:
+    """What gets sent to the LLM for one turn."""
+
+    messages: list[dict]  # Verbatim window, ending with the new visitor message
+    note: Optional[str]  # Summary + pinned details for the system prompt
+    turn_count: int  # Visitor turns in the whole conversation, including this one
+    tokens_saved: int  # Estimated prompt tokens avoided this turn
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3].rstrip() + "..."
+
+
+def fold_into_summary(summary: Optional[str], messages: list) -> str:
+    """Append clipped lines for messages to the summary, keeping it under SUMMARY_MAX_CHARS."""
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        if message.role == "user":
+            lines.append(f"- Visitor: {_clip(message.content, SUMMARY_VISITOR_CHARS)}")
+        else:
+            lines.append(f"- You: {_clip(message.content, SUMMARY_ASSISTANT_CHARS)}")
+
+    while lines and sum(len(line) + 1 for line in lines) > SUMMARY_MAX_CHARS:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def _context_note(conversation: models.ChatWidgetConversation) -> Optional[str]:
+    if not conversation.context_summary:
+        return None
+
+    parts = [
+        "EARLIER IN THIS CONVERSATION (summarized, oldest first):",
+        conversation.context_summary,
+    ]
+
+    pinned = [
+        f"- {label}: {value}"
+        for label, value in (
+            ("Name", conversation.lead_name),
+            ("Email", conversation.lead_email),
+            ("Phone", conversation.lead_phone),
+        )
+        if value
+    ]
+    if pinned:
+        parts.append("")
+        parts.append("VISITOR DETAILS ALREADY CAPTURED (do not ask for these again):")
+        parts.extend(pinned)
+
+    return "\n".join(parts)
+
+
+def load_chat_context(
+    db: Session,
+    conversation: models.ChatWidgetConversation,
+    new_message: str,
+) -> ChatContext:
+    """
+    Build the bounded context for the next turn.
+
+    Reads only messages newer than the summary watermark. When more than
+    CONTEXT_RECENT_TURNS visitor turns have accumulated, the oldest ones are
+    folded into the summary and the watermark moves forward (committed
+    here, so it survives even if the LLM call fails).
+    """
+    watermark = conversation.context_summary_upto_id or 0
+    tail = (
+        db.query(models.ChatWidgetMessage.id, models.ChatWidgetMessage.role, models.ChatWidgetMessage.content)
+        .filter(
+            models.ChatWidgetMessage.conversation_id == conversation.id,
+            models.ChatWidgetMessage.id > watermark,
+        )
+        .order_by(models.ChatWidgetMessage.id)
+        .all()
+    )
+
+    user_positions = [i for i, m in enumerate(tail) if m.role == "user"]
+    if len(user_positions) > CONTEXT_RECENT_TURNS:
+        cut = user_positions[-CONTEXT_RECENT_TURNS]
+        folded, tail = tail[:cut], tail[cut:]
+
+        conversation.context_summary = fold_into_summary(conversation.context_summary, folded)
+        conversation.context_summary_upto_id = folded[-1].id
+        conversation.context_summarized_tokens = (conversation.context_summarized_tokens or 0) + sum(
+            estimate_tokens(m.content) for m in folded
+        )
+        db.commit()
+
+        logger.info(
+            f"Folded {len(folded)} messages into summary for chat conversation {conversation.id}",
+            extra={"event": "chat_context_folded", "conversation_id": conversation.id, "messages": len(folded)},
+        )
+
+    note = _context_note(conversation)
+    tokens_saved = 0
+    if note:
+        tokens_saved = max(0, (conversation.context_summarized_tokens or 0) - estimate_tokens(note))
+
+    messages = [{"role": m.role, "content": m.content} for m in tail]
+    messages.append({"role": "user", "content": new_message})
+
+    return ChatContext(
+        messages=messages,
+        note=note,
+        turn_count=(conversation.message_count or 0) + 1,
+        tokens_saved=tokens_saved,
+    )
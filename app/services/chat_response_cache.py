@@ -0,0 +1,134 @@
+# app/services/chat_response_cache.py
+"""
+Instant replies for common first-turn chat widget questions.
+
+Most conversations open with the same handful of questions ("pricing?",
+"what are your hours?"). The first reply to each is cached per widget
+version, keyed by the normalized question, so repeats skip the LLM call.
+The visitor's part of day is part of the key because first replies tend
+to open with a greeting. So is the linked booking page, whose links and
+meeting types replies quote; booking edits also drop the org's entries. Owners can also pin canned answers on the
+widget, which always win.
+
+Only the very first visitor turn is ever served from here: once a
+conversation has any history the reply depends on it and must come from
+the model.
+"""
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from app.services.ai_chat import booking_fingerprint, time_of_day
+
+# Seconds a cached first-turn reply is served
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+# Cached replies kept per process, across all widgets
+RESPONSE_CACHE_MAX_ENTRIES = 5000
+
+# Longer openers are too specific to be worth caching
+RESPONSE_CACHE_MAX_QUESTION_CHARS = 200
+
+# Leading greetings/fillers dropped so "Hi! Pricing?" matches "pricing"
+_FILLER_PREFIX = re.compile(r"^(?:(?:hi|hello|hey|hiya|yo|ok|okay|so|um|uh|please|quick question)\b[\s,]*)+")
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_question(message: str) -> str:
+    """Lowercase, strip punctuation, greetings and extra whitespace."""
+    text = _NON_WORD.sub(" ", message.lower())
+    text = " ".join(text.split())
+    text = _FILLER_PREFIX.sub("", text)
+    return " ".join(text.split())
+
+
+class ChatResponseCache:
+    """LRU of first-turn replies keyed by (org id, widget id, widget version, question, part of day, booking page)."""
+
+    def __init__(self, ttl_seconds: int = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._replies: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self._hits = 0
+        self._pinned_hits = 0
+        self._misses = 0
+        self._lock = Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._replies.get(key)
+            if entry and time.time() - entry[1] < self._ttl:
+                self._replies.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._replies.pop(key, None)
+            self._misses += 1
+            return None
+
+    def set(self, key: tuple, reply: str):
+        with self._lock:
+            self._replies[key] = (reply, time.time())
+            self._replies.move_to_end(key)
+            while len(self._replies) > self._max_entries:
+                self._replies.popitem(last=False)
+
+    def invalidate_org(self, organization_id: int):
+        """Drop every reply cached for an organization's widgets."""
+        with self._lock:
+            for key in [k for k in self._replies if k[0] == organization_id]:
+                del self._replies[key]
+
+    def record_pinned_hit(self):
+        with self._lock:
+            self._pinned_hits += 1
+
+    def clear(self):
+        with self._lock:
+            self._replies.clear()
+            self._hits = self._pinned_hits = self._misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._pinned_hits + self._misses
+            return {
+                "entries": len(self._replies),
+                "hits": self._hits,
+                "pinned_hits": self._pinned_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._pinned_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global first-turn reply cache
+chat_response_cache = ChatResponseCache()
+
+
+def cached_first_reply(config, message: str, timezone: Optional[str]) -> tuple[Optional[str], Optional[tuple]]:
+    """
+    Look up an instant reply for a first-turn message.
+
+    `config` is a WidgetSnapshot. Returns (reply, key): reply is None on a
+    miss, and key is what to store the model's reply under with
+    store_first_reply() (None if the message isn't cacheable).
+    """
+    question = normalize_question(message)
+    if not question or len(question) > RESPONSE_CACHE_MAX_QUESTION_CHARS:
+        return None, None
+
+    pinned = config.canned_answers.get(question)
+    if pinned:
+        chat_response_cache.record_pinned_hit()
+        return pinned, None
+
+    key = (
+        config.organization_id, config.id, config.updated_at, question, time_of_day(timezone),
+        booking_fingerprint(config),
+    )
+    return chat_response_cache.get(key), key
+
+
+def store_first_reply(key: tuple, reply: str):
+    """Cache the model's reply to a first-turn question."""
+    chat_response_cache.set(key, reply)
@@ -0,0 +1,407 @@
+# app/services/crm_backfill.py
+"""
+Historical backfill of an org's existing leads into a newly connected CRM.
+
+Only new leads reach the CRM through the crm_sync_jobs outbox. A backfill
+(crm_backfills row, one active per org and provider) pushes the leads the
+org already had when it was started, in bulk:
+
+- Leads are read oldest first, one batch at a time by keyset (id after
+  the checkpoint), each in a short-lived session, so no connection or
+  transaction stays open across CRM calls. Leads the outbox has synced (or
+  is syncing) to the provider are skipped.
+- Each batch goes through the provider's bulk path: HubSpot's batch APIs
+  (contacts looked up by email with batch/read first) and Salesforce Bulk
+  API 2.0 (duplicates found with batched SOQL first). Providers without a
+  bulk API get the per-lead upserts, a few at a time. Every CRM request
+  stays within crm_rate_limiter's per-account budget.
+- Progress is checkpointed after every batch (last lead id and counts),
+  so a restart or a crash resumes where it stopped instead of starting
+  over. The checkpoint doubles as the runner's heartbeat: backfills
+  whose runner stopped beating for BACKFILL_STALE_LOCK_SECONDS are picked
+  up again.
+- Cancelling (API) takes effect after the batch in flight.
+- A batch in which every lead failed (usually the credentials, or the
+  CRM being down) stops the backfill as "failed" without advancing the
+  checkpoint; it is resumed from the API once fixed. Leads failing on
+  their own are counted and handed to the crm_sync_jobs outbox with the
+  checkpoint, which retries them with backoff and dead-letters them
+  (replayable from the API) if they keep failing.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import or_
+
+from app.crud.crm_backfill import backfill_leads_query
+from app.db import models
+from app.db.session import SessionLocal
+from app.integrations.salesforce import create_leads_bulk as salesforce_create_leads_bulk
+from app.services.crm_sync import (
+    CRM_BATCH_PUSHERS,
+    CRM_PUSHERS,
+    RETRY_BASE_SECONDS,
+    SYNC_BATCH_SIZE,
+    CRMSyncError,
+    LeadFields,
+    lead_fields,
+)
+
+logger = logging.getLogger(__name__)
+
+# Leads per batch: HubSpot's batch API limit, or one Bulk API ingest job
+BACKFILL_BATCH_SIZES = {
+    "hubspot": SYNC_BATCH_SIZE,
+    "salesforce": 2000,
+}
+DEFAULT_BACKFILL_BATCH_SIZE = 100
+
+# Per-lead pushes in flight for providers without a bulk API
+BACKFILL_LEAD_CONCURRENCY = 4
+
+# Backfills run at once (each for a different org or provider)
+BACKFILL_CONCURRENCY = 2
+
+# Running backfills whose checkpoint is older than this are picked up
+# again; longer than a Salesforce bulk job may take
+BACKFILL_STALE_LOCK_SECONDS = 1800
+
+# How often idle runners look for queued backfills
+POLL_INTERVAL_SECONDS = 15.0
+
+
+@dataclass(frozen=True)
+class ClaimedBackfill:
+    id: int
+    organization_id: int
+    provider: str
+    last_lead_id: int
+    until_lead_id: int
+    locked_at: datetime
+
+
+async def _push_bulk_to_salesforce(org_id: int, leads: List[LeadFields]) -> List[Union[Optional[str], Exception]]:
+    """Leads through a Salesforce Bulk API 2.0 ingest job, existing ones found by email."""
+    try:
+        results = await salesforce_create_leads_bulk(
+            org_id=org_id,
+            leads=[
+                {
+                    "email": lead.email,
+                    "first_name": lead.first_name,
+                    "last_name": lead.last_name,
+                    "company": lead.company,
+                }
+                for lead in leads
+            ],
+        )
+    except Exception as exc:
+        detail = getattr(exc, "detail", None) or str(exc)
+        raise CRMSyncError(str(detail)) from exc
+    return [CRMSyncError(result["error"]) if result.get("error") else result.get("id") for result in results]
+
+
+# Bulk paths by provider: one result (record id or the exception for that
+# lead) per lead, in order
+BACKFILL_BATCH_PUSHERS: Dict[
+    str, Callable[[int, List[LeadFields]], Awaitable[List[Union[Optional[str], Exception]]]]
+] = {
+    **CRM_BATCH_PUSHERS,
+    "salesforce": _push_bulk_to_salesforce,
+}
+
+
+def batch_size_for(provider: str) -> int:
+    return BACKFILL_BATCH_SIZES.get(provider, DEFAULT_BACKFILL_BATCH_SIZE)
+
+
+async def push_leads(provider: str, org_id: int, leads: List[LeadFields]) -> List[Union[Optional[str], Exception]]:
+    """Push a batch through the provider's bulk path, else lead by lead; never raises."""
+    batch_pusher = BACKFILL_BATCH_PUSHERS.get(provider)
+    if batch_pusher is not None:
+        try:
+            return await batch_pusher(org_id, leads)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            return [exc] * len(leads)
+
+    pusher = CRM_PUSHERS.get(provider)
+    if pusher is None:
+        return [CRMSyncError(f"Unsupported CRM provider: {provider}")] * len(leads)
+    semaphore = asyncio.Semaphore(BACKFILL_LEAD_CONCURRENCY)
+
+    async def push(lead: LeadFields):
+        async with semaphore:
+            return await pusher(org_id, lead)
+
+    return list(await asyncio.gather(*(push(lead) for lead in leads), return_exceptions=True))
+
+
+# ---- Checkpoints ----
+
+def claim_backfill() -> Optional[ClaimedBackfill]:
+    """Claim the oldest queued backfill, or a running one whose runner stopped."""
+    Backfill = models.CRMBackfill
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=BACKFILL_STALE_LOCK_SECONDS)
+    db = SessionLocal()
+    try:
+        claimable = or_(
+            Backfill.status == models.CRM_BACKFILL_PENDING,
+            (Backfill.status == models.CRM_BACKFILL_RUNNING)
+            & (Backfill.locked_at.is_(None) | (Backfill.locked_at < cutoff)),
+        )
+        candidates = (
+            db.query(Backfill.id)
+            .filter(claimable)
+            .order_by(Backfill.id)
+            .limit(5)
+            .all()
+        )
+        for (backfill_id,) in candidates:
+            # Conditional update: another runner may have claimed it since the select
+            won = db.query(Backfill).filter(Backfill.id == backfill_id, claimable).update(
+                {Backfill.status: models.CRM_BACKFILL_RUNNING, Backfill.locked_at: now, Backfill.updated_at: now},
+                synchronize_session=False,
+            )
+            db.commit()
+            if won:
+                backfill = db.get(Backfill, backfill_id)
+                return ClaimedBackfill(
+                    backfill.id, backfill.organization_id, backfill.provider,
+                    backfill.last_lead_id, backfill.until_lead_id, now,
+                )
+        return None
+    finally:
+        db.close()
+
+
+def _owned(db, backfill: ClaimedBackfill, locked_at: datetime):
+    """The backfill row, if it is still running under this runner's lock."""
+    Backfill = models.CRMBackfill
+    return db.query(Backfill).filter(
+        Backfill.id == backfill.id,
+        Backfill.status == models.CRM_BACKFILL_RUNNING,
+        Backfill.locked_at == locked_at,
+    )
+
+
+def checkpoint(
+    backfill: ClaimedBackfill,
+    locked_at: datetime,
+    last_lead_id: int,
+    synced: int,
+    failures: Dict[int, str],
+) -> Optional[datetime]:
+    """
+    Record a finished batch and refresh the heartbeat. Returns the new lock
+    time, or None if the backfill was cancelled (or taken over) meanwhile.
+
+    Leads that failed (failures: lead id -> error) get a sync job in the
+    same transaction, due after the outbox's first retry delay, so they are
+    retried and end up replayable rather than skipped for good. They are
+    unordered, so they don't delay the org's live syncs while backing off.
+    """
+    Backfill = models.CRMBackfill
+    now = datetime.utcnow()
+    values = {
+        Backfill.last_lead_id: last_lead_id,
+        Backfill.processed: Backfill.processed + synced + len(failures),
+        Backfill.synced: Backfill.synced + synced,
+        Backfill.failed: Backfill.failed + len(failures),
+        Backfill.locked_at: now,
+        Backfill.updated_at: now,
+    }
+    if failures:
+        values[Backfill.last_error] = list(failures.values())[-1][:500]
+    db = SessionLocal()
+    try:
+        updated = _owned(db, backfill, locked_at).update(values, synchronize_session=False)
+        if updated:
+            db.add_all([
+                models.CRMSyncJob(
+                    organization_id=backfill.organization_id,
+                    lead_id=lead_id,
+                    provider=backfill.provider,
+                    ordered=False,  # Historical leads; don't hold up live syncs
+                    status=models.CRM_SYNC_PENDING,
+                    attempts=1,
+                    next_attempt_at=now + timedelta(seconds=RETRY_BASE_SECONDS),
+                    last_error=error[:500],
+                )
+                for lead_id, error in failures.items()
+            ])
+        db.commit()
+        return now if updated else None
+    finally:
+        db.close()
+
+
+def finish_backfill(backfill: ClaimedBackfill, locked_at: datetime, status: str, error: Optional[str] = None) -> None:
+    Backfill = models.CRMBackfill
+    now = datetime.utcnow()
+    values = {Backfill.status: status, Backfill.locked_at: None, Backfill.updated_at: now}
+    if status == models.CRM_BACKFILL_COMPLETED:
+        values[Backfill.completed_at] = now
+    if error:
+        values[Backfill.last_error] = error[:500]
+    db = SessionLocal()
+    try:
+        _owned(db, backfill, locked_at).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def release_backfill(backfill: ClaimedBackfill, locked_at: datetime) -> None:
+    """Unlock a backfill interrupted by shutdown, so the next runner resumes it right away."""
+    db = SessionLocal()
+    try:
+        _owned(db, backfill, locked_at).update(
+            {models.CRMBackfill.locked_at: None}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def load_batch(backfill: ClaimedBackfill, after_id: int, batch_size: int) -> List[Tuple[int, LeadFields]]:
+    """The next (lead id, fields) batch after after_id (keyset), read in its own short session."""
+    db = SessionLocal()
+    try:
+        org = db.get(models.Organization, backfill.organization_id)
+        if not org:
+            return []
+        query = backfill_leads_query(
+            db, backfill.organization_id, backfill.provider, after_id, backfill.until_lead_id
+        )
+        return [(db_lead.id, lead_fields(org, db_lead)) for db_lead in query.limit(batch_size)]
+    finally:
+        db.close()
+
+
+async def run_backfill(backfill: ClaimedBackfill) -> str:
+    """Push a claimed backfill's remaining leads batch by batch; returns its final status."""
+    locked_at = backfill.locked_at
+    after_id = backfill.last_lead_id
+    batch_size = batch_size_for(backfill.provider)
+    try:
+        while True:
+            batch = await asyncio.to_thread(load_batch, backfill, after_id, batch_size)
+            if not batch:
+                await asyncio.to_thread(finish_backfill, backfill, locked_at, models.CRM_BACKFILL_COMPLETED)
+                return models.CRM_BACKFILL_COMPLETED
+
+            results = await push_leads(backfill.provider, backfill.organization_id, [lead for _, lead in batch])
+            failures = {
+                lead_id: str(result) or result.__class__.__name__
+                for (lead_id, _), result in zip(batch, results)
+                if isinstance(result, Exception)
+            }
+            errors = list(failures.values())
+            if errors and len(errors) == len(batch):
+                # Nothing got through: stop here rather than fail every lead the same way
+                logger.error(
+                    f"{backfill.provider} backfill {backfill.id} for org {backfill.organization_id} "
+                    f"failed: {errors[0]}",
+                    extra={"event": "crm_backfill_failed", "backfill_id": backfill.id},
+                )
+                await asyncio.to_thread(
+                    finish_backfill, backfill, locked_at, models.CRM_BACKFILL_FAILED, errors[0]
+                )
+                return models.CRM_BACKFILL_FAILED
+
+            after_id = batch[-1][0]
+            locked_at = await asyncio.to_thread(
+                checkpoint, backfill, locked_at, after_id, len(batch) - len(failures), failures
+            )
+            if locked_at is None:
+                return models.CRM_BACKFILL_CANCELLED
+    except asyncio.CancelledError:
+        await asyncio.to_thread(release_backfill, backfill, locked_at)
+        raise
+
+
+# ---- Runner ----
+
+class CRMBackfillRunner:
+    """Tasks running queued backfills; woken when one is started or resumed, else polling."""
+
+    def __init__(self, concurrency: int = BACKFILL_CONCURRENCY, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = Lock()
+        self._counts = {
+            models.CRM_BACKFILL_COMPLETED: 0,
+            models.CRM_BACKFILL_CANCELLED: 0,
+            models.CRM_BACKFILL_FAILED: 0,
+        }
+
+    def _count(self, status: str):
+        with self._lock:
+            self._counts[status] += 1
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work(), name=f"crm-backfill-{i}") for i in range(self.concurrency)]
+        logger.info(f"CRM backfill runner started ({self.concurrency} tasks)", extra={"event": "crm_backfill_runner_started"})
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    def wake(self):
+        """Have idle runners look for queued backfills now (callable from any thread or loop)."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # Loop closed while stopping
+
+    async def run_once(self) -> Optional[str]:
+        """Run one queued backfill to the end; returns its final status, or None if none was queued."""
+        backfill = await asyncio.to_thread(claim_backfill)
+        if backfill is None:
+            return None
+        status = await run_backfill(backfill)
+        self._count(status)
+        return status
+
+    async def _work(self):
+        while True:
+            self._wake.clear()
+            try:
+                if await self.run_once() is not None:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"CRM backfill runner error: {exc}", extra={"event": "crm_backfill_runner_error"})
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": bool(self._tasks), **self._counts}
+
+
+# Global runner, started in the app lifespan
+crm_backfill_runner = CRMBackfillRunner()
@@ -0,0 +1,640 @@
+# app/services/crm_sync.py
+"""
+CRM sync for new leads.
+
+Pushes a lead into the organization's active CRM (HubSpot, Pipedrive,
+Salesforce, Nutshell or Zoho) and emails the org when a sync fails for
+good, if CRM error notifications are enabled.
+
+Syncs run from the crm_sync_jobs outbox rather than straight off the
+event bus. A job is committed in the same transaction as its lead (see
+crud.crm_sync_job.enqueue_crm_sync), so a restart or a CRM outage no
+longer loses the sync. crm_sync_worker processes the outbox:
+
+- Jobs are claimed with a conditional UPDATE, so several workers (or app
+  processes) never run the same job.
+- Per-org ordering: a job is only claimed once every earlier job of its
+  org has finished, so one org's leads reach the CRM in the order they
+  arrived. While the head job is backing off, the rest of the org waits
+  (a failure is usually the org's credentials, not the lead). Retries of
+  leads a backfill failed to push are unordered: they run whenever due
+  and never hold up the org's new leads.
+- For HubSpot, the org's consecutive due jobs are claimed together (up
+  to SYNC_BATCH_SIZE) and pushed through the batch APIs, a handful of
+  requests for the whole burst instead of four per lead. Results are
+  mapped back per lead, so one bad lead only fails its own job.
+- A failed job is retried with exponential backoff, and dead-lettered
+  (status "dead") after MAX_ATTEMPTS; only then is the org notified.
+  Only transient failures (5xx, 429, network, auth) are retried: a lead
+  the CRM rejects outright (another 4xx, e.g. a validation error) is
+  dead-lettered at once instead of holding up the org for hours.
+  Dead jobs are replayed through /api/integrations/crm-sync.
+- The CRM writes are idempotent upserts that look the record up by email
+  first, so a retry after a partial success doesn't create duplicates.
+- Jobs left running by a crashed worker are requeued after
+  STALE_LOCK_SECONDS.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session, aliased
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.integrations.hubspot import create_lead_full as hubspot_create_lead_full
+from app.integrations.hubspot import create_leads_batch as hubspot_create_leads_batch
+from app.integrations import nutshell
+from app.integrations.pipedrive import create_lead as pipedrive_create_lead
+from app.integrations.salesforce import create_lead as salesforce_create_lead
+from app.integrations.zoho import create_lead as zoho_create_lead
+from app.services.email import send_crm_error_notification
+from app.api.routes.integrations_notifications import get_org_notification_settings
+
+logger = logging.getLogger(__name__)
+
+# Attempts before a job is dead-lettered
+MAX_ATTEMPTS = 6
+
+# Retry backoff: 30s, 2m, 8m, 32m, ~2h
+RETRY_BASE_SECONDS = 30
+RETRY_MULTIPLIER = 4
+
+# Running jobs not finished within this long are assumed orphaned
+STALE_LOCK_SECONDS = 600
+
+# Jobs processed concurrently (each from a different org)
+WORKER_CONCURRENCY = 4
+
+# Jobs of one org pushed together by providers with batch APIs
+SYNC_BATCH_SIZE = 100
+
+# How often idle workers poll for due retries
+POLL_INTERVAL_SECONDS = 5.0
+
+
+# 4xx answers a retry can fix: auth (refreshed or reconnected), timeouts, conflicts, rate limits
+RETRYABLE_CLIENT_ERRORS = {401, 403, 408, 409, 423, 425, 429}
+
+
+def is_permanent_status(status: Optional[int]) -> bool:
+    """True if a CRM's HTTP status means the lead itself was rejected, so retrying can't help."""
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_CLIENT_ERRORS
+
+
+class CRMSyncError(Exception):
+    """The CRM rejected the lead or couldn't be reached."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        # Rejected for good (e.g. a validation error on the email): dead-lettered without retries
+        self.permanent = permanent
+
+
+@dataclass(frozen=True)
+class LeadFields:
+    """The lead data a sync needs, read before any CRM call."""
+
+    org_name: Optional[str]
+    email: str
+    first_name: str
+    last_name: str
+    phone: str
+    company: str
+    display_name: str
+    source: str
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    organization_id: int
+    lead_id: int
+    provider: str
+    attempts: int
+
+
+# ---- Per-CRM pushes (raise CRMSyncError, return the CRM record id) ----
+
+async def _push_to_hubspot(org_id: int, lead: LeadFields) -> Optional[str]:
+    """Contact (found by email or created) + company + association."""
+    result = await hubspot_create_lead_full(
+        email=lead.email,
+        first_name=lead.first_name,
+        last_name=lead.last_name,
+        phone=lead.phone,
+        company_name=lead.company,
+        organization_id=org_id,
+    )
+    contact = result.get("contact") or {}
+    if not contact.get("id"):
+        raise CRMSyncError("HubSpot returned no contact id")
+    return str(contact["id"])
+
+
+async def _push_to_pipedrive(org_id: int, lead: LeadFields) -> Optional[str]:
+    """Person (found by email or created) plus lead."""
+    result = await pipedrive_create_lead(
+        title=f"{lead.source} lead from {lead.email}",
+        name=lead.display_name,
+        email=lead.email,
+        organization_id=org_id,
+    )
+    if result is None:
+        raise CRMSyncError("Failed to create lead in Pipedrive. Check API credentials.")
+    return str(result.get("id")) if result.get("id") else None
+
+
+async def _push_to_salesforce(org_id: int, lead: LeadFields) -> Optional[str]:
+    """Lead sObject, unless one with the same email exists."""
+    try:
+        result = await salesforce_create_lead(
+            org_id=org_id,
+            email=lead.email,
+            first_name=lead.first_name,
+            last_name=lead.last_name,
+            company=lead.company,
+        )
+    except Exception as exc:
+        detail = getattr(exc, "detail", None) or str(exc)
+        permanent = is_permanent_status(getattr(exc, "upstream_status", None))
+        raise CRMSyncError(str(detail), permanent=permanent) from exc
+    return str(result.get("id")) if result.get("id") else None
+
+
+async def _push_to_nutshell(org_id: int, lead: LeadFields) -> Optional[str]:
+    """JSON RPC newLead, linked to the contact found by email or created."""
+    result = await nutshell.create_lead(
+        description=f"{lead.source} lead from {lead.email}",
+        contact_name=lead.display_name,
+        contact_email=lead.email,
+        organization_id=org_id,
+    )
+    if result is None:
+        raise CRMSyncError("Failed to create lead in Nutshell. Check API credentials.")
+    return str(result.get("id")) if isinstance(result, dict) and result.get("id") else None
+
+
+async def _push_to_zoho(org_id: int, lead: LeadFields) -> Optional[str]:
+    """REST API Lead, unless one with the same email exists."""
+    result = await zoho_create_lead(
+        title=f"Lead from {lead.email}",
+        name=f"{lead.first_name} {lead.last_name}".strip() or lead.email,
+        email=lead.email,
+        company=lead.company,
+        phone=lead.phone,
+        organization_id=org_id,
+    )
+    if result is None:
+        raise CRMSyncError("Failed to create lead in Zoho CRM. Check API credentials.")
+    return str(result.get("id")) if result.get("id") else None
+
+
+async def _push_batch_to_hubspot(org_id: int, leads: List[LeadFields]) -> List[Union[Optional[str], Exception]]:
+    """Contacts, companies and associations through HubSpot's batch APIs."""
+    results = await hubspot_create_leads_batch(
+        [
+            {
+                "email": lead.email,
+                "first_name": lead.first_name,
+                "last_name": lead.last_name,
+                "phone": lead.phone,
+                "company_name": lead.company,
+            }
+            for lead in leads
+        ],
+        organization_id=org_id,
+    )
+    return [
+        CRMSyncError(result["error"], permanent=is_permanent_status(result.get("error_status")))
+        if result["error"] else str(result["contact"]["id"])
+        for result in results
+    ]
+
+
+CRM_PUSHERS: Dict[str, Callable[[int, LeadFields], Awaitable[Optional[str]]]] = {
+    "hubspot": _push_to_hubspot,
+    "pipedrive": _push_to_pipedrive,
+    "salesforce": _push_to_salesforce,
+    "nutshell": _push_to_nutshell,
+    "zoho": _push_to_zoho,
+}
+
+# Providers whose leads can be pushed many at a time: one result (record
+# id or the exception for that lead) per lead, in order
+CRM_BATCH_PUSHERS: Dict[
+    str, Callable[[int, List[LeadFields]], Awaitable[List[Union[Optional[str], Exception]]]]
+] = {
+    "hubspot": _push_batch_to_hubspot,
+}
+
+
+def _maybe_send_crm_error_notification(
+    org_id: int,
+    org_name: Optional[str],
+    crm_provider: str,
+    error_message: str,
+    lead_name: Optional[str],
+):
+    """Check notification settings and send CRM error notification if enabled."""
+    db = SessionLocal()
+    try:
+        notification_settings = get_org_notification_settings(db, org_id)
+        should_notify = (
+            notification_settings is None  # Default: enabled
+            or notification_settings.crm_error
+        )
+
+        if not should_notify:
+            return
+
+        recipients = [
+            user.email
+            for user in db.query(models.User)
+            .filter(models.User.organization_id == org_id)
+            .all()
+            if user.email
+        ]
+
+        if recipients:
+            send_crm_error_notification(
+                recipients=recipients,
+                crm_provider=crm_provider,
+                error_message=error_message,
+                lead_name=lead_name,
+                organization_name=org_name,
+            )
+    finally:
+        db.close()
+
+
+# ---- Outbox ----
+
+def lead_fields(org: models.Organization, db_lead: models.Lead) -> LeadFields:
+    first_name = db_lead.first_name or ""
+    last_name = db_lead.last_name or ""
+    return LeadFields(
+        org_name=getattr(org, "name", None),
+        email=db_lead.email,
+        first_name=first_name,
+        last_name=last_name,
+        phone=db_lead.phone or "",
+        company=db_lead.company or "",
+        display_name=db_lead.name or f"{first_name} {last_name}".strip() or db_lead.email,
+        source=db_lead.source or "Site2CRM",
+    )
+
+
+def _load_leads(org_id: int, lead_ids: List[int]) -> Dict[int, LeadFields]:
+    db = SessionLocal()
+    try:
+        org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
+        if not org:
+            return {}
+        db_leads = db.query(models.Lead).filter(
+            models.Lead.id.in_(lead_ids),
+            models.Lead.organization_id == org_id,
+        ).all()
+
+        return {db_lead.id: lead_fields(org, db_lead) for db_lead in db_leads}
+    finally:
+        db.close()
+
+
+def _claim(db: Session, job_ids: List[int], now: datetime) -> List[ClaimedJob]:
+    """Mark pending jobs running; returns those this worker won."""
+    Job = models.CRMSyncJob
+    # Conditional update: another worker may have claimed some since the select
+    db.query(Job).filter(Job.id.in_(job_ids), Job.status == models.CRM_SYNC_PENDING).update(
+        {
+            Job.status: models.CRM_SYNC_RUNNING,
+            Job.locked_at: now,
+            Job.attempts: Job.attempts + 1,
+            Job.updated_at: now,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    jobs = (
+        db.query(Job)
+        .filter(Job.id.in_(job_ids), Job.status == models.CRM_SYNC_RUNNING, Job.locked_at == now)
+        .order_by(Job.id)
+        .all()
+    )
+    return [ClaimedJob(job.id, job.organization_id, job.lead_id, job.provider, job.attempts) for job in jobs]
+
+
+def claim_jobs(limit: int, batch_size: int = SYNC_BATCH_SIZE) -> List[List[ClaimedJob]]:
+    """
+    Claim due jobs for up to `limit` orgs, as one list per org.
+
+    Each list starts with the org's oldest unfinished job, if it isn't
+    already running. For providers with a batch API, the org's next due
+    jobs for the same provider are claimed with it (up to batch_size), so
+    a burst of leads is pushed in a few requests.
+    """
+    return _claim_jobs(limit, batch_size)[0]
+
+
+def _claim_jobs(limit: int, batch_size: int = SYNC_BATCH_SIZE) -> Tuple[List[List[ClaimedJob]], bool]:
+    """claim_jobs, plus whether another worker won any of the heads it selected."""
+    Job = models.CRMSyncJob
+    earlier = aliased(models.CRMSyncJob)
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    try:
+        # Unordered jobs (backfill retries) don't wait and aren't waited for
+        blocked = exists().where(
+            earlier.organization_id == Job.organization_id,
+            earlier.id < Job.id,
+            earlier.ordered.is_(True),
+            earlier.status.in_([models.CRM_SYNC_PENDING, models.CRM_SYNC_RUNNING]),
+        )
+        heads = (
+            db.query(Job)
+            .filter(
+                Job.status == models.CRM_SYNC_PENDING,
+                Job.next_attempt_at <= now,
+                or_(Job.ordered.is_(False), ~blocked),
+            )
+            .order_by(Job.id)
+            .limit(limit)
+            .all()
+        )
+
+        batches = []
+        lost = False
+        for head in heads:
+            job_ids = [head.id]
+            if head.provider in CRM_BATCH_PUSHERS and batch_size > 1:
+                following = (
+                    db.query(Job)
+                    .filter(
+                        Job.organization_id == head.organization_id,
+                        Job.id > head.id,
+                        Job.ordered.is_(head.ordered),
+                        Job.status == models.CRM_SYNC_PENDING,
+                    )
+                    .order_by(Job.id)
+                    .limit(batch_size - 1)
+                    .all()
+                )
+                # Stop at the first job that can't go yet, to keep the org's order
+                for job in following:
+                    if job.provider != head.provider or job.next_attempt_at > now:
+                        break
+                    job_ids.append(job.id)
+
+            claimed = _claim(db, job_ids, now)
+            # Followers are only valid behind their head
+            if claimed and claimed[0].id == head.id:
+                batches.append(claimed)
+                continue
+            lost = True
+            # Another worker has the head; give back any followers won here
+            for job in claimed:
+                release_job(job.id)
+        return batches, lost
+    finally:
+        db.close()
+
+
+def complete_job(job_id: int, external_id: Optional[str]) -> None:
+    db = SessionLocal()
+    try:
+        job = db.get(models.CRMSyncJob, job_id)
+        if job:
+            job.status = models.CRM_SYNC_SUCCEEDED
+            job.external_id = external_id[:100] if external_id else None
+            job.completed_at = datetime.utcnow()
+            job.locked_at = None
+            job.last_error = None
+            db.commit()
+    finally:
+        db.close()
+
+
+def fail_job(job_id: int, error: str, permanent: bool = False) -> bool:
+    """
+    Record a failed attempt and schedule the retry; True if the job is now
+    dead. Permanent failures are dead-lettered at once, so they stop
+    holding up the org's later jobs.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(models.CRMSyncJob, job_id)
+        if not job:
+            return False
+        job.last_error = error[:500]
+        job.locked_at = None
+        if permanent or job.attempts >= MAX_ATTEMPTS:
+            job.status = models.CRM_SYNC_DEAD
+        else:
+            job.status = models.CRM_SYNC_PENDING
+            delay = RETRY_BASE_SECONDS * RETRY_MULTIPLIER ** max(0, job.attempts - 1)
+            job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        db.commit()
+        return job.status == models.CRM_SYNC_DEAD
+    finally:
+        db.close()
+
+
+def release_job(job_id: int) -> None:
+    """Return a job interrupted by shutdown to the queue, without using up an attempt."""
+    db = SessionLocal()
+    try:
+        job = db.get(models.CRMSyncJob, job_id)
+        if job and job.status == models.CRM_SYNC_RUNNING:
+            job.status = models.CRM_SYNC_PENDING
+            job.attempts = max(0, job.attempts - 1)
+            job.locked_at = None
+            db.commit()
+    finally:
+        db.close()
+
+
+def reclaim_stale_jobs() -> int:
+    """Requeue (or dead-letter, if out of attempts) jobs orphaned by a crashed worker."""
+    Job = models.CRMSyncJob
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=STALE_LOCK_SECONDS)
+    db = SessionLocal()
+    try:
+        stale = db.query(Job).filter(Job.status == models.CRM_SYNC_RUNNING, Job.locked_at < cutoff).all()
+        for job in stale:
+            job.locked_at = None
+            job.last_error = "Worker stopped before the sync finished"
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = models.CRM_SYNC_DEAD
+            else:
+                job.status = models.CRM_SYNC_PENDING
+                job.next_attempt_at = now
+        db.commit()
+        return len(stale)
+    finally:
+        db.close()
+
+
+async def _record_outcome(
+    job: ClaimedJob,
+    lead: Optional[LeadFields],
+    external_id: Optional[str] = None,
+    exc: Optional[Exception] = None,
+) -> str:
+    """Store a job's result; returns "succeeded", "failed" or "dead_lettered"."""
+    if exc is None:
+        await asyncio.to_thread(complete_job, job.id, external_id)
+        return "succeeded"
+
+    error = str(exc) or exc.__class__.__name__
+    dead = await asyncio.to_thread(fail_job, job.id, error, getattr(exc, "permanent", False))
+    logger.error(
+        f"{job.provider} sync failed for org {job.organization_id}, lead {job.lead_id} "
+        f"(attempt {job.attempts}/{MAX_ATTEMPTS}): {error}",
+        extra={"event": "crm_sync_failed", "job_id": job.id, "dead": dead},
+    )
+    if dead and lead is not None:
+        await asyncio.to_thread(
+            _maybe_send_crm_error_notification,
+            job.organization_id, lead.org_name, job.provider, error, lead.display_name,
+        )
+    return "dead_lettered" if dead else "failed"
+
+
+async def process_job(job: ClaimedJob) -> str:
+    """Push one claimed job's lead to its CRM and record the outcome."""
+    lead = (await asyncio.to_thread(_load_leads, job.organization_id, [job.lead_id])).get(job.lead_id)
+    pusher = CRM_PUSHERS.get(job.provider)
+    try:
+        if lead is None:
+            raise CRMSyncError(f"Lead {job.lead_id} not found", permanent=True)
+        if pusher is None:
+            raise CRMSyncError(f"Unsupported CRM provider: {job.provider}", permanent=True)
+        external_id = await pusher(job.organization_id, lead)
+    except asyncio.CancelledError:
+        await asyncio.to_thread(release_job, job.id)
+        raise
+    except Exception as exc:
+        return await _record_outcome(job, lead, exc=exc)
+    return await _record_outcome(job, lead, external_id)
+
+
+async def process_batch(jobs: List[ClaimedJob]) -> List[str]:
+    """
+    Push one org's claimed jobs, in a single batch where the provider
+    supports it, and record each job's outcome.
+    """
+    batch_pusher = CRM_BATCH_PUSHERS.get(jobs[0].provider)
+    if len(jobs) == 1 or batch_pusher is None:
+        return [await process_job(job) for job in jobs]
+
+    org_id = jobs[0].organization_id
+    leads = await asyncio.to_thread(_load_leads, org_id, [job.lead_id for job in jobs])
+    found = [job for job in jobs if job.lead_id in leads]
+    try:
+        results = await batch_pusher(org_id, [leads[job.lead_id] for job in found]) if found else []
+    except asyncio.CancelledError:
+        for job in jobs:
+            await asyncio.to_thread(release_job, job.id)
+        raise
+    except Exception as exc:
+        results = [exc] * len(found)
+
+    by_job = dict(zip((job.id for job in found), results))
+    outcomes = []
+    for job in jobs:
+        result = by_job.get(job.id, CRMSyncError(f"Lead {job.lead_id} not found", permanent=True))
+        if isinstance(result, Exception):
+            outcomes.append(await _record_outcome(job, leads.get(job.lead_id), exc=result))
+        else:
+            outcomes.append(await _record_outcome(job, leads[job.lead_id], result))
+    return outcomes
+
+
+# ---- Worker pool ----
+
+class CRMSyncWorker:
+    """A pool of tasks draining the outbox; woken on new leads, else polling for retries."""
+
+    def __init__(self, concurrency: int = WORKER_CONCURRENCY, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = Lock()
+        self._counts = {"succeeded": 0, "failed": 0, "dead_lettered": 0}
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(reclaim_stale_jobs)
+        self._tasks = [asyncio.create_task(self._work(), name=f"crm-sync-{i}") for i in range(self.concurrency)]
+        logger.info(f"CRM sync worker started ({self.concurrency} tasks)", extra={"event": "crm_sync_worker_started"})
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+    def wake(self):
+        """Have idle workers look for new jobs now (callable from any thread or loop)."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass  # Loop closed while stopping
+
+    async def run_once(self) -> int:
+        """Process due jobs for up to `concurrency` orgs at once; returns how many ran."""
+        await asyncio.to_thread(reclaim_stale_jobs)
+        batches = await asyncio.to_thread(claim_jobs, self.concurrency)
+        for outcomes in await asyncio.gather(*(process_batch(jobs) for jobs in batches)):
+            for outcome in outcomes:
+                self._count(outcome)
+        return sum(len(jobs) for jobs in batches)
+
+    async def _work(self):
+        while True:
+            self._wake.clear()
+            try:
+                batches, lost = await asyncio.to_thread(_claim_jobs, 1)
+                if batches:
+                    for outcome in await process_batch(batches[0]):
+                        self._count(outcome)
+                    continue
+                if lost:
+                    # Another task won the same head; the next org's may be free
+                    continue
+                await asyncio.to_thread(reclaim_stale_jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"CRM sync worker error: {exc}", extra={"event": "crm_sync_worker_error"})
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": bool(self._tasks), **self._counts}
+
+
+# Global worker, started in the app lifespan
+crm_sync_worker = CRMSyncWorker()
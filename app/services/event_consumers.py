@@ -0,0 +1,244 @@
+# app/services/event_consumers.py
+"""
+Default consumers for domain events.
+
+Each consumer loads what it needs by id in its own session, so nothing
+here runs inside (or holds up) the request that published the event.
+Sync consumers run in a worker thread (see app.services.events).
+"""
+import logging
+from datetime import datetime
+
+from app.db import models
+from app.db.session import SessionLocal
+from app.services.events import (
+    EventBus,
+    event_bus,
+    LeadCreated,
+    LeadUpdated,
+    ChatStarted,
+    ChatLeadCaptured,
+    BookingCreated,
+)
+
+logger = logging.getLogger(__name__)
+
+_registered_buses: set[int] = set()
+
+
+def _org_recipients(db, org_id: int) -> list[str]:
+    return [
+        user.email
+        for user in db.query(models.User)
+        .filter(models.User.organization_id == org_id)
+        .all()
+        if user.email
+    ]
+
+
+# =============================================================================
+# Webhooks
+# =============================================================================
+
+def webhooks_lead_created(event: LeadCreated):
+    from app.services.webhook_service import fire_lead_created_webhook
+
+    db = SessionLocal()
+    try:
+        lead = db.query(models.Lead).filter(models.Lead.id == event.lead_id).first()
+        if lead:
+            fire_lead_created_webhook(event.org_id, lead, source=event.source)
+    finally:
+        db.close()
+
+
+def webhooks_lead_updated(event: LeadUpdated):
+    from app.services.webhook_service import fire_lead_updated_webhook
+
+    db = SessionLocal()
+    try:
+        lead = db.query(models.Lead).filter(models.Lead.id == event.lead_id).first()
+        if lead:
+            fire_lead_updated_webhook(event.org_id, lead, list(event.changed_fields))
+    finally:
+        db.close()
+
+
+def webhooks_chat_started(event: ChatStarted):
+    from app.services.webhook_service import fire_chat_started_webhook
+
+    db = SessionLocal()
+    try:
+        conversation = db.query(models.ChatWidgetConversation).filter(
+            models.ChatWidgetConversation.id == event.conversation_id
+        ).first()
+        if conversation:
+            fire_chat_started_webhook(event.org_id, conversation, conversation.config)
+    finally:
+        db.close()
+
+
+def webhooks_chat_lead_captured(event: ChatLeadCaptured):
+    from app.services.webhook_service import fire_chat_lead_captured_webhook
+
+    db = SessionLocal()
+    try:
+        conversation = db.query(models.ChatWidgetConversation).filter(
+            models.ChatWidgetConversation.id == event.conversation_id
+        ).first()
+        if conversation:
+            fire_chat_lead_captured_webhook(event.org_id, conversation, conversation.config)
+    finally:
+        db.close()
+
+
+# =============================================================================
+# Email
+# =============================================================================
+
+def email_new_lead(event: LeadCreated):
+    """Notify org users about a new lead (if new-lead notifications are enabled)."""
+    from app.services.email import send_new_lead_notification
+    from app.api.routes.integrations_notifications import get_org_notification_settings
+
+    db = SessionLocal()
+    try:
+        notification_settings = get_org_notification_settings(db, event.org_id)
+        should_notify = (
+            notification_settings is None  # Default: enabled
+            or notification_settings.new_lead
+        )
+        if not should_notify:
+            return
+
+        lead = db.query(models.Lead).filter(models.Lead.id == event.lead_id).first()
+        org = db.query(models.Organization).filter(models.Organization.id == event.org_id).first()
+        recipients = _org_recipients(db, event.org_id)
+        if not lead or not recipients:
+            return
+
+        display_name = lead.name or f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead.email
+        send_new_lead_notification(
+            recipients,
+            display_name or "New lead",
+            lead.email,
+            lead.company,
+            lead.source,
+            org.name if org else None,
+        )
+    finally:
+        db.close()
+
+
+def email_booking_created(event: BookingCreated):
+    """Send booking confirmation to the guest and a notification to the host."""
+    from app.services.email import send_booking_confirmation_guest, send_booking_notification_host
+
+    db = SessionLocal()
+    try:
+        booking = db.query(models.Booking).filter(models.Booking.id == event.booking_id).first()
+        if not booking:
+            return
+        meeting_type = booking.meeting_type
+        config = meeting_type.booking_config
+
+        manage_url = f"https://site2crm.io/book/{config.slug}/cancel/{booking.id}?token={booking.cancel_token}"
+
+        send_booking_confirmation_guest(
+            recipient=booking.guest_email,
+            guest_name=booking.guest_name,
+            meeting_type_name=meeting_type.name,
+            host_name=config.business_name,
+            scheduled_at=booking.scheduled_at,
+            duration_minutes=booking.duration_minutes,
+            timezone=booking.timezone,
+            meeting_link=booking.meeting_link,
+            manage_url=manage_url,
+        )
+
+        # Send notification to host (find org owner/default user)
+        host_user = db.query(models.User).filter(
+            models.User.organization_id == event.org_id,
+            models.User.is_default == True,
+        ).first()
+        if not host_user:
+            host_user = db.query(models.User).filter(
+                models.User.organization_id == event.org_id,
+                models.User.role == "OWNER",
+            ).first()
+
+        if host_user:
+            send_booking_notification_host(
+                recipient=host_user.email,
+                host_name=config.business_name,
+                guest_name=booking.guest_name,
+                guest_email=booking.guest_email,
+                guest_company=booking.guest_company,
+                meeting_type_name=meeting_type.name,
+                scheduled_at=booking.scheduled_at,
+                duration_minutes=booking.duration_minutes,
+                timezone=booking.timezone,
+                guest_notes=booking.guest_notes,
+            )
+    finally:
+        db.close()
+
+
+# =============================================================================
+# CRM sync
+# =============================================================================
+
+def crm_sync_lead_created(event: LeadCreated):
+    """The lead's sync job was committed with it; wake the outbox worker to run it now."""
+    from app.services.crm_sync import crm_sync_worker
+
+    if event.sync_to_crm:
+        crm_sync_worker.wake()
+
+
+# =============================================================================
+# Scoring
+# =============================================================================
+
+def score_lead(event: LeadCreated):
+    """Give new leads an initial score so scoring views don't start empty."""
+    from app.services.lead_scoring import calculate_lead_score
+
+    db = SessionLocal()
+    try:
+        lead = db.query(models.Lead).filter(models.Lead.id == event.lead_id).first()
+        if not lead or lead.score is not None:
+            return
+
+        score = calculate_lead_score(db, lead)
+        lead.score = score.total_score
+        lead.score_engagement = score.engagement_score
+        lead.score_source = score.source_score
+        lead.score_value = score.value_score
+        lead.score_velocity = score.velocity_score
+        lead.score_fit = score.fit_score
+        lead.win_probability = int(score.win_probability)
+        lead.score_updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+# =============================================================================
+# Registration
+# =============================================================================
+
+def register_default_consumers(bus: EventBus = event_bus):
+    """Register the built-in consumers on a bus (idempotent)."""
+    if id(bus) in _registered_buses:
+        return
+    _registered_buses.add(id(bus))
+
+    bus.subscribe(LeadCreated, name="webhooks")(webhooks_lead_created)
+    bus.subscribe(LeadCreated, name="email")(email_new_lead)
+    bus.subscribe(LeadCreated, name="crm_sync")(crm_sync_lead_created)
+    bus.subscribe(LeadCreated, name="scoring")(score_lead)
+    bus.subscribe(LeadUpdated, name="webhooks")(webhooks_lead_updated)
+    bus.subscribe(ChatStarted, name="webhooks")(webhooks_chat_started)
+    bus.subscribe(ChatLeadCaptured, name="webhooks")(webhooks_chat_lead_captured)
+    bus.subscribe(BookingCreated, name="email")(email_booking_created)
@@ -0,0 +1,288 @@
+# app/services/events.py
+"""
+In-process domain event bus for Site2CRM.
+
+Route handlers publish typed events (lead.created, chat.lead_captured,
+booking.created, ...) after their transaction commits. Registered consumers
+(webhooks, email, CRM sync, scoring) run on a bounded pool of worker tasks
+off the request path, with per-consumer latency and error metrics.
+
+Consumers may be sync or async. Sync consumers run in a worker thread so
+blocking DB/HTTP/SMTP calls never stall the event loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, ClassVar, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of consumer invocations processed concurrently
+EVENT_BUS_CONCURRENCY = 8
+
+# Pending consumer invocations before new events are dropped
+EVENT_BUS_MAX_QUEUE = 10000
+
+
+# =============================================================================
+# Events
+# =============================================================================
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Base class for domain events. Events carry ids, not ORM objects."""
+
+    name: ClassVar[str] = "event"
+
+    org_id: int
+    occurred_at: datetime = field(default_factory=datetime.utcnow, kw_only=True)
+
+
+@dataclass(frozen=True)
+class LeadCreated(DomainEvent):
+    name: ClassVar[str] = "lead.created"
+
+    lead_id: int
+    source: str = "form"
+    sync_to_crm: bool = True
+
+
+@dataclass(frozen=True)
+class LeadUpdated(DomainEvent):
+    name: ClassVar[str] = "lead.updated"
+
+    lead_id: int
+    changed_fields: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ChatStarted(DomainEvent):
+    name: ClassVar[str] = "chat.started"
+
+    conversation_id: int
+
+
+@dataclass(frozen=True)
+class ChatLeadCaptured(DomainEvent):
+    name: ClassVar[str] = "chat.lead_captured"
+
+    conversation_id: int
+
+
+@dataclass(frozen=True)
+class BookingCreated(DomainEvent):
+    name: ClassVar[str] = "booking.created"
+
+    booking_id: int
+
+
+# =============================================================================
+# Bus
+# =============================================================================
+
+@dataclass
+class ConsumerStats:
+    """Latency and error counters for one consumer."""
+
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_error: Optional[str] = None
+    last_error_at: Optional[datetime] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
+        }
+
+
+@dataclass
+class _Consumer:
+    name: str
+    handler: Callable[[Any], Any]
+    stats: ConsumerStats = field(default_factory=ConsumerStats)
+
+
+class EventBus:
+    """
+    Publish/subscribe bus with a bounded worker pool.
+
+    publish() is safe to call from sync route handlers (threadpool) and from
+    async code. When the bus has not been started (scripts, tests without the
+    app lifespan) events are dispatched on a short-lived background thread.
+    """
+
+    def __init__(self, concurrency: int = EVENT_BUS_CONCURRENCY, max_queue: int = EVENT_BUS_MAX_QUEUE):
+        self._concurrency = concurrency
+        self._max_queue = max_queue
+        self._consumers: dict[str, list[_Consumer]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._dropped = 0
+
+    # ---- Registration ----
+
+    def subscribe(self, event_type: type[DomainEvent], name: Optional[str] = None):
+        """
+        Decorator registering a consumer for an event type.
+
+        Usage:
+            @event_bus.subscribe(LeadCreated, name="webhooks")
+            def deliver_lead_created(event: LeadCreated):
+                ...
+        """
+        def decorator(func):
+            consumer_name = name or func.__name__
+            consumers = self._consumers.setdefault(event_type.name, [])
+            if not any(c.name == consumer_name for c in consumers):
+                consumers.append(_Consumer(name=consumer_name, handler=func))
+            return func
+
+        return decorator
+
+    def consumers_for(self, event_type: type[DomainEvent]) -> list[str]:
+        return [c.name for c in self._consumers.get(event_type.name, [])]
+
+    # ---- Lifecycle ----
+
+    async def start(self):
+        """Start worker tasks on the running loop (called from the app lifespan)."""
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"event-bus-worker-{i}")
+            for i in range(self._concurrency)
+        ]
+        logger.info(f"Event bus started with {self._concurrency} workers")
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Drain pending work (bounded by drain_timeout) and stop workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Event bus stopped with {self._queue.qsize()} pending consumer calls")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        self._queue = None
+        logger.info("Event bus stopped")
+
+    # ---- Publishing ----
+
+    def publish(self, event: DomainEvent):
+        """Queue an event for all of its consumers. Never raises."""
+        consumers = self._consumers.get(event.name, [])
+        if not consumers:
+            return
+
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                on_loop = False
+            for consumer in consumers:
+                if on_loop:
+                    self._enqueue(consumer, event)
+                else:
+                    loop.call_soon_threadsafe(self._enqueue, consumer, event)
+            return
+
+        # Bus not running - dispatch on a throwaway loop so callers stay non-blocking
+        thread = threading.Thread(
+            target=lambda: asyncio.run(self._dispatch_all(consumers, event)),
+            name=f"event-{event.name}",
+            daemon=True,
+        )
+        thread.start()
+
+    def _enqueue(self, consumer: _Consumer, event: DomainEvent):
+        try:
+            self._queue.put_nowait((consumer, event))
+        except asyncio.QueueFull:
+            self._dropped += 1
+            logger.error(
+                f"Event bus queue full, dropped {event.name} for consumer {consumer.name}",
+                extra={"event": "event_bus_dropped", "domain_event": event.name, "consumer": consumer.name},
+            )
+
+    # ---- Dispatch ----
+
+    async def _worker(self):
+        while True:
+            consumer, event = await self._queue.get()
+            try:
+                await self._run_consumer(consumer, event)
+            finally:
+                self._queue.task_done()
+
+    async def _dispatch_all(self, consumers: list[_Consumer], event: DomainEvent):
+        await asyncio.gather(*(self._run_consumer(c, event) for c in consumers))
+
+    async def _run_consumer(self, consumer: _Consumer, event: DomainEvent):
+        start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(consumer.handler):
+                await consumer.handler(event)
+            else:
+                await asyncio.to_thread(consumer.handler, event)
+        except Exception as e:
+            consumer.stats.errors += 1
+            consumer.stats.last_error = str(e)[:200]
+            consumer.stats.last_error_at = datetime.utcnow()
+            logger.error(
+                f"Event consumer {consumer.name} failed for {event.name}: {e}",
+                extra={"event": "event_consumer_failed", "domain_event": event.name, "consumer": consumer.name},
+            )
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            consumer.stats.calls += 1
+            consumer.stats.total_ms += elapsed_ms
+            consumer.stats.max_ms = max(consumer.stats.max_ms, elapsed_ms)
+
+    # ---- Metrics ----
+
+    def stats(self) -> dict:
+        """Per-consumer latency/error metrics plus queue depth."""
+        return {
+            "running": bool(self._workers),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "dropped": self._dropped,
+            "consumers": {
+                event_name: {c.name: c.stats.to_dict() for c in consumers}
+                for event_name, consumers in self._consumers.items()
+            },
+        }
+
+    def summary(self) -> dict:
+        """
+        stats() for the public health check: counts and timings only.
+
+        Error messages from SMTP, webhook and CRM failures can carry
+        emails, URLs or tokens, so last_error is left out (it is logged).
+        """
+        stats = self.stats()
+        for consumers in stats["consumers"].values():
+            for consumer in consumers.values():
+                consumer.pop("last_error", None)
+        return stats
+
+
+# Global event bus instance
+event_bus = EventBus()
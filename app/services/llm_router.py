@@ -0,0 +1,236 @@
+# app/services/llm_router.py
+"""
+Provider health tracking and hedged requests for LLM calls.
+
+Each provider keeps a rolling window of recent call outcomes and latencies.
+A provider whose recent calls mostly fail (or that fails several times in a
+row) has its circuit opened and is skipped until a cooldown passes, after
+which a single probe request decides whether it is healthy again.
+
+ProviderRouter.call() sends the request to the first healthy provider. If
+no answer arrives within that provider's latency budget (its recent p95,
+clamped), the same request is also sent to the next provider and whichever
+answer arrives first wins; the other request is cancelled. A provider that
+fails outright hands over to the next one immediately.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Recent calls remembered per provider
+HEALTH_WINDOW = 50
+
+# Circuit opens at this error rate (once the window has enough samples) ...
+CIRCUIT_ERROR_RATE = 0.5
+CIRCUIT_MIN_SAMPLES = 10
+
+# ... or after this many failures in a row
+CIRCUIT_CONSECUTIVE_FAILURES = 5
+
+# Seconds an open circuit skips the provider before a probe is allowed
+CIRCUIT_COOLDOWN_SECONDS = 30
+
+# Hedge after the primary's p95 latency, clamped to this range (seconds)
+HEDGE_MIN_SECONDS = 2.0
+HEDGE_MAX_SECONDS = 10.0
+HEDGE_DEFAULT_SECONDS = 5.0  # Until the provider has latency samples
+
+
+class ProviderHealth:
+    """Rolling latency/error window and circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = HEALTH_WINDOW,
+        cooldown_seconds: float = CIRCUIT_COOLDOWN_SECONDS,
+    ):
+        self.name = name
+        self._samples: deque[tuple[bool, Optional[float]]] = deque(maxlen=window)
+        self._cooldown = cooldown_seconds
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._calls = 0
+        self._failures = 0
+        self._lock = Lock()
+
+    def available(self) -> bool:
+        """Whether a request may be sent (lets one probe through per cooldown when open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self._cooldown:
+                return False
+            self._opened_at = time.monotonic()
+            self._probing = True
+            return True
+
+    def record_success(self, latency_ms: Optional[float] = None):
+        with self._lock:
+            self._calls += 1
+            self._consecutive_failures = 0
+            if self._opened_at is not None:
+                logger.info(f"LLM provider {self.name} recovered, closing circuit")
+                self._opened_at = None
+                self._probing = False
+                self._samples.clear()
+            self._samples.append((True, latency_ms))
+
+    def record_failure(self, latency_ms: Optional[float] = None):
+        with self._lock:
+            self._calls += 1
+            self._failures += 1
+            self._consecutive_failures += 1
+            self._samples.append((False, latency_ms))
+
+            if self._probing:
+                self._opened_at = time.monotonic()
+                self._probing = False
+                return
+            if self._opened_at is None and (
+                self._consecutive_failures >= CIRCUIT_CONSECUTIVE_FAILURES
+                or (len(self._samples) >= CIRCUIT_MIN_SAMPLES and self._error_rate() >= CIRCUIT_ERROR_RATE)
+            ):
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"LLM provider {self.name} unhealthy, opening circuit for {self._cooldown}s",
+                    extra={"event": "llm_circuit_opened", "provider": self.name},
+                )
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for ok, _ in self._samples if not ok) / len(self._samples)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Latency (ms) of recent successful calls at quantile q."""
+        with self._lock:
+            latencies = sorted(ms for ok, ms in self._samples if ok and ms is not None)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+
+    def snapshot(self) -> dict:
+        p50 = self.latency_percentile(0.5)
+        p95 = self.latency_percentile(0.95)
+        with self._lock:
+            return {
+                "circuit": "closed" if self._opened_at is None else ("half_open" if self._probing else "open"),
+                "calls": self._calls,
+                "failures": self._failures,
+                "error_rate": round(self._error_rate(), 2),
+                "latency_p50_ms": round(p50, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95, 1) if p95 is not None else None,
+            }
+
+
+class ProviderRouter:
+    """Routes a request across providers with circuit breaking and hedging."""
+
+    def __init__(
+        self,
+        hedge_min_seconds: float = HEDGE_MIN_SECONDS,
+        hedge_max_seconds: float = HEDGE_MAX_SECONDS,
+        cooldown_seconds: float = CIRCUIT_COOLDOWN_SECONDS,
+    ):
+        self._hedge_min = hedge_min_seconds
+        self._hedge_max = hedge_max_seconds
+        self._cooldown = cooldown_seconds
+        self._health: dict[str, ProviderHealth] = {}
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._lock = Lock()
+
+    def health(self, name: str) -> ProviderHealth:
+        with self._lock:
+            if name not in self._health:
+                self._health[name] = ProviderHealth(name, cooldown_seconds=self._cooldown)
+            return self._health[name]
+
+    def select(self, names: list[str]) -> list[str]:
+        """Providers to try, in order, skipping open circuits (all of them if every circuit is open)."""
+        healthy = [name for name in names if self.health(name).available()]
+        return healthy or list(names)
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait on a provider before hedging to the next one."""
+        p95 = self.health(name).latency_percentile(0.95)
+        seconds = p95 / 1000 if p95 is not None else HEDGE_DEFAULT_SECONDS
+        return min(self._hedge_max, max(self._hedge_min, seconds))
+
+    async def call(self, providers: list[tuple[str, Callable[[], Awaitable[Any]]]]) -> tuple[str, Any]:
+        """
+        Run a request against providers and return (provider_name, result).
+
+        `providers` is an ordered list of (name, factory) where the factory
+        starts the request. Raises if every provider fails.
+        """
+        factories = dict(providers)
+        queue = self.select([name for name, _ in providers])
+        if not queue:
+            raise Exception("No AI providers configured")
+
+        pending: dict[asyncio.Task, tuple[str, float, bool]] = {}
+        errors: list[str] = []
+
+        def launch(hedged: bool = False):
+            name = queue.pop(0)
+            task = asyncio.ensure_future(factories[name]())
+            pending[task] = (name, time.perf_counter(), hedged)
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if queue and len(pending) == 1:
+                    (name, _, _), = pending.values()
+                    timeout = self.hedge_delay(name)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    with self._lock:
+                        self._hedges += 1
+                    logger.info(f"LLM provider {name} over {timeout:.1f}s budget, hedging to {queue[0]}")
+                    launch(hedged=True)
+                    continue
+
+                for task in done:
+                    name, started, hedged = pending.pop(task)
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    error = task.exception()
+                    if error is None:
+                        self.health(name).record_success(latency_ms)
+                        if hedged:
+                            with self._lock:
+                                self._hedge_wins += 1
+                        return name, task.result()
+
+                    self.health(name).record_failure(latency_ms)
+                    errors.append(f"{name}: {error}")
+                    logger.warning(f"LLM provider {name} failed: {error}")
+
+                if not pending and queue:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        raise Exception(f"All AI providers failed ({'; '.join(errors)})")
+
+    def stats(self) -> dict:
+        with self._lock:
+            health = dict(self._health)
+            hedges, wins = self._hedges, self._hedge_wins
+        return {
+            "hedges": hedges,
+            "hedge_wins": wins,
+            "providers": {name: h.snapshot() for name, h in health.items()},
+        }
@@ -5,6 +5,7 @@ Handles:
 - Daily digest emails (sent at 8am UTC)
 - Weekly digest emails (sent Monday 8am UTC)
 - Salesperson digest emails (sent with weekly digest if enabled)
+- Webhook delivery log retention (daily at 3am UTC)
 """
 import logging
 from datetime import datetime, timedelta
@@ -25,6 +26,7 @@ from app.services.email import (
     send_recommendations_digest,
     send_booking_reminder,
 )
+from app.services.webhook_service import prune_webhook_deliveries
 
 logger = logging.getLogger(__name__)
 
@@ -93,6 +95,15 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    # Webhook delivery log retention: 3am UTC every day
+    sched.add_job(
+        run_webhook_delivery_retention,
+        CronTrigger(hour=3, minute=0),
+        id="webhook_delivery_retention",
+        name="Webhook Delivery Log Retention",
+        replace_existing=True,
+    )
+
     sched.start()
     logger.info("Scheduler started with digest jobs")
 
@@ -630,3 +641,26 @@ async def run_booking_reminders():
         db.close()
 
     logger.info("Booking reminders job completed")
+
+
+# =============================================================================
+# Webhook Delivery Retention
+# =============================================================================
+
+async def run_webhook_delivery_retention():
+    """Prune and compact webhook delivery logs according to each org's plan."""
+    logger.info("Running webhook delivery retention job")
+
+    db = SessionLocal()
+    try:
+        result = prune_webhook_deliveries(db)
+    except Exception as e:
+        logger.error(f"Error running webhook delivery retention: {e}")
+        db.rollback()
+        return
+    finally:
+        db.close()
+
+    logger.info(
+        f"Webhook delivery retention job completed: {result['deleted']} deleted, {result['compacted']} compacted"
+    )
@@ -0,0 +1,127 @@
+# app/services/usage.py
+"""
+Monthly usage counters for plan limits.
+
+Leads, widget conversations, bookings and AI messages are metered in
+usage_counters, one row per (organization, metric, month). Plan checks read
+that single row instead of counting the month's rows in the source tables,
+and every increment is one atomic upsert:
+
+    INSERT ... ON CONFLICT (organization_id, metric, period)
+    DO UPDATE SET count = count + 1 RETURNING count
+
+A new month simply starts a new row, so there is nothing to reset.
+"""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+def current_period(now: Optional[datetime] = None) -> date:
+    """First day of the current (UTC) month."""
+    return (now or datetime.utcnow()).date().replace(day=1)
+
+
+def next_period_start(now: Optional[datetime] = None) -> datetime:
+    """When the current month's counters stop applying."""
+    period = current_period(now)
+    if period.month == 12:
+        return datetime(period.year + 1, 1, 1)
+    return datetime(period.year, period.month + 1, 1)
+
+
+def get_usage(db: Session, organization_id: int, metric: str) -> int:
+    """This month's count for one metric."""
+    count = (
+        db.query(models.UsageCounter.count)
+        .filter(
+            models.UsageCounter.organization_id == organization_id,
+            models.UsageCounter.metric == metric,
+            models.UsageCounter.period == current_period(),
+        )
+        .scalar()
+    )
+    return count or 0
+
+
+def get_org_usage(db: Session, organization_id: int) -> dict[str, int]:
+    """This month's counts for every metric, keyed by metric (missing metrics are 0)."""
+    rows = (
+        db.query(models.UsageCounter.metric, models.UsageCounter.count)
+        .filter(
+            models.UsageCounter.organization_id == organization_id,
+            models.UsageCounter.period == current_period(),
+        )
+        .all()
+    )
+    usage = {
+        models.USAGE_METRIC_LEADS: 0,
+        models.USAGE_METRIC_CHAT_CONVERSATIONS: 0,
+        models.USAGE_METRIC_BOOKINGS: 0,
+        models.USAGE_METRIC_AI_MESSAGES: 0,
+    }
+    usage.update({metric: count for metric, count in rows})
+    return usage
+
+
+def _insert(db: Session):
+    dialect = db.bind.dialect.name if db.bind else "postgresql"
+    return sqlite.insert if dialect == "sqlite" else postgresql.insert
+
+
+def increment_usage(
+    db: Session,
+    organization_id: int,
+    metric: str,
+    amount: int = 1,
+    limit: Optional[int] = None,
+) -> Optional[int]:
+    """
+    Atomically add to this month's count and commit. Returns the new count.
+
+    With a limit, the increment only happens if the new count stays within
+    it; otherwise nothing changes and None is returned. The check and the
+    increment are the same statement, so concurrent requests can't both
+    take the last slot.
+    """
+    if limit is not None and amount > limit:
+        return None
+
+    counter = models.UsageCounter.__table__
+    stmt = _insert(db)(counter).values(
+        organization_id=organization_id,
+        metric=metric,
+        period=current_period(),
+        count=amount,
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[counter.c.organization_id, counter.c.metric, counter.c.period],
+        set_={"count": counter.c.count + amount, "updated_at": datetime.utcnow()},
+        where=(counter.c.count + amount <= limit) if limit is not None else None,
+    ).returning(counter.c.count)
+
+    count = db.execute(stmt).scalar()
+    db.commit()
+    return count
+
+
+def decrement_usage(db: Session, organization_id: int, metric: str, amount: int = 1) -> None:
+    """Give back usage that was counted for work that didn't happen (never below zero)."""
+    counter = models.UsageCounter.__table__
+    db.execute(
+        update(counter)
+        .where(
+            counter.c.organization_id == organization_id,
+            counter.c.metric == metric,
+            counter.c.period == current_period(),
+            counter.c.count >= amount,
+        )
+        .values(count=counter.c.count - amount, updated_at=datetime.utcnow())
+    )
+    db.commit()
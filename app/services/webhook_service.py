@@ -9,12 +9,17 @@ import json
 import hmac
 import hashlib
 import time
-from datetime import datetime
+import zlib
+from datetime import datetime, timedelta
+from threading import Lock
 from typing import Optional, Any
 import httpx
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.plans import get_webhook_log_retention_days
 from app.db import models
 from app.db.session import SessionLocal
 
@@ -28,6 +33,93 @@ WEBHOOK_TIMEOUT = 10
 # Max response body to store (characters)
 MAX_RESPONSE_BODY = 1000
 
+# Payloads smaller than this are stored as plain text (compression wouldn't pay off)
+PAYLOAD_COMPRESS_MIN_BYTES = 256
+
+# Failed deliveries kept per webhook regardless of age (for debugging)
+RETENTION_KEEP_FAILURES = 20
+
+# Rows deleted/compacted per statement by the retention job
+RETENTION_BATCH_SIZE = 1000
+
+# How long a cached subscription entry is trusted (seconds). Invalidation from
+# the webhook routes only reaches the local process, so this bounds how stale
+# another worker's view of an org's subscriptions can get.
+SUBSCRIPTION_INDEX_TTL = 60
+
+
+class WebhookSubscriptionIndex:
+    """
+    Per-process index of active webhook subscriptions keyed by (org_id, event).
+
+    Orgs are loaded lazily with a single query covering all of their active
+    webhooks, so the common "no subscribers" case becomes a dict lookup.
+    Entries are tagged with the version they were loaded under; bumping the
+    version (via invalidate) makes every older entry stale at once.
+    """
+
+    def __init__(self, ttl_seconds: int = SUBSCRIPTION_INDEX_TTL):
+        self._ttl = ttl_seconds
+        # {org_id: (version, loaded_at, {event: (webhook_id, ...)})}
+        self._orgs: dict[int, tuple[int, float, dict[str, tuple[int, ...]]]] = {}
+        self._org_versions: dict[int, int] = {}
+        self._version = 0
+        self._lock = Lock()
+
+    def _current_version(self, org_id: int) -> int:
+        return self._version + self._org_versions.get(org_id, 0)
+
+    def _load(self, org_id: int) -> dict[str, tuple[int, ...]]:
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Webhook.id, models.Webhook.event).filter(
+                models.Webhook.organization_id == org_id,
+                models.Webhook.is_active == True,
+            ).all()
+        finally:
+            db.close()
+
+        by_event: dict[str, list[int]] = {}
+        for webhook_id, event in rows:
+            by_event.setdefault(event, []).append(webhook_id)
+        return {event: tuple(ids) for event, ids in by_event.items()}
+
+    def get(self, org_id: int, event: str) -> tuple[int, ...]:
+        """Return the ids of active webhooks subscribed to event for org_id."""
+        with self._lock:
+            version = self._current_version(org_id)
+            entry = self._orgs.get(org_id)
+            if entry and entry[0] == version and time.time() - entry[1] < self._ttl:
+                return entry[2].get(event, ())
+
+        subscriptions = self._load(org_id)
+
+        with self._lock:
+            # Only store if nothing was invalidated while we were loading
+            if self._current_version(org_id) == version:
+                self._orgs[org_id] = (version, time.time(), subscriptions)
+
+        return subscriptions.get(event, ())
+
+    def invalidate(self, org_id: Optional[int] = None):
+        """Bump the version for one org (or all orgs) so the next lookup reloads."""
+        with self._lock:
+            if org_id is None:
+                self._version += 1
+                self._orgs.clear()
+            else:
+                self._org_versions[org_id] = self._org_versions.get(org_id, 0) + 1
+                self._orgs.pop(org_id, None)
+
+
+# Global subscription index instance
+subscription_index = WebhookSubscriptionIndex()
+
+
+def invalidate_webhook_subscriptions(org_id: Optional[int] = None):
+    """Invalidate cached webhook subscriptions after a webhook is created, changed or deleted."""
+    subscription_index.invalidate(org_id)
+
 
 def generate_signature(payload: dict, secret: str) -> str:
     """Generate HMAC-SHA256 signature for webhook payload."""
@@ -40,6 +132,21 @@ def generate_signature(payload: dict, secret: str) -> str:
     return f"sha256={signature}"
 
 
+def encode_delivery_payload(payload_str: str) -> dict:
+    """Build the payload columns for a WebhookDelivery, compressing large bodies."""
+    raw = payload_str.encode("utf-8")
+    if settings.webhook_compress_payloads and len(raw) >= PAYLOAD_COMPRESS_MIN_BYTES:
+        return {"payload": None, "payload_compressed": zlib.compress(raw)}
+    return {"payload": payload_str, "payload_compressed": None}
+
+
+def decode_delivery_payload(delivery: models.WebhookDelivery) -> str:
+    """Return the JSON payload of a delivery, whichever way it was stored."""
+    if delivery.payload_compressed is not None:
+        return zlib.decompress(delivery.payload_compressed).decode("utf-8")
+    return delivery.payload or ""
+
+
 def fire_webhook_sync(
     db: Session,
     webhook: models.Webhook,
@@ -95,7 +202,7 @@ def fire_webhook_sync(
     delivery = models.WebhookDelivery(
         webhook_id=webhook.id,
         event=payload.get("event", "unknown"),
-        payload=json.dumps(payload),
+        **encode_delivery_payload(json.dumps(payload)),
         response_status=status_code,
         response_body=response_body,
         error_message=error_message,
@@ -186,7 +293,7 @@ async def fire_webhook_async(
         delivery = models.WebhookDelivery(
             webhook_id=webhook.id,
             event=payload.get("event", "unknown"),
-            payload=json.dumps(payload),
+            **encode_delivery_payload(json.dumps(payload)),
             response_status=status_code,
             response_body=response_body,
             error_message=error_message,
@@ -237,12 +344,16 @@ def fire_webhooks_for_event(
         data: Event data to include in payload
         background_tasks: FastAPI BackgroundTasks for async execution
     """
+    # Most orgs have no webhooks - answer that from the index without a DB round trip
+    webhook_ids = subscription_index.get(org_id, event)
+    if not webhook_ids:
+        return
+
     db = SessionLocal()
     try:
-        # Find all active webhooks for this org and event
         webhooks = db.query(models.Webhook).filter(
+            models.Webhook.id.in_(webhook_ids),
             models.Webhook.organization_id == org_id,
-            models.Webhook.event == event,
             models.Webhook.is_active == True,
         ).all()
 
@@ -278,16 +389,89 @@ def fire_webhooks_for_event(
         db.close()
 
 
+# ---- Delivery log retention ----
+
+def prune_webhook_deliveries(db: Session, now: Optional[datetime] = None) -> dict:
+    """
+    Apply per-plan retention to webhook delivery logs.
+
+    Deletes deliveries older than the org plan's retention window, except
+    the most recent failures per webhook, and compresses any remaining
+    uncompressed payloads. Works in batches so no single statement holds
+    locks on a large range of the table.
+
+    Returns counts of deleted and compacted rows.
+    """
+    now = now or datetime.utcnow()
+    deleted = 0
+    compacted = 0
+
+    webhooks = db.query(models.Webhook.id, models.Organization.plan).join(
+        models.Organization, models.Organization.id == models.Webhook.organization_id
+    ).all()
+
+    for webhook_id, plan in webhooks:
+        cutoff = now - timedelta(days=get_webhook_log_retention_days(plan))
+
+        keep_ids = [
+            row.id for row in db.query(models.WebhookDelivery.id).filter(
+                models.WebhookDelivery.webhook_id == webhook_id,
+                models.WebhookDelivery.is_success == False,
+            ).order_by(
+                models.WebhookDelivery.delivered_at.desc()
+            ).limit(RETENTION_KEEP_FAILURES)
+        ]
+
+        while True:
+            query = db.query(models.WebhookDelivery.id).filter(
+                models.WebhookDelivery.webhook_id == webhook_id,
+                models.WebhookDelivery.delivered_at < cutoff,
+            )
+            if keep_ids:
+                query = query.filter(models.WebhookDelivery.id.notin_(keep_ids))
+            batch = [row.id for row in query.limit(RETENTION_BATCH_SIZE)]
+            if not batch:
+                break
+
+            db.query(models.WebhookDelivery).filter(
+                models.WebhookDelivery.id.in_(batch)
+            ).delete(synchronize_session=False)
+            db.commit()
+            deleted += len(batch)
+
+    if settings.webhook_compress_payloads:
+        last_id = 0
+        while True:
+            rows = db.query(models.WebhookDelivery).filter(
+                models.WebhookDelivery.id > last_id,
+                models.WebhookDelivery.payload_compressed.is_(None),
+                func.length(models.WebhookDelivery.payload) >= PAYLOAD_COMPRESS_MIN_BYTES,
+            ).order_by(models.WebhookDelivery.id).limit(RETENTION_BATCH_SIZE).all()
+            if not rows:
+                break
+
+            for delivery in rows:
+                columns = encode_delivery_payload(delivery.payload)
+                if columns["payload_compressed"] is not None:
+                    delivery.payload = None
+                    delivery.payload_compressed = columns["payload_compressed"]
+                    compacted += 1
+            last_id = rows[-1].id
+            db.commit()
+
+    logger.info(
+        f"Webhook delivery retention: deleted={deleted} compacted={compacted}",
+        extra={"event": "webhook_retention", "deleted": deleted, "compacted": compacted}
+    )
+
+    return {"deleted": deleted, "compacted": compacted}
+
+
 # ---- Convenience functions for specific events ----
 
-def fire_lead_created_webhook(
-    org_id: int,
-    lead: models.Lead,
-    source: str = "form",
-    background_tasks: Any = None,
-):
-    """Fire webhook when a new lead is created."""
-    data = {
+def build_lead_created_data(lead: models.Lead, source: str = "form") -> dict:
+    """Event data for lead.created (shared by webhooks and polling triggers)."""
+    return {
         "lead_id": lead.id,
         "email": lead.email,
         "name": lead.name,
@@ -302,17 +486,11 @@ def fire_lead_created_webhook(
         "utm_campaign": lead.utm_campaign,
         "created_at": lead.created_at.isoformat() if lead.created_at else None,
     }
-    fire_webhooks_for_event(org_id, models.WEBHOOK_EVENT_LEAD_CREATED, data, background_tasks)
 
 
-def fire_lead_updated_webhook(
-    org_id: int,
-    lead: models.Lead,
-    changed_fields: list[str],
-    background_tasks: Any = None,
-):
-    """Fire webhook when a lead is updated."""
-    data = {
+def build_lead_updated_data(lead: models.Lead, changed_fields: list[str]) -> dict:
+    """Event data for lead.updated."""
+    return {
         "lead_id": lead.id,
         "email": lead.email,
         "name": lead.name,
@@ -326,6 +504,47 @@ def fire_lead_updated_webhook(
         "changed_fields": changed_fields,
         "updated_at": lead.updated_at.isoformat() if lead.updated_at else None,
     }
+
+
+def build_chat_lead_captured_data(
+    conversation: models.ChatWidgetConversation,
+    config: models.ChatWidgetConfig,
+) -> dict:
+    """Event data for chat.lead_captured."""
+    return {
+        "conversation_id": conversation.id,
+        "session_id": conversation.session_id,
+        "widget_id": config.id,
+        "widget_key": config.widget_key,
+        "business_name": config.business_name,
+        "email": conversation.lead_email,
+        "name": conversation.lead_name,
+        "phone": conversation.lead_phone,
+        "page_url": conversation.page_url,
+        "message_count": conversation.message_count,
+        "captured_at": conversation.lead_captured_at.isoformat() if conversation.lead_captured_at else None,
+    }
+
+
+def fire_lead_created_webhook(
+    org_id: int,
+    lead: models.Lead,
+    source: str = "form",
+    background_tasks: Any = None,
+):
+    """Fire webhook when a new lead is created."""
+    data = build_lead_created_data(lead, source)
+    fire_webhooks_for_event(org_id, models.WEBHOOK_EVENT_LEAD_CREATED, data, background_tasks)
+
+
+def fire_lead_updated_webhook(
+    org_id: int,
+    lead: models.Lead,
+    changed_fields: list[str],
+    background_tasks: Any = None,
+):
+    """Fire webhook when a lead is updated."""
+    data = build_lead_updated_data(lead, changed_fields)
     fire_webhooks_for_event(org_id, models.WEBHOOK_EVENT_LEAD_UPDATED, data, background_tasks)
 
 
@@ -383,17 +602,5 @@ def fire_chat_lead_captured_webhook(
     background_tasks: Any = None,
 ):
     """Fire webhook when chat captures lead info (email/phone)."""
-    data = {
-        "conversation_id": conversation.id,
-        "session_id": conversation.session_id,
-        "widget_id": config.id,
-        "widget_key": config.widget_key,
-        "business_name": config.business_name,
-        "email": conversation.lead_email,
-        "name": conversation.lead_name,
-        "phone": conversation.lead_phone,
-        "page_url": conversation.page_url,
-        "message_count": conversation.message_count,
-        "captured_at": conversation.lead_captured_at.isoformat() if conversation.lead_captured_at else None,
-    }
+    data = build_chat_lead_captured_data(conversation, config)
     fire_webhooks_for_event(org_id, models.WEBHOOK_EVENT_CHAT_LEAD_CAPTURED, data, background_tasks)
@@ -0,0 +1,231 @@
+# app/services/widget_snapshot.py
+"""
+Hot-path cache of chat widget configuration.
+
+Every widget message needs the widget config, its booking page, the active
+meeting types and the org's plan. Reading those from the database on each
+turn costs several queries before the LLM is even called, so the message
+handler reads an immutable snapshot instead, cached per process by
+widget_key.
+
+The database stays the source of truth. Writers invalidate explicitly
+(widget edits by key, booking page / meeting type edits and plan changes by
+org), and WIDGET_SNAPSHOT_TTL bounds how long another worker process can
+serve a stale snapshot.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import models
+from app.services.chat_response_cache import normalize_question
+
+# Seconds a snapshot is served before it is re-read
+WIDGET_SNAPSHOT_TTL = 300
+
+
+@dataclass(frozen=True)
+class MeetingTypeSnapshot:
+    """An active meeting type offered through the widget."""
+
+    name: str
+    slug: str
+    duration_minutes: int
+    description: Optional[str]
+    is_active: bool = True
+
+
+@dataclass(frozen=True)
+class BookingConfigSnapshot:
+    """The booking page linked to a widget."""
+
+    id: int
+    slug: str
+    business_name: Optional[str]
+    is_active: bool
+    meeting_types: tuple[MeetingTypeSnapshot, ...]
+
+
+@dataclass(frozen=True)
+class WidgetSnapshot:
+    """
+    Read-only view of everything a chat turn needs from configuration.
+
+    Attribute names match ChatWidgetConfig, so the snapshot can be passed
+    anywhere the prompt builder or lead capture expects a config.
+    """
+
+    id: int
+    widget_key: str
+    organization_id: int
+    updated_at: datetime
+    is_active: bool
+    business_name: str
+    business_description: str
+    services: str
+    restrictions: Optional[str]
+    cta: str
+    contact_email: str
+    tone: str
+    extra_context: Optional[str]
+    primary_goal: Optional[str]
+    goal_url: Optional[str]
+    rebuttal_count: Optional[int]
+    persistence_level: Optional[str]
+    welcome_message: Optional[str]
+    success_message: Optional[str]
+    collect_phone: bool
+    collect_name: bool
+    collect_company: bool
+    booking_enabled: bool
+    booking_config: Optional[BookingConfigSnapshot]
+    plan: Optional[str]  # None if the organization no longer exists
+    cached_at: float
+    canned_answers: dict[str, str] = field(default_factory=dict)  # Normalized question -> pinned reply
+
+
+class WidgetSnapshotCache:
+    """Per-process map from widget_key to its WidgetSnapshot."""
+
+    def __init__(self, ttl_seconds: int = WIDGET_SNAPSHOT_TTL):
+        self._ttl = ttl_seconds
+        self._snapshots: dict[str, WidgetSnapshot] = {}
+        self._lock = Lock()
+
+    def get(self, widget_key: str) -> Optional[WidgetSnapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(widget_key)
+            if snapshot and time.time() - snapshot.cached_at < self._ttl:
+                return snapshot
+            self._snapshots.pop(widget_key, None)
+            return None
+
+    def set(self, snapshot: WidgetSnapshot):
+        with self._lock:
+            self._snapshots[snapshot.widget_key] = snapshot
+
+    def invalidate(self, widget_key: Optional[str] = None):
+        """Drop one widget (or every widget) from the cache."""
+        with self._lock:
+            if widget_key is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(widget_key, None)
+
+    def invalidate_org(self, organization_id: int):
+        """Drop every widget belonging to an organization."""
+        with self._lock:
+            stale = [k for k, s in self._snapshots.items() if s.organization_id == organization_id]
+            for widget_key in stale:
+                del self._snapshots[widget_key]
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+
+# Global snapshot cache instance
+widget_snapshots = WidgetSnapshotCache()
+
+
+def _parse_canned_answers(canned_answers_json: Optional[str]) -> dict[str, str]:
+    try:
+        items = json.loads(canned_answers_json) if canned_answers_json else []
+    except json.JSONDecodeError:
+        return {}
+    return {normalize_question(item["question"]): item["answer"] for item in items}
+
+
+def _build_snapshot(db: Session, widget_key: str) -> Optional[WidgetSnapshot]:
+    row = (
+        db.query(models.ChatWidgetConfig, models.Organization.id, models.Organization.plan)
+        .outerjoin(models.Organization, models.Organization.id == models.ChatWidgetConfig.organization_id)
+        .options(joinedload(models.ChatWidgetConfig.booking_config))
+        .filter(models.ChatWidgetConfig.widget_key == widget_key)
+        .first()
+    )
+    if row is None:
+        return None
+    config, org_id, plan = row
+
+    booking = None
+    if config.booking_enabled and config.booking_config:
+        meeting_types = (
+            db.query(models.MeetingType)
+            .filter(
+                models.MeetingType.booking_config_id == config.booking_config.id,
+                models.MeetingType.is_active == True,
+            )
+            .order_by(models.MeetingType.order_index, models.MeetingType.id)
+            .all()
+        )
+        booking = BookingConfigSnapshot(
+            id=config.booking_config.id,
+            slug=config.booking_config.slug,
+            business_name=config.booking_config.business_name,
+            is_active=config.booking_config.is_active,
+            meeting_types=tuple(
+                MeetingTypeSnapshot(
+                    name=mt.name,
+                    slug=mt.slug,
+                    duration_minutes=mt.duration_minutes,
+                    description=mt.description,
+                )
+                for mt in meeting_types
+            ),
+        )
+
+    return WidgetSnapshot(
+        id=config.id,
+        widget_key=config.widget_key,
+        organization_id=config.organization_id,
+        updated_at=config.updated_at,
+        is_active=config.is_active,
+        business_name=config.business_name,
+        business_description=config.business_description,
+        services=config.services,
+        restrictions=config.restrictions,
+        cta=config.cta,
+        contact_email=config.contact_email,
+        tone=config.tone,
+        extra_context=config.extra_context,
+        primary_goal=config.primary_goal,
+        goal_url=config.goal_url,
+        rebuttal_count=config.rebuttal_count,
+        persistence_level=config.persistence_level,
+        welcome_message=config.welcome_message,
+        success_message=config.success_message,
+        collect_phone=bool(config.collect_phone),
+        collect_name=config.collect_name if config.collect_name is not None else True,
+        collect_company=bool(config.collect_company),
+        booking_enabled=bool(config.booking_enabled),
+        booking_config=booking,
+        plan=(plan or "free") if org_id is not None else None,
+        cached_at=time.time(),
+        canned_answers=_parse_canned_answers(config.canned_answers),
+    )
+
+
+def get_widget_snapshot(db: Session, widget_key: str) -> Optional[WidgetSnapshot]:
+    """Return the cached snapshot for a widget, reading it on a miss (None if unknown)."""
+    snapshot = widget_snapshots.get(widget_key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = _build_snapshot(db, widget_key)
+    if snapshot is not None:
+        widget_snapshots.set(snapshot)
+    return snapshot
+
+
+@event.listens_for(models.Organization.plan, "set")
+def _invalidate_on_plan_change(target, value, oldvalue, initiator):
+    # Plans are changed from billing, PayPal, AppSumo and trial flows; hooking
+    # the attribute keeps every one of them covered.
+    if target.id is not None and value != oldvalue:
+        widget_snapshots.invalidate_org(target.id)
@@ -28,6 +28,7 @@ from app.api.routes import reports
 from app.api.routes import integrations
 from app.api.routes.integrations_update import router as integrations_update_router
 from app.api.routes.integrations_notifications import router as integrations_notifications_router
+from app.api.routes.crm_sync import router as crm_sync_router
 from app.api.routes import salesforce
 from app.api.routes import hubspot_oauth
 from app.api.routes import pipedrive_oauth
@@ -57,6 +58,7 @@ from app.api.routes import ab_tests as ab_tests_routes
 from app.api.routes import chat_widget as chat_widget_routes
 from app.api.routes import webhooks as webhooks_routes
 from app.api.routes import oauth as oauth_routes
+from app.api.routes import zapier as zapier_routes
 from app.api.routes import booking as booking_routes
 from app.api.routes import booking_public as booking_public_routes
 from app.api.routes import google_calendar as google_calendar_routes
@@ -64,19 +66,44 @@ from app.api.routes import google_calendar as google_calendar_routes
 # Scheduler for digest emails
 from app.services.scheduler import start_scheduler, stop_scheduler
 
+# Domain event bus (webhooks, emails, CRM sync off the request path)
+from app.services.events import event_bus
+from app.services.event_consumers import register_default_consumers
+
+# Pooled keep-alive HTTP clients for CRM integrations
+from app.integrations.http_clients import crm_clients
+
+# Outbox worker pushing new leads to CRMs
+from app.services.crm_sync import crm_sync_worker
+
+# Bulk sync of existing leads into newly connected CRMs
+from app.services.crm_backfill import crm_backfill_runner
+
 
 # -----------------------------------
 # Lifespan (startup/shutdown)
 # -----------------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: start the scheduler
+    # Startup: open CRM clients, then start the event bus and scheduler
     logger.info("Application starting up", extra={"event": "startup"})
+    await crm_clients.start()
+    register_default_consumers()
+    await event_bus.start()
+    await crm_sync_worker.start()
+    await crm_backfill_runner.start()
     start_scheduler()
     yield
-    # Shutdown: stop the scheduler
+    # Shutdown: stop the scheduler, the CRM sync worker (in-flight jobs go
+    # back to the outbox) and the backfill runner (resumes from its last
+    # checkpoint), drain pending events (which may still call CRMs), then
+    # close the CRM clients
     logger.info("Application shutting down", extra={"event": "shutdown"})
     stop_scheduler()
+    await crm_sync_worker.stop()
+    await crm_backfill_runner.stop()
+    await event_bus.stop()
+    await crm_clients.stop()
 
 
 # -----------------------------------
@@ -206,6 +233,7 @@ app.include_router(salespeople_router, prefix="/api", tags=["Salespeople"])
 app.include_router(integrations_current_router, prefix="/api", tags=["Integrations"])
 app.include_router(integrations_update_router, prefix="/api", tags=["Integrations"])
 app.include_router(integrations_notifications_router, prefix="/api", tags=["Integrations"])
+app.include_router(crm_sync_router, prefix="/api", tags=["Integrations"])
 app.include_router(forms_routes.router, prefix="/api", tags=["Forms"])
 app.include_router(public_forms_routes.router, prefix="/api", tags=["Public Forms"])
 app.include_router(contact_routes.router, prefix="/api", tags=["Contact"])
@@ -222,6 +250,7 @@ app.include_router(chat_widget_routes.router, prefix="/api", tags=["Chat Widget"
 app.include_router(chat_widget_routes.public_router, prefix="/api", tags=["Public Chat Widget"])
 app.include_router(webhooks_routes.router, prefix="/api", tags=["Webhooks"])
 app.include_router(oauth_routes.router, tags=["OAuth"])
+app.include_router(zapier_routes.router, prefix="/api", tags=["Zapier"])
 app.include_router(booking_routes.router, prefix="/api", tags=["Booking"])
 app.include_router(booking_public_routes.router, prefix="/api", tags=["Public Booking"])
 app.include_router(google_calendar_routes.router, prefix="/api", tags=["Booking Calendar"])
@@ -9,12 +9,14 @@ import {
   getChatWidgetEmbedCode,
   getChatWidgetConversations,
   getChatWidgetConversationDetail,
+  getChatWidgetConversationMessages,
   getChatWidgetTemplates,
   getChatWidgetTemplate,
   type ChatWidgetConfig,
   type ChatWidgetEmbedCode,
   type ChatWidgetConversation,
   type ChatWidgetConversationDetail,
+  type ChatWidgetConversationMessage,
   type ChatWidgetTemplate,
 } from "@/utils/api";
 import { FriendlyError } from "@/components/FriendlyError";
@@ -442,6 +444,9 @@ export default function ChatWidgetPage() {
   const [embedCode, setEmbedCode] = useState<ChatWidgetEmbedCode | null>(null);
   const [conversations, setConversations] = useState<ChatWidgetConversation[]>([]);
   const [selectedConversation, setSelectedConversation] = useState<ChatWidgetConversationDetail | null>(null);
+  const [conversationMessages, setConversationMessages] = useState<ChatWidgetConversationMessage[]>([]);
+  const [olderMessagesBeforeId, setOlderMessagesBeforeId] = useState<number | null>(null);
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
   const [templates, setTemplates] = useState<ChatWidgetTemplate[]>([]);
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
@@ -591,6 +596,34 @@ export default function ChatWidgetPage() {
     setView("embed");
   };
 
+  const openConversation = async (conversationId: number) => {
+    try {
+      const [detail, page] = await Promise.all([
+        getChatWidgetConversationDetail(conversationId),
+        getChatWidgetConversationMessages(conversationId),
+      ]);
+      setConversationMessages(page.messages);
+      setOlderMessagesBeforeId(page.next_before_id);
+      setSelectedConversation(detail);
+    } catch (err) {
+      console.error("Failed to load conversation", err);
+    }
+  };
+
+  const loadOlderMessages = async () => {
+    if (!selectedConversation || olderMessagesBeforeId === null) return;
+    setLoadingOlderMessages(true);
+    try {
+      const page = await getChatWidgetConversationMessages(selectedConversation.id, olderMessagesBeforeId);
+      setConversationMessages((prev) => [...page.messages, ...prev]);
+      setOlderMessagesBeforeId(page.next_before_id);
+    } catch (err) {
+      console.error("Failed to load older messages", err);
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  };
+
   const handleViewConversations = (widget: ChatWidgetConfig) => {
     setSelectedWidget(widget);
     setSelectedConversation(null);
@@ -2265,12 +2298,23 @@ export default function ChatWidgetPage() {
 
               {/* Chat transcript */}
               <div className="rounded-2xl border border-gray-200 dark:border-gray-800 bg-gray-50 dark:bg-gray-950 p-4 space-y-3 max-h-[600px] overflow-y-auto">
-                {selectedConversation.transcript.length === 0 ? (
+                {olderMessagesBeforeId !== null && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadOlderMessages}
+                      disabled={loadingOlderMessages}
+                      className="text-sm text-indigo-600 hover:text-indigo-800 dark:text-indigo-400 disabled:opacity-50 transition-colors"
+                    >
+                      {loadingOlderMessages ? "Loading..." : "Load older messages"}
+                    </button>
+                  </div>
+                )}
+                {conversationMessages.length === 0 ? (
                   <p className="text-center text-gray-500 py-8">No messages in this conversation</p>
                 ) : (
-                  selectedConversation.transcript.map((msg, i) => (
+                  conversationMessages.map((msg) => (
                     <div
-                      key={i}
+                      key={msg.id}
                       className={`flex ${msg.role === "user" ? "justify-end" : "justify-start"}`}
                     >
                       <div
@@ -2320,14 +2364,7 @@ export default function ChatWidgetPage() {
                   {conversations.map((conv) => (
                     <div
                       key={conv.id}
-                      onClick={async () => {
-                        try {
-                          const detail = await getChatWidgetConversationDetail(conv.id);
-                          setSelectedConversation(detail);
-                        } catch (err) {
-                          console.error("Failed to load conversation", err);
-                        }
-                      }}
+                      onClick={() => openConversation(conv.id)}
                       className="rounded-2xl border border-gray-200 dark:border-gray-800 bg-white dark:bg-gray-900 px-5 py-4 hover:shadow-lg hover:border-indigo-300 dark:hover:border-indigo-700 transition-all cursor-pointer"
                     >
                       <div className="flex items-start justify-between">
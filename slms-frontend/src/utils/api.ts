@@ -937,6 +937,11 @@ export async function deleteVariant(testId: number, variantId: number): Promise<
 }
 
 // Chat Widget types
+export interface ChatWidgetCannedAnswer {
+  question: string;
+  answer: string;
+}
+
 export interface ChatWidgetConfig {
   id?: number;
   widget_key?: string;
@@ -959,6 +964,7 @@ export interface ChatWidgetConfig {
   collect_name: boolean;
   collect_company: boolean;
   quick_replies: string[] | null;
+  canned_answers?: ChatWidgetCannedAnswer[] | null;
   // Widget appearance
   primary_color: string;
   widget_position: string;
@@ -1026,10 +1032,24 @@ export interface ChatWidgetConversation {
   updated_at: string;
 }
 
+export interface ChatWidgetConversationMessage {
+  id: number;
+  role: string;
+  content: string;
+  created_at: string;
+}
+
+export interface ChatWidgetConversationMessagesPage {
+  messages: ChatWidgetConversationMessage[];
+  next_before_id: number | null;
+}
+
 export interface ChatWidgetConversationDetail extends ChatWidgetConversation {
   transcript: { role: string; content: string }[];
+  has_more_messages: boolean;
   total_tokens_input: number;
   total_tokens_output: number;
+  context_tokens_saved: number;
 }
 
 // Chat Widget API functions
@@ -1094,6 +1114,18 @@ export async function getChatWidgetConversationDetail(conversationId: number): P
   return fetchJSON<ChatWidgetConversationDetail>(`${baseUrl}/chat-widget/conversations/${conversationId}`);
 }
 
+export async function getChatWidgetConversationMessages(
+  conversationId: number,
+  beforeId?: number,
+  limit = 100
+): Promise<ChatWidgetConversationMessagesPage> {
+  const params: Record<string, unknown> = { limit };
+  if (beforeId) params.before_id = beforeId;
+  return fetchJSON<ChatWidgetConversationMessagesPage>(
+    `${baseUrl}/chat-widget/conversations/${conversationId}/messages${toQuery(params)}`
+  );
+}
+
 // Named plus default export
 export const api = {
   login,
@@ -69,6 +69,11 @@ def app(db_session):
     """Create a test FastAPI app with overridden dependencies."""
     from main import app as fastapi_app
     from app.api.deps.auth import get_db
+    from app.services.widget_snapshot import widget_snapshots
+    from app.services.chat_response_cache import chat_response_cache
+    from app.integrations.company_cache import company_cache
+    from app.integrations.credentials import credential_cache
+    from app.integrations.rate_limits import crm_rate_limiter
 
     def override_get_db():
         try:
@@ -77,6 +82,11 @@ def app(db_session):
             pass
 
     fastapi_app.dependency_overrides[get_db] = override_get_db
+    widget_snapshots.invalidate()
+    chat_response_cache.clear()
+    credential_cache.clear()
+    company_cache.clear()
+    crm_rate_limiter.reset()
     yield fastapi_app
     fastapi_app.dependency_overrides.clear()
 
@@ -135,6 +145,34 @@ def auth_headers(test_user) -> dict:
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def oauth_headers(app, db_session, test_user, test_org) -> dict:
+    """Bearer headers for an OAuth token issued to the test user."""
+    from app.api.routes import oauth as oauth_routes
+
+    app.dependency_overrides[oauth_routes.get_db] = lambda: db_session
+    oauth_routes.token_cache.invalidate()
+
+    client_app = models.OAuthClient(
+        client_id="zapier",
+        client_secret="secret",
+        name="Zapier",
+        redirect_uris="[]",
+    )
+    db_session.add(client_app)
+    db_session.flush()
+    db_session.add(models.OAuthToken(
+        client_id=client_app.id,
+        user_id=test_user.id,
+        organization_id=test_org.id,
+        access_token="zapier-access-token",
+        refresh_token="zapier-refresh-token",
+        access_token_expires_at=datetime.utcnow() + timedelta(hours=1),
+    ))
+    db_session.commit()
+    return {"Authorization": "Bearer zapier-access-token"}
+
+
 @pytest.fixture
 def test_lead(db_session, test_org) -> models.Lead:
     """Create a test lead."""
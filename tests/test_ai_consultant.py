@@ -0,0 +1,149 @@
+# tests/test_ai_consultant.py
+"""
+Tests for the AI Lead Consultant chat endpoints.
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.api.routes import auth as auth_routes
+from app.api.routes import chat as chat_routes
+from app.services.ai_consultant import AIConsultantError, ai_consultant
+from app.services.usage import get_usage
+
+
+class FakeMessages:
+    """Stands in for AsyncAnthropic().messages."""
+
+    def __init__(self, chunks: list[str], fail: bool = False):
+        self.chunks = chunks
+        self.fail = fail
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text="".join(self.chunks))],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=len(self.chunks)),
+        )
+
+    def stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return FakeStream(self.chunks, self.fail)
+
+
+class FakeStream:
+    def __init__(self, chunks: list[str], fail: bool):
+        self.chunks = chunks
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+        if isinstance(self.fail, Exception):
+            raise self.fail
+        if self.fail:
+            raise AIConsultantError("AI service error: overloaded")
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=len(self.chunks)))
+
+
+@pytest.fixture
+def fake_messages(app, db_session, test_engine, test_org, monkeypatch):
+    test_org.plan = "pro"
+    db_session.commit()
+    app.dependency_overrides[chat_routes.get_db] = lambda: db_session
+    # Streams finish in their own session
+    monkeypatch.setattr(chat_routes, "SessionLocal", sessionmaker(bind=test_engine))
+    app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+
+    messages = FakeMessages(["Follow up ", "within a day."])
+    monkeypatch.setattr(ai_consultant, "client", SimpleNamespace(messages=messages))
+    return messages
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+class TestSendMessage:
+    """Test the non-streaming consultant endpoint."""
+
+    def test_reply_saved_and_counted(self, client, db_session, test_org, auth_headers, fake_messages):
+        response = client.post("/api/chat/messages", json={"message": "How soon?"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["response"] == "Follow up within a day."
+        assert db_session.query(models.ChatMessage).count() == 2
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES) == 1
+
+    def test_history_is_limited(self, client, db_session, test_org, test_user, auth_headers, fake_messages):
+        conversation = models.ChatConversation(
+            organization_id=test_org.id, user_id=test_user.id, context_type="general", title="Old"
+        )
+        db_session.add(conversation)
+        db_session.flush()
+        for i in range(chat_routes.HISTORY_MESSAGES + 10):
+            db_session.add(models.ChatMessage(
+                conversation_id=conversation.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+            ))
+        db_session.commit()
+
+        client.post(
+            "/api/chat/messages",
+            json={"message": "And now?", "conversation_id": conversation.id},
+            headers=auth_headers,
+        )
+
+        sent = fake_messages.requests[0]["messages"]
+        assert len(sent) == chat_routes.HISTORY_MESSAGES + 1
+        assert sent[0]["content"] == "message 10"
+        assert sent[-1]["content"] == "And now?"
+
+
+class TestStreamMessage:
+    """Test the SSE consultant endpoint."""
+
+    def test_streams_tokens_then_done(self, client, db_session, test_org, auth_headers, fake_messages):
+        response = client.post("/api/chat/messages/stream", json={"message": "How soon?"}, headers=auth_headers)
+
+        events = _events(response.text)
+        assert [name for name, _ in events] == ["token", "token", "done"]
+        assert events[-1][1]["response"] == "Follow up within a day."
+        assert events[-1][1]["tokens_used"] == 12
+        assert db_session.query(models.ChatMessage).count() == 2
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES) == 1
+
+    def test_failed_stream_not_counted(self, client, db_session, test_org, auth_headers, fake_messages):
+        fake_messages.fail = True
+
+        response = client.post("/api/chat/messages/stream", json={"message": "How soon?"}, headers=auth_headers)
+
+        assert _events(response.text)[-1] == ("error", {"detail": "AI service error: overloaded"})
+        assert db_session.query(models.ChatMessage).count() == 0
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES) == 0
+
+    def test_unexpected_error_ends_with_error_event(self, client, db_session, test_org, auth_headers, fake_messages):
+        fake_messages.fail = RuntimeError("connection reset")
+
+        response = client.post("/api/chat/messages/stream", json={"message": "How soon?"}, headers=auth_headers)
+
+        assert _events(response.text)[-1] == ("error", {"detail": "AI service temporarily unavailable"})
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES) == 0
@@ -0,0 +1,89 @@
+# tests/test_chat_context.py
+"""
+Tests for the chat widget context window (recent turns + rolling summary).
+"""
+import pytest
+
+from app.db import models
+from app.services import chat_context
+from app.services.chat_context import CONTEXT_RECENT_TURNS, load_chat_context
+
+
+@pytest.fixture
+def conversation(db_session, test_org) -> models.ChatWidgetConversation:
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_context_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs",
+        contact_email="hello@acme.example.com",
+    )
+    db_session.add(config)
+    db_session.flush()
+    conversation = models.ChatWidgetConversation(config_id=config.id, session_id="session-context-1")
+    db_session.add(conversation)
+    db_session.commit()
+    return conversation
+
+
+def _add_turns(db_session, conversation, count, start=0):
+    for i in range(start, start + count):
+        db_session.add(models.ChatWidgetMessage(
+            conversation_id=conversation.id, role="user", content=f"question {i} " + "x" * 200
+        ))
+        db_session.add(models.ChatWidgetMessage(
+            conversation_id=conversation.id, role="assistant", content=f"answer {i} " + "y" * 200
+        ))
+    conversation.message_count = (conversation.message_count or 0) + count
+    db_session.commit()
+
+
+class TestChatContext:
+    """Test windowing, summarizing and pinning."""
+
+    def test_short_conversation_is_sent_verbatim(self, db_session, conversation):
+        _add_turns(db_session, conversation, 2)
+
+        context = load_chat_context(db_session, conversation, "new question")
+
+        assert len(context.messages) == 5
+        assert context.note is None
+        assert context.tokens_saved == 0
+        assert context.turn_count == 3
+
+    def test_old_turns_fold_into_summary(self, db_session, conversation):
+        _add_turns(db_session, conversation, CONTEXT_RECENT_TURNS + 4)
+        conversation.lead_email = "jane@example.com"
+        db_session.commit()
+
+        context = load_chat_context(db_session, conversation, "new question")
+
+        user_messages = [m for m in context.messages if m["role"] == "user"]
+        assert len(user_messages) == CONTEXT_RECENT_TURNS + 1
+        assert context.messages[0]["content"].startswith("question 4")
+        assert "question 0" in context.note
+        assert "jane@example.com" in context.note
+        assert context.turn_count == CONTEXT_RECENT_TURNS + 5
+        assert context.tokens_saved > 0
+        assert conversation.context_summary_upto_id is not None
+
+    def test_summary_is_extended_not_rebuilt(self, db_session, conversation):
+        _add_turns(db_session, conversation, CONTEXT_RECENT_TURNS + 1)
+        load_chat_context(db_session, conversation, "q")
+        first_summary = conversation.context_summary
+
+        _add_turns(db_session, conversation, 2, start=CONTEXT_RECENT_TURNS + 1)
+        load_chat_context(db_session, conversation, "q")
+
+        assert conversation.context_summary.startswith(first_summary)
+        assert "question 2" in conversation.context_summary
+
+    def test_summary_stays_bounded(self, db_session, conversation, monkeypatch):
+        monkeypatch.setattr(chat_context, "SUMMARY_MAX_CHARS", 400)
+        _add_turns(db_session, conversation, CONTEXT_RECENT_TURNS + 20)
+
+        context = load_chat_context(db_session, conversation, "q")
+
+        assert len(conversation.context_summary) <= 400
+        assert "question 19" in context.note
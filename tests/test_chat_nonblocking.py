@@ -0,0 +1,96 @@
+# tests/test_chat_nonblocking.py
+"""
+Tests that the async chat widget handlers never block the event loop.
+"""
+import asyncio
+import gc
+import time
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.api.routes import chat_widget as chat_widget_routes
+from app.services import ai_chat
+
+# Simulated slow database work per turn (seconds)
+SLOW_DB = 0.3
+
+
+@pytest.fixture
+def chat_widget(db_session, test_org) -> models.ChatWidgetConfig:
+    test_org.plan = "pro"
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_nonblocking_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs, installs",
+        contact_email="hello@acme.example.com",
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+@pytest.fixture
+def slow_db(test_engine, monkeypatch):
+    """Make the per-turn DB work slow and blocking, and stub the LLM."""
+    load_context = chat_widget_routes.load_chat_context
+    # Streams finish the turn in their own session
+    monkeypatch.setattr(chat_widget_routes, "SessionLocal", sessionmaker(bind=test_engine))
+
+    def slow_load_context(*args, **kwargs):
+        time.sleep(SLOW_DB)
+        return load_context(*args, **kwargs)
+
+    async def completion(config, messages, max_tokens=256, timezone=None, **kwargs):
+        return "Sure, happy to help.", 10, 5
+
+    async def stream(messages, system_prompt, max_tokens, result):
+        yield "Sure, happy to help."
+
+    monkeypatch.setattr(chat_widget_routes, "load_chat_context", slow_load_context)
+    monkeypatch.setattr(chat_widget_routes, "chat_completion", completion)
+    monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(ai_chat, "_deepseek_stream", stream)
+
+
+async def _max_loop_stall(app, widget_key: str, path: str) -> tuple[float, int]:
+    """Send a message while a heartbeat measures the longest event-loop stall."""
+    stalls = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        beat = asyncio.create_task(heartbeat())
+        response = await client.post(
+            f"/api/public/chat-widget/{path}",
+            params={"widget_key": widget_key},
+            json={"session_id": "session-nonblocking-1", "message": "Do you fix leaks?"},
+        )
+        done.set()
+        await beat
+
+    return max(stalls), response.status_code
+
+
+class TestChatHandlersDoNotBlockLoop:
+    """Slow database work must not stall other coroutines."""
+
+    @pytest.mark.parametrize("path", ["message", "message/stream"])
+    def test_loop_keeps_running_during_db_work(self, app, chat_widget, slow_db, path):
+        # Start from a clean heap so a full GC pass isn't mistaken for a blocking handler
+        gc.collect()
+        max_stall, status = asyncio.run(_max_loop_stall(app, chat_widget.widget_key, path))
+
+        assert status == 200
+        assert max_stall < SLOW_DB / 2
@@ -0,0 +1,171 @@
+# tests/test_chat_response_cache.py
+"""
+Tests for cached and pinned first-turn chat widget replies.
+"""
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.db import models
+from app.api.routes import booking as booking_routes
+from app.api.routes import chat_widget as chat_widget_routes
+from app.services.chat_response_cache import (
+    cached_first_reply,
+    chat_response_cache,
+    normalize_question,
+    store_first_reply,
+)
+
+
+@pytest.fixture
+def chat_widget(db_session, test_org) -> models.ChatWidgetConfig:
+    test_org.plan = "pro"
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_first_turn_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs, installs",
+        contact_email="hello@acme.example.com",
+        canned_answers=json.dumps([{"question": "What are your hours?", "answer": "We're open 8-6, Mon-Sat."}]),
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+@pytest.fixture
+def fake_completion(monkeypatch):
+    calls = []
+
+    async def completion(config, messages, max_tokens=256, timezone=None, **kwargs):
+        calls.append(messages)
+        return f"reply {len(calls)}", 10, 5
+
+    monkeypatch.setattr(chat_widget_routes, "chat_completion", completion)
+    return calls
+
+
+def _send(client, widget_key, message, session_id):
+    response = client.post(
+        "/api/public/chat-widget/message",
+        params={"widget_key": widget_key},
+        json={"session_id": session_id, "message": message},
+    )
+    assert response.status_code == 200
+    return response.json()["response"]
+
+
+class TestNormalizeQuestion:
+    def test_ignores_case_punctuation_and_greetings(self):
+        assert normalize_question("Hi! How much does it COST??") == "how much does it cost"
+        assert normalize_question("how much does it cost") == "how much does it cost"
+        assert normalize_question("Hello") == ""
+
+
+class TestFirstTurnCache:
+    """Test which turns may be answered from the cache."""
+
+    def test_repeat_first_question_skips_llm(self, client, chat_widget, fake_completion):
+        widget_key = chat_widget.widget_key
+
+        first = _send(client, widget_key, "How much does it cost?", "session-first-turn-1")
+        second = _send(client, widget_key, "how much does it cost", "session-first-turn-2")
+
+        assert first == second == "reply 1"
+        assert len(fake_completion) == 1
+        assert chat_response_cache.stats()["hits"] == 1
+
+    def test_later_turns_never_use_cache(self, client, chat_widget, fake_completion):
+        widget_key = chat_widget.widget_key
+
+        _send(client, widget_key, "How much does it cost?", "session-first-turn-1")
+        reply = _send(client, widget_key, "How much does it cost?", "session-first-turn-1")
+
+        assert reply == "reply 2"
+        assert len(fake_completion) == 2
+
+    def test_messages_with_contact_details_are_not_cached(self, client, chat_widget, fake_completion):
+        widget_key = chat_widget.widget_key
+
+        _send(client, widget_key, "Pricing? I'm jane@example.com", "session-first-turn-1")
+        _send(client, widget_key, "Pricing? I'm jane@example.com", "session-first-turn-2")
+
+        assert len(fake_completion) == 2
+
+    def test_pinned_answer_served_without_llm(self, client, db_session, chat_widget, fake_completion):
+        widget_key = chat_widget.widget_key
+
+        reply = _send(client, widget_key, "what are your hours", "session-first-turn-1")
+
+        conversation = db_session.query(models.ChatWidgetConversation).one()
+        db_session.refresh(conversation)
+        assert reply == "We're open 8-6, Mon-Sat."
+        assert fake_completion == []
+        assert [m.role for m in conversation.messages] == ["user", "assistant"]
+        assert chat_response_cache.stats()["pinned_hits"] == 1
+
+
+class TestBookingChanges:
+    """Test that replies quoting a booking page don't outlive edits to it."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        chat_response_cache.clear()
+        yield
+        chat_response_cache.clear()
+
+    def _config(self, meeting_name):
+        meeting = SimpleNamespace(name=meeting_name, duration_minutes=30, description=None, is_active=True)
+        booking = SimpleNamespace(slug="acme", business_name="Acme", meeting_types=(meeting,))
+        return SimpleNamespace(
+            id=1, organization_id=7, updated_at=datetime(2026, 10, 1), canned_answers={},
+            booking_enabled=True, booking_config=booking,
+        )
+
+    def test_meeting_type_edit_misses_cache(self):
+        _, key = cached_first_reply(self._config("Site visit"), "Can I book a demo?", None)
+        store_first_reply(key, "Book a site visit at /book/acme/site-visit")
+
+        reply, _ = cached_first_reply(self._config("Free estimate"), "Can I book a demo?", None)
+
+        assert reply is None
+
+    def test_booking_edit_drops_org_replies(self):
+        _, key = cached_first_reply(self._config("Site visit"), "Can I book a demo?", None)
+        store_first_reply(key, "Book a site visit")
+        chat_response_cache.set((8, 2, None, "pricing", "morning", None), "Other org")
+
+        booking_routes._invalidate_chat_caches(7)
+
+        assert chat_response_cache.stats()["entries"] == 1
+        assert cached_first_reply(self._config("Site visit"), "Can I book a demo?", None)[0] is None
+
+
+class TestCannedAnswersConfig:
+    """Test managing pinned answers from the dashboard."""
+
+    def test_update_keeps_answers_when_field_omitted(self, app, client, db_session, auth_headers, chat_widget):
+        from app.api.routes import auth as auth_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+        body = {
+            "business_name": "Acme Plumbing",
+            "business_description": "Residential plumbing",
+            "services": "Repairs",
+            "contact_email": "hello@acme.example.com",
+        }
+
+        kept = client.put(f"/api/chat-widget/config/{chat_widget.widget_key}", headers=auth_headers, json=body)
+        replaced = client.put(
+            f"/api/chat-widget/config/{chat_widget.widget_key}",
+            headers=auth_headers,
+            json={**body, "canned_answers": [{"question": "Pricing?", "answer": "From $99."}]},
+        )
+
+        assert kept.json()["canned_answers"] == [
+            {"question": "What are your hours?", "answer": "We're open 8-6, Mon-Sat."}
+        ]
+        assert replaced.json()["canned_answers"] == [{"question": "Pricing?", "answer": "From $99."}]
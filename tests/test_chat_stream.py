@@ -0,0 +1,142 @@
+# tests/test_chat_stream.py
+"""
+Tests for the streaming chat widget endpoint.
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.api.routes import chat_widget as chat_widget_routes
+from app.db import models
+from app.services import ai_chat
+
+
+@pytest.fixture(autouse=True)
+def stream_sessions(test_engine, monkeypatch):
+    """Streams finish the turn in their own session; point it at the test database."""
+    monkeypatch.setattr(chat_widget_routes, "SessionLocal", sessionmaker(bind=test_engine))
+
+
+@pytest.fixture
+def chat_widget(db_session, test_org) -> models.ChatWidgetConfig:
+    test_org.plan = "pro"
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_stream_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs, installs",
+        contact_email="hello@acme.example.com",
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _fake_stream(*chunks, fail=False):
+    async def stream(messages, system_prompt, max_tokens, result):
+        if fail:
+            raise RuntimeError("provider down")
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+
+class TestChatStream:
+    """Test SSE relay, fallback and finalization."""
+
+    def test_streams_tokens_then_done(self, client, db_session, chat_widget, monkeypatch):
+        monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+        monkeypatch.setattr(ai_chat, "_deepseek_stream", _fake_stream("Hi ", "there! ", "What's your email?"))
+
+        response = client.post(
+            "/api/public/chat-widget/message/stream",
+            params={"widget_key": chat_widget.widget_key},
+            json={"session_id": "session-stream-1", "message": "I'm jane@example.com"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response.text)
+        assert [e for e, _ in events] == ["token", "token", "token", "done"]
+        done = events[-1][1]
+        assert done["response"] == "Hi there! What's your email?"
+        assert done["lead_captured"] is True
+        assert done["ttft_ms"] is not None
+
+        db_session.expire_all()
+        conversation = db_session.query(models.ChatWidgetConversation).one()
+        assert [(m.role, m.content) for m in conversation.messages] == [
+            ("user", "I'm jane@example.com"),
+            ("assistant", "Hi there! What's your email?"),
+        ]
+        assert conversation.message_count == 1
+        assert conversation.total_tokens_output > 0
+        assert conversation.lead_email == "jane@example.com"
+
+    def test_falls_back_before_first_token(self, client, chat_widget, monkeypatch):
+        monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+        monkeypatch.setattr(ai_chat, "_deepseek_stream", _fake_stream(fail=True))
+        monkeypatch.setattr(ai_chat, "_cloudflare_stream", _fake_stream("Fallback answer"))
+
+        response = client.post(
+            "/api/public/chat-widget/message/stream",
+            params={"widget_key": chat_widget.widget_key},
+            json={"session_id": "session-stream-2", "message": "Hello"},
+        )
+
+        events = _events(response.text)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["response"] == "Fallback answer"
+
+    def test_error_event_when_all_providers_fail(self, client, chat_widget, monkeypatch):
+        monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+        monkeypatch.setattr(ai_chat, "_deepseek_stream", _fake_stream(fail=True))
+        monkeypatch.setattr(ai_chat, "_cloudflare_stream", _fake_stream(fail=True))
+
+        response = client.post(
+            "/api/public/chat-widget/message/stream",
+            params={"widget_key": chat_widget.widget_key},
+            json={"session_id": "session-stream-3", "message": "Hello"},
+        )
+
+        assert _events(response.text) == [("error", {"detail": "AI service temporarily unavailable"})]
+
+    def test_unknown_widget_is_http_error(self, client):
+        response = client.post(
+            "/api/public/chat-widget/message/stream",
+            params={"widget_key": "missing"},
+            json={"session_id": "session-stream-4", "message": "Hello"},
+        )
+        assert response.status_code == 404
+
+    def test_client_disconnect_still_stores_turn(self, db_session, chat_widget, monkeypatch):
+        monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+        monkeypatch.setattr(ai_chat, "_deepseek_stream", _fake_stream("Hi ", "there! ", "What's your email?"))
+        request = Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": ("203.0.113.5", 1)})
+        req = chat_widget_routes.ChatMessageRequest(session_id="session-stream-5", message="I'm jane@example.com")
+
+        async def read_first_token_then_disconnect():
+            response = await chat_widget_routes.stream_chat_message(chat_widget.widget_key, req, request, db_session)
+            first = await response.body_iterator.__anext__()
+            await response.body_iterator.aclose()
+            return first
+
+        assert asyncio.run(read_first_token_then_disconnect()).startswith("event: token")
+
+        db_session.expire_all()
+        conversation = db_session.query(models.ChatWidgetConversation).one()
+        assert [m.role for m in conversation.messages] == ["user", "assistant"]
+        assert conversation.message_count == 1
+        assert conversation.lead_email == "jane@example.com"
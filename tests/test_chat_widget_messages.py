@@ -0,0 +1,101 @@
+# tests/test_chat_widget_messages.py
+"""
+Tests for append-only chat widget message storage.
+"""
+import pytest
+
+from app.db import models
+from app.api.routes import chat_widget as chat_widget_routes
+
+
+@pytest.fixture
+def chat_widget(db_session, test_org) -> models.ChatWidgetConfig:
+    test_org.plan = "pro"
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_messages_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs, installs",
+        contact_email="hello@acme.example.com",
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+@pytest.fixture
+def fake_completion(monkeypatch):
+    """Replace the LLM call; records the history sent on each turn."""
+    calls = []
+
+    async def completion(config, messages, max_tokens=256, timezone=None, **kwargs):
+        calls.append(messages)
+        return f"reply {len(calls)}", 10, 5
+
+    monkeypatch.setattr(chat_widget_routes, "chat_completion", completion)
+    return calls
+
+
+def _send(client, widget, message, session_id="session-messages-1"):
+    return client.post(
+        "/api/public/chat-widget/message",
+        params={"widget_key": widget.widget_key},
+        json={"session_id": session_id, "message": message},
+    )
+
+
+class TestMessageStorage:
+    """Test that turns are appended as rows and replayed as history."""
+
+    def test_turns_append_rows_and_replay_history(self, client, db_session, chat_widget, fake_completion):
+        assert _send(client, chat_widget, "Hello").status_code == 200
+        assert _send(client, chat_widget, "Do you fix leaks?").status_code == 200
+
+        conversation = db_session.query(models.ChatWidgetConversation).one()
+        db_session.refresh(conversation)
+        assert [(m.role, m.content) for m in conversation.messages] == [
+            ("user", "Hello"),
+            ("assistant", "reply 1"),
+            ("user", "Do you fix leaks?"),
+            ("assistant", "reply 2"),
+        ]
+        assert conversation.message_count == 2
+        assert conversation.transcript == "[]"
+        assert fake_completion[1] == [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "reply 1"},
+            {"role": "user", "content": "Do you fix leaks?"},
+        ]
+
+
+class TestConversationMessagesEndpoint:
+    """Test paginated dashboard reads."""
+
+    def test_pages_backwards(self, app, client, db_session, auth_headers, chat_widget):
+        from app.api.routes import auth as auth_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+
+        conversation = models.ChatWidgetConversation(config_id=chat_widget.id, session_id="session-page-1")
+        db_session.add(conversation)
+        db_session.flush()
+        for i in range(5):
+            db_session.add(models.ChatWidgetMessage(
+                conversation_id=conversation.id, role="user", content=f"m{i}"
+            ))
+        db_session.commit()
+
+        url = f"/api/chat-widget/conversations/{conversation.id}/messages"
+        first = client.get(url, headers=auth_headers, params={"limit": 3}).json()
+        second = client.get(
+            url, headers=auth_headers, params={"limit": 3, "before_id": first["next_before_id"]}
+        ).json()
+
+        assert [m["content"] for m in first["messages"]] == ["m2", "m3", "m4"]
+        assert [m["content"] for m in second["messages"]] == ["m0", "m1"]
+        assert second["next_before_id"] is None
+
+        detail = client.get(f"/api/chat-widget/conversations/{conversation.id}", headers=auth_headers).json()
+        assert [m["content"] for m in detail["transcript"]] == ["m0", "m1", "m2", "m3", "m4"]
+        assert detail["has_more_messages"] is False
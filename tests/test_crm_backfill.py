@@ -0,0 +1,294 @@
+# tests/test_crm_backfill.py
+"""
+Tests for historical CRM backfills: streaming, checkpoints, resume and
+cancel, the progress API and the Salesforce Bulk API 2.0 path.
+"""
+import asyncio
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crm_backfill as backfill_crud
+from app.crud import lead as lead_crud
+from app.db import models
+from app.integrations import salesforce
+from app.integrations.rate_limits import crm_rate_limiter
+from app.schemas.lead import LeadCreate
+from app.services import crm_backfill, crm_sync
+from app.services.crm_backfill import crm_backfill_runner
+
+
+@pytest.fixture
+def backfills(test_engine, monkeypatch):
+    """Point the runner at the test database and fake the HubSpot batch push."""
+    monkeypatch.setattr(crm_backfill, "SessionLocal", sessionmaker(bind=test_engine))
+    monkeypatch.setitem(crm_backfill.BACKFILL_BATCH_SIZES, "hubspot", 2)
+
+    pushed = []
+    failing = set()
+
+    async def fake_batch(org_id, leads):
+        pushed.append([lead.email for lead in leads])
+        if failing & {lead.email for lead in leads} == {lead.email for lead in leads}:
+            raise RuntimeError("HubSpot 401: invalid token")
+        return [ValueError("bad email") if lead.email in failing else f"contact-{lead.email}" for lead in leads]
+
+    monkeypatch.setitem(crm_backfill.BACKFILL_BATCH_PUSHERS, "hubspot", fake_batch)
+    return SimpleNamespace(pushed=pushed, failing=failing)
+
+
+def _leads(db_session, org, count):
+    return [
+        lead_crud.create_lead(
+            db_session,
+            LeadCreate(email=f"lead{i}@example.com", name=f"Lead {i}", organization_id=org.id),
+            enforce_limit=False,
+        )
+        for i in range(count)
+    ]
+
+
+def _refresh(db_session, backfill):
+    db_session.expire_all()
+    return db_session.get(models.CRMBackfill, backfill.id)
+
+
+class TestBackfillRunner:
+    """Test that backfills push in batches and checkpoint their progress."""
+
+    def test_pushes_all_leads_in_batches(self, db_session, test_org, backfills):
+        _leads(db_session, test_org, 5)
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+
+        assert asyncio.run(crm_backfill_runner.run_once()) == models.CRM_BACKFILL_COMPLETED
+
+        backfill = _refresh(db_session, backfill)
+        assert [len(batch) for batch in backfills.pushed] == [2, 2, 1]
+        assert (backfill.total, backfill.processed, backfill.synced, backfill.failed) == (5, 5, 5, 0)
+        assert backfill.completed_at is not None
+
+    def test_skips_leads_handled_by_outbox_and_newer_leads(self, db_session, test_org, backfills):
+        lead_crud.create_lead(
+            db_session,
+            LeadCreate(email="synced@example.com", name="Synced", organization_id=test_org.id),
+            enforce_limit=False,
+            sync_to_crm=True,
+        )
+        _leads(db_session, test_org, 1)
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+        lead_crud.create_lead(
+            db_session,
+            LeadCreate(email="later@example.com", name="Later", organization_id=test_org.id),
+            enforce_limit=False,
+        )
+
+        asyncio.run(crm_backfill_runner.run_once())
+
+        assert backfill.total == 1
+        assert backfills.pushed == [["lead0@example.com"]]
+
+    def test_single_lead_failures_counted(self, db_session, test_org, backfills):
+        _leads(db_session, test_org, 2)
+        backfills.failing.add("lead1@example.com")
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+
+        asyncio.run(crm_backfill_runner.run_once())
+
+        backfill = _refresh(db_session, backfill)
+        assert backfill.status == models.CRM_BACKFILL_COMPLETED
+        assert (backfill.synced, backfill.failed, backfill.last_error) == (1, 1, "bad email")
+
+    def test_failed_leads_handed_to_outbox(self, db_session, test_org, backfills):
+        leads = _leads(db_session, test_org, 2)
+        backfills.failing.add("lead1@example.com")
+        backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+
+        asyncio.run(crm_backfill_runner.run_once())
+
+        [job] = db_session.query(models.CRMSyncJob).all()
+        assert (job.lead_id, job.provider, job.status) == (leads[1].id, "hubspot", models.CRM_SYNC_PENDING)
+        assert (job.attempts, job.last_error) == (1, "bad email")
+
+    def test_failed_lead_retry_does_not_delay_new_leads(self, db_session, test_org, backfills, test_engine, monkeypatch):
+        monkeypatch.setattr(crm_sync, "SessionLocal", sessionmaker(bind=test_engine))
+        _leads(db_session, test_org, 2)
+        backfills.failing.add("lead1@example.com")
+        backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+        asyncio.run(crm_backfill_runner.run_once())
+        new_lead = lead_crud.create_lead(
+            db_session,
+            LeadCreate(email="new@example.com", name="New", organization_id=test_org.id),
+            enforce_limit=False,
+            sync_to_crm=True,
+        )
+
+        # The backfill retry is backing off, but the new lead's job goes now
+        [[job]] = crm_sync.claim_jobs(limit=4, batch_size=1)
+
+        assert job.lead_id == new_lead.id
+
+    def test_failed_batch_resumes_from_checkpoint(self, db_session, test_org, backfills):
+        leads = _leads(db_session, test_org, 4)
+        backfills.failing.update({"lead2@example.com", "lead3@example.com"})
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+
+        assert asyncio.run(crm_backfill_runner.run_once()) == models.CRM_BACKFILL_FAILED
+
+        backfill = _refresh(db_session, backfill)
+        assert backfill.last_lead_id == leads[1].id
+        assert "invalid token" in backfill.last_error
+
+        backfills.failing.clear()
+        backfill_crud.resume_backfill(db_session, backfill)
+        asyncio.run(crm_backfill_runner.run_once())
+
+        backfill = _refresh(db_session, backfill)
+        assert backfill.status == models.CRM_BACKFILL_COMPLETED
+        assert backfills.pushed[-1] == ["lead2@example.com", "lead3@example.com"]
+        assert (backfill.processed, backfill.synced) == (4, 4)
+
+    def test_cancel_stops_after_batch_in_flight(self, db_session, test_org, backfills, monkeypatch):
+        _leads(db_session, test_org, 6)
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "hubspot")
+        push = crm_backfill.BACKFILL_BATCH_PUSHERS["hubspot"]
+
+        async def cancel_during_push(org_id, leads):
+            backfill_crud.cancel_backfill(db_session, _refresh(db_session, backfill))
+            return await push(org_id, leads)
+
+        monkeypatch.setitem(crm_backfill.BACKFILL_BATCH_PUSHERS, "hubspot", cancel_during_push)
+
+        assert asyncio.run(crm_backfill_runner.run_once()) == models.CRM_BACKFILL_CANCELLED
+
+        backfill = _refresh(db_session, backfill)
+        assert backfill.status == models.CRM_BACKFILL_CANCELLED
+        assert len(backfills.pushed) == 1
+
+    def test_provider_without_bulk_api_pushes_per_lead(self, db_session, test_org, backfills, monkeypatch):
+        _leads(db_session, test_org, 3)
+        pushed = []
+
+        async def push(org_id, lead):
+            pushed.append(lead.email)
+            return f"person-{lead.email}"
+
+        monkeypatch.setitem(crm_backfill.CRM_PUSHERS, "pipedrive", push)
+        backfill = backfill_crud.create_backfill(db_session, test_org.id, "pipedrive")
+
+        asyncio.run(crm_backfill_runner.run_once())
+
+        assert sorted(pushed) == [f"lead{i}@example.com" for i in range(3)]
+        assert _refresh(db_session, backfill).synced == 3
+
+
+class TestBackfillAPI:
+    """Test starting, watching, cancelling and resuming backfills."""
+
+    def test_start_and_progress(self, client, db_session, test_org, auth_headers):
+        _leads(db_session, test_org, 3)
+
+        resp = client.post("/api/integrations/crm-sync/backfills", json={"provider": "hubspot"}, headers=auth_headers)
+
+        assert resp.status_code == 201
+        assert (resp.json()["status"], resp.json()["total"]) == (models.CRM_BACKFILL_PENDING, 3)
+        resp = client.get(f"/api/integrations/crm-sync/backfills/{resp.json()['id']}", headers=auth_headers)
+        assert resp.json()["processed"] == 0
+
+    def test_one_active_backfill_per_provider(self, client, auth_headers):
+        client.post("/api/integrations/crm-sync/backfills", json={"provider": "hubspot"}, headers=auth_headers)
+
+        resp = client.post("/api/integrations/crm-sync/backfills", json={"provider": "hubspot"}, headers=auth_headers)
+
+        assert resp.status_code == 409
+
+    def test_unsupported_provider(self, client, auth_headers):
+        resp = client.post("/api/integrations/crm-sync/backfills", json={"provider": "excel"}, headers=auth_headers)
+
+        assert resp.status_code == 400
+
+    def test_cancel_and_resume(self, client, auth_headers):
+        backfill_id = client.post(
+            "/api/integrations/crm-sync/backfills", json={}, headers=auth_headers
+        ).json()["id"]
+
+        resp = client.post(f"/api/integrations/crm-sync/backfills/{backfill_id}/cancel", headers=auth_headers)
+        assert resp.json()["status"] == models.CRM_BACKFILL_CANCELLED
+
+        resp = client.post(f"/api/integrations/crm-sync/backfills/{backfill_id}/resume", headers=auth_headers)
+        assert resp.json()["status"] == models.CRM_BACKFILL_PENDING
+
+        resp = client.post(f"/api/integrations/crm-sync/backfills/{backfill_id}/resume", headers=auth_headers)
+        assert resp.status_code == 409
+
+    def test_unknown_backfill(self, client, auth_headers):
+        resp = client.get("/api/integrations/crm-sync/backfills/999", headers=auth_headers)
+
+        assert resp.status_code == 404
+
+
+@pytest.fixture
+def salesforce_bulk_api(monkeypatch):
+    requests = []
+    uploads = []
+
+    def handler(request):
+        path = request.url.path
+        requests.append((request.method, path))
+        if path.endswith("/query"):
+            return httpx.Response(200, json={
+                "done": True, "records": [{"Id": "00Q-old", "Email": "Old@example.com"}],
+            })
+        if path.endswith("/jobs/ingest") and request.method == "POST":
+            assert json.loads(request.content)["operation"] == "insert"
+            return httpx.Response(200, json={"id": "750x"})
+        if path.endswith("/batches"):
+            uploads.extend(csv.DictReader(io.StringIO(request.content.decode())))
+            return httpx.Response(201)
+        if path.endswith("/jobs/ingest/750x") and request.method == "PATCH":
+            return httpx.Response(200, json={"state": "UploadComplete"})
+        if path.endswith("/jobs/ingest/750x"):
+            return httpx.Response(200, json={"state": "JobComplete"})
+        if path.endswith("/successfulResults/"):
+            return httpx.Response(200, text="sf__Id,sf__Created,FirstName,LastName,Email,Company\n00Q-new,true,,Unknown,new@example.com,Unknown\n")
+        if path.endswith("/failedResults/"):
+            return httpx.Response(200, text="sf__Id,sf__Error,FirstName,LastName,Email,Company\n,INVALID_EMAIL_ADDRESS:Email,,Unknown,bad@example,Unknown\n")
+        return httpx.Response(404)
+
+    @asynccontextmanager
+    async def client(provider):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+            yield c
+
+    async def credential(org_id):
+        return "token", "https://acme.my.salesforce.com"
+
+    monkeypatch.setattr(salesforce, "crm_clients", SimpleNamespace(client=client))
+    monkeypatch.setattr(salesforce, "_get_active_sf_credential", credential)
+    crm_rate_limiter.reset()
+    yield SimpleNamespace(requests=requests, uploads=uploads)
+    crm_rate_limiter.reset()
+
+
+class TestSalesforceBulk:
+    """Test the Bulk API 2.0 ingest flow and its per-lead results."""
+
+    def test_bulk_insert(self, salesforce_bulk_api):
+        leads = [{"email": "old@example.com"}, {"email": "new@example.com"}, {"email": "bad@example"}]
+
+        results = asyncio.run(salesforce.create_leads_bulk(org_id=1, leads=leads))
+
+        assert results == [
+            {"id": "00Q-old", "existing": True},
+            {"existing": False, "id": "00Q-new"},
+            {"existing": False, "error": "INVALID_EMAIL_ADDRESS:Email"},
+        ]
+        # Existing leads aren't uploaded
+        assert [row["Email"] for row in salesforce_bulk_api.uploads] == ["new@example.com", "bad@example"]
+        # query, create job, upload, close, status, two result sets
+        assert len(salesforce_bulk_api.requests) == 7
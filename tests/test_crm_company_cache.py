@@ -0,0 +1,104 @@
+# tests/test_crm_company_cache.py
+"""
+Tests for the per-org CRM company resolution cache and its use in the
+HubSpot lead sync.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.integrations import company_cache as company_cache_module
+from app.integrations import hubspot
+from app.integrations.company_cache import company_cache, lookup_company, normalize_company_name
+
+
+@pytest.fixture
+def companies(test_engine, test_org, monkeypatch):
+    """Point the cache at the test database and fake the HubSpot company calls."""
+    monkeypatch.setattr(company_cache_module, "SessionLocal", sessionmaker(bind=test_engine))
+    company_cache.clear()
+
+    calls = SimpleNamespace(searches=[], creates=[], associations=[], missing=set())
+
+    async def search_contact(email, organization_id=None):
+        return {"id": "c-1", "properties": {"email": email}}
+
+    async def search_company(name, organization_id=None):
+        calls.searches.append(name)
+        return None
+
+    async def create_company(name, organization_id=None, **kwargs):
+        calls.creates.append(name)
+        return {"id": f"co-{len(calls.creates)}", "properties": {"name": name}}
+
+    async def associate(contact_id, company_id, organization_id):
+        calls.associations.append(company_id)
+        return 404 if company_id in calls.missing else 200
+
+    monkeypatch.setattr(hubspot, "search_contact_by_email", search_contact)
+    monkeypatch.setattr(hubspot, "search_company_by_name", search_company)
+    monkeypatch.setattr(hubspot, "create_company", create_company)
+    monkeypatch.setattr(hubspot, "_associate", associate)
+    yield calls
+    company_cache.clear()
+
+
+def _sync(org, company_name):
+    return asyncio.run(hubspot.create_lead_full(
+        email="jane@example.com", company_name=company_name, organization_id=org.id,
+    ))
+
+
+class TestNormalization:
+    """Test that trivially different spellings share an entry."""
+
+    def test_punctuation_case_and_whitespace(self):
+        assert normalize_company_name("Acme, Inc.") == normalize_company_name("  acme   inc ") == "acme inc"
+
+    def test_ampersand_kept(self):
+        assert normalize_company_name("Smith & Co") == "smith & co"
+
+    def test_empty(self):
+        assert normalize_company_name(None) == ""
+
+
+class TestCompanyCache:
+    """Test that repeat companies skip the search and stale ids are dropped."""
+
+    def test_repeat_company_skips_search(self, companies, test_org):
+        hits = company_cache.stats()["hits"]
+        first = _sync(test_org, "Acme, Inc.")
+        second = _sync(test_org, "acme inc")
+
+        assert first["company"]["id"] == second["company"]["id"] == "co-1"
+        assert second["associated"] is True
+        assert companies.searches == ["Acme, Inc."]
+        assert company_cache.stats()["hits"] == hits + 1
+
+    def test_entry_survives_restart(self, companies, test_org, db_session):
+        _sync(test_org, "Acme")
+        company_cache.clear()
+
+        assert asyncio.run(lookup_company(test_org.id, "hubspot", "ACME")) == "co-1"
+        [row] = db_session.query(models.CRMCompanyCacheEntry).all()
+        assert (row.organization_id, row.provider, row.normalized_name) == (test_org.id, "hubspot", "acme")
+
+    def test_entries_scoped_per_org(self, companies, test_org):
+        _sync(test_org, "Acme")
+
+        assert asyncio.run(lookup_company(test_org.id + 1, "hubspot", "Acme")) is None
+        assert asyncio.run(lookup_company(test_org.id, "pipedrive", "Acme")) is None
+
+    def test_deleted_company_invalidated(self, companies, test_org):
+        _sync(test_org, "Acme")
+        companies.missing.add("co-1")  # Deleted or merged in HubSpot
+
+        result = _sync(test_org, "Acme")
+
+        assert result["company"]["id"] == "co-2"
+        assert companies.associations == ["co-1", "co-1", "co-2"]
+        assert len(companies.searches) == 2
+        assert asyncio.run(lookup_company(test_org.id, "hubspot", "Acme")) == "co-2"
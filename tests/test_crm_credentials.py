@@ -0,0 +1,122 @@
+# tests/test_crm_credentials.py
+"""
+Tests for the cached CRM credential lookup.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.integrations import credentials
+from app.integrations import salesforce
+from app.integrations.credentials import credential_cache, get_credential
+
+
+@pytest.fixture
+def credential_loads(test_engine, monkeypatch):
+    """Point the loader at the test database and count the sessions it opens."""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    loads = []
+
+    def session_factory():
+        loads.append(1)
+        return TestingSessionLocal()
+
+    monkeypatch.setattr(credentials, "SessionLocal", session_factory)
+    credential_cache.clear()
+    yield loads
+    credential_cache.clear()
+
+
+def _add_credential(db_session, org, provider="hubspot", **kwargs):
+    cred = models.IntegrationCredential(
+        organization_id=org.id,
+        provider=provider,
+        auth_type=kwargs.pop("auth_type", "oauth"),
+        access_token=kwargs.pop("access_token", "token-1"),
+        **kwargs,
+    )
+    db_session.add(cred)
+    db_session.commit()
+    return cred
+
+
+class TestCredentialCache:
+    """Test caching and invalidation of CRM credentials."""
+
+    def test_steady_state_makes_no_db_round_trips(self, db_session, test_org, credential_loads):
+        _add_credential(db_session, test_org)
+
+        tokens = [asyncio.run(get_credential(test_org.id, "hubspot")).access_token for _ in range(3)]
+
+        assert tokens == ["token-1"] * 3
+        assert len(credential_loads) == 1
+
+    def test_missing_credential_cached(self, db_session, test_org, credential_loads):
+        assert asyncio.run(get_credential(test_org.id, "pipedrive")) is None
+        assert asyncio.run(get_credential(test_org.id, "pipedrive")) is None
+        assert len(credential_loads) == 1
+
+    def test_token_update_invalidates(self, db_session, test_org, credential_loads):
+        cred = _add_credential(db_session, test_org)
+        asyncio.run(get_credential(test_org.id, "hubspot"))
+
+        cred.access_token = "token-2"
+        db_session.commit()
+
+        assert asyncio.run(get_credential(test_org.id, "hubspot")).access_token == "token-2"
+
+    def test_new_credential_invalidates_cached_miss(self, db_session, test_org, credential_loads):
+        assert asyncio.run(get_credential(test_org.id, "hubspot")) is None
+
+        _add_credential(db_session, test_org)
+
+        assert asyncio.run(get_credential(test_org.id, "hubspot")).access_token == "token-1"
+
+    def test_bulk_deactivate_invalidates(self, db_session, test_org, credential_loads):
+        _add_credential(db_session, test_org)
+        asyncio.run(get_credential(test_org.id, "hubspot"))
+
+        db_session.query(models.IntegrationCredential).filter(
+            models.IntegrationCredential.organization_id == test_org.id,
+        ).update({models.IntegrationCredential.is_active: False})
+        db_session.commit()
+
+        assert asyncio.run(get_credential(test_org.id, "hubspot")) is None
+
+    def test_expiring_token_not_served_from_cache(self, db_session, test_org, credential_loads):
+        _add_credential(db_session, test_org, expires_at=datetime.utcnow() + timedelta(seconds=30))
+
+        asyncio.run(get_credential(test_org.id, "hubspot"))
+        asyncio.run(get_credential(test_org.id, "hubspot"))
+
+        assert len(credential_loads) == 2
+
+    def test_write_from_another_process_seen_within_ttl(self, db_session, test_org, credential_loads, monkeypatch):
+        stale = credentials.CRMCredential(
+            organization_id=test_org.id, provider="hubspot", auth_type="oauth",
+            access_token="revoked", refresh_token=None, expires_at=None,
+        )
+        # Cached here before another worker disconnected the integration
+        credential_cache.set(test_org.id, "hubspot", stale)
+        assert asyncio.run(get_credential(test_org.id, "hubspot")) is stale
+
+        now = credentials.time.time()
+        monkeypatch.setattr(credentials.time, "time", lambda: now + credentials.CREDENTIAL_CACHE_TTL + 1)
+
+        assert asyncio.run(get_credential(test_org.id, "hubspot")) is None
+
+    def test_salesforce_instance_url_from_metadata(self, db_session, test_org, credential_loads):
+        _add_credential(
+            db_session,
+            test_org,
+            provider="salesforce",
+            scopes=json.dumps({"instance_url": "https://acme.my.salesforce.com/"}),
+        )
+
+        token, instance_url = asyncio.run(salesforce._get_active_sf_credential(test_org.id))
+
+        assert (token, instance_url) == ("token-1", "https://acme.my.salesforce.com")
@@ -0,0 +1,74 @@
+# tests/test_crm_http_clients.py
+"""
+Tests for the pooled CRM HTTP client registry.
+"""
+import asyncio
+
+from app.integrations.http_clients import CRM_CLIENT_SETTINGS, CRMClientRegistry
+
+
+class TestCRMClientRegistry:
+    """Test client sharing and lifecycle."""
+
+    def test_shared_client_reused_on_app_loop(self):
+        async def scenario():
+            registry = CRMClientRegistry()
+            await registry.start()
+            try:
+                async with registry.client("hubspot") as first:
+                    pass
+                async with registry.client("hubspot") as second:
+                    pass
+                async with registry.client("pipedrive") as other:
+                    pass
+                return first, second, other
+            finally:
+                await registry.stop()
+
+        first, second, other = asyncio.run(scenario())
+
+        assert first is second
+        assert other is not first
+        assert first.is_closed and other.is_closed  # Closed by stop()
+
+    def test_provider_settings_applied(self):
+        async def scenario():
+            registry = CRMClientRegistry()
+            await registry.start()
+            try:
+                async with registry.client("salesforce") as client:
+                    return client.timeout
+            finally:
+                await registry.stop()
+
+        assert asyncio.run(scenario()) == CRM_CLIENT_SETTINGS["salesforce"].timeout
+
+    def test_one_off_client_when_not_started(self):
+        async def scenario():
+            registry = CRMClientRegistry()
+            async with registry.client("hubspot") as first:
+                assert not first.is_closed
+            async with registry.client("hubspot") as second:
+                pass
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        assert first is not second
+        assert first.is_closed and second.is_closed
+
+    def test_one_off_client_on_other_loop(self):
+        registry = CRMClientRegistry()
+
+        async def start():
+            await registry.start()
+
+        async def borrow():
+            async with registry.client("hubspot") as client:
+                return client
+
+        asyncio.run(start())
+        client = asyncio.run(borrow())
+
+        assert client is not registry._clients["hubspot"]
+        assert client.is_closed
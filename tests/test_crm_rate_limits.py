@@ -0,0 +1,151 @@
+# tests/test_crm_rate_limits.py
+"""
+Tests for the per-account CRM rate limiter.
+"""
+import asyncio
+import time
+
+import httpx
+
+from app.integrations import rate_limits
+from app.integrations.rate_limits import CRMRateLimiter, ProviderRateLimit, TokenBucket, retry_after_seconds
+
+FAST_LIMITS = {
+    "hubspot": ProviderRateLimit(
+        requests=2,
+        per_seconds=0.1,
+        daily_remaining_header="X-HubSpot-RateLimit-Daily-Remaining",
+    ),
+}
+
+
+def _mock_client(statuses: list[int], headers: dict = None) -> httpx.AsyncClient:
+    def handler(request):
+        status = statuses.pop(0) if statuses else 200
+        return httpx.Response(status, headers=headers or {}, json={})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestTokenBucket:
+    """Test queueing and 429 backoff."""
+
+    def test_queues_instead_of_failing(self):
+        bucket = TokenBucket(FAST_LIMITS["hubspot"])
+
+        async def scenario():
+            start = time.monotonic()
+            await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(scenario())
+
+        # 2 slots up front, then 4 more at 20/s
+        assert elapsed >= 0.18
+        assert bucket.stats()["queued"] == 4
+
+    def test_pause_slows_rate_and_blocks(self):
+        bucket = TokenBucket(FAST_LIMITS["hubspot"])
+        bucket.pause(0.1)
+
+        async def scenario():
+            start = time.monotonic()
+            await bucket.acquire()
+            return time.monotonic() - start
+
+        assert asyncio.run(scenario()) >= 0.1
+        assert bucket.stats()["rate_per_second"] == 10.0
+        assert bucket.stats()["rate_limited"] == 1
+
+    def test_retry_after_parsing(self):
+        assert retry_after_seconds(httpx.Headers({"Retry-After": "7"})) == 7.0
+        assert retry_after_seconds(httpx.Headers({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert retry_after_seconds(httpx.Headers({})) is None
+
+
+class TestCRMRateLimiter:
+    """Test sending through the limiter."""
+
+    def test_429_retried_after_retry_after(self):
+        limiter = CRMRateLimiter(FAST_LIMITS)
+        statuses = [429, 200]
+
+        async def scenario():
+            async with _mock_client(statuses, {"Retry-After": "0"}) as client:
+                return await limiter.send(client, "hubspot", 1, "GET", "https://api.hubapi.com/x")
+
+        assert asyncio.run(scenario()).status_code == 200
+        assert limiter.stats()["hubspot"]["1"]["rate_limited"] == 1
+
+    def test_gives_up_when_retry_after_too_long(self):
+        limiter = CRMRateLimiter(FAST_LIMITS)
+        statuses = [429, 200]
+
+        async def scenario():
+            async with _mock_client(statuses, {"Retry-After": "3600"}) as client:
+                return await limiter.send(client, "hubspot", 1, "GET", "https://api.hubapi.com/x")
+
+        assert asyncio.run(scenario()).status_code == 429
+        assert statuses == [200]  # Not retried
+
+    def test_stops_after_max_retries(self, monkeypatch):
+        monkeypatch.setattr(rate_limits, "BACKOFF_BASE_SECONDS", 0.001)
+        limiter = CRMRateLimiter(FAST_LIMITS)
+        statuses = [429] * 10
+
+        async def scenario():
+            async with _mock_client(statuses) as client:
+                return await limiter.send(client, "hubspot", 1, "GET", "https://api.hubapi.com/x")
+
+        assert asyncio.run(scenario()).status_code == 429
+        assert len(statuses) == 10 - (rate_limits.MAX_RATE_LIMIT_RETRIES + 1)
+
+    def test_budget_reported_per_account(self):
+        limiter = CRMRateLimiter(FAST_LIMITS)
+
+        async def scenario():
+            async with _mock_client([], {"X-HubSpot-RateLimit-Daily-Remaining": "2500"}) as client:
+                await limiter.send(client, "hubspot", 1, "GET", "https://api.hubapi.com/x")
+                await limiter.send(client, "hubspot", 2, "GET", "https://api.hubapi.com/x")
+
+        asyncio.run(scenario())
+        stats = limiter.stats()["hubspot"]
+
+        assert set(stats) == {"1", "2"}
+        assert stats["1"]["daily_remaining"] == 2500
+        assert stats["1"]["requests"] == 1
+
+    def test_salesforce_usage_header(self):
+        headers = httpx.Headers({"Sforce-Limit-Info": "api-usage=18/15000"})
+        assert rate_limits._header_int(headers, "Sforce-Limit-Info") == 14982
+
+    def test_summary_totals_per_provider(self):
+        limiter = CRMRateLimiter(FAST_LIMITS)
+
+        async def scenario():
+            async with _mock_client([], {"X-HubSpot-RateLimit-Daily-Remaining": "2500"}) as client:
+                await limiter.send(client, "hubspot", 1, "GET", "https://api.hubapi.com/x")
+            async with _mock_client([], {"X-HubSpot-RateLimit-Daily-Remaining": "40"}) as client:
+                await limiter.send(client, "hubspot", 2, "GET", "https://api.hubapi.com/x")
+
+        asyncio.run(scenario())
+        summary = limiter.summary()["hubspot"]
+
+        assert (summary["accounts"], summary["requests"], summary["min_daily_remaining"]) == (2, 2, 40)
+
+    def test_health_endpoint(self, client, monkeypatch):
+        limiter = CRMRateLimiter(FAST_LIMITS)
+        monkeypatch.setattr("app.api.routes.core.crm_rate_limiter", limiter)
+
+        async def scenario():
+            async with _mock_client([]) as client:
+                await limiter.send(client, "hubspot", 4242, "GET", "https://api.hubapi.com/x")
+
+        asyncio.run(scenario())
+        response = client.get("/health/crm")
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"rate_limits", "credentials", "companies", "sync_jobs"}
+        # Public: no org ids or per-account budgets
+        assert response.json()["rate_limits"]["hubspot"]["accounts"] == 1
+        assert "4242" not in response.text
@@ -0,0 +1,436 @@
+# tests/test_crm_sync_jobs.py
+"""
+Tests for the CRM sync outbox: enqueueing, the worker, retries, replay and
+the HubSpot batch path.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import lead as lead_crud
+from app.db import models
+from app.integrations import company_cache as company_cache_module
+from app.integrations import hubspot, salesforce
+from app.integrations.rate_limits import crm_rate_limiter
+from app.schemas.lead import LeadCreate
+from app.services import crm_sync
+from app.services.crm_sync import MAX_ATTEMPTS, claim_jobs, crm_sync_worker
+
+
+@pytest.fixture
+def outbox(test_engine, monkeypatch):
+    """Point the worker at the test database and fake the CRM pushes."""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    monkeypatch.setattr(crm_sync, "SessionLocal", TestingSessionLocal)
+
+    pushes = []
+    failures = []
+    notifications = []
+
+    async def fake_push(org_id, lead):
+        pushes.append((org_id, lead.email))
+        if failures:
+            raise crm_sync.CRMSyncError(failures.pop(0))
+        return f"contact-{len(pushes)}"
+
+    monkeypatch.setitem(crm_sync.CRM_PUSHERS, "hubspot", fake_push)
+    monkeypatch.setattr(
+        crm_sync, "_maybe_send_crm_error_notification", lambda *args: notifications.append(args)
+    )
+
+    return SimpleNamespace(pushes=pushes, failures=failures, notifications=notifications)
+
+
+def _create_lead(db_session, org, email="jane@example.com"):
+    return lead_crud.create_lead(
+        db_session,
+        LeadCreate(email=email, name="Jane", first_name="Jane", organization_id=org.id),
+        enforce_limit=False,
+        sync_to_crm=True,
+    )
+
+
+def _jobs(db_session):
+    db_session.expire_all()
+    return db_session.query(models.CRMSyncJob).order_by(models.CRMSyncJob.id).all()
+
+
+class TestOutbox:
+    """Test that jobs are written with the lead and processed by the worker."""
+
+    def test_job_committed_with_lead(self, db_session, test_org):
+        lead = _create_lead(db_session, test_org)
+
+        [job] = _jobs(db_session)
+        assert (job.lead_id, job.organization_id, job.provider) == (lead.id, test_org.id, "hubspot")
+        assert job.status == models.CRM_SYNC_PENDING
+
+    def test_no_job_without_sync_to_crm(self, db_session, test_org):
+        lead_crud.create_lead(db_session, LeadCreate(email="x@example.com", name="X", organization_id=test_org.id))
+
+        assert _jobs(db_session) == []
+
+    def test_worker_completes_job(self, db_session, test_org, outbox):
+        _create_lead(db_session, test_org)
+
+        assert asyncio.run(crm_sync_worker.run_once()) == 1
+
+        [job] = _jobs(db_session)
+        assert job.status == models.CRM_SYNC_SUCCEEDED
+        assert job.external_id == "contact-1"
+        assert job.attempts == 1
+        assert outbox.pushes == [(test_org.id, "jane@example.com")]
+
+    def test_failure_retried_with_backoff(self, db_session, test_org, outbox):
+        _create_lead(db_session, test_org)
+        outbox.failures.append("HubSpot 503")
+
+        asyncio.run(crm_sync_worker.run_once())
+
+        [job] = _jobs(db_session)
+        assert job.status == models.CRM_SYNC_PENDING
+        assert job.last_error == "HubSpot 503"
+        assert job.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+        assert outbox.notifications == []
+        # Not due yet
+        assert asyncio.run(crm_sync_worker.run_once()) == 0
+
+    def test_dead_lettered_after_max_attempts(self, db_session, test_org, outbox):
+        _create_lead(db_session, test_org)
+        [job] = _jobs(db_session)
+        job.attempts = MAX_ATTEMPTS - 1
+        db_session.commit()
+        outbox.failures.append("invalid token")
+
+        asyncio.run(crm_sync_worker.run_once())
+
+        [job] = _jobs(db_session)
+        assert job.status == models.CRM_SYNC_DEAD
+        assert len(outbox.notifications) == 1
+
+    def test_permanent_rejection_dead_lettered_at_once(self, db_session, test_org, outbox, monkeypatch):
+        async def reject_bad(org_id, lead):
+            if lead.email.startswith("bad"):
+                raise crm_sync.CRMSyncError("HubSpot 400: Invalid email", permanent=True)
+            return "contact-1"
+
+        test_org.active_crm = "pipedrive"  # One job at a time, in order
+        db_session.commit()
+        monkeypatch.setitem(crm_sync.CRM_PUSHERS, "pipedrive", reject_bad)
+        _create_lead(db_session, test_org, "bad@example.com")
+        _create_lead(db_session, test_org, "good@example.com")
+
+        asyncio.run(crm_sync_worker.run_once())
+        asyncio.run(crm_sync_worker.run_once())
+
+        bad, good = _jobs(db_session)
+        assert (bad.status, bad.attempts) == (models.CRM_SYNC_DEAD, 1)
+        assert good.status == models.CRM_SYNC_SUCCEEDED
+        assert len(outbox.notifications) == 1
+
+    def test_salesforce_rejection_is_permanent(self, monkeypatch):
+        async def reject(**kwargs):
+            raise salesforce.SalesforceRequestError(400, "Salesforce lead create failed: INVALID_EMAIL_ADDRESS")
+
+        monkeypatch.setattr(crm_sync, "salesforce_create_lead", reject)
+        lead = crm_sync.LeadFields(None, "bad@example", "", "", "", "", "bad@example", "Site2CRM")
+
+        with pytest.raises(crm_sync.CRMSyncError) as exc:
+            asyncio.run(crm_sync._push_to_salesforce(1, lead))
+
+        assert exc.value.permanent is True
+
+    def test_per_org_ordering(self, db_session, test_org, outbox):
+        test_org.active_crm = "pipedrive"  # No batch API: one job per org at a time
+        other = models.Organization(name="Other", domain="other.example.com", api_key="other_key", active_crm="hubspot")
+        db_session.add(other)
+        db_session.commit()
+        first = _create_lead(db_session, test_org, "a@example.com")
+        _create_lead(db_session, test_org, "b@example.com")
+        third = _create_lead(db_session, other, "c@example.com")
+
+        batches = claim_jobs(10)
+
+        assert [[job.lead_id for job in jobs] for jobs in batches] == [[first.id], [third.id]]
+        # The org's second job waits until the first has finished
+        assert claim_jobs(10) == []
+
+    def test_batch_claims_consecutive_due_jobs(self, db_session, test_org, outbox):
+        leads = [_create_lead(db_session, test_org, f"{i}@example.com") for i in range(4)]
+        jobs = _jobs(db_session)
+        jobs[2].next_attempt_at = datetime.utcnow() + timedelta(minutes=5)
+        db_session.commit()
+
+        [batch] = claim_jobs(10)
+
+        # Stops at the job that isn't due, so the org's order holds
+        assert [job.lead_id for job in batch] == [leads[0].id, leads[1].id]
+
+    def test_followers_released_when_head_lost(self, db_session, test_org, outbox, monkeypatch):
+        for i in range(3):
+            _create_lead(db_session, test_org, f"{i}@example.com")
+        claim = crm_sync._claim
+
+        def racing_claim(db, job_ids, now):
+            claim(db, job_ids[:1], now - timedelta(seconds=1))  # Another worker wins the head first
+            return claim(db, job_ids, now)
+
+        monkeypatch.setattr(crm_sync, "_claim", racing_claim)
+
+        assert crm_sync._claim_jobs(10) == ([], True)
+
+        head, *followers = _jobs(db_session)
+        assert head.status == models.CRM_SYNC_RUNNING
+        assert [(job.status, job.attempts) for job in followers] == [(models.CRM_SYNC_PENDING, 0)] * 2
+
+    def test_batch_errors_mapped_to_jobs(self, db_session, test_org, outbox, monkeypatch):
+        async def fake_batch(org_id, leads):
+            return [
+                crm_sync.CRMSyncError("Property values were not valid") if lead.email.startswith("bad") else f"contact-{lead.email}"
+                for lead in leads
+            ]
+
+        monkeypatch.setitem(crm_sync.CRM_BATCH_PUSHERS, "hubspot", fake_batch)
+        _create_lead(db_session, test_org, "good@example.com")
+        _create_lead(db_session, test_org, "bad@example.com")
+
+        assert asyncio.run(crm_sync_worker.run_once()) == 2
+
+        good, bad = _jobs(db_session)
+        assert (good.status, good.external_id) == (models.CRM_SYNC_SUCCEEDED, "contact-good@example.com")
+        assert (bad.status, bad.last_error) == (models.CRM_SYNC_PENDING, "Property values were not valid")
+        assert outbox.pushes == []  # Went through the batch path
+
+    def test_stale_running_job_requeued(self, db_session, test_org, outbox):
+        _create_lead(db_session, test_org)
+        [job] = _jobs(db_session)
+        job.status = models.CRM_SYNC_RUNNING
+        job.attempts = 1
+        job.locked_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+
+        asyncio.run(crm_sync_worker.run_once())
+
+        [job] = _jobs(db_session)
+        assert job.status == models.CRM_SYNC_SUCCEEDED
+        assert job.attempts == 2
+
+
+class TestReplayAPI:
+    """Test listing and replaying dead-lettered jobs."""
+
+    def _dead_job(self, db_session, org):
+        _create_lead(db_session, org)
+        [job] = _jobs(db_session)
+        job.status = models.CRM_SYNC_DEAD
+        job.attempts = MAX_ATTEMPTS
+        job.last_error = "invalid token"
+        db_session.commit()
+        return job
+
+    def test_list_dead_jobs(self, client, db_session, test_org, auth_headers):
+        job = self._dead_job(db_session, test_org)
+
+        resp = client.get("/api/integrations/crm-sync/jobs?status=dead", headers=auth_headers)
+
+        assert resp.status_code == 200
+        assert [j["id"] for j in resp.json()] == [job.id]
+
+    def test_replay_job(self, client, db_session, test_org, auth_headers):
+        job = self._dead_job(db_session, test_org)
+
+        resp = client.post(f"/api/integrations/crm-sync/jobs/{job.id}/replay", headers=auth_headers)
+
+        assert resp.status_code == 200
+        assert resp.json()["status"] == models.CRM_SYNC_PENDING
+        assert resp.json()["attempts"] == 0
+
+    def test_replay_all(self, client, db_session, test_org, auth_headers):
+        self._dead_job(db_session, test_org)
+
+        resp = client.post("/api/integrations/crm-sync/jobs/replay", headers=auth_headers)
+
+        assert resp.json() == {"replayed": 1}
+        assert _jobs(db_session)[0].status == models.CRM_SYNC_PENDING
+
+    def test_replay_unknown_job(self, client, auth_headers):
+        resp = client.post("/api/integrations/crm-sync/jobs/999/replay", headers=auth_headers)
+
+        assert resp.status_code == 404
+
+
+class TestIdempotentUpsert:
+    """Test that a retried HubSpot sync reuses the existing contact."""
+
+    def test_existing_contact_not_recreated(self, monkeypatch):
+        created = []
+
+        async def search(email, organization_id=None):
+            return {"id": "101", "properties": {"email": email}}
+
+        async def create_contact(**kwargs):
+            created.append(kwargs)
+            return {"id": "999"}
+
+        monkeypatch.setattr(hubspot, "search_contact_by_email", search)
+        monkeypatch.setattr(hubspot, "create_contact", create_contact)
+
+        result = asyncio.run(hubspot.create_lead_full(email="jane@example.com", organization_id=1))
+
+        assert result["contact"]["id"] == "101"
+        assert created == []
+
+
+@pytest.fixture
+def hubspot_batch_api(test_engine, monkeypatch):
+    monkeypatch.setattr(company_cache_module, "SessionLocal", sessionmaker(bind=test_engine))
+    company_cache_module.company_cache.clear()
+    requests = []
+    searches = []
+    # Company search pages, served in order; the default finds Acme on one page
+    search_pages = []
+    # Association responses, served in order; the default associates everything
+    associations = []
+
+    def handler(request):
+        path = request.url.path
+        body = json.loads(request.content)
+        requests.append(path)
+        if path.endswith("/associations/contacts/companies/batch/create"):
+            if associations:
+                return associations.pop(0)
+            return httpx.Response(201, json={"results": []})
+        if path.endswith("/contacts/batch/read"):
+            return httpx.Response(207, json={"results": [{"id": "1", "properties": {"email": "old@example.com"}}]})
+        if path.endswith("/contacts/batch/create"):
+            if any(i["properties"]["email"].startswith("bad") for i in body["inputs"]):
+                return httpx.Response(400, json={"message": "Property values were not valid"})
+            return httpx.Response(201, json={"results": [
+                {"id": f"new-{i['properties']['email']}", "properties": i["properties"]} for i in body["inputs"]
+            ]})
+        if path.endswith("/objects/contacts"):
+            if body["properties"]["email"].startswith("bad"):
+                return httpx.Response(400, json={"message": "Invalid email"})
+            return httpx.Response(201, json={"id": f"new-{body['properties']['email']}", "properties": body["properties"]})
+        if path.endswith("/companies/search"):
+            searches.append(body)
+            if search_pages:
+                return httpx.Response(200, json=search_pages.pop(0))
+            return httpx.Response(200, json={"results": [{"id": "co-1", "properties": {"name": "Acme"}}]})
+        if path.endswith("/companies/batch/create"):
+            return httpx.Response(201, json={"results": [
+                {"id": f"co-{i['properties']['name']}", "properties": i["properties"]} for i in body["inputs"]
+            ]})
+        return httpx.Response(404)
+
+    @asynccontextmanager
+    async def client(provider):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+            yield c
+
+    async def token(organization_id):
+        return "token"
+
+    monkeypatch.setattr(hubspot, "crm_clients", SimpleNamespace(client=client))
+    monkeypatch.setattr(hubspot, "_get_org_token", token)
+    crm_rate_limiter.reset()
+    yield SimpleNamespace(requests=requests, searches=searches, search_pages=search_pages, associations=associations)
+    crm_rate_limiter.reset()
+
+
+class TestHubSpotBatch:
+    """Test the batch contact/company/association flow and its per-lead results."""
+
+    def test_batch_flow(self, hubspot_batch_api):
+        leads = [
+            {"email": "old@example.com", "company_name": "Acme"},
+            {"email": "new@example.com", "company_name": "acme"},
+            {"email": "bad@example.com", "company_name": "Acme"},
+            {"email": "solo@example.com", "company_name": "Globex"},
+        ]
+
+        results = asyncio.run(hubspot.create_leads_batch(leads, organization_id=1))
+
+        assert [r["contact"] and r["contact"]["id"] for r in results] == [
+            "1", "new-new@example.com", None, "new-solo@example.com",
+        ]
+        assert [r["error"] for r in results][:2] == [None, None]
+        assert "Invalid email" in results[2]["error"]
+        assert [r["error_status"] for r in results] == [None, None, 400, None]
+        assert [r["company"] and r["company"]["id"] for r in results] == ["co-1", "co-1", None, "co-Globex"]
+        assert [r["associated"] for r in results] == [True, True, False, True]
+        # read, rejected batch, 3 single creates, search, company create, associations
+        assert len(hubspot_batch_api.requests) == 8
+
+    def test_validation_errors_are_permanent(self, hubspot_batch_api):
+        leads = [
+            crm_sync.LeadFields(None, email, "", "", "", "", email, "Site2CRM")
+            for email in ("new@example.com", "bad@example.com")
+        ]
+
+        ok, rejected = asyncio.run(crm_sync._push_batch_to_hubspot(1, leads))
+
+        assert ok == "new-new@example.com"
+        assert rejected.permanent is True
+        assert crm_sync.is_permanent_status(400) and not crm_sync.is_permanent_status(429)
+        assert not crm_sync.is_permanent_status(503) and not crm_sync.is_permanent_status(None)
+
+    def test_company_search_pages_and_lowercases(self, hubspot_batch_api):
+        hubspot_batch_api.search_pages.extend([
+            {
+                "results": [{"id": f"other-{i}", "properties": {"name": "Globex"}} for i in range(100)],
+                "paging": {"next": {"after": "100"}},
+            },
+            {"results": [{"id": "co-7", "properties": {"name": "ACME"}}]},
+        ])
+        leads = [
+            {"email": "old@example.com", "company_name": "Globex"},
+            {"email": "new@example.com", "company_name": "ACME "},
+        ]
+
+        results = asyncio.run(hubspot.create_leads_batch(leads, organization_id=1))
+
+        assert [r["company"]["id"] for r in results] == ["other-0", "co-7"]
+        first, second = hubspot_batch_api.searches
+        assert first["filterGroups"][0]["filters"][0]["values"] == ["globex", "acme"]
+        assert "after" not in first and second["after"] == "100"
+        assert not any(path.endswith("/objects/companies/batch/create") for path in hubspot_batch_api.requests)
+
+    def test_cached_id_not_found_forgotten_and_retried(self, hubspot_batch_api):
+        asyncio.run(company_cache_module.remember_companies(1, "hubspot", {"Acme": "co-gone"}))
+        hubspot_batch_api.associations.append(httpx.Response(207, json={"results": [], "errors": [{
+            "status": "error",
+            "category": "OBJECT_NOT_FOUND",
+            "message": "No company with id co-gone",
+            "context": {"toObjectId": ["co-gone"]},
+        }]}))
+
+        [result] = asyncio.run(hubspot.create_leads_batch(
+            [{"email": "old@example.com", "company_name": "Acme"}], organization_id=1,
+        ))
+
+        assert (result["company"]["id"], result["associated"]) == ("co-1", True)
+        assert asyncio.run(company_cache_module.lookup_company(1, "hubspot", "Acme")) == "co-1"
+
+    def test_cached_id_kept_on_other_failures(self, hubspot_batch_api):
+        asyncio.run(company_cache_module.remember_companies(1, "hubspot", {"Acme": "co-1"}))
+        hubspot_batch_api.associations.append(httpx.Response(207, json={"results": [], "errors": [{
+            "status": "error",
+            "category": "VALIDATION_ERROR",
+            "message": "Association limit reached",
+            "context": {"toObjectId": ["co-1"]},
+        }]}))
+
+        [result] = asyncio.run(hubspot.create_leads_batch(
+            [{"email": "old@example.com", "company_name": "Acme"}], organization_id=1,
+        ))
+
+        assert result["associated"] is False
+        assert not any(path.endswith("/companies/search") for path in hubspot_batch_api.requests)
+        assert asyncio.run(company_cache_module.lookup_company(1, "hubspot", "Acme")) == "co-1"
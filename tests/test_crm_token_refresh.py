@@ -0,0 +1,149 @@
+# tests/test_crm_token_refresh.py
+"""
+Tests for single-flight OAuth token refresh and the 401 retry.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.integrations import credentials, token_manager, zoho
+from app.integrations.credentials import credential_cache
+from app.integrations.token_manager import get_access_token, refresh_access_token
+
+
+@pytest.fixture
+def refreshes(test_engine, monkeypatch):
+    """Point the token manager at the test database and fake the token endpoint."""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    monkeypatch.setattr(credentials, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(token_manager, "SessionLocal", TestingSessionLocal)
+
+    calls = []
+
+    async def fake_refresh(cred):
+        calls.append(cred.refresh_token)
+        await asyncio.sleep(0.01)  # Let concurrent callers pile up on the lock
+        return {"access_token": f"fresh-{len(calls)}", "expires_in": 3600}
+
+    for provider in ("hubspot", "zoho"):
+        monkeypatch.setitem(token_manager.TOKEN_REFRESHERS, provider, fake_refresh)
+    credential_cache.clear()
+    yield calls
+    credential_cache.clear()
+
+
+def _add_oauth_credential(db_session, org, provider="hubspot", **kwargs):
+    cred = models.IntegrationCredential(
+        organization_id=org.id,
+        provider=provider,
+        auth_type="oauth",
+        access_token=kwargs.pop("access_token", "stale"),
+        refresh_token="refresh-1",
+        **kwargs,
+    )
+    db_session.add(cred)
+    db_session.commit()
+    return cred
+
+
+class TestTokenManager:
+    """Test proactive and single-flight refresh."""
+
+    def test_concurrent_callers_share_one_refresh(self, db_session, test_org, refreshes):
+        cred = _add_oauth_credential(db_session, test_org)
+
+        async def scenario():
+            return await asyncio.gather(
+                *(refresh_access_token(test_org.id, "hubspot", stale_token="stale") for _ in range(5))
+            )
+
+        tokens = asyncio.run(scenario())
+
+        assert tokens == ["fresh-1"] * 5
+        assert refreshes == ["refresh-1"]
+        db_session.refresh(cred)
+        assert cred.access_token == "fresh-1"
+        assert cred.expires_at > datetime.utcnow() + timedelta(minutes=50)
+
+    def test_token_refreshed_by_another_worker_is_reused(self, db_session, test_org, refreshes):
+        cred = _add_oauth_credential(db_session, test_org)
+        stale = asyncio.run(credentials.get_credential(test_org.id, "hubspot"))
+        cred.access_token = "other-worker"
+        db_session.commit()
+        # This worker's cache never heard about the other worker's commit
+        credential_cache.set(test_org.id, "hubspot", stale)
+
+        token = asyncio.run(refresh_access_token(test_org.id, "hubspot", stale_token="stale"))
+
+        assert token == "other-worker"
+        assert refreshes == []
+
+    def test_expiring_token_refreshed_proactively(self, db_session, test_org, refreshes):
+        _add_oauth_credential(db_session, test_org, expires_at=datetime.utcnow() + timedelta(seconds=90))
+
+        assert asyncio.run(get_access_token(test_org.id, "hubspot")) == "fresh-1"
+        assert asyncio.run(get_access_token(test_org.id, "hubspot")) == "fresh-1"
+        assert len(refreshes) == 1
+
+    def test_valid_token_not_refreshed(self, db_session, test_org, refreshes):
+        _add_oauth_credential(db_session, test_org, expires_at=datetime.utcnow() + timedelta(hours=1))
+
+        assert asyncio.run(get_access_token(test_org.id, "hubspot")) == "stale"
+        assert refreshes == []
+
+    def test_api_key_credential_not_refreshed(self, db_session, test_org, refreshes):
+        db_session.add(models.IntegrationCredential(
+            organization_id=test_org.id, provider="hubspot", auth_type="pat", access_token="pat-token",
+        ))
+        db_session.commit()
+
+        assert asyncio.run(refresh_access_token(test_org.id, "hubspot")) is None
+        assert refreshes == []
+
+
+class TestUnauthorizedRetry:
+    """Test that a 401 refreshes the token and retries exactly once."""
+
+    @pytest.fixture
+    def zoho_api(self, monkeypatch):
+        seen = []
+        statuses = []
+
+        def handler(request):
+            seen.append(request.headers["Authorization"])
+            status = statuses.pop(0) if statuses else 200
+            return httpx.Response(status, json={"data": []})
+
+        @asynccontextmanager
+        async def client(provider):
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+                yield c
+
+        monkeypatch.setattr(zoho, "crm_clients", SimpleNamespace(client=client))
+        return SimpleNamespace(seen=seen, statuses=statuses)
+
+    def test_retries_with_refreshed_token(self, db_session, test_org, refreshes, zoho_api):
+        _add_oauth_credential(db_session, test_org, provider="zoho")
+        zoho_api.statuses.append(401)
+
+        result = asyncio.run(zoho._request("GET", "/users", test_org.id))
+
+        assert result == {"data": []}
+        assert zoho_api.seen == ["Zoho-oauthtoken stale", "Zoho-oauthtoken fresh-1"]
+        assert len(refreshes) == 1
+
+    def test_only_one_retry(self, db_session, test_org, refreshes, zoho_api):
+        _add_oauth_credential(db_session, test_org, provider="zoho")
+        zoho_api.statuses.extend([401, 401])
+
+        result = asyncio.run(zoho._request("GET", "/users", test_org.id))
+
+        assert result == "unauthorized"
+        assert len(zoho_api.seen) == 2
+        assert len(refreshes) == 1
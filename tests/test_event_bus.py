@@ -0,0 +1,108 @@
+# tests/test_event_bus.py
+"""
+Tests for the in-process domain event bus.
+"""
+import asyncio
+import threading
+
+from app.services.events import EventBus, LeadCreated, LeadUpdated
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestEventBus:
+    """Test publish/subscribe, isolation and metrics."""
+
+    def test_publish_reaches_all_consumers(self):
+        bus = EventBus(concurrency=2)
+        received = []
+
+        @bus.subscribe(LeadCreated, name="sync_consumer")
+        def sync_consumer(event):
+            received.append(("sync", event.lead_id))
+
+        @bus.subscribe(LeadCreated, name="async_consumer")
+        async def async_consumer(event):
+            received.append(("async", event.lead_id))
+
+        async def scenario():
+            await bus.start()
+            bus.publish(LeadCreated(org_id=1, lead_id=42))
+            await bus.stop()
+
+        _run(scenario())
+
+        assert sorted(received) == [("async", 42), ("sync", 42)]
+
+    def test_failing_consumer_does_not_affect_others(self):
+        bus = EventBus(concurrency=2)
+        received = []
+
+        @bus.subscribe(LeadCreated, name="broken")
+        def broken(event):
+            raise RuntimeError("crm down")
+
+        @bus.subscribe(LeadCreated, name="webhooks")
+        def webhooks(event):
+            received.append(event.lead_id)
+
+        async def scenario():
+            await bus.start()
+            bus.publish(LeadCreated(org_id=1, lead_id=7))
+            await bus.stop()
+
+        _run(scenario())
+
+        stats = bus.stats()["consumers"]["lead.created"]
+        assert received == [7]
+        assert stats["broken"]["calls"] == 1
+        assert stats["broken"]["errors"] == 1
+        assert "crm down" in stats["broken"]["last_error"]
+        assert stats["webhooks"]["errors"] == 0
+        # The public summary keeps the counts but not the error text
+        summary = bus.summary()["consumers"]["lead.created"]["broken"]
+        assert summary["errors"] == 1
+        assert "last_error" not in summary
+
+    def test_events_only_reach_their_subscribers(self):
+        bus = EventBus()
+        received = []
+
+        @bus.subscribe(LeadUpdated)
+        def on_update(event):
+            received.append(event.changed_fields)
+
+        async def scenario():
+            await bus.start()
+            bus.publish(LeadCreated(org_id=1, lead_id=1))
+            bus.publish(LeadUpdated(org_id=1, lead_id=1, changed_fields=("status",)))
+            await bus.stop()
+
+        _run(scenario())
+
+        assert received == [("status",)]
+
+    def test_subscribe_is_idempotent_by_name(self):
+        bus = EventBus()
+
+        def handler(event):
+            pass
+
+        bus.subscribe(LeadCreated, name="webhooks")(handler)
+        bus.subscribe(LeadCreated, name="webhooks")(handler)
+
+        assert bus.consumers_for(LeadCreated) == ["webhooks"]
+
+    def test_publish_without_running_bus_dispatches_in_background(self):
+        bus = EventBus()
+        done = threading.Event()
+
+        @bus.subscribe(LeadCreated)
+        def consumer(event):
+            done.set()
+
+        bus.publish(LeadCreated(org_id=1, lead_id=1))
+
+        assert done.wait(timeout=5)
@@ -0,0 +1,177 @@
+# tests/test_llm_router.py
+"""
+Tests for LLM provider hedging and circuit breaking, against local fake
+DeepSeek/Cloudflare servers.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.db import models
+from app.services import ai_chat
+from app.services.llm_router import CIRCUIT_CONSECUTIVE_FAILURES, ProviderRouter
+
+
+class FakeProvider:
+    """Minimal HTTP server answering every POST after `delay` seconds."""
+
+    def __init__(self, body: dict, delay: float = 0.0, status: int = 200):
+        self.body = body
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def _handle(self, reader, writer):
+        try:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            length = next(
+                (int(line.split(b":")[1]) for line in headers.split(b"\r\n") if line.lower().startswith(b"content-length")),
+                0,
+            )
+            await reader.readexactly(length)
+            self.requests += 1
+            await asyncio.sleep(self.delay)
+            payload = json.dumps(self.body).encode()
+            writer.write(
+                f"HTTP/1.1 {self.status} X\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def _deepseek_body(text):
+    return {"choices": [{"message": {"content": text}}], "usage": {"prompt_tokens": 10, "completion_tokens": 3}}
+
+
+def _cloudflare_body(text):
+    return {"success": True, "result": {"response": text, "usage": {"prompt_tokens": 10, "completion_tokens": 3}}}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = ProviderRouter(hedge_min_seconds=0.5, hedge_max_seconds=0.5)
+    monkeypatch.setattr(ai_chat, "llm_router", router)
+    monkeypatch.setattr(ai_chat.settings, "DEEPSEEK_API_KEY", "test-key")
+    monkeypatch.setattr(ai_chat.settings, "CLOUDFLARE_ACCOUNT_ID", "acct")
+    monkeypatch.setattr(ai_chat.settings, "CLOUDFLARE_API_TOKEN", "cf-token")
+    return router
+
+
+def _point_at(monkeypatch, deepseek: FakeProvider, cloudflare: FakeProvider):
+    monkeypatch.setattr(ai_chat, "DEEPSEEK_API_URL", deepseek.url)
+    monkeypatch.setattr(ai_chat, "CLOUDFLARE_API_URL", cloudflare.url + "/{account_id}/{model}")
+
+
+async def _complete():
+    config = models.ChatWidgetConfig(
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs",
+        contact_email="hello@acme.example.com",
+    )
+    return await ai_chat.chat_completion(config, [{"role": "user", "content": "Hi"}])
+
+
+class TestHedging:
+    """Test hedged requests across providers."""
+
+    def test_fast_primary_is_not_hedged(self, router, monkeypatch):
+        async def scenario():
+            async with FakeProvider(_deepseek_body("from deepseek")) as deepseek, \
+                    FakeProvider(_cloudflare_body("from cloudflare")) as cloudflare:
+                _point_at(monkeypatch, deepseek, cloudflare)
+                reply = await _complete()
+                return reply, cloudflare.requests
+
+        (text, _, _), cloudflare_requests = asyncio.run(scenario())
+
+        assert text == "from deepseek"
+        assert cloudflare_requests == 0
+        assert router.stats()["hedges"] == 0
+
+    def test_slow_primary_is_hedged_and_fallback_wins(self, router, monkeypatch):
+        async def scenario():
+            async with FakeProvider(_deepseek_body("from deepseek"), delay=2) as deepseek, \
+                    FakeProvider(_cloudflare_body("from cloudflare")) as cloudflare:
+                _point_at(monkeypatch, deepseek, cloudflare)
+                start = time.perf_counter()
+                reply = await _complete()
+                return reply, time.perf_counter() - start
+
+        (text, _, _), elapsed = asyncio.run(scenario())
+
+        assert text == "from cloudflare"
+        assert elapsed < 1.5
+        assert router.stats()["hedges"] == 1
+        assert router.stats()["hedge_wins"] == 1
+
+    def test_failed_primary_falls_back_without_waiting(self, router, monkeypatch):
+        async def scenario():
+            async with FakeProvider({"error": "boom"}, status=500) as deepseek, \
+                    FakeProvider(_cloudflare_body("from cloudflare")) as cloudflare:
+                _point_at(monkeypatch, deepseek, cloudflare)
+                return await _complete()
+
+        text, _, _ = asyncio.run(scenario())
+
+        assert text == "from cloudflare"
+        assert router.stats()["hedges"] == 0
+        assert router.stats()["providers"]["deepseek"]["failures"] == 1
+
+
+class TestCircuitBreaker:
+    """Test that an unhealthy provider is skipped."""
+
+    def test_failing_provider_circuit_opens(self, router, monkeypatch):
+        async def scenario():
+            async with FakeProvider({"error": "boom"}, status=500) as deepseek, \
+                    FakeProvider(_cloudflare_body("from cloudflare")) as cloudflare:
+                _point_at(monkeypatch, deepseek, cloudflare)
+                for _ in range(CIRCUIT_CONSECUTIVE_FAILURES + 3):
+                    await _complete()
+                return deepseek.requests
+
+        deepseek_requests = asyncio.run(scenario())
+
+        assert deepseek_requests == CIRCUIT_CONSECUTIVE_FAILURES
+        assert router.stats()["providers"]["deepseek"]["circuit"] == "open"
+
+    def test_probe_after_cooldown_closes_circuit(self):
+        router = ProviderRouter(cooldown_seconds=0)
+        health = router.health("deepseek")
+        for _ in range(CIRCUIT_CONSECUTIVE_FAILURES):
+            health.record_failure(100)
+
+        assert router.select(["deepseek", "cloudflare"]) == ["deepseek", "cloudflare"]
+        health.record_success(100)
+
+        assert health.snapshot()["circuit"] == "closed"
+        assert health.snapshot()["error_rate"] == 0.0
+
+    def test_all_circuits_open_still_tries_providers(self):
+        router = ProviderRouter()
+        for name in ("deepseek", "cloudflare"):
+            for _ in range(CIRCUIT_CONSECUTIVE_FAILURES):
+                router.health(name).record_failure(100)
+
+        assert router.select(["deepseek", "cloudflare"]) == ["deepseek", "cloudflare"]
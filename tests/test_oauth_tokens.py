@@ -0,0 +1,82 @@
+# tests/test_oauth_tokens.py
+"""
+Tests for OAuth bearer-token resolution and its cache.
+"""
+from datetime import datetime, timedelta
+
+from app.db import models
+from app.api.routes import oauth as oauth_routes
+
+
+class TestOAuthTokenCache:
+    """Test cached token resolution for Zapier calls."""
+
+    def test_me_resolves_token_and_caches_it(self, client, oauth_headers, test_user):
+        response = client.get("/oauth/me", headers=oauth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["user"]["email"] == test_user.email
+        assert oauth_routes.token_cache.get("zapier-access-token") is not None
+
+    def test_cached_token_still_checks_expiry(self, client, db_session, oauth_headers):
+        client.get("/oauth/me", headers=oauth_headers)
+        oauth_routes.token_cache.set(
+            "zapier-access-token",
+            models.OAuthToken(
+                user_id=1,
+                organization_id=1,
+                scopes="read write",
+                access_token_expires_at=datetime.utcnow() - timedelta(seconds=1),
+            ),
+        )
+
+        response = client.get("/oauth/me", headers=oauth_headers)
+
+        assert response.status_code == 401
+        assert oauth_routes.token_cache.get("zapier-access-token") is None
+
+    def test_refresh_invalidates_previous_access_token(self, client, oauth_headers):
+        assert client.get("/oauth/me", headers=oauth_headers).status_code == 200
+
+        response = client.post("/oauth/token", data={
+            "grant_type": "refresh_token",
+            "refresh_token": "zapier-refresh-token",
+            "client_id": "zapier",
+            "client_secret": "secret",
+        })
+        assert response.status_code == 200
+        new_token = response.json()["access_token"]
+
+        assert client.get("/oauth/me", headers=oauth_headers).status_code == 401
+        assert client.get(
+            "/oauth/me", headers={"Authorization": f"Bearer {new_token}"}
+        ).status_code == 200
+
+    def test_cache_never_stores_raw_tokens(self):
+        cache = oauth_routes.OAuthTokenCache()
+        cache.set("secret-token", models.OAuthToken(
+            user_id=1,
+            organization_id=1,
+            scopes="read",
+            access_token_expires_at=datetime.utcnow() + timedelta(hours=1),
+        ))
+
+        assert "secret-token" not in cache._tokens
+        assert cache.get("secret-token").user_id == 1
+
+    def test_cached_token_for_missing_user_rejected(self, client, oauth_headers):
+        client.get("/oauth/me", headers=oauth_headers)
+        oauth_routes.token_cache.set(
+            "zapier-access-token",
+            models.OAuthToken(
+                user_id=999,
+                organization_id=1,
+                scopes="read write",
+                access_token_expires_at=datetime.utcnow() + timedelta(hours=1),
+            ),
+        )
+
+        response = client.get("/oauth/me", headers=oauth_headers)
+
+        assert response.status_code == 401
+        assert oauth_routes.token_cache.get("zapier-access-token") is None
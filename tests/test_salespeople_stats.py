@@ -0,0 +1,126 @@
+# tests/test_salespeople_stats.py
+"""
+Tests for CRM salesperson stats fan-out.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.integrations import hubspot, salesforce
+from app.integrations import rate_limits
+from app.integrations.rate_limits import FANOUT_CONCURRENCY, ProviderRateLimit, crm_rate_limiter, gather_limited
+
+OWNER_COUNT = 20
+SF_INSTANCE = "https://acme.my.salesforce.com"
+
+
+def _mock_clients(handler):
+    @asynccontextmanager
+    async def client(provider):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+            yield c
+
+    return SimpleNamespace(client=client)
+
+
+@pytest.fixture
+def hubspot_api(monkeypatch):
+    state = SimpleNamespace(in_flight=0, max_in_flight=0)
+
+    async def handler(request):
+        if request.url.path.startswith("/crm/v3/owners"):
+            owners = [{"id": str(i), "email": f"rep{i}@example.com", "firstName": f"Rep{i}"} for i in range(OWNER_COUNT)]
+            return httpx.Response(200, json={"results": owners})
+
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        await asyncio.sleep(0.01)
+        state.in_flight -= 1
+        owner_id = json.loads(request.content)["filterGroups"][0]["filters"][1]["value"]
+        return httpx.Response(200, json={"total": int(owner_id), "results": []})
+
+    async def token(organization_id):
+        return "token"
+
+    monkeypatch.setattr(hubspot, "crm_clients", _mock_clients(handler))
+    monkeypatch.setattr(hubspot, "_get_org_token", token)
+    # Don't wait out the real 5/s search limit
+    monkeypatch.setitem(rate_limits.CRM_RATE_LIMITS, "hubspot-search", ProviderRateLimit(requests=100, per_seconds=1.0))
+    crm_rate_limiter.reset()
+    yield state
+    crm_rate_limiter.reset()
+
+
+class TestOwnerFanOut:
+    """Test that per-owner deal counts run concurrently, in bounded batches."""
+
+    def test_hubspot_deal_counts_concurrent(self, hubspot_api):
+        rows = asyncio.run(hubspot.get_salespeople_stats(days=7, organization_id=1))
+
+        assert [r["new_deals_last_n_days"] for r in rows] == list(range(OWNER_COUNT))
+        assert 1 < hubspot_api.max_in_flight <= FANOUT_CONCURRENCY
+        # Deal searches are throttled by the search bucket, not the general one
+        stats = crm_rate_limiter.stats()
+        assert stats["hubspot-search"]["1"]["requests"] == OWNER_COUNT
+        assert stats["hubspot"]["1"]["requests"] == 1
+
+    def test_gather_limited_keeps_order(self):
+        async def value(i):
+            await asyncio.sleep(0.001 * (5 - i))
+            return i
+
+        assert asyncio.run(gather_limited((value(i) for i in range(5)), limit=2)) == [0, 1, 2, 3, 4]
+
+
+@pytest.fixture
+def salesforce_api(monkeypatch):
+    state = SimpleNamespace(in_flight=0, max_in_flight=0, requests=[])
+
+    async def handler(request):
+        state.requests.append(request.url.path)
+        if request.url.path.endswith("/query/01g-2000"):
+            return httpx.Response(200, json={"done": True, "records": [{"Id": "005B", "Name": "Bea", "Email": "bea@example.com"}]})
+
+        soql = request.url.params["q"]
+        if soql.startswith("SELECT Id, Name, Email FROM User"):
+            return httpx.Response(200, json={
+                "done": False,
+                "nextRecordsUrl": f"/services/data/v{salesforce.API_VERSION}/query/01g-2000",
+                "records": [{"Id": "005A", "Name": "Al", "Email": "al@example.com"}],
+            })
+
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        await asyncio.sleep(0.01)
+        state.in_flight -= 1
+        return httpx.Response(200, json={"done": True, "records": [
+            {"OwnerId": "005A", "expr0": 2},
+            {"OwnerId": "005B", "expr0": 1},
+        ]})
+
+    async def credential(org_id):
+        return "token", SF_INSTANCE
+
+    monkeypatch.setattr(salesforce, "crm_clients", _mock_clients(handler))
+    monkeypatch.setattr(salesforce, "_get_active_sf_credential", credential)
+    crm_rate_limiter.reset()
+    yield state
+    crm_rate_limiter.reset()
+
+
+class TestSalesforceStats:
+    """Test concurrent SOQL aggregates and result pagination."""
+
+    def test_aggregates_concurrent_and_users_paginated(self, salesforce_api):
+        rows = asyncio.run(salesforce.get_salespeople_stats(db=None, org_id=1, days=7))
+
+        assert salesforce_api.max_in_flight == 4
+        assert len(salesforce_api.requests) == 6  # 4 aggregates, User query and its second batch
+        assert [(r["owner_name"], r["owner_email"], r["new_deals_last_n_days"]) for r in rows] == [
+            ("Al", "al@example.com", 2),
+            ("Bea", "bea@example.com", 1),
+        ]
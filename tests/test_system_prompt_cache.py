@@ -0,0 +1,119 @@
+# tests/test_system_prompt_cache.py
+"""
+Tests for the compiled chat widget system prompt cache.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import models
+from app.services import ai_chat
+from app.services.ai_chat import build_system_prompt, invalidate_system_prompts, system_prompt_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_prompt_cache():
+    system_prompt_cache.clear()
+    yield
+    system_prompt_cache.clear()
+
+
+@pytest.fixture
+def widget_config(db_session, test_org) -> models.ChatWidgetConfig:
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_prompt_cache_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs",
+        contact_email="hello@acme.example.com",
+    )
+    db_session.add(config)
+    db_session.commit()
+    return config
+
+
+class TestSystemPromptCache:
+    """Test reuse and invalidation of compiled prompts."""
+
+    def test_same_version_and_stage_compiles_once(self, widget_config, monkeypatch):
+        calls = []
+        original = ai_chat._build_static_prompt
+
+        def counting(config, stage):
+            calls.append(stage)
+            return original(config, stage)
+
+        monkeypatch.setattr(ai_chat, "_build_static_prompt", counting)
+
+        first = build_system_prompt(widget_config, turn_count=1)
+        second = build_system_prompt(widget_config, turn_count=2)
+
+        assert first == second
+        assert calls == ["early"]
+
+    def test_stages_are_cached_separately(self, widget_config):
+        early = build_system_prompt(widget_config, turn_count=1)
+        late = build_system_prompt(widget_config, turn_count=8)
+
+        assert early != late
+        assert len(system_prompt_cache) == 2
+
+    def test_config_edit_misses_cache(self, widget_config, db_session):
+        before = build_system_prompt(widget_config)
+
+        widget_config.business_name = "Acme Heating"
+        widget_config.updated_at = (widget_config.updated_at or datetime.utcnow()) + timedelta(seconds=1)
+        db_session.commit()
+        after = build_system_prompt(widget_config)
+
+        assert "Acme Plumbing" in before
+        assert "Acme Heating" in after
+
+    def test_time_context_is_appended_after_cached_prefix(self, widget_config):
+        plain = build_system_prompt(widget_config)
+        with_time = build_system_prompt(widget_config, timezone="America/New_York")
+
+        assert with_time.startswith(plain)
+        assert "CURRENT TIME" in with_time[len(plain):]
+
+    def test_invalidate_clears_cache(self, widget_config):
+        build_system_prompt(widget_config)
+        assert len(system_prompt_cache) == 1
+
+        invalidate_system_prompts()
+
+        assert len(system_prompt_cache) == 0
+
+    def test_invalidate_is_per_org(self, widget_config):
+        build_system_prompt(widget_config)
+
+        invalidate_system_prompts(widget_config.organization_id + 1)
+        assert len(system_prompt_cache) == 1
+
+        invalidate_system_prompts(widget_config.organization_id)
+        assert len(system_prompt_cache) == 0
+
+    def test_meeting_type_edit_misses_cache_without_invalidation(self, widget_config, db_session):
+        # Another worker process edits the booking page: no local invalidation
+        booking = models.BookingConfig(
+            organization_id=widget_config.organization_id, booking_key="bk_acme", slug="acme", business_name="Acme Plumbing",
+        )
+        db_session.add(booking)
+        db_session.flush()
+        meeting = models.MeetingType(
+            booking_config_id=booking.id, name="Site visit", slug="site-visit", duration_minutes=30,
+        )
+        db_session.add(meeting)
+        widget_config.booking_enabled = True
+        widget_config.booking_config_id = booking.id
+        db_session.commit()
+        before = build_system_prompt(widget_config)
+
+        meeting.name = "Free estimate"
+        db_session.commit()
+        db_session.refresh(booking)
+        after = build_system_prompt(widget_config)
+
+        assert "Site visit" in before
+        assert "Free estimate" in after
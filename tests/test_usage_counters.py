@@ -0,0 +1,162 @@
+# tests/test_usage_counters.py
+"""
+Tests for monthly usage counters and the plan checks that read them.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import models
+from app.api.routes import booking_public as booking_public_routes
+from app.api.routes import chat as chat_routes
+from app.api.routes import chat_widget as chat_widget_routes
+from app.crud import lead as lead_crud
+from app.services.usage import (
+    current_period,
+    decrement_usage,
+    get_org_usage,
+    get_usage,
+    increment_usage,
+    next_period_start,
+)
+
+
+class TestIncrementUsage:
+    """Test the atomic counter upsert."""
+
+    def test_first_increment_creates_row(self, db_session, test_org):
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS) == 0
+
+        assert increment_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS) == 1
+        assert increment_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS) == 2
+
+        rows = db_session.query(models.UsageCounter).all()
+        assert len(rows) == 1
+        assert rows[0].period == current_period()
+        assert rows[0].count == 2
+
+    def test_limit_stops_at_boundary(self, db_session, test_org):
+        metric = models.USAGE_METRIC_AI_MESSAGES
+        results = [increment_usage(db_session, test_org.id, metric, limit=2) for _ in range(3)]
+
+        assert results == [1, 2, None]
+        assert get_usage(db_session, test_org.id, metric) == 2
+
+    def test_metrics_counted_separately(self, db_session, test_org):
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_BOOKINGS)
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_CHAT_CONVERSATIONS, amount=3)
+
+        usage = get_org_usage(db_session, test_org.id)
+
+        assert usage[models.USAGE_METRIC_BOOKINGS] == 1
+        assert usage[models.USAGE_METRIC_CHAT_CONVERSATIONS] == 3
+        assert usage[models.USAGE_METRIC_LEADS] == 0
+
+    def test_previous_month_not_counted(self, db_session, test_org):
+        db_session.add(models.UsageCounter(
+            organization_id=test_org.id,
+            metric=models.USAGE_METRIC_LEADS,
+            period=date(2000, 1, 1),
+            count=99,
+        ))
+        db_session.commit()
+
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS) == 0
+
+    def test_decrement_never_below_zero(self, db_session, test_org):
+        metric = models.USAGE_METRIC_AI_MESSAGES
+        increment_usage(db_session, test_org.id, metric)
+
+        decrement_usage(db_session, test_org.id, metric)
+        decrement_usage(db_session, test_org.id, metric)
+
+        assert get_usage(db_session, test_org.id, metric) == 0
+
+    def test_next_period_start_rolls_year(self):
+        assert next_period_start(datetime(2026, 12, 15)) == datetime(2027, 1, 1)
+        assert next_period_start(datetime(2026, 3, 1)) == datetime(2026, 4, 1)
+
+
+class TestPlanChecks:
+    """Test that plan enforcement reads the counters."""
+
+    def test_lead_limit(self, db_session, test_org):
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS, amount=100)
+
+        allowed, current, limit, _ = lead_crud.check_lead_limit(db_session, test_org.id)
+
+        assert (allowed, current, limit) == (False, 100, 100)
+
+    def test_lead_increment(self, db_session, test_org):
+        lead_crud.increment_lead_count(db_session, test_org.id)
+
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_LEADS) == 1
+
+    def test_ai_quota(self, db_session, test_org):
+        test_org.plan = "starter"  # 50 AI messages
+        db_session.commit()
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES, amount=49)
+
+        chat_routes.check_and_increment_usage(db_session, test_org)
+        with pytest.raises(HTTPException) as exc:
+            chat_routes.check_and_increment_usage(db_session, test_org)
+
+        assert exc.value.status_code == 429
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_AI_MESSAGES) == 50
+
+    def test_conversation_limit(self, db_session, test_org):
+        config = models.ChatWidgetConfig(
+            organization_id=test_org.id,
+            widget_key="cw_usage_test",
+            business_name="Acme",
+            business_description="Plumbing",
+            services="Repairs",
+            contact_email="hello@acme.example.com",
+        )
+        db_session.add(config)
+        db_session.commit()
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_CHAT_CONVERSATIONS, amount=30)
+
+        with pytest.raises(HTTPException) as exc:
+            chat_widget_routes.enforce_conversation_limits(db_session, config, None, "hi", plan="free")
+
+        assert exc.value.status_code == 429
+
+    def test_conversation_reserved_atomically(self, db_session, test_org):
+        # free plan: 30 conversations a month
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_CHAT_CONVERSATIONS, amount=29)
+
+        chat_widget_routes.reserve_conversation(db_session, test_org.id, "free")
+        with pytest.raises(HTTPException) as exc:
+            chat_widget_routes.reserve_conversation(db_session, test_org.id, "free")
+
+        assert exc.value.status_code == 429
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_CHAT_CONVERSATIONS) == 30
+
+    def test_booking_rejected_when_slot_taken_after_check(self, app, client, db_session, test_org, monkeypatch):
+        app.dependency_overrides[booking_public_routes.get_db] = lambda: db_session
+        booking_config = models.BookingConfig(
+            organization_id=test_org.id, booking_key="bk_usage_test", slug="acme", business_name="Acme",
+            min_notice_hours=0,
+        )
+        db_session.add(booking_config)
+        db_session.flush()
+        db_session.add(models.MeetingType(
+            booking_config_id=booking_config.id, name="Estimate", slug="estimate", duration_minutes=30,
+        ))
+        db_session.commit()
+        # free plan: 5 bookings a month, all taken between the fast check and the reservation
+        increment_usage(db_session, test_org.id, models.USAGE_METRIC_BOOKINGS, amount=5)
+        monkeypatch.setattr(booking_public_routes, "get_usage", lambda *args: 0)
+
+        resp = client.post("/api/public/book/acme/estimate", json={
+            "guest_name": "Pat Guest",
+            "guest_email": "pat@example.com",
+            "scheduled_at": (datetime.utcnow() + timedelta(days=2)).isoformat(),
+            "timezone": "UTC",
+        })
+
+        assert resp.status_code == 403
+        assert db_session.query(models.Booking).count() == 0
+        assert get_usage(db_session, test_org.id, models.USAGE_METRIC_BOOKINGS) == 5
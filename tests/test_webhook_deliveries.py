@@ -0,0 +1,127 @@
+# tests/test_webhook_deliveries.py
+"""
+Tests for webhook delivery log storage, retention and pagination.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import models
+from app.services import webhook_service
+
+
+@pytest.fixture
+def test_webhook(db_session, test_org) -> models.Webhook:
+    webhook = models.Webhook(
+        organization_id=test_org.id,
+        url="https://hooks.example.com/lead",
+        event=models.WEBHOOK_EVENT_LEAD_CREATED,
+    )
+    db_session.add(webhook)
+    db_session.commit()
+    return webhook
+
+
+def _add_delivery(db_session, webhook, delivered_at, is_success=True, payload=None):
+    delivery = models.WebhookDelivery(
+        webhook_id=webhook.id,
+        event=webhook.event,
+        delivered_at=delivered_at,
+        is_success=is_success,
+        **webhook_service.encode_delivery_payload(json.dumps(payload or {"n": 1})),
+    )
+    db_session.add(delivery)
+    return delivery
+
+
+class TestPayloadEncoding:
+    """Test compressed payload storage."""
+
+    def test_large_payload_is_compressed(self, db_session, test_webhook):
+        payload = {"notes": "x" * 2000}
+        delivery = _add_delivery(db_session, test_webhook, datetime.utcnow(), payload=payload)
+        db_session.commit()
+
+        assert delivery.payload is None
+        assert len(delivery.payload_compressed) < 2000
+        assert json.loads(webhook_service.decode_delivery_payload(delivery)) == payload
+
+    def test_small_payload_is_plain_text(self, db_session, test_webhook):
+        delivery = _add_delivery(db_session, test_webhook, datetime.utcnow())
+        db_session.commit()
+
+        assert delivery.payload_compressed is None
+        assert webhook_service.decode_delivery_payload(delivery) == '{"n": 1}'
+
+
+class TestDeliveryRetention:
+    """Test per-plan retention of delivery logs."""
+
+    def test_prunes_old_deliveries_but_keeps_recent_failures(self, db_session, test_org, test_webhook):
+        now = datetime.utcnow()
+        old = now - timedelta(days=30)  # Free plan keeps 7 days
+
+        for i in range(5):
+            _add_delivery(db_session, test_webhook, old + timedelta(minutes=i))
+        old_failure = _add_delivery(db_session, test_webhook, old, is_success=False)
+        recent = _add_delivery(db_session, test_webhook, now - timedelta(days=1))
+        db_session.commit()
+
+        result = webhook_service.prune_webhook_deliveries(db_session, now=now)
+
+        remaining = {d.id for d in db_session.query(models.WebhookDelivery).all()}
+        assert result["deleted"] == 5
+        assert remaining == {old_failure.id, recent.id}
+
+
+class TestDeliveryPagination:
+    """Test keyset pagination of the delivery log endpoint."""
+
+    def test_cursor_walks_all_pages(self, app, client, db_session, auth_headers, test_webhook):
+        from app.api.routes import auth as auth_routes
+        from app.api.routes import webhooks as webhooks_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+        app.dependency_overrides[webhooks_routes.get_db] = lambda: db_session
+
+        start = datetime.utcnow() - timedelta(hours=1)
+        for i in range(5):
+            _add_delivery(db_session, test_webhook, start + timedelta(minutes=i))
+        db_session.commit()
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(
+                f"/api/webhooks/{test_webhook.id}/deliveries",
+                headers=auth_headers,
+                params=params,
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 5
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == 5
+        assert seen == sorted(seen, reverse=True)
+
+    def test_invalid_cursor_rejected(self, app, client, db_session, auth_headers, test_webhook):
+        from app.api.routes import auth as auth_routes
+        from app.api.routes import webhooks as webhooks_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+        app.dependency_overrides[webhooks_routes.get_db] = lambda: db_session
+
+        response = client.get(
+            f"/api/webhooks/{test_webhook.id}/deliveries",
+            headers=auth_headers,
+            params={"cursor": "not-a-cursor"},
+        )
+        assert response.status_code == 400
@@ -0,0 +1,107 @@
+# tests/test_webhook_subscriptions.py
+"""
+Tests for the in-memory webhook subscription index.
+"""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.services import webhook_service
+
+
+@pytest.fixture
+def subscription_index(test_engine):
+    """Fresh subscription index reading from the test database."""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    index = webhook_service.WebhookSubscriptionIndex()
+    with patch.object(webhook_service, "SessionLocal", TestingSessionLocal), \
+         patch.object(webhook_service, "subscription_index", index):
+        yield index
+
+
+def _add_webhook(db_session, org, event=models.WEBHOOK_EVENT_LEAD_CREATED, is_active=True):
+    webhook = models.Webhook(
+        organization_id=org.id,
+        url=f"https://hooks.example.com/{event}",
+        event=event,
+        is_active=is_active,
+    )
+    db_session.add(webhook)
+    db_session.commit()
+    return webhook
+
+
+class TestWebhookSubscriptionIndex:
+    """Test lazy loading and invalidation of the subscription index."""
+
+    def test_no_subscribers_is_cached(self, subscription_index, test_org):
+        """Second lookup for an org without webhooks should not hit the DB."""
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED) == ()
+
+        with patch.object(subscription_index, "_load") as mock_load:
+            assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_UPDATED) == ()
+            mock_load.assert_not_called()
+
+    def test_returns_active_webhooks_by_event(self, subscription_index, db_session, test_org):
+        """Only active webhooks for the requested event should be returned."""
+        created = _add_webhook(db_session, test_org)
+        _add_webhook(db_session, test_org, event=models.WEBHOOK_EVENT_LEAD_UPDATED, is_active=False)
+
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED) == (created.id,)
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_UPDATED) == ()
+
+    def test_invalidate_reloads_org(self, subscription_index, db_session, test_org):
+        """A version bump should make the next lookup see new webhooks."""
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED) == ()
+
+        created = _add_webhook(db_session, test_org)
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED) == ()
+
+        subscription_index.invalidate(test_org.id)
+        assert subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED) == (created.id,)
+
+    def test_fire_skips_db_for_orgs_without_webhooks(self, subscription_index, test_org):
+        """Firing an event with no subscribers should not open a session."""
+        subscription_index.get(test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED)
+
+        with patch.object(webhook_service, "SessionLocal") as mock_session:
+            webhook_service.fire_webhooks_for_event(
+                test_org.id, models.WEBHOOK_EVENT_LEAD_CREATED, {"lead_id": 1}
+            )
+            mock_session.assert_not_called()
+
+
+class TestWebhookRoutesInvalidate:
+    """Test that webhook management routes invalidate the index."""
+
+    def test_create_and_toggle_invalidate(self, app, client, db_session, auth_headers, test_user):
+        from app.api.routes import auth as auth_routes
+        from app.api.routes import webhooks as webhooks_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+        app.dependency_overrides[webhooks_routes.get_db] = lambda: db_session
+
+        with patch("app.api.routes.webhooks.invalidate_webhook_subscriptions") as mock_invalidate:
+            response = client.post(
+                "/api/webhooks",
+                headers=auth_headers,
+                json={"url": "https://hooks.example.com/new", "event": models.WEBHOOK_EVENT_LEAD_CREATED},
+            )
+            assert response.status_code == 201
+            webhook_id = response.json()["id"]
+
+            response = client.patch(
+                f"/api/webhooks/{webhook_id}",
+                headers=auth_headers,
+                json={"is_active": False},
+            )
+            assert response.status_code == 200
+            assert response.json()["is_active"] is False
+
+            response = client.delete(f"/api/webhooks/{webhook_id}", headers=auth_headers)
+            assert response.status_code == 204
+
+        assert mock_invalidate.call_count == 3
+        mock_invalidate.assert_called_with(test_user.organization_id)
@@ -0,0 +1,137 @@
+# tests/test_widget_snapshot.py
+"""
+Tests for the chat widget configuration snapshot cache.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.db import models
+from app.api.routes import chat_widget as chat_widget_routes
+from app.services.widget_snapshot import get_widget_snapshot, widget_snapshots
+
+
+@pytest.fixture
+def chat_widget(db_session, test_org) -> models.ChatWidgetConfig:
+    test_org.plan = "pro"
+    booking_config = models.BookingConfig(
+        organization_id=test_org.id,
+        booking_key="bk_snapshot_test",
+        slug="acme-plumbing",
+        business_name="Acme Plumbing",
+    )
+    db_session.add(booking_config)
+    db_session.flush()
+    db_session.add_all([
+        models.MeetingType(booking_config_id=booking_config.id, name="Estimate", slug="estimate", duration_minutes=30),
+        models.MeetingType(
+            booking_config_id=booking_config.id, name="Old", slug="old", duration_minutes=15, is_active=False
+        ),
+    ])
+    config = models.ChatWidgetConfig(
+        organization_id=test_org.id,
+        widget_key="cw_snapshot_test",
+        business_name="Acme Plumbing",
+        business_description="Residential plumbing",
+        services="Repairs",
+        contact_email="hello@acme.example.com",
+        booking_enabled=True,
+        booking_config_id=booking_config.id,
+    )
+    db_session.add(config)
+    db_session.commit()
+    widget_snapshots.invalidate()
+    yield config
+    widget_snapshots.invalidate()
+
+
+@pytest.fixture
+def config_queries(db_session):
+    """Record SQL statements that read configuration tables."""
+    statements = []
+    engine = db_session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and any(
+            table in statement for table in ("chat_widget_configs", "booking_configs", "meeting_types", "organizations")
+        ):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class TestWidgetSnapshot:
+    """Test snapshot contents, reuse and invalidation."""
+
+    def test_snapshot_has_plan_and_active_meeting_types(self, db_session, chat_widget):
+        snapshot = get_widget_snapshot(db_session, chat_widget.widget_key)
+
+        assert snapshot.plan == "pro"
+        assert [mt.name for mt in snapshot.booking_config.meeting_types] == ["Estimate"]
+
+    def test_second_lookup_does_not_query(self, db_session, chat_widget, config_queries):
+        first = get_widget_snapshot(db_session, chat_widget.widget_key)
+        queries_after_first = len(config_queries)
+        second = get_widget_snapshot(db_session, chat_widget.widget_key)
+
+        assert second is first
+        assert queries_after_first > 0
+        assert len(config_queries) == queries_after_first
+
+    def test_unknown_widget_is_not_cached(self, db_session, chat_widget):
+        assert get_widget_snapshot(db_session, "cw_missing") is None
+        assert len(widget_snapshots) == 0
+
+    def test_plan_change_invalidates_org(self, db_session, chat_widget, test_org):
+        get_widget_snapshot(db_session, chat_widget.widget_key)
+
+        test_org.plan = "free"
+        db_session.commit()
+
+        assert len(widget_snapshots) == 0
+        assert get_widget_snapshot(db_session, chat_widget.widget_key).plan == "free"
+
+
+class TestChatTurnUsesSnapshot:
+    """Test that later turns don't re-read configuration."""
+
+    def test_later_turns_skip_config_queries(self, client, chat_widget, config_queries, monkeypatch):
+        async def completion(config, messages, max_tokens=256, timezone=None, **kwargs):
+            return "reply", 10, 5
+
+        monkeypatch.setattr(chat_widget_routes, "chat_completion", completion)
+        widget_key = chat_widget.widget_key
+
+        def send(message):
+            return client.post(
+                "/api/public/chat-widget/message",
+                params={"widget_key": widget_key},
+                json={"session_id": "session-snapshot-1", "message": message},
+            )
+
+        assert send("Hello").status_code == 200
+        config_queries.clear()
+        assert send("Do you fix leaks?").status_code == 200
+
+        assert config_queries == []
+
+    def test_widget_update_invalidates(self, client, db_session, chat_widget, auth_headers, app):
+        from app.api.routes import auth as auth_routes
+
+        app.dependency_overrides[auth_routes.get_db] = lambda: db_session
+        get_widget_snapshot(db_session, chat_widget.widget_key)
+
+        response = client.put(
+            f"/api/chat-widget/config/{chat_widget.widget_key}",
+            headers=auth_headers,
+            json={
+                "business_name": "Acme Heating",
+                "business_description": "Residential heating",
+                "services": "Repairs",
+                "contact_email": "hello@acme.example.com",
+            },
+        )
+
+        assert response.status_code == 200
+        assert get_widget_snapshot(db_session, chat_widget.widget_key).business_name == "Acme Heating"
@@ -0,0 +1,94 @@
+# tests/test_zapier_triggers.py
+"""
+Tests for Zapier polling trigger endpoints.
+"""
+from datetime import datetime, timedelta
+
+from app.db import models
+
+
+def _add_leads(db_session, org, count, start):
+    leads = []
+    for i in range(count):
+        lead = models.Lead(
+            organization_id=org.id,
+            name=f"Lead {i}",
+            email=f"lead{i}@example.com",
+            created_at=start + timedelta(minutes=i),
+            updated_at=start + timedelta(minutes=i),
+        )
+        db_session.add(lead)
+        leads.append(lead)
+    db_session.commit()
+    return leads
+
+
+class TestNewLeadsTrigger:
+    """Test the new-leads polling trigger."""
+
+    def test_requires_oauth_token(self, client):
+        response = client.get("/api/zapier/triggers/new-leads")
+        assert response.status_code == 401
+
+    def test_returns_newest_first_without_cursor(self, client, db_session, test_org, oauth_headers):
+        leads = _add_leads(db_session, test_org, 3, datetime.utcnow() - timedelta(hours=1))
+
+        response = client.get("/api/zapier/triggers/new-leads", headers=oauth_headers)
+
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == [l.id for l in reversed(leads)]
+
+    def test_cursor_returns_only_newer_leads(self, client, db_session, test_org, oauth_headers):
+        leads = _add_leads(db_session, test_org, 5, datetime.utcnow() - timedelta(hours=1))
+
+        first = client.get(
+            "/api/zapier/triggers/new-leads", headers=oauth_headers, params={"limit": 1}
+        ).json()
+        oldest_cursor = client.get("/api/zapier/triggers/new-leads", headers=oauth_headers).json()[-1]["cursor"]
+
+        response = client.get(
+            "/api/zapier/triggers/new-leads",
+            headers=oauth_headers,
+            params={"cursor": oldest_cursor, "limit": 2},
+        )
+
+        assert first[0]["id"] == leads[-1].id
+        assert [item["id"] for item in response.json()] == [leads[1].id, leads[2].id]
+
+    def test_invalid_cursor_rejected(self, client, oauth_headers):
+        response = client.get(
+            "/api/zapier/triggers/new-leads", headers=oauth_headers, params={"cursor": "bogus"}
+        )
+        assert response.status_code == 400
+
+
+class TestUpdatedLeadsTrigger:
+    """Test the updated-leads polling trigger."""
+
+    def test_id_changes_with_each_update(self, client, db_session, test_org, oauth_headers):
+        lead = _add_leads(db_session, test_org, 1, datetime.utcnow() - timedelta(hours=1))[0]
+
+        before = client.get("/api/zapier/triggers/updated-leads", headers=oauth_headers).json()
+        lead.updated_at = datetime.utcnow()
+        db_session.commit()
+        after = client.get(
+            "/api/zapier/triggers/updated-leads",
+            headers=oauth_headers,
+            params={"cursor": before[0]["cursor"]},
+        ).json()
+
+        assert len(after) == 1
+        assert after[0]["lead_id"] == lead.id
+        assert after[0]["id"] != before[0]["id"]
+
+    def test_legacy_leads_without_updated_at_skipped(self, client, db_session, test_org, oauth_headers):
+        legacy, lead = _add_leads(db_session, test_org, 2, datetime.utcnow() - timedelta(hours=1))
+        db_session.execute(
+            models.Lead.__table__.update().where(models.Lead.id == legacy.id).values(updated_at=None)
+        )
+        db_session.commit()
+
+        response = client.get("/api/zapier/triggers/updated-leads", headers=oauth_headers)
+
+        assert response.status_code == 200
+        assert [item["lead_id"] for item in response.json()] == [lead.id]
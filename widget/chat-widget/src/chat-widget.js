@@ -1196,20 +1196,24 @@
     }
   }
 
-  function addMessage(role, content) {
-    messages.push({ role: role, content: content });
-
+  function appendMessageElement(role) {
     var msgEl = document.createElement("div");
     msgEl.className = "s2c-message " + role;
     msgEl.setAttribute("role", "listitem");
+    messagesContainer.appendChild(msgEl);
+    return msgEl;
+  }
 
+  function addMessage(role, content) {
+    messages.push({ role: role, content: content });
+
+    var msgEl = appendMessageElement(role);
     if (role === "assistant") {
       msgEl.innerHTML = formatMessageWithLinks(content);
     } else {
       msgEl.textContent = content;
     }
 
-    messagesContainer.appendChild(msgEl);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
   }
 
@@ -1318,6 +1322,72 @@
     if (typingEl) typingEl.remove();
   }
 
+  function postChat(path, reqBody, signal) {
+    return fetch(API_BASE + path + "?widget_key=" + widgetKey, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(reqBody),
+      signal: signal,
+    });
+  }
+
+  // Render a /message/stream reply as its tokens arrive; resolves with the
+  // "done" event body, which matches the JSON /message response
+  async function readReplyStream(res, onFirstToken) {
+    var reader = res.body.getReader();
+    var decoder = new TextDecoder();
+    var buffer = "";
+    var text = "";
+    var msgEl = null;
+    var result = null;
+
+    while (true) {
+      var chunk = await reader.read();
+      if (chunk.done) break;
+      buffer += decoder.decode(chunk.value, { stream: true });
+
+      var events = buffer.split("\n\n");
+      buffer = events.pop();
+      for (var i = 0; i < events.length; i++) {
+        var eventName = "message";
+        var payload = "";
+        var lines = events[i].split("\n");
+        for (var j = 0; j < lines.length; j++) {
+          if (lines[j].indexOf("event: ") === 0) eventName = lines[j].slice(7);
+          else if (lines[j].indexOf("data: ") === 0) payload += lines[j].slice(6);
+        }
+        if (!payload) continue;
+        var data = JSON.parse(payload);
+
+        if (eventName === "token") {
+          if (!msgEl) {
+            onFirstToken();
+            msgEl = appendMessageElement("assistant");
+          }
+          text += data.text;
+          msgEl.textContent = text;
+          messagesContainer.scrollTop = messagesContainer.scrollHeight;
+        } else if (eventName === "done") {
+          result = data;
+        } else if (eventName === "error") {
+          throw new Error(data.detail || "Stream error");
+        }
+      }
+    }
+
+    if (!result) throw new Error("Stream ended before the reply finished");
+
+    // Swap the plain streamed text for the formatted reply (links as buttons)
+    if (!msgEl) {
+      onFirstToken();
+      msgEl = appendMessageElement("assistant");
+    }
+    messages.push({ role: "assistant", content: result.response });
+    msgEl.innerHTML = formatMessageWithLinks(result.response);
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    return result;
+  }
+
   async function sendMessage() {
     var message = inputField.value.trim();
     if (!message || isLoading) return;
@@ -1356,25 +1426,35 @@
         reqBody.timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
       }
 
-      var res = await fetch(
-        API_BASE + "/message?widget_key=" + widgetKey,
-        {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify(reqBody),
-          signal: controller.signal,
-        }
-      );
+      // Stream the reply where the browser can read response bodies
+      // incrementally; otherwise (or if the server has no stream endpoint)
+      // fall back to the plain JSON endpoint
+      var data = null;
+      var res = null;
+      if (window.ReadableStream && window.TextDecoder) {
+        res = await postChat("/message/stream", reqBody, controller.signal);
+        if (res.status === 404 || res.status === 405) res = null;
+      }
 
-      clearTimeout(timeoutId);
-      hideTyping();
+      if (res && res.ok && res.body) {
+        // The timeout only covers waiting for the first token
+        data = await readReplyStream(res, function () {
+          clearTimeout(timeoutId);
+          hideTyping();
+        });
+      } else {
+        if (!res) res = await postChat("/message", reqBody, controller.signal);
 
-      if (!res.ok) {
-        throw new Error("API error");
-      }
+        clearTimeout(timeoutId);
+        hideTyping();
+
+        if (!res.ok) {
+          throw new Error("API error");
+        }
 
-      var data = await res.json();
-      addMessage("assistant", data.response);
+        data = await res.json();
+        addMessage("assistant", data.response);
+      }
 
       if (data.lead_captured) {
         console.log(